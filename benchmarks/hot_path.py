@@ -0,0 +1,213 @@
+"""
+Offline benchmarks for the URL/title hot path.
+
+Runs every hot-path function over the checked-in corpus in `benchmarks/corpus`,
+reports throughput and allocations per call, and compares the results against
+a JSON baseline. The process exits non-zero when any benchmark regresses by more
+than the configured threshold.
+
+Usage:
+    python -m benchmarks.hot_path                   # run and compare against the baseline
+    python -m benchmarks.hot_path --save-baseline   # run and record a new baseline
+    python -m benchmarks.hot_path -k extract_title  # only run matching benchmarks
+"""
+import argparse
+import inspect
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, List, NamedTuple
+
+from bot.cogs.snip_cog import SnipCog
+from bot.util import (
+    validate_and_normalize_url,
+    get_domain_from_url,
+    remove_website_title,
+    extract_youtube_video_id,
+    extract_title_from_html,
+)
+from services.title_normalizer import TitleNormalizer
+
+CORPUS_DIR = Path(__file__).parent / "corpus"
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+
+# Large pages are generated from the checked-in news sample rather than stored,
+# so the repository stays small while still covering multi-MB documents.
+PADDED_PAGE_SIZES = {"1mb": 1 << 20, "4mb": 4 << 20}
+
+
+class Benchmark(NamedTuple):
+    name: str
+    func: Callable
+    inputs: List[tuple]
+
+
+def load_urls() -> List[str]:
+    lines = (CORPUS_DIR / "urls.txt").read_text(encoding="utf-8").splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.startswith("#")]
+
+
+def load_html_samples() -> dict:
+    samples = {path.stem: path.read_bytes() for path in sorted((CORPUS_DIR / "html").glob("*.html"))}
+
+    news = samples["news"]
+    body_end = news.rindex(b"</body>")
+    filler = b"<p>" + b"Archived comment thread entry with a permalink and a timestamp. " * 16 + b"</p>\n"
+    for label, size in PADDED_PAGE_SIZES.items():
+        repeats = max(0, (size - len(news)) // len(filler) + 1)
+        samples[f"news-{label}"] = news[:body_end] + filler * repeats + news[body_end:]
+
+    return samples
+
+
+def build_benchmarks() -> List[Benchmark]:
+    urls = load_urls()
+    normalized = [url for url in map(validate_and_normalize_url, urls) if url]
+    titles = [
+        ("Article Title - example.com", "https://example.com/article"),
+        ("Popular git config options | jvns.ca", "https://jvns.ca/blog/2024/02/16/popular-git-config-options/"),
+        ("Chipmakers race to expand supply - BBC News", "https://www.bbc.co.uk/news/technology-68412345"),
+        ("Foo - Stack Overflow", "https://stackoverflow.com/questions/231767"),
+        ("Pure Title", "https://sub.domain.example.co.jp/ja/articles/2024/03/sample"),
+    ]
+
+    benchmarks = [
+        Benchmark("validate_and_normalize_url", validate_and_normalize_url, [(url,) for url in urls]),
+        Benchmark("get_domain_from_url", get_domain_from_url, [(url,) for url in normalized]),
+        Benchmark("remove_website_title", remove_website_title, titles),
+        Benchmark("normalize_title", TitleNormalizer().normalize, titles),
+        Benchmark("extract_youtube_video_id", extract_youtube_video_id, [(url,) for url in normalized]),
+    ]
+
+    for name, html in load_html_samples().items():
+        benchmarks.append(Benchmark(f"extract_title_from_html[{name}]", extract_title_from_html, [(html,)]))
+
+    cog = SnipCog(bot=None)
+    channel = SimpleNamespace(available_tags=[SimpleNamespace(name=f"Tag {i:02d}") for i in range(20)])
+    autocomplete_inputs = ["", "tag", "Tag 0", "Tag 01, Tag 1", "Tag 01, Tag 02, Tag 03, ", "nomatch"]
+    benchmarks.append(Benchmark(
+        "tag_autocomplete",
+        cog.tag_autocomplete,
+        [(SimpleNamespace(options={"channel": channel}, value=value, bot=None),) for value in autocomplete_inputs],
+    ))
+
+    return benchmarks
+
+
+def _call(func: Callable, args: tuple) -> Any:
+    result = func(*args)
+    if inspect.isawaitable(result):
+        # Autocomplete handlers never suspend, so the coroutine can be driven directly.
+        try:
+            result.send(None)
+        except StopIteration as stop:
+            return stop.value
+        raise RuntimeError(f"{func.__qualname__} suspended during a benchmark run")
+    return result
+
+
+def measure_throughput(benchmark: Benchmark, min_time: float) -> float:
+    """
+    Call the benchmark round-robin over its inputs until `min_time` has elapsed.
+
+    Returns:
+        float: Calls per second.
+    """
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time:
+        for args in benchmark.inputs:
+            _call(benchmark.func, args)
+        calls += len(benchmark.inputs)
+        elapsed = time.perf_counter() - start
+    return calls / elapsed
+
+
+def measure_allocations(benchmark: Benchmark) -> int:
+    """
+    Trace one pass over the inputs and report the average peak allocation per call.
+
+    Returns:
+        int: Average bytes allocated at peak during a single call.
+    """
+    total = 0
+    tracemalloc.start()
+    for args in benchmark.inputs:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        _call(benchmark.func, args)
+        _, peak = tracemalloc.get_traced_memory()
+        total += peak - baseline
+    tracemalloc.stop()
+    return total // len(benchmark.inputs)
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    """
+    Compare a run against a baseline.
+
+    Parameters:
+        results (dict): Results of the current run, keyed by benchmark name.
+        baseline (dict): Previously saved results, keyed by benchmark name.
+        threshold (float): The allowed relative regression (0.2 = 20%).
+
+    Returns:
+        List[str]: A description of each regression found.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+
+        if current["ops_per_sec"] < previous["ops_per_sec"] * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {current['ops_per_sec']:.0f} ops/s vs baseline {previous['ops_per_sec']:.0f} ops/s"
+            )
+        if current["peak_bytes_per_call"] > previous["peak_bytes_per_call"] * (1 + threshold):
+            regressions.append(
+                f"{name}: peak allocation {current['peak_bytes_per_call']} B vs baseline {previous['peak_bytes_per_call']} B"
+            )
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the URL/title hot path.")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Baseline JSON file.")
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run as the new baseline.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative regression (default: 0.2).")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Minimum seconds to run each benchmark.")
+    parser.add_argument("-k", dest="keyword", default=None, help="Only run benchmarks whose name contains this.")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for benchmark in build_benchmarks():
+        if args.keyword and args.keyword not in benchmark.name:
+            continue
+
+        ops_per_sec = measure_throughput(benchmark, args.min_time)
+        peak_bytes = measure_allocations(benchmark)
+        results[benchmark.name] = {"ops_per_sec": round(ops_per_sec, 1), "peak_bytes_per_call": peak_bytes}
+        print(f"{benchmark.name:<45} {ops_per_sec:>12,.1f} ops/s {peak_bytes:>14,} B/call")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
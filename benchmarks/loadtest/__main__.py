@@ -0,0 +1,253 @@
+"""
+End-to-end load test for `/snip` against a local fake Discord API and web origin.
+
+Drives `SnipCog.snip` (and `TitleInputModal.callback` whenever the snip falls
+back to the manual-title modal) at a Poisson arrival rate, then reports
+end-to-end latency percentiles and REST calls per snip. Nothing leaves the
+machine: Discord REST traffic goes to `FakeDiscordAPI` and page fetches are
+proxied to `FakeOrigin`.
+
+Usage:
+    python -m benchmarks.loadtest --rate 20 --snips 500
+    python -m benchmarks.loadtest --rate 50 --discord-429-ratio 0.05 --origin-latency 1.5
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import List
+
+import discord
+from discord.http import Route
+
+from benchmarks.loadtest.fake_discord import (
+    FakeDiscordAPI,
+    APPLICATION_ID,
+    FORUM_ID,
+    GUILD_ID,
+    guild_payload,
+    next_snowflake,
+    user_payload,
+)
+from benchmarks.loadtest.fake_origin import FakeOrigin
+
+
+class LoadTestContext(discord.ApplicationContext):
+    """
+    Application context that keeps a handle on the modal it sent, so the
+    harness can submit it like a user would.
+    """
+
+    modal = None
+
+    async def send_modal(self, modal):
+        self.modal = modal
+        return await super().send_modal(modal)
+
+
+def interaction_payload(interaction_type: int, user_id: int, data: dict) -> dict:
+    return {
+        "id": str(next_snowflake()),
+        "application_id": str(APPLICATION_ID),
+        "type": interaction_type,
+        "token": f"token-{next_snowflake()}",
+        "version": 1,
+        "guild_id": str(GUILD_ID),
+        "channel_id": str(FORUM_ID),
+        "locale": "en-US",
+        "guild_locale": "en-US",
+        "app_permissions": "0",
+        "entitlements": [],
+        "authorizing_integration_owners": {},
+        "member": {
+            "user": user_payload(user_id, f"loadtest-user-{user_id % 1000}"),
+            "roles": [],
+            "joined_at": "2024-01-01T00:00:00+00:00",
+            "deaf": False,
+            "mute": False,
+            "permissions": str(discord.Permissions.all().value),
+        },
+        "data": data,
+    }
+
+
+def percentile(samples: List[float], point: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(point / 100 * (len(ordered) - 1))))]
+
+
+class BackgroundLoop:
+    """
+    Runs the fake servers on their own event loop thread, so blocking calls made
+    by the bot under test can't stall the servers answering them.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="loadtest-fakes", daemon=True)
+        self._thread.start()
+
+    def run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+
+class LoadTest:
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.discord_api = FakeDiscordAPI(
+            latency=args.discord_latency,
+            jitter=args.discord_jitter,
+            rate_limit_ratio=args.discord_429_ratio,
+            retry_after=args.retry_after,
+        )
+        self.origin = FakeOrigin(latency=args.origin_latency, jitter=args.origin_jitter, page_size=args.origin_size)
+        self.fakes = BackgroundLoop()
+        self.latencies: List[float] = []
+        self.outcomes: Counter = Counter()
+
+    async def setup(self):
+        self.fakes.run(self.discord_api.start())
+        self.fakes.run(self.origin.start())
+
+        Route.API_BASE_URL = f"{self.discord_api.base_url}/api/v{{API_VERSION}}"
+        os.environ["HTTP_PROXY"] = self.origin.proxy_url
+        os.environ["NO_PROXY"] = "127.0.0.1,localhost"
+
+        # Imported after the environment is prepared so module-level clients pick it up.
+        from bot.cogs.snip_cog import SnipCog
+
+        self.bot = discord.Bot()
+        await self.bot.login("loadtest-token")
+        self.bot._connection._add_guild(discord.Guild(data=guild_payload(), state=self.bot._connection))
+        self.forum = await self.bot.fetch_channel(FORUM_ID)
+        self.cog = SnipCog(self.bot)
+
+        # Only count REST calls made by the snips themselves.
+        self.discord_api.calls.clear()
+
+    async def teardown(self):
+        from services.http import close_session
+
+        await self.bot.close()
+        await close_session()
+        self.fakes.run(self.origin.stop())
+        self.fakes.run(self.discord_api.stop())
+        self.fakes.close()
+
+    async def run_snip(self, index: int):
+        titled = random.random() >= self.args.untitled_ratio
+        url = self.origin.page_url(index, titled=titled)
+        user_id = 720000000000000000 + index
+
+        interaction = discord.Interaction(
+            data=interaction_payload(2, user_id, {
+                "id": str(next_snowflake()),
+                "name": "snip",
+                "type": 1,
+                "options": [
+                    {"name": "url", "type": 3, "value": url},
+                    {"name": "channel", "type": 7, "value": str(FORUM_ID)},
+                ],
+            }),
+            state=self.bot._connection,
+        )
+        ctx = LoadTestContext(self.bot, interaction)
+
+        start = time.perf_counter()
+        try:
+            await self.cog.snip.callback(
+                self.cog, ctx, url=url, channel=self.forum, title=None, message=None,
+                mention=None, additional_mentions="", tags=None,
+            )
+
+            if ctx.modal is not None:
+                submit = discord.Interaction(
+                    data=interaction_payload(5, user_id, {
+                        "custom_id": ctx.modal.custom_id,
+                        "components": [],
+                    }),
+                    state=self.bot._connection,
+                )
+                ctx.modal.title_input.refresh_state({"value": f"Manual title {index}"})
+                await ctx.modal.callback(submit)
+                self.outcomes["modal"] += 1
+            else:
+                self.outcomes["fetched"] += 1
+        except Exception as e:
+            self.outcomes[f"error: {type(e).__name__}"] += 1
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+    async def run(self):
+        tasks = []
+        started = time.perf_counter()
+        for index in range(self.args.snips):
+            tasks.append(asyncio.create_task(self.run_snip(index)))
+            await asyncio.sleep(random.expovariate(self.args.rate))
+        await asyncio.gather(*tasks)
+        self.elapsed = time.perf_counter() - started
+
+    def report(self):
+        snips = len(self.latencies)
+        calls = self.discord_api.total_calls
+        print(f"\nSnips: {snips} in {self.elapsed:.1f}s ({snips / self.elapsed:.1f}/s offered at {self.args.rate}/s)")
+        for outcome, count in sorted(self.outcomes.items()):
+            print(f"  {outcome:<28} {count}")
+
+        print("\nEnd-to-end latency")
+        for point in (50, 95, 99):
+            print(f"  p{point:<3} {percentile(self.latencies, point) * 1000:>9.1f} ms")
+        print(f"  max  {max(self.latencies, default=0) * 1000:>9.1f} ms")
+
+        print(f"\nDiscord REST calls: {calls} ({calls / max(snips, 1):.2f} per snip)")
+        for route, count in self.discord_api.calls.most_common():
+            limited = self.discord_api.rate_limited.get(route, 0)
+            print(f"  {route:<70} {count:>6}" + (f"  ({limited} x 429)" if limited else ""))
+        print(f"\nOrigin requests: {sum(self.origin.requests.values())}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test /snip against local fakes.")
+    parser.add_argument("--rate", type=float, default=10.0, help="Snip arrivals per second.")
+    parser.add_argument("--snips", type=int, default=200, help="Total number of snips to run.")
+    parser.add_argument("--untitled-ratio", type=float, default=0.1,
+                        help="Fraction of pages without a title (exercises the modal).")
+    parser.add_argument("--discord-latency", type=float, default=0.05)
+    parser.add_argument("--discord-jitter", type=float, default=0.02)
+    parser.add_argument("--discord-429-ratio", type=float, default=0.0, help="Fraction of REST calls answered with 429.")
+    parser.add_argument("--retry-after", type=float, default=0.5, help="retry_after sent with injected 429s.")
+    parser.add_argument("--origin-latency", type=float, default=0.2)
+    parser.add_argument("--origin-jitter", type=float, default=0.1)
+    parser.add_argument("--origin-size", type=int, default=64 * 1024, help="Page size in bytes.")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    async def _run():
+        load_test = LoadTest(args)
+        await load_test.setup()
+        try:
+            await load_test.run()
+        finally:
+            await load_test.teardown()
+        load_test.report()
+
+    asyncio.run(_run())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""
+A local stand-in for the parts of Discord's REST API that a snip touches.
+
+Every request is counted per route, can be delayed by a configurable latency
+and can be answered with a 429 at a configurable rate, so the load test can see
+how py-cord's rate-limit handling behaves under pressure.
+"""
+import asyncio
+import itertools
+import json
+import random
+from collections import Counter
+from datetime import datetime, timezone
+
+from aiohttp import web
+
+GUILD_ID = 700000000000000001
+FORUM_ID = 700000000000000002
+BOT_USER_ID = 700000000000000003
+APPLICATION_ID = BOT_USER_ID
+
+_snowflakes = itertools.count(710000000000000000)
+
+
+def next_snowflake() -> int:
+    return next(_snowflakes)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def user_payload(user_id: int, name: str, bot: bool = False) -> dict:
+    return {
+        "id": str(user_id),
+        "username": name,
+        "global_name": name,
+        "discriminator": "0",
+        "avatar": None,
+        "bot": bot,
+    }
+
+
+def guild_payload() -> dict:
+    return {
+        "id": str(GUILD_ID),
+        "name": "Load Test Guild",
+        "owner_id": str(BOT_USER_ID),
+        "roles": [{
+            "id": str(GUILD_ID),
+            "name": "@everyone",
+            "permissions": "0",
+            "position": 0,
+            "color": 0,
+            "colors": {"primary_color": 0, "secondary_color": None, "tertiary_color": None},
+            "hoist": False,
+            "managed": False,
+            "mentionable": False,
+        }],
+        "emojis": [],
+        "stickers": [],
+        "features": [],
+        "channels": [],
+        "members": [],
+        "member_count": 1,
+    }
+
+
+def forum_payload() -> dict:
+    return {
+        "id": str(FORUM_ID),
+        "type": 15,
+        "guild_id": str(GUILD_ID),
+        "name": "loadtest-forum",
+        "position": 0,
+        "permission_overwrites": [],
+        "nsfw": False,
+        "parent_id": None,
+        "topic": None,
+        "rate_limit_per_user": 0,
+        "flags": 0,
+        "available_tags": [
+            {"id": str(index + 1), "name": name, "moderated": False, "emoji_id": None, "emoji_name": None}
+            for index, name in enumerate(["Article", "Video", "Tool", "Discussion"])
+        ],
+    }
+
+
+def message_payload(channel_id: int, content: str = "", embeds: list = None) -> dict:
+    return {
+        "id": str(next_snowflake()),
+        "channel_id": str(channel_id),
+        "author": user_payload(BOT_USER_ID, "SnipDis", bot=True),
+        "content": content or "",
+        "timestamp": _now(),
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": embeds or [],
+        "pinned": False,
+        "type": 0,
+        "flags": 0,
+    }
+
+
+def _json_response(data: dict, status: int = 200, headers: dict = None) -> web.Response:
+    # py-cord only decodes bodies whose Content-Type is exactly application/json.
+    return web.Response(
+        body=json.dumps(data).encode(),
+        status=status,
+        headers={"Content-Type": "application/json", **(headers or {})},
+    )
+
+
+class FakeDiscordAPI:
+    """
+    Serves the REST routes used by `/snip` and the title modal.
+
+    Parameters:
+        latency (float): Base response latency in seconds.
+        jitter (float): Uniform random latency added on top of `latency`.
+        rate_limit_ratio (float): Fraction of requests answered with a 429.
+        retry_after (float): The `retry_after` value sent with injected 429s.
+    """
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02, rate_limit_ratio: float = 0.0,
+                 retry_after: float = 0.5):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_ratio = rate_limit_ratio
+        self.retry_after = retry_after
+
+        self.calls: Counter = Counter()
+        self.rate_limited: Counter = Counter()
+        self._runner: web.AppRunner | None = None
+        self.port: int | None = None
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def start(self, port: int = 0):
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/api/v{version}/users/@me", self._get_me)
+        app.router.add_get("/api/v{version}/channels/{channel_id}", self._get_channel)
+        app.router.add_post("/api/v{version}/channels/{channel_id}/threads", self._create_thread)
+        app.router.add_post("/api/v{version}/channels/{channel_id}/messages", self._create_message)
+        app.router.add_delete("/api/v{version}/channels/{channel_id}/messages/{message_id}", self._no_content)
+        app.router.add_post("/api/v{version}/interactions/{interaction_id}/{token}/callback", self._callback)
+        app.router.add_post("/api/v{version}/webhooks/{application_id}/{token}", self._followup)
+        app.router.add_patch("/api/v{version}/webhooks/{application_id}/{token}/messages/{message_id}", self._followup)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        resource = request.match_info.route.resource
+        route = f"{request.method} {resource.canonical if resource else request.path}"
+        self.calls[route] += 1
+
+        await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+
+        if self.rate_limit_ratio and random.random() < self.rate_limit_ratio:
+            self.rate_limited[route] += 1
+            return _json_response(
+                {"message": "You are being rate limited.", "retry_after": self.retry_after, "global": False},
+                status=429,
+                headers={
+                    "Retry-After": str(self.retry_after),
+                    "X-RateLimit-Limit": "5",
+                    "X-RateLimit-Remaining": "0",
+                    "X-RateLimit-Reset-After": str(self.retry_after),
+                    "X-RateLimit-Bucket": route,
+                    "X-RateLimit-Scope": "user",
+                    # Webhook requests only retry a 429 that came through Discord's proxy.
+                    "Via": "1.1 google",
+                },
+            )
+
+        return await handler(request)
+
+    async def _get_me(self, request: web.Request):
+        return _json_response(user_payload(BOT_USER_ID, "SnipDis", bot=True))
+
+    async def _get_channel(self, request: web.Request):
+        return _json_response(forum_payload())
+
+    async def _create_thread(self, request: web.Request):
+        body = await self._json_body(request)
+        message = message_payload(0, body.get("message", {}).get("content", ""))
+        thread_id = int(message["id"])
+        message["channel_id"] = str(thread_id)
+        return _json_response({
+            "id": str(thread_id),
+            "type": 11,
+            "guild_id": str(GUILD_ID),
+            "parent_id": request.match_info["channel_id"],
+            "owner_id": str(BOT_USER_ID),
+            "name": body.get("name", ""),
+            "last_message_id": message["id"],
+            "message_count": 1,
+            "member_count": 1,
+            "rate_limit_per_user": 0,
+            "flags": 0,
+            "applied_tags": body.get("applied_tags", []),
+            "thread_metadata": {
+                "archived": False,
+                "auto_archive_duration": 1440,
+                "archive_timestamp": _now(),
+                "locked": False,
+            },
+            "message": message,
+        }, status=201)
+
+    async def _create_message(self, request: web.Request):
+        body = await self._json_body(request)
+        return _json_response(
+            message_payload(int(request.match_info["channel_id"]), body.get("content"), body.get("embeds"))
+        )
+
+    async def _callback(self, request: web.Request):
+        body = await self._json_body(request)
+        return _json_response({
+            "interaction": {
+                "id": request.match_info["interaction_id"],
+                "type": 2,
+                "response_message_id": None,
+                "response_message_loading": body.get("type") == 5,
+                "response_message_ephemeral": True,
+            }
+        })
+
+    async def _followup(self, request: web.Request):
+        body = await self._json_body(request)
+        return _json_response(message_payload(0, body.get("content"), body.get("embeds")))
+
+    async def _no_content(self, request: web.Request):
+        return web.Response(status=204)
+
+    @staticmethod
+    async def _json_body(request: web.Request) -> dict:
+        if request.content_type in ("multipart/form-data", "application/x-www-form-urlencoded"):
+            form = await request.post()
+            return json.loads(form.get("payload_json") or "{}")
+        return await request.json() if request.can_read_body else {}
@@ -0,0 +1,77 @@
+"""
+A local web origin that serves pages with tunable latency and size.
+
+The origin listens as a plain HTTP forward proxy, so pointing `HTTP_PROXY` at it
+routes every `http://` page fetch the bot makes to it regardless of hostname.
+Pages under `/untitled/` have no title metadata, which sends the snip down the
+manual-title modal path.
+"""
+import asyncio
+import random
+from collections import Counter
+
+from aiohttp import web
+
+ORIGIN_HOST = "origin.loadtest"
+
+
+class FakeOrigin:
+    """
+    Parameters:
+        latency (float): Base time to first byte in seconds.
+        jitter (float): Uniform random latency added on top of `latency`.
+        page_size (int): Approximate size of each served page in bytes.
+    """
+
+    def __init__(self, latency: float = 0.2, jitter: float = 0.1, page_size: int = 64 * 1024):
+        self.latency = latency
+        self.jitter = jitter
+        self.page_size = page_size
+        self.requests: Counter = Counter()
+        self._runner: web.AppRunner | None = None
+        self.port: int | None = None
+
+    @property
+    def proxy_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def page_url(self, index: int, titled: bool = True) -> str:
+        return f"http://{ORIGIN_HOST}/{'article' if titled else 'untitled'}/{index}"
+
+    async def start(self, port: int = 0):
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self._serve)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    def _render(self, path: str) -> bytes:
+        titled = path.startswith("/article/")
+        head = "<head><meta charset=\"utf-8\"></head>"
+        if titled:
+            title = f"Load test article {path.rsplit('/', 1)[-1]}"
+            head = (
+                f"<head><meta charset=\"utf-8\"><title>{title} - {ORIGIN_HOST}</title>"
+                f"<meta property=\"og:title\" content=\"{title}\">"
+                f"<meta property=\"og:description\" content=\"A synthetic page served by the load test origin.\">"
+                f"</head>"
+            )
+
+        paragraph = "<p>" + "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 8 + "</p>\n"
+        repeats = max(1, (self.page_size - len(head)) // len(paragraph))
+        return f"<!doctype html><html>{head}<body>{paragraph * repeats}</body></html>".encode()
+
+    async def _serve(self, request: web.Request):
+        self.requests[request.method] += 1
+        await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+
+        if request.method == "HEAD":
+            return web.Response(status=200, content_type="text/html")
+        return web.Response(body=self._render(request.path), content_type="text/html")
@@ -1,7 +1,26 @@
 import os
 import discord
+import logging
 from dotenv import load_dotenv
 from .util import get_guild_ids_for_environment
+from .log import bind, new_trace_id
+from .loop_monitor import loop_monitor
+from .responder import Responder
+from .shutdown import graceful_shutdown
+from .startup import discover_cogs, preload_cogs, startup_timer
+from services.canonical import canonicalizer
+from services.feeds import feed_store, feed_watcher
+from services.guild_config import guild_config
+from services.http import close_session, get_session
+from services.link_checker import link_checker
+from services.prefetch import title_prefetcher
+from services.proxy_pool import proxy_pool
+from services.search_index import snip_index
+from services.title_cache import title_cache
+from services.title_normalizer import title_normalizer
+from services.title_resolver import title_resolver
+
+logger = logging.getLogger(__name__)
 
 load_dotenv()
 BOT_TOKEN = os.getenv("BOT_TOKEN")
@@ -20,39 +39,124 @@ async def on_ready():
     Event triggered when the bot becomes ready to use.
     It performs actions like syncing slash commands and setting the bot status.
     """
-    print(f"Logged in as {bot.user} (ID: {bot.user.id})")
+    logger.info("Logged in as %s (ID: %s)", bot.user, bot.user.id)
+    if not startup_timer.reported:
+        startup_timer.mark("ready")
+        startup_timer.reported = True
+        logger.info(startup_timer.report())
 
     activity = discord.CustomActivity(type=discord.ActivityType.custom, name="Use /snip to snip the web!")
     await bot.change_presence(status=discord.Status.online, activity=activity)
 
-    print("Syncing slash commands...")
+    logger.info("Syncing slash commands...")
     try:
         await bot.sync_commands(commands=bot.application_commands, guild_ids=get_guild_ids_for_environment())
-        print("Commands synced successfully.")
+        logger.info("Commands synced successfully.")
     except Exception as e:
-        print(f"Failed to sync commands: {e}")
+        logger.error("Failed to sync commands: %s", e)
+
+
+class ShuttingDown(discord.CheckFailure):
+    pass
 
 
-async def load_cogs():
+@bot.check
+async def accepting_commands(ctx: discord.ApplicationContext) -> bool:
     """
-    Dynamically load all cogs (command extensions) in the 'bot/cogs' directory.
+    Refuse new commands once the bot is shutting down.
     """
-    cogs_directory = "bot/cogs"
-    for filename in os.listdir(cogs_directory):
-        if filename.endswith(".py") and not filename.startswith("__"):
-            cog_name = f"{cogs_directory.replace('/', '.')}.{filename[:-3]}"  # Convert to import path
-            try:
-                bot.load_extension(cog_name)
-                print(f"Loaded {cog_name} successfully.")
-            except Exception as e:
-                print(f"Failed to load {cog_name}: {e}")
+    if graceful_shutdown.requested:
+        responder = Responder()
+        responder.set_context(ctx)
+        await responder.warning("SnipDis is restarting. Please try again in a moment.")
+        raise ShuttingDown("The bot is shutting down.")
+    return True
+
+
+@bot.event
+async def on_application_command_error(ctx: discord.ApplicationContext, error: discord.DiscordException):
+    if isinstance(error, ShuttingDown):
+        return
+    await discord.Bot.on_application_command_error(bot, ctx, error)
+
+
+@bot.before_invoke
+async def tag_invocation(ctx: discord.ApplicationContext):
+    """
+    Tag the command's task so blocking calls detected by the loop monitor, and
+    everything it logs, can be attributed to a guild and command.
+    """
+    loop_monitor.tag_current_task(guild=ctx.guild_id, command=ctx.command.qualified_name)
+    # Each interaction is handled in its own task, so the fields end with it.
+    bind(guild=ctx.guild_id, command=ctx.command.qualified_name, trace_id=new_trace_id())
+
+
+@bot.after_invoke
+async def untag_invocation(ctx: discord.ApplicationContext):
+    loop_monitor.untag_current_task()
+
+
+async def load_cogs(names=None):
+    """
+    Load the cogs (command extensions) in the `bot.cogs` package.
 
+    Parameters:
+        names (List[str]): The cogs' module names; discovered from the package if not given.
+    """
+    for cog_name in names if names is not None else discover_cogs():
+        try:
+            bot.load_extension(cog_name)
+            logger.debug("Loaded %s successfully.", cog_name)
+        except Exception as e:
+            logger.exception("Failed to load %s: %s", cog_name, e)
 
 
 async def run():
     """
     Asynchronous entry point to start the bot and load commands.
+
+    The caches, databases and cog imports don't depend on each other, so they
+    are loaded concurrently in worker threads. On SIGTERM the publish queue is
+    drained and the caches are saved, so the next start doesn't begin cold.
     """
     async with bot:
-        await load_cogs()
-        await bot.start(BOT_TOKEN)
+        graceful_shutdown.install(bot)
+        loop_monitor.start()
+        proxy_pool.start()
+        cogs = discover_cogs()
+        get_session()
+        await startup_timer.gather("initialization", {
+            "title cache": title_cache.load,
+            "title suffixes": title_normalizer.load,
+            "redirect cache": canonicalizer.load,
+            "guild config": guild_config.open,
+            "search index": snip_index.open,
+            "feed store": feed_store.open,
+            "cog imports": lambda: preload_cogs(cogs),
+        })
+        title_resolver.start()
+        link_checker.start(bot)
+        feed_watcher.start(bot)
+        with startup_timer.step("cogs"):
+            await load_cogs(cogs)
+        try:
+            await bot.start(BOT_TOKEN)
+        finally:
+            await feed_watcher.stop()
+            await link_checker.stop()
+            await title_prefetcher.stop()
+            await title_resolver.stop()
+            canonicalizer.save()
+            try:
+                title_cache.save()
+            except OSError as e:
+                logger.error("Failed to save title cache: %s", e)
+            try:
+                title_normalizer.save()
+            except OSError as e:
+                logger.error("Failed to save title suffixes: %s", e)
+            await proxy_pool.stop()
+            snip_index.close()
+            feed_store.close()
+            guild_config.close()
+            await close_session()
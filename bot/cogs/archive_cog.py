@@ -0,0 +1,52 @@
+import asyncio
+import io
+import discord
+from discord.ext import commands
+from bot.util import truncate_string
+from services.archive import ARCHIVE_BUTTON_PREFIX, snapshot_store
+
+
+class ArchiveCog(commands.Cog):
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.Cog.listener()
+    async def on_interaction(self, interaction: discord.Interaction):
+        """
+        Serve the snapshot behind a "View archived copy" button.
+        """
+        if interaction.type != discord.InteractionType.component:
+            return
+        custom_id = interaction.custom_id or ""
+        if not custom_id.startswith(ARCHIVE_BUTTON_PREFIX):
+            return
+
+        digest = custom_id[len(ARCHIVE_BUTTON_PREFIX):]
+        text = await asyncio.to_thread(snapshot_store.get, digest)
+        if text is None:
+            await interaction.response.send_message("This archived copy is no longer available.", ephemeral=True)
+            return
+
+        info = await asyncio.to_thread(snapshot_store.info, digest)
+        if info is None:
+            # Older snapshots carried the title and URL in front of the text.
+            title, url, text = (text.split("\n", 2) + ["", ""])[:3]
+        else:
+            title, url = info.get("title") or "", info.get("url") or ""
+        embed = discord.Embed(
+            title=truncate_string(title, 256) or "Archived copy",
+            url=url or None,
+            description=truncate_string(text.strip(), 4000) or None,
+            color=discord.Color.light_grey(),
+        )
+        embed.set_footer(text="Archived copy · the full text is attached")
+        await interaction.response.send_message(
+            embed=embed,
+            file=discord.File(io.BytesIO(f"{title}\n{url}\n\n{text}".encode("utf-8")), filename="archived-copy.txt"),
+            ephemeral=True,
+        )
+
+
+def setup(bot):
+    bot.add_cog(ArchiveCog(bot))
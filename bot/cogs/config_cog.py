@@ -0,0 +1,107 @@
+import discord
+from discord.ext import commands
+from discord import ApplicationContext, Option
+from bot.responder import Responder
+from services.guild_config import GuildConfig, MAX_TITLE_BUDGET, MIN_TITLE_BUDGET, guild_config
+from services.thread_templates import TEMPLATE_FIELDS, TEMPLATE_KEYS
+from services.title_resolver import DEFAULT_BUDGET
+
+
+def describe_config(config: GuildConfig) -> str:
+    return "\n".join([
+        f"- Default forum: {f'<#{config.default_channel_id}>' if config.default_channel_id else 'none'}",
+        f"- Default tags: {', '.join(f'`{tag}`' for tag in config.default_tags) or 'none'}",
+        f"- Title fetch budget: `{config.title_budget or DEFAULT_BUDGET}s`",
+        f"- Custom templates: {', '.join(f'`{key}`' for key in config.templates) or 'none'}",
+    ])
+
+
+class ConfigCog(commands.Cog):
+
+    config = discord.SlashCommandGroup("config", "SnipDis settings for this server.")
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    @config.command(name="show", description="Show this server's SnipDis settings.")
+    async def config_show(self, ctx: ApplicationContext):
+        responder = Responder()
+        responder.set_context(ctx)
+        await responder.success(describe_config(guild_config.get(ctx.guild_id)))
+
+    @config.command(name="set", description="Change this server's /snip defaults.")
+    async def config_set(
+            self,
+            ctx: ApplicationContext,
+            default_channel: Option(discord.ForumChannel, "Forum /snip posts to when none is picked.", default=None),
+            default_tags: Option(str, "Tags applied when none are given (comma-separated).", default=None),
+            title_budget: Option(float, "Seconds /snip waits for a page title.", min_value=MIN_TITLE_BUDGET,
+                                 max_value=MAX_TITLE_BUDGET, default=None),
+            reset: Option(str, "Reset a setting to its default.",
+                          choices=["default_channel", "default_tags", "title_budget"], default=None)
+    ):
+        responder = Responder()
+        responder.set_context(ctx)
+
+        if not ctx.author.guild_permissions.manage_channels:
+            await responder.error("You do not have permission to change settings.")
+            return
+
+        changes = {}
+        if default_channel is not None:
+            changes["default_channel_id"] = default_channel.id
+        if default_tags is not None:
+            changes["default_tags"] = default_tags.split(",")
+        if title_budget is not None:
+            changes["title_budget"] = title_budget
+        if reset:
+            field = "default_channel_id" if reset == "default_channel" else reset
+            changes[field] = GuildConfig._field_defaults[field]
+
+        if not changes:
+            await responder.warning("Nothing to change.")
+            return
+
+        try:
+            config = guild_config.update(ctx.guild_id, **changes)
+        except ValueError as e:
+            await responder.error(str(e))
+            return
+        await responder.success(f"Settings updated:\n{describe_config(config)}")
+
+    @config.command(name="template", description="Customize the name, body or embed of this server's snip threads.")
+    async def config_template(
+            self,
+            ctx: ApplicationContext,
+            part: Option(str, "The part of the thread to change.", choices=list(TEMPLATE_KEYS)),
+            template: Option(str, "Fields such as {title} and {url}, \\n for a new line; leave empty to reset.",
+                             default=None)
+    ):
+        responder = Responder()
+        responder.set_context(ctx)
+
+        if not ctx.author.guild_permissions.manage_channels:
+            await responder.error("You do not have permission to change settings.")
+            return
+
+        templates = dict(guild_config.get(ctx.guild_id).templates)
+        if template:
+            # Slash command options can't hold line breaks.
+            templates[part] = template.replace("\\n", "\n")
+        else:
+            templates.pop(part, None)
+
+        try:
+            guild_config.update(ctx.guild_id, templates=templates)
+        except ValueError as e:
+            fields = "\n".join(f"- `{{{name}}}`: {description}" for name, description in TEMPLATE_FIELDS.items())
+            await responder.error(f"{e}\n\nTemplates can use:\n{fields}")
+            return
+        if template:
+            await responder.success(f"Snip thread `{part}` template updated.")
+        else:
+            await responder.success(f"Snip thread `{part}` template reset to the default.")
+
+
+def setup(bot):
+    bot.add_cog(ConfigCog(bot))
@@ -0,0 +1,40 @@
+from discord.ext import commands
+from discord import ApplicationContext
+from bot.responder import Responder
+from bot.loop_monitor import loop_monitor
+
+
+class DiagnosticsCog(commands.Cog):
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.responder = Responder()
+
+    @commands.slash_command(
+        name="looplag",
+        description="Show event loop scheduling delay percentiles."
+    )
+    async def loop_lag(self, ctx: ApplicationContext):
+        self.responder.set_context(ctx)
+
+        if not ctx.author.guild_permissions.manage_channels:
+            await self.responder.error("You do not have permission to view diagnostics.")
+            return
+
+        if not loop_monitor.running:
+            await self.responder.warning("The event loop monitor is not running.")
+            return
+
+        stats = loop_monitor.stats()
+        await self.responder.success(
+            f"**Event loop lag** (last {stats['samples']} samples)\n"
+            f"- p50: `{stats['p50']}ms`\n"
+            f"- p90: `{stats['p90']}ms`\n"
+            f"- p99: `{stats['p99']}ms`\n"
+            f"- Blocks over {int(loop_monitor.block_threshold * 1000)}ms: `{stats['blocked_count']}` "
+            f"(worst `{stats['max_block_ms']}ms`)"
+        )
+
+
+def setup(bot):
+    bot.add_cog(DiagnosticsCog(bot))
@@ -0,0 +1,73 @@
+import os
+
+import discord
+from discord.ext import commands
+from discord import ApplicationContext, Option
+from bot.responder import Responder
+from services.export import EXPORT_FORMATS, forum_exporter
+
+
+class ExportCog(commands.Cog):
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.slash_command(
+        name="snipexport",
+        description="Export every snip in a forum as a compressed JSONL or CSV file."
+    )
+    async def snip_export(
+            self,
+            ctx: ApplicationContext,
+            channel: Option(discord.ForumChannel, "The Forum channel to export."),
+            fmt: Option(str, "File format of the export.", choices=list(EXPORT_FORMATS), default="jsonl", name="format"),
+            restart: Option(bool, "Discard an unfinished export and start over.", default=False)
+    ):
+        # Exports run for a long time, so each invocation gets its own responder.
+        responder = Responder()
+        responder.set_context(ctx)
+
+        if not ctx.author.guild_permissions.manage_channels:
+            await responder.error("You do not have permission to export snips.")
+            return
+
+        if forum_exporter.is_running(channel, fmt):
+            await responder.warning(f"An export of {channel.mention} is already running.")
+            return
+
+        await ctx.defer(ephemeral=True)
+
+        async def _progress(state: dict):
+            try:
+                await ctx.interaction.edit_original_response(
+                    content=f"Exporting {channel.mention}: {state['records']} snips from {state['threads']} threads so far..."
+                )
+            except discord.HTTPException:
+                pass
+
+        try:
+            result = await forum_exporter.export(channel, fmt, restart=restart, progress=_progress)
+        except discord.HTTPException as e:
+            await responder.error(f"Export stopped by a Discord error and can be resumed by running it again: {e}")
+            return
+
+        size = os.path.getsize(result.path)
+        if size > ctx.guild.filesize_limit:
+            await responder.error(
+                f"The export of {result.records} snips is {size // 1024} KiB, over this server's upload limit."
+            )
+            return
+
+        filename = f"{channel.name}-snips.{fmt}.gz"
+        summary = f"Exported {result.records} snips from {result.threads} threads in {channel.mention}."
+        try:
+            await ctx.followup.send(summary, file=discord.File(result.path, filename=filename), ephemeral=True)
+        except discord.HTTPException:
+            # The interaction token expires after 15 minutes, which a large export can outlast.
+            await ctx.author.send(summary, file=discord.File(result.path, filename=filename))
+
+        os.remove(result.path)
+
+
+def setup(bot):
+    bot.add_cog(ExportCog(bot))
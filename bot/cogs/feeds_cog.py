@@ -0,0 +1,118 @@
+import discord
+from discord.ext import commands
+from discord import ApplicationContext, Option
+from bot.responder import Responder
+from bot.util import truncate_string, validate_and_normalize_url
+from services.feeds import feed_store, feed_watcher, normalize_feed_url
+
+
+class FeedsCog(commands.Cog):
+
+    feed = discord.SlashCommandGroup("feed", "Auto-snip new entries from RSS, Atom and YouTube feeds.")
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    @feed.command(name="add", description="Snip new entries from a feed into a forum.")
+    async def feed_add(
+            self,
+            ctx: ApplicationContext,
+            url: Option(str, "An RSS or Atom feed, or a YouTube channel or playlist URL."),
+            channel: Option(discord.ForumChannel, "The Forum channel to snip entries into."),
+            tags: Option(str, "Tags to apply to every snipped entry (comma-separated)", default=None)
+    ):
+        responder = Responder()
+        responder.set_context(ctx)
+
+        if not ctx.author.guild_permissions.manage_channels:
+            await responder.error("You do not have permission to manage feeds.")
+            return
+
+        if not feed_store.is_open:
+            await responder.warning("Feeds are not available right now.")
+            return
+
+        url = validate_and_normalize_url(url)
+        if not url:
+            await responder.error("Please provide a valid feed URL.")
+            return
+        url = normalize_feed_url(url)
+
+        await ctx.defer(ephemeral=True)
+        tag_names = [tag.strip() for tag in tags.split(",") if tag.strip()] if tags else []
+        feed = feed_store.subscribe(ctx.guild.id, channel.id, url, tag_names, created_by=ctx.author.id)
+        if feed is None:
+            await responder.warning(f"{channel.mention} already follows `{url}`.")
+            return
+
+        # The first poll checks the feed works and records its current entries, so only later ones are snipped.
+        try:
+            result = await feed_watcher.poll(feed)
+        except Exception as e:
+            feed_store.unsubscribe(channel.id, url)
+            await responder.error(f"Could not read a feed from `{url}`: {e}")
+            return
+
+        if not result.entries:
+            feed_store.unsubscribe(channel.id, url)
+            await responder.error(f"`{url}` doesn't look like an RSS or Atom feed.")
+            return
+
+        await responder.success(f"{channel.mention} will now get a snip for every new entry in `{url}`.")
+
+    @feed.command(name="remove", description="Stop snipping entries from a feed.")
+    async def feed_remove(
+            self,
+            ctx: ApplicationContext,
+            url: Option(str, "The feed URL, as shown by /feed list."),
+            channel: Option(discord.ForumChannel, "The Forum channel the feed posts to.")
+    ):
+        responder = Responder()
+        responder.set_context(ctx)
+
+        if not ctx.author.guild_permissions.manage_channels:
+            await responder.error("You do not have permission to manage feeds.")
+            return
+
+        if not feed_store.is_open:
+            await responder.warning("Feeds are not available right now.")
+            return
+
+        normalized = validate_and_normalize_url(url)
+        if feed_store.unsubscribe(channel.id, url) or (
+                normalized and feed_store.unsubscribe(channel.id, normalize_feed_url(normalized))):
+            await responder.success(f"{channel.mention} no longer follows `{url}`.")
+        else:
+            await responder.warning(f"{channel.mention} doesn't follow `{url}`.")
+
+    @feed.command(name="list", description="List the feeds this server follows.")
+    async def feed_list(
+            self,
+            ctx: ApplicationContext,
+            channel: Option(discord.ForumChannel, "Only list feeds for this Forum channel.", default=None)
+    ):
+        responder = Responder()
+        responder.set_context(ctx)
+
+        if not feed_store.is_open:
+            await responder.warning("Feeds are not available right now.")
+            return
+
+        feeds = feed_store.list(ctx.guild.id, channel.id if channel else None)
+        if not feeds:
+            await responder.respond("No feeds are being followed.")
+            return
+
+        lines = [
+            f"- <#{feed.channel_id}> · {truncate_string(feed.title or 'Untitled feed', 60)}\n  `{feed.url}`"
+            f"{' · failing' if feed.failures else ''}"
+            for feed in feeds[:25]
+        ]
+        if len(feeds) > 25:
+            lines.append(f"...and {len(feeds) - 25} more.")
+        embed = discord.Embed(title="Feeds", description="\n".join(lines), color=discord.Color.green())
+        await ctx.respond(embed=embed, ephemeral=True)
+
+
+def setup(bot):
+    bot.add_cog(FeedsCog(bot))
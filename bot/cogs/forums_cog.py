@@ -2,6 +2,11 @@ import discord
 from discord.ext import commands
 from discord import ApplicationContext, Option, PermissionOverwrite, CategoryChannel, Role, Guild
 from bot.responder import Responder
+from services.discord import MAX_FORUM_TAGS, ensure_forum_tag
+from services.forum_tags import apply_tag_spec, parse_tag_spec
+
+# Largest uploaded tag list accepted by /tags, in bytes.
+MAX_TAG_SPEC_SIZE = 64 * 1024
 
 
 class ForumsCog(commands.Cog):
@@ -165,26 +170,12 @@ class ForumsCog(commands.Cog):
             return
 
         # Check Discord's limit of 20 tags per forum
-        if len(existing_tags) >= 20:
-            await self.responder.error(f"Forum channel {channel.mention} has reached the maximum of 20 tags.")
+        if len(existing_tags) >= MAX_FORUM_TAGS:
+            await self.responder.error(f"Forum channel {channel.mention} has reached the maximum of {MAX_FORUM_TAGS} tags.")
             return
 
         try:
-            # Create the new tag object
-            # Note: We need to create a new ForumTag, but Discord requires editing the channel
-            # with the full list of tags including the new one
-            # emoji is required but uses empty string for tags without emojis
-            new_tag = discord.ForumTag(
-                name=name,
-                emoji=emoji if emoji else "",
-                moderated=moderated
-            )
-
-            # Create new tag by editing the channel with updated tags list
-            # We need to append the new tag to existing ones
-            updated_tags = list(existing_tags) + [new_tag]
-
-            await channel.edit(available_tags=updated_tags)
+            await ensure_forum_tag(channel, name, emoji=emoji, moderated=moderated)
 
             emoji_display = f" {emoji}" if emoji else ""
             await self.responder.success(
@@ -200,6 +191,57 @@ class ForumsCog(commands.Cog):
         except Exception as e:
             await self.responder.error(f"An unexpected error occurred: {e}")
 
+    @commands.slash_command(
+        name="tags",
+        description="Add, rename, update or remove a forum's tags in one go."
+    )
+    async def bulk_tags(
+            self,
+            ctx: ApplicationContext,
+            channel: Option(discord.ForumChannel, "The forum channel whose tags to change."),
+            tags: Option(str, "Comma-separated tags, e.g. `🐛 Bug, Docs (moderated), Old -> New`.", default=None),
+            file: Option(discord.Attachment, "A text file with one tag per line, or a JSON list.", default=None),
+            remove_missing: Option(bool, "Remove tags that aren't listed.", default=False),
+            preview: Option(bool, "Only show what would change.", default=False)
+    ):
+        responder = Responder()
+        responder.set_context(ctx)
+
+        if not ctx.author.guild_permissions.manage_channels:
+            await responder.error("You do not have permission to manage forum tags.")
+            return
+
+        if not tags and not file:
+            await responder.error("Provide the tags as a list or an uploaded file.")
+            return
+
+        if file and file.size > MAX_TAG_SPEC_SIZE:
+            await responder.error(f"`{file.filename}` is too large for a tag list.")
+            return
+
+        await ctx.defer(ephemeral=True)
+
+        try:
+            text = (await file.read()).decode("utf-8-sig", errors="replace") if file else tags
+            specs = parse_tag_spec(text)
+            diff = await apply_tag_spec(channel, specs, remove_missing=remove_missing, dry_run=preview)
+        except ValueError as e:
+            await responder.error(str(e))
+            return
+        except discord.Forbidden:
+            await responder.error("Missing permissions to edit the forum channel.")
+            return
+        except discord.HTTPException as e:
+            await responder.error(f"Discord API error: {e}")
+            return
+
+        if not diff.has_changes:
+            await responder.success(f"The tags in {channel.mention} already match.")
+        elif preview:
+            await responder.warning(f"These changes would be made to {channel.mention}:\n{diff.summary()}")
+        else:
+            await responder.success(f"Updated the tags in {channel.mention}:\n{diff.summary()}")
+
 
 def setup(bot):
     bot.add_cog(ForumsCog(bot))
\ No newline at end of file
@@ -0,0 +1,85 @@
+import aiohttp
+import discord
+from discord.ext import commands
+from discord import ApplicationContext, Option
+from bot.responder import Responder
+from services.link_import import IMPORT_FORMATS, detect_format, link_importer
+
+
+class ImportCog(commands.Cog):
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.slash_command(
+        name="snipimport",
+        description="Import a text, CSV or bookmarks HTML file of links into a forum as snips."
+    )
+    async def snip_import(
+            self,
+            ctx: ApplicationContext,
+            file: Option(discord.Attachment, "A text, CSV or exported bookmarks HTML file."),
+            channel: Option(discord.ForumChannel, "The Forum channel to import into."),
+            tags: Option(str, "Tags to apply to every imported snip (comma-separated)", default=None),
+            fmt: Option(str, "File format (default: detected).", choices=list(IMPORT_FORMATS), default=None, name="format")
+    ):
+        # Imports run for a long time, so each invocation gets its own responder.
+        responder = Responder()
+        responder.set_context(ctx)
+
+        if not ctx.author.guild_permissions.manage_channels:
+            await responder.error("You do not have permission to import snips.")
+            return
+
+        await ctx.defer(ephemeral=True)
+
+        try:
+            path, digest = await link_importer.download(file.url)
+        except aiohttp.ClientError as e:
+            await responder.error(f"Could not download `{file.filename}`: {e}")
+            return
+
+        if link_importer.is_running(channel, digest):
+            await responder.warning(f"`{file.filename}` is already being imported into {channel.mention}.")
+            return
+
+        if not fmt:
+            with open(path, "r", encoding="utf-8-sig", errors="replace") as source:
+                fmt = detect_format(file.filename, source.readline())
+
+        tag_names = [tag.strip() for tag in tags.split(",") if tag.strip()] if tags else []
+        applied_tags = [tag for tag in channel.available_tags if tag.name in tag_names]
+
+        async def _progress(state: dict):
+            try:
+                await ctx.interaction.edit_original_response(
+                    content=f"Importing `{file.filename}` into {channel.mention}: {state['published']} published, "
+                            f"{state['duplicates']} duplicates skipped so far..."
+                )
+            except discord.HTTPException:
+                pass
+
+        try:
+            result = await link_importer.run(channel, path, digest, fmt, ctx.author, applied_tags, progress=_progress)
+        except Exception as e:
+            await responder.error(
+                f"The import stopped: {e}\n\nRun the command again with the same file to resume where it left off."
+            )
+            return
+
+        summary = (
+            f"Imported `{file.filename}` into {channel.mention}.\n"
+            f"- Published: `{result.published}`\n"
+            f"- Duplicates skipped: `{result.duplicates}`\n"
+            f"- Invalid links: `{result.invalid}`\n"
+            f"- Failed: `{result.failed}`"
+        )
+        try:
+            await responder.success(summary)
+        except discord.HTTPException:
+            # The interaction token expires after 15 minutes, which a large import can outlast.
+            await ctx.author.send(summary)
+
+
+def setup(bot):
+    bot.add_cog(ImportCog(bot))
@@ -0,0 +1,46 @@
+import discord
+from discord.ext import commands
+from discord import ApplicationContext
+from bot.responder import Responder
+from bot.util import truncate_string
+from services.discord import visible_forum_ids
+from services.link_checker import link_checker
+from services.search_index import snip_index
+
+
+class LinkCheckCog(commands.Cog):
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.slash_command(
+        name="deadlinks",
+        description="List this server's snips whose links no longer work."
+    )
+    async def dead_links(self, ctx: ApplicationContext):
+        responder = Responder()
+        responder.set_context(ctx)
+
+        if not snip_index.is_open:
+            await responder.warning("Dead-link checks are not available right now.")
+            return
+
+        rows = snip_index.dead_links(ctx.guild.id, channel_ids=visible_forum_ids(ctx.guild, ctx.author))
+        embed = discord.Embed(title="Dead links", color=discord.Color.red())
+        if rows:
+            embed.description = "\n".join(
+                f"- [{truncate_string(title, 80)}]({jump_url or url}) · "
+                f"{f'HTTP {status}' if status else 'unreachable'}"
+                for title, url, jump_url, status in rows
+            )
+        else:
+            embed.description = "No dead links found so far."
+
+        report = link_checker.last_report
+        if report:
+            embed.set_footer(text=f"Last run {report.summary()}")
+        await ctx.respond(embed=embed, ephemeral=True)
+
+
+def setup(bot):
+    bot.add_cog(LinkCheckCog(bot))
@@ -0,0 +1,90 @@
+import discord
+from discord.ext import commands
+from discord import ApplicationContext, Option
+from bot.responder import Responder
+from services.discord import visible_forum_ids
+from services.search_index import snip_index
+from ui.views import SEARCH_PAGE_SIZE, SearchResultsView, build_search_embed
+
+
+class SearchCog(commands.Cog):
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.slash_command(
+        name="snipsearch",
+        description="Search this server's snips by title, message, domain, tag or snipper."
+    )
+    async def snip_search(
+            self,
+            ctx: ApplicationContext,
+            query: Option(str, "Words to search for.", min_length=1, max_length=200),
+            channel: Option(discord.ForumChannel, "Only search this Forum channel.", default=None),
+            tag: Option(str, "Only return snips with this tag.", default=None),
+            author: Option(discord.User, "Only return snips by this user.", default=None)
+    ):
+        responder = Responder()
+        responder.set_context(ctx)
+
+        if not snip_index.is_open:
+            await responder.warning("Snip search is not available right now.")
+            return
+
+        visible = visible_forum_ids(ctx.guild, ctx.author)
+
+        def _fetch_page(page: int):
+            return snip_index.search(
+                ctx.guild.id,
+                query,
+                channel_id=channel.id if channel else None,
+                tag=tag,
+                author_id=author.id if author else None,
+                limit=SEARCH_PAGE_SIZE,
+                offset=page * SEARCH_PAGE_SIZE,
+                channel_ids=visible,
+            )
+
+        hits, total = _fetch_page(0)
+        embed = build_search_embed(query, hits, total, 0)
+        if total <= SEARCH_PAGE_SIZE:
+            await ctx.respond(embed=embed, ephemeral=True)
+            return
+
+        view = SearchResultsView(query, _fetch_page, total, ctx.author.id)
+        await ctx.respond(embed=embed, view=view, ephemeral=True)
+
+    @commands.slash_command(
+        name="snipindex",
+        description="Add a forum's existing snips to the search index."
+    )
+    async def snip_index_backfill(
+            self,
+            ctx: ApplicationContext,
+            channel: Option(discord.ForumChannel, "The Forum channel to index.")
+    ):
+        responder = Responder()
+        responder.set_context(ctx)
+
+        if not ctx.author.guild_permissions.manage_channels:
+            await responder.error("You do not have permission to index snips.")
+            return
+
+        if not snip_index.is_open:
+            await responder.warning("Snip search is not available right now.")
+            return
+
+        await ctx.defer(ephemeral=True)
+        indexed = await snip_index.backfill(channel)
+        await responder.success(
+            f"Indexed {indexed} snips from {channel.mention}. "
+            f"{snip_index.count(ctx.guild.id)} snips in this server are now searchable."
+        )
+
+    @commands.Cog.listener()
+    async def on_raw_thread_delete(self, payload: discord.RawThreadDeleteEvent):
+        snip_index.remove(payload.thread_id)
+
+
+def setup(bot):
+    bot.add_cog(SearchCog(bot))
@@ -1,8 +1,15 @@
+import json
 from discord.ext import commands
-from discord import slash_command, Option, Guild, ForumChannel, CategoryChannel, PermissionOverwrite, Role
+from discord import slash_command, Option, Guild
 import discord
 
 from bot.responder import Responder
+from services.provisioning import (
+    ForumSpec, ProvisioningError, ProvisioningSpec, forum_provisioner, parse_provisioning_spec
+)
+
+# Largest uploaded provisioning spec accepted, in bytes.
+MAX_SPEC_SIZE = 64 * 1024
 
 
 class SetupCog(commands.Cog):
@@ -13,22 +20,29 @@ class SetupCog(commands.Cog):
     async def setup(
             self,
             ctx: discord.ApplicationContext,
-            name: Option(str, "The name of the Forum channel to create."),
-            description: Option(str, "A  description for the Forum channel."),
+            name: Option(str, "The name of the Forum channel to create.", required=False),
+            description: Option(str, "A  description for the Forum channel.", required=False),
             category: Option(discord.CategoryChannel, "The category to create the Forum channel in.", required=False),
             category_name: Option(str, "The name of the category to create for your Forum channel.", required=False),
             nsfw_category: Option(bool, "Mark the category as NSFW (Not Safe For Work).", default=False),
             roles: Option(str, "Comma-separated role names to allow access.", required=False),
-            position: Option(int, "Position of the category in the list.", required=False)
+            position: Option(int, "Position of the category in the list.", required=False),
+            spec: Option(discord.Attachment, "A JSON spec for a category with several forums, tags and roles.",
+                         required=False)
     ):
-        self.responder.set_context(ctx)
+        responder = Responder()
+        responder.set_context(ctx)
 
-        if position is not None and category is not None:
-            await self.responder.error("You cannot modify the position of an existing category.")
+        if not ctx.author.guild_permissions.manage_channels:
+            await responder.error("You do not have permission to use this command.")
             return
 
-        if not ctx.author.guild_permissions.manage_channels:
-            await self.responder.error("You do not have permission to use this command.")
+        if not spec and not (name and description):
+            await responder.error("Provide a forum name and description, or a spec file.")
+            return
+
+        if spec and spec.size > MAX_SPEC_SIZE:
+            await responder.error(f"`{spec.filename}` is too large for a spec.")
             return
 
         await ctx.defer(ephemeral=True)
@@ -36,55 +50,37 @@ class SetupCog(commands.Cog):
         guild: Guild = ctx.guild
 
         if not guild:
-            await self.responder.error("Could not find server with provided id.")
+            await responder.error("Could not find server with provided id.")
             return
 
-        role_objects = []
-        if roles:
-            role_names = [role_name.strip() for role_name in roles.split(",")]
-            for role_name in role_names:
-                role: Role = discord.utils.get(guild.roles, name=role_name)
-                if role:
-                    role_objects.append(role)
-                else:
-                    await self.responder.warning(f"Role `{role_name}` not found. This role will be ignored.")
-
-        overwrites = {
-            guild.default_role: PermissionOverwrite(view_channel=False),
-        }
-        for role in role_objects:
-            overwrites[role] = PermissionOverwrite(view_channel=True)
-
         try:
-            category: CategoryChannel = await guild.create_category_channel(
-                name=category_name,
-                overwrites=overwrites,
-                position=position
-            )
-
-            forum_channel: ForumChannel = await guild.create_forum_channel(
-                name=name,
-                topic=description[:1024],
-                overwrites=overwrites,
-                nsfw=nsfw_category,
-                category=category
-            )
-
-            await self.responder.success(
-                f"""Successfully created:
-                - Category: [`{category.name}`]
-                - Forum Channel: [`{forum_channel.name}`]({forum_channel.jump_url})
-                """
-            )
-
-        except discord.Forbidden:
-            await self.responder.error("Missing permissions to create channels.")
-        except Exception as e:
-            await self.responder.error(f"An unexpected error occurred: {e}")
+            if spec:
+                try:
+                    provisioning_spec = parse_provisioning_spec(json.loads(await spec.read()))
+                except ValueError as e:
+                    raise ProvisioningError(f"`{spec.filename}` is not valid JSON: {e}")
+            else:
+                provisioning_spec = ProvisioningSpec(
+                    forums=[ForumSpec(name=name, topic=description[:1024], nsfw=nsfw_category)],
+                    category_name=category_name or (None if category else name),
+                    position=position,
+                    roles=roles.split(",") if roles else [],
+                )
+            if category is not None:
+                provisioning_spec = provisioning_spec._replace(category=category, category_name=None)
+
+            result = await forum_provisioner.provision(guild, provisioning_spec, reason=f"/startforum by {ctx.author}")
+        except ProvisioningError as e:
+            await responder.error(str(e))
+            return
+
+        lines = [f"- Category: `{result.category.name}`"]
+        lines += [f"- Forum Channel: [`{forum.name}`]({forum.jump_url})" for forum in result.forums]
+        lines += [f"\n{warning}" for warning in result.warnings]
+        await responder.success("Successfully created:\n" + "\n".join(lines))
 
     def __init__(self, bot):
         self.bot = bot
-        self.responder = Responder()
 
 
 def setup(bot):
@@ -1,15 +1,22 @@
+import time
+
 import discord
 import sentry_sdk
 from discord.ext import commands
 from bot.responder import Responder
 from bot.util import (
-    fetch_webpage_title,
     validate_and_normalize_url,
-    fetch_youtube_video_title,
     get_domain_from_url,
-    convert_string_id_to_discord_member
+    convert_string_id_to_discord_member,
+    truncate_string
 )
+from services.archive import snapshot_archiver
+from services.canonical import canonicalizer, remove_tracking_params
 from services.discord import create_forum_thread
+from services.guild_config import guild_config
+from services.prefetch import title_prefetcher
+from services.title_candidates import CONFIDENT_TITLE
+from services.title_resolver import DEFAULT_BUDGET, title_resolver
 from ui.modals import TitleInputModal
 
 
@@ -18,6 +25,24 @@ class SnipCog(commands.Cog):
         self.bot = bot
         self.responder = Responder()
 
+    async def url_autocomplete(self, ctx: discord.AutocompleteContext):
+        """
+        Autocomplete function for the snip URL.
+        Starts fetching the page's title in the background while the user fills
+        in the rest of the command, and echoes the URL back as the only choice.
+        """
+        current_value = (ctx.value or "").strip()
+        url = validate_and_normalize_url(current_value) if current_value else None
+        if not url:
+            return []
+
+        title_prefetcher.prefetch(ctx.interaction.user.id, url)
+
+        # Choice values are limited to 100 characters; longer URLs are still submitted as typed.
+        if len(current_value) > 100:
+            return []
+        return [discord.OptionChoice(name=truncate_string(current_value), value=current_value)]
+
     async def tag_autocomplete(self, ctx: discord.AutocompleteContext):
         """
         Autocomplete function for forum tags.
@@ -26,6 +51,9 @@ class SnipCog(commands.Cog):
         """
         # Get the forum channel from the current interaction options
         channel_id_or_obj = ctx.options.get("channel")
+        if not channel_id_or_obj:
+            default_channel_id = guild_config.get(ctx.interaction.guild_id).default_channel_id
+            channel_id_or_obj = str(default_channel_id) if default_channel_id else None
 
         if not channel_id_or_obj:
             # User hasn't selected a channel yet - provide a helpful message
@@ -116,14 +144,27 @@ class SnipCog(commands.Cog):
     async def snip(
             self,
             ctx: discord.ApplicationContext,
-            url: discord.Option(str, "The URL of the webpage to snip."),
-            channel: discord.Option(discord.ForumChannel, "The Forum Channel to post to."),
+            url: discord.Option(str, "The URL of the webpage to snip.", autocomplete=url_autocomplete),
+            channel: discord.Option(discord.ForumChannel, "The Forum Channel to post to (default: the server's default forum).", default=None),
             title: discord.Option(str, "Title of the post (default: Webpage's title).", default=None, min_length=1, max_length=100),
             message: discord.Option(str, "Message body for the Snip.", default=None, min_length=1, max_length=1000),
             mention: discord.Option(discord.User, "User to mention.", default=None, name="mention"),
             additional_mentions: discord.Option(str, "Additional user mentions (e.g., @user1 @user2)", default="", name="mentions"),
             tags: discord.Option(str, "Tags to apply (comma-separated)", default=None, autocomplete=tag_autocomplete),
     ):
+        # Snips run concurrently, so each invocation gets its own responder
+        # rather than sharing the cog's context.
+        responder = Responder()
+        responder.set_context(ctx)
+
+        # In-memory lookup; nothing on the snip path waits on storage.
+        config = guild_config.get(ctx.guild_id)
+        if channel is None:
+            channel = ctx.guild.get_channel(config.default_channel_id) if ctx.guild and config.default_channel_id else None
+            if not isinstance(channel, discord.ForumChannel):
+                await responder.error("Pick a Forum channel to post to, or set a default one with `/config set`.")
+                return
+
         sentry_sdk.add_breadcrumb(
             category="snip",
             message=f"Snip command invocation by {ctx.author.name}#{ctx.author.discriminator}",
@@ -147,14 +188,15 @@ class SnipCog(commands.Cog):
             level="info"
         )
 
-        self.responder.set_context(ctx)
+        # The title must be resolved before Discord's 3 second interaction deadline.
+        started = time.monotonic()
 
         # Mark the original url for telemetry
         original_url = url
         url = validate_and_normalize_url(url)
 
         if not url:
-            await self.responder.error("The provided URL is invalid after validation! Ensure the URL is correct.")
+            await responder.error("The provided URL is invalid after validation! Ensure the URL is correct.")
             sentry_sdk.add_breadcrumb(
                 category="snip",
                 message="Invalid URL after validation",
@@ -163,17 +205,22 @@ class SnipCog(commands.Cog):
             )
             return
 
+        # The canonical form only keys caches and duplicate checks; the user's own link is what gets posted.
+        canonical_url = await canonicalizer.canonicalize(url)
+        url = remove_tracking_params(url)
+
         sentry_sdk.add_breadcrumb(
             category="snip",
             message="URL validated",
             data={
                 "original_url": original_url,
-                "validated_url": url
+                "validated_url": url,
+                "canonical_url": canonical_url
             },
             level="info"
         )
 
-        async def _invoke_title_modal(ctx: discord.ApplicationContext):
+        async def _invoke_title_modal(ctx: discord.ApplicationContext, suggested_title: str = None):
             """
             Sentry breadcrumb needs to be initialized before invoking modal
             to avoid losing scoped context up to here causing any requests
@@ -207,7 +254,9 @@ class SnipCog(commands.Cog):
                     message=message,
                     mention=mention,
                     additional_mentions=additional_mentions,
-                    applied_tags=applied_tags
+                    applied_tags=applied_tags,
+                    suggested_title=suggested_title,
+                    canonical_url=canonical_url
                 )
 
                 modal.sentry_context = {
@@ -222,10 +271,9 @@ class SnipCog(commands.Cog):
 
         # Parse and validate tags
         applied_tags = []
-        if tags:
-            # Split comma-separated tag names
-            tag_names = [tag.strip() for tag in tags.split(',') if tag.strip()]
-
+        # Split comma-separated tag names, falling back to the server's default tags
+        tag_names = [tag.strip() for tag in tags.split(',') if tag.strip()] if tags else list(config.default_tags)
+        if tag_names:
             # Match tag names to actual ForumTag objects
             for tag_name in tag_names:
                 matching_tag = next((tag for tag in channel.available_tags if tag.name == tag_name), None)
@@ -242,6 +290,8 @@ class SnipCog(commands.Cog):
                 level="info"
             )
 
+        metadata = None
+        fetched_url = canonical_url
         if not title:
             domain = get_domain_from_url(url)
             sentry_sdk.add_breadcrumb(
@@ -254,28 +304,26 @@ class SnipCog(commands.Cog):
                 level="info"
             )
 
-            if domain in ["youtube.com", "youtu.be"]:
-                title = await fetch_youtube_video_title(url)
-                if not title:
-                    sentry_sdk.add_breadcrumb(
-                        category="snip",
-                        message="Failed to fetch YouTube video title; invoking modal",
-                        data={"url": url, "domain": domain},
-                        level="warning"
-                    )
-                    await _invoke_title_modal(ctx)
-                    return
-            else:
-                title = await fetch_webpage_title(url)
-                if not title:
-                    sentry_sdk.add_breadcrumb(
-                        category="snip",
-                        message="Failed to fetch webpage title; invoking modal",
-                        data={"url": url, "domain": domain},
-                        level="warning"
-                    )
-                    await _invoke_title_modal(ctx)
-                    return
+            candidates = await title_resolver.resolve_candidates(
+                canonical_url, budget=(config.title_budget or DEFAULT_BUDGET) - (time.monotonic() - started)
+            )
+            best = candidates[0] if candidates else None
+            if best is None or best.confidence < CONFIDENT_TITLE or best.metadata is None:
+                sentry_sdk.add_breadcrumb(
+                    category="snip",
+                    message="No confident title; invoking modal",
+                    data={
+                        "url": url,
+                        "domain": domain,
+                        "candidates": [(candidate.title, candidate.confidence) for candidate in candidates]
+                    },
+                    level="warning"
+                )
+                await _invoke_title_modal(ctx, best.title if best else None)
+                return
+            title = best.title
+            metadata = best.metadata
+            canonical_url = metadata.canonical_url or canonical_url
 
         sentry_sdk.add_breadcrumb(
             category="snip",
@@ -304,6 +352,8 @@ class SnipCog(commands.Cog):
                 channel=channel,
                 title=title,
                 url=url,
+                canonical_url=canonical_url,
+                metadata=metadata,
                 message=message,
                 author=ctx.author,
                 mention=mention,
@@ -321,9 +371,10 @@ class SnipCog(commands.Cog):
                 },
                 level="info"
             )
-            await self.responder.success(
+            await responder.success(
                 f"Thread **'{title}'** successfully created in {channel.mention}! \n\nView it [here]({thread.jump_url})."
             )
+            snapshot_archiver.archive_later(thread, url, title, source_url=fetched_url)
 
             sentry_sdk.capture_message(
                 f"Snip successfully created: {title}",
@@ -335,12 +386,12 @@ class SnipCog(commands.Cog):
                 f"Failed to create Snip: Missing permissions in {channel.name}",
                 level="error"
             )
-            await self.responder.error(
+            await responder.error(
                 "SnipDis lacks permissions to create threads in the selected forum channel."
             )
         except Exception as e:
             sentry_sdk.capture_exception(e)
-            await self.responder.error(
+            await responder.error(
                 f"An unexpected error occurred: {str(e)}"
             )
 
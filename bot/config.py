@@ -5,4 +5,41 @@ load_dotenv()
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 DEV_GUILD_IDS = os.getenv("GUILD_IDS")
-ENV = os.getenv("ENV", "PROD")
\ No newline at end of file
+ENV = os.getenv("ENV", "PROD")
+
+# Event loop monitoring (seconds)
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.25"))
+LOOP_BLOCK_THRESHOLD = float(os.getenv("LOOP_BLOCK_THRESHOLD", "0.1"))
+
+# Proxy pool (seconds)
+PROXY_REFRESH_INTERVAL = float(os.getenv("PROXY_REFRESH_INTERVAL", "600"))
+
+# Local state (caches, learned stats, checkpoints)
+DATA_DIR = os.getenv("DATA_DIR", "data")
+
+# Minimum seconds between threads published by bulk jobs
+PUBLISH_INTERVAL = float(os.getenv("PUBLISH_INTERVAL", "1.5"))
+
+# Dead-link checker: seconds between runs, and snips probed per run
+LINK_CHECK_INTERVAL = float(os.getenv("LINK_CHECK_INTERVAL", "900"))
+LINK_CHECK_BATCH = int(os.getenv("LINK_CHECK_BATCH", "200"))
+
+# Feed watcher: bounds on each feed's adaptive poll interval (seconds)
+FEED_MIN_INTERVAL = float(os.getenv("FEED_MIN_INTERVAL", "300"))
+FEED_MAX_INTERVAL = float(os.getenv("FEED_MAX_INTERVAL", "21600"))
+
+# Page snapshot archive: off unless enabled, and the most of a page kept for a snapshot (bytes)
+ARCHIVE_SNAPSHOTS = os.getenv("ARCHIVE_SNAPSHOTS", "false").lower() in ("1", "true", "yes")
+ARCHIVE_MAX_BYTES = int(os.getenv("ARCHIVE_MAX_BYTES", str(2 * 1024 * 1024)))
+
+# Graceful shutdown: the longest queued snips are drained for before the bot closes (seconds)
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "20"))
+
+# Logging: root level, per-logger levels and rate limits ("services.feeds=DEBUG,discord=WARNING"),
+# the default rate limit per logger (records per second, with bursts), and "json" or "text" output
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_RATE_LIMIT = float(os.getenv("LOG_RATE_LIMIT", "20"))
+LOG_RATE_BURST = float(os.getenv("LOG_RATE_BURST", "100"))
+LOG_RATE_LIMITS = os.getenv("LOG_RATE_LIMITS", "")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
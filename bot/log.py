@@ -0,0 +1,252 @@
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from bot.config import LOG_FORMAT, LOG_LEVEL, LOG_LEVELS, LOG_RATE_BURST, LOG_RATE_LIMIT, LOG_RATE_LIMITS
+
+# Records waiting for the writer thread; beyond this, new records are dropped rather than block the caller.
+QUEUE_SIZE = 10000
+
+# Levels for noisy third-party loggers, unless LOG_LEVELS says otherwise.
+DEFAULT_LEVELS = {"discord": "WARNING", "aiohttp": "WARNING"}
+
+_context: contextvars.ContextVar[dict] = contextvars.ContextVar("log_context", default={})
+
+# Attributes every LogRecord has; anything else on a record is a structured field.
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def bind(**fields) -> contextvars.Token:
+    """
+    Add fields, such as `guild`, `command` or `trace_id`, to every record logged
+    from the current task and the tasks it starts.
+
+    Returns:
+        contextvars.Token: Pass to `unbind` to remove the fields again.
+    """
+    return _context.set({**_context.get(), **fields})
+
+
+def unbind(token: contextvars.Token):
+    _context.reset(token)
+
+
+@contextmanager
+def log_context(**fields):
+    token = bind(**fields)
+    try:
+        yield
+    finally:
+        unbind(token)
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def _parse_settings(text: str) -> Dict[str, str]:
+    settings = {}
+    for item in text.split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip():
+            settings[name.strip()] = value.strip()
+    return settings
+
+
+class ContextFilter(logging.Filter):
+    """
+    Adds the bound context to records, and the domain of a record's `url` field.
+
+    Runs in the logging thread, before the record is queued, so it sees that thread's context.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        url = getattr(record, "url", None)
+        if url and not hasattr(record, "domain"):
+            record.domain = urlparse(url).hostname
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Drops records from loggers that log more than their rate, so a burst of
+    failures can't flood the output. The next record a logger is allowed to log
+    carries how many of its records were dropped in `suppressed`.
+
+    Parameters:
+        rate (float): Records per second allowed for each logger.
+        burst (float): Records a logger may log at once before it is limited.
+        rates (Dict[str, float]): Rates for particular loggers and their children.
+    """
+
+    def __init__(self, rate: float = LOG_RATE_LIMIT, burst: float = LOG_RATE_BURST, rates: Dict[str, float] = None):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.rates = rates or {}
+        # Logger name -> [tokens, last update, suppressed records]
+        self._buckets: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def _rate_for(self, name: str) -> float:
+        while True:
+            if name in self.rates:
+                return self.rates[name]
+            if "." not in name:
+                return self.rate
+            name = name.rsplit(".", 1)[0]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(record.name)
+            if bucket is None:
+                bucket = self._buckets[record.name] = [self.burst, now, 0]
+            rate = self._rate_for(record.name)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            if bucket[2]:
+                record.suppressed = bucket[2]
+                bucket[2] = 0
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats a record as one line of JSON with its structured fields.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and key != "url":
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exception"] = record.exc_text
+        if record.stack_info:
+            data["stack"] = record.stack_info
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """
+    Human readable lines for local development, with the structured fields appended.
+    """
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = " ".join(f"{key}={value}" for key, value in record.__dict__.items()
+                          if key not in _RECORD_ATTRIBUTES and key != "url")
+        return f"{line} [{fields}]" if fields else line
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queues records for the writer thread without ever blocking.
+
+    Only the message and traceback are rendered in the logging thread;
+    formatting and writing happen in the writer thread. Records that don't
+    fit in the queue are dropped and counted on the next record that does.
+    """
+
+    def __init__(self, record_queue: queue.Queue):
+        super().__init__(record_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.dropped:
+            record.dropped = self.dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+        else:
+            self.dropped = 0
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(level: str = LOG_LEVEL, levels: str = LOG_LEVELS, rate_limits: str = LOG_RATE_LIMITS,
+                  output: str = LOG_FORMAT, stream=None) -> logging.handlers.QueueListener:
+    """
+    Route all logging through a queue to a background writer thread.
+
+    Parameters:
+        level (str): The root logger's level.
+        levels (str): Levels for particular loggers, as `name=LEVEL,...`.
+        rate_limits (str): Rate limits for particular loggers, as `name=records per second,...`.
+        output (str): `json` for structured records, or `text`.
+        stream: Where records are written; stdout by default.
+
+    Returns:
+        logging.handlers.QueueListener: The running writer; `stop_logging` stops it.
+    """
+    global _listener
+    stop_logging()
+
+    writer = logging.StreamHandler(stream or sys.stdout)
+    writer.setFormatter(TextFormatter() if output == "text" else JsonFormatter())
+
+    handler = NonBlockingQueueHandler(queue.Queue(QUEUE_SIZE))
+    handler.addFilter(ContextFilter())
+    handler.addFilter(RateLimitFilter(rates={name: float(rate) for name, rate in _parse_settings(rate_limits).items()}))
+
+    root = logging.getLogger()
+    for existing in [h for h in root.handlers if isinstance(h, NonBlockingQueueHandler)]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    for name, logger_level in {**DEFAULT_LEVELS, **_parse_settings(levels)}.items():
+        logging.getLogger(name).setLevel(logger_level.upper())
+
+    _listener = logging.handlers.QueueListener(handler.queue, writer)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """
+    Write out every queued record and stop the writer thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections import deque
+from typing import Dict, Iterable, Optional
+
+import sentry_sdk
+
+from bot.config import LOOP_BLOCK_THRESHOLD, LOOP_LAG_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """
+    Watches the event loop for scheduling delay and blocking callbacks.
+
+    A probe task sleeps for a fixed interval and records how late it was woken
+    up. A watchdog thread checks that the probe keeps ticking; when the loop
+    has been stuck for longer than the block threshold it captures the loop
+    thread's stack along with the running task and whatever command context
+    was tagged on that task, so blocking I/O can be traced back to its source.
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, block_threshold: float = LOOP_BLOCK_THRESHOLD,
+                 window: int = 2048):
+        self.interval = interval
+        self.block_threshold = block_threshold
+
+        self._samples: deque = deque(maxlen=window)
+        self._task_context: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._probe_task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self._last_tick = time.monotonic()
+        self._tick = 0
+        self._reported_tick = -1
+
+        self.blocked_count = 0
+        self.max_block = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._probe_task is not None and not self._probe_task.done()
+
+    def start(self):
+        """
+        Start the probe task and watchdog thread. Must be called from inside the running loop.
+        """
+        if self.running:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stop.clear()
+
+        self._probe_task = self._loop.create_task(self._probe(), name="loop-lag-probe")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        """
+        Stop the probe task and the watchdog thread.
+        """
+        self._stop.set()
+        if self._probe_task:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+
+    def tag_current_task(self, **context):
+        """
+        Attach context (e.g. guild and command) to the currently running task.
+        The context is reported alongside any block detected while that task runs.
+        """
+        task = asyncio.current_task()
+        if task is not None:
+            self._task_context[task] = context
+
+    def untag_current_task(self):
+        task = asyncio.current_task()
+        if task is not None:
+            self._task_context.pop(task, None)
+
+    def percentiles(self, points: Iterable[int] = (50, 90, 99)) -> Dict[str, float]:
+        """
+        Return scheduling delay percentiles over the sample window, in milliseconds.
+
+        Parameters:
+            points (Iterable[int]): The percentiles to compute.
+
+        Returns:
+            Dict[str, float]: A mapping such as ``{"p50": 0.4, "p99": 12.1}``.
+        """
+        samples = sorted(self._samples)
+        if not samples:
+            return {f"p{point}": 0.0 for point in points}
+
+        result = {}
+        for point in points:
+            index = min(len(samples) - 1, int(round(point / 100 * (len(samples) - 1))))
+            result[f"p{point}"] = round(samples[index] * 1000, 2)
+        return result
+
+    def stats(self) -> dict:
+        """
+        Snapshot of the monitor's current measurements.
+        """
+        return {
+            **self.percentiles(),
+            "samples": len(self._samples),
+            "blocked_count": self.blocked_count,
+            "max_block_ms": round(self.max_block * 1000, 2),
+        }
+
+    async def _probe(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            delay = max(0.0, loop.time() - expected)
+            self._samples.append(delay)
+            # The watchdog reports a block while it is still going; only here is its full length known.
+            if delay >= self.block_threshold:
+                self.max_block = max(self.max_block, delay)
+            self._last_tick = time.monotonic()
+            self._tick += 1
+
+    def _watch(self):
+        poll = max(self.block_threshold / 2, 0.01)
+        while not self._stop.wait(poll):
+            stalled = time.monotonic() - self._last_tick - self.interval
+            if stalled >= self.block_threshold and self._reported_tick != self._tick:
+                self._reported_tick = self._tick
+                self._report_block(stalled)
+
+    def _report_block(self, stalled: float):
+        """
+        Capture the loop thread's stack and the running task while it is still blocked.
+
+        Parameters:
+            stalled (float): How long the loop had been blocked when the watchdog noticed,
+                a lower bound on the block's full length.
+        """
+        self.blocked_count += 1
+
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame else "<unavailable>"
+
+        task = asyncio.current_task(self._loop) if self._loop else None
+        coroutine = None
+        context = {}
+        if task is not None:
+            coro = task.get_coro()
+            coroutine = getattr(coro, "__qualname__", repr(coro))
+            context = self._task_context.get(task, {})
+
+        details = {
+            "blocked_ms": round(stalled * 1000, 2),
+            "coroutine": coroutine,
+            "guild": context.get("guild"),
+            "command": context.get("command"),
+            "stack": stack,
+        }
+
+        logger.warning(
+            "Event loop blocked for at least %sms in %s (guild=%s, command=%s)\n%s",
+            details["blocked_ms"], coroutine or "callback", details["guild"], details["command"], stack,
+            extra={"blocked_ms": details["blocked_ms"], "coroutine": coroutine, "guild": details["guild"],
+                   "command": details["command"]},
+        )
+
+        with sentry_sdk.new_scope() as scope:
+            scope.set_context("loop_block", details)
+            sentry_sdk.capture_message(
+                f"Event loop blocked for at least {details['blocked_ms']}ms in {coroutine or 'callback'}",
+                level="warning"
+            )
+
+
+loop_monitor = LoopLagMonitor()
@@ -0,0 +1,232 @@
+import codecs
+import re
+from html.parser import HTMLParser
+from typing import Optional
+from urllib.parse import urljoin
+
+# Meta tags that carry each field, in order of preference.
+_TITLE_KEYS = ("og:title", "twitter:title")
+_DESCRIPTION_KEYS = ("og:description", "description", "twitter:description")
+_SITE_NAME_KEYS = ("og:site_name", "application-name")
+_IMAGE_KEYS = ("og:image", "og:image:url", "og:image:secure_url", "twitter:image", "twitter:image:src")
+_PUBLISHED_KEYS = ("article:published_time", "og:published_time", "date", "pubdate")
+_META_KEYS = frozenset(_TITLE_KEYS + _DESCRIPTION_KEYS + _SITE_NAME_KEYS + _IMAGE_KEYS + _PUBLISHED_KEYS + ("og:url",))
+
+_ICON_RELS = ("icon", "shortcut icon", "apple-touch-icon")
+
+# `<meta charset=...>` or `<meta http-equiv="Content-Type" content="...; charset=...">`.
+_META_CHARSET = re.compile(rb"""<meta[^>]*?charset\s*=\s*["']?\s*([a-z0-9_.:-]+)(?=[\s"';/>])""", re.IGNORECASE)
+# Where a charset can no longer be declared.
+_HEAD_END = re.compile(rb"</head|<body", re.IGNORECASE)
+# Browsers only look this far into a page for its charset, as should we.
+_CHARSET_PRESCAN_BYTES = 1024
+# Labels browsers decode differently from Python's codec of the same name.
+_CHARSET_OVERRIDES = {"iso-8859-1": "cp1252", "latin1": "cp1252", "latin-1": "cp1252", "us-ascii": "cp1252",
+                      "ascii": "cp1252", "utf-16": "utf-8", "utf-16le": "utf-8", "utf-16be": "utf-8"}
+
+# Tags that can only appear once the document body has started.
+_BODY_TAGS = frozenset(("body", "main", "article", "div", "p", "h1", "section", "header", "nav"))
+
+
+class PageMetadata:
+    """
+    Compact link-preview record for a page, along with the response's cache
+    validators (`etag`, `last_modified`) used to revalidate it.
+    """
+    __slots__ = ("title", "description", "site_name", "canonical_url", "image", "published_time", "favicon",
+                 "etag", "last_modified")
+
+    def __init__(self, title: Optional[str] = None, description: Optional[str] = None,
+                 site_name: Optional[str] = None, canonical_url: Optional[str] = None,
+                 image: Optional[str] = None, published_time: Optional[str] = None,
+                 favicon: Optional[str] = None, etag: Optional[str] = None,
+                 last_modified: Optional[str] = None):
+        self.title = title
+        self.description = description
+        self.site_name = site_name
+        self.canonical_url = canonical_url
+        self.image = image
+        self.published_time = published_time
+        self.favicon = favicon
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def __repr__(self) -> str:
+        return f"PageMetadata(title={self.title!r}, site_name={self.site_name!r})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, PageMetadata):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def to_dict(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PageMetadata":
+        return cls(**{slot: data.get(slot) for slot in cls.__slots__})
+
+
+class MetadataParser(HTMLParser):
+    """
+    Collects link-preview metadata from a page's `<head>` in a single streaming pass.
+
+    Feed it chunks as they arrive; `done` turns True once the head has ended, at
+    which point the rest of the document can be skipped.
+    """
+
+    def __init__(self, url: str = ""):
+        super().__init__(convert_charrefs=True)
+        self.url = url
+        self.done = False
+
+        self._meta: dict = {}
+        self._title_parts: Optional[list] = None
+        self._title: Optional[str] = None
+        self._canonical: Optional[str] = None
+        self._favicon: Optional[str] = None
+        self._favicon_rank = len(_ICON_RELS)
+
+    def feed(self, data: str):
+        if not self.done:
+            super().feed(data)
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+
+        if tag == "title" and self._title is None:
+            self._title_parts = []
+        elif tag == "meta":
+            attributes = dict(attrs)
+            key = (attributes.get("property") or attributes.get("name") or attributes.get("itemprop") or "").lower()
+            content = attributes.get("content")
+            if key in _META_KEYS and content and key not in self._meta:
+                self._meta[key] = content.strip()
+        elif tag == "link":
+            attributes = dict(attrs)
+            rel = (attributes.get("rel") or "").lower()
+            href = attributes.get("href")
+            if not href:
+                return
+            if rel == "canonical" and self._canonical is None:
+                self._canonical = href
+            elif rel in _ICON_RELS and _ICON_RELS.index(rel) < self._favicon_rank:
+                self._favicon = href
+                self._favicon_rank = _ICON_RELS.index(rel)
+        elif tag in _BODY_TAGS:
+            self.done = True
+
+    def handle_endtag(self, tag):
+        if tag == "title" and self._title_parts is not None:
+            self._title = "".join(self._title_parts).strip() or None
+            self._title_parts = None
+        elif tag == "head":
+            self.done = True
+
+    def handle_data(self, data):
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+
+    def _first(self, keys) -> Optional[str]:
+        return next((self._meta[key] for key in keys if self._meta.get(key)), None)
+
+    def _absolute(self, href: Optional[str]) -> Optional[str]:
+        return urljoin(self.url, href) if href and self.url else href
+
+    def result(self) -> PageMetadata:
+        """
+        Build the metadata record from everything seen so far.
+
+        The title is the longest of the `<title>` tag and the `og:title` and
+        `twitter:title` meta tags.
+        """
+        titles = [title for title in [self._title, *(self._meta.get(key) for key in _TITLE_KEYS)] if title]
+
+        return PageMetadata(
+            title=max(titles, key=len, default=None),
+            description=self._first(_DESCRIPTION_KEYS),
+            site_name=self._first(_SITE_NAME_KEYS),
+            canonical_url=self._absolute(self._canonical or self._meta.get("og:url")),
+            image=self._absolute(self._first(_IMAGE_KEYS)),
+            published_time=self._first(_PUBLISHED_KEYS),
+            favicon=self._absolute(self._favicon),
+        )
+
+
+class StreamingMetadataExtractor:
+    """
+    Decodes byte chunks incrementally and feeds them to a `MetadataParser`.
+
+    Without an `encoding` from the response headers, the first kilobyte is
+    held back until the page's byte order mark or `<meta charset>` (or its
+    `http-equiv` form) is found in it, falling back to UTF-8 once the head
+    ends or a kilobyte has arrived without one.
+    """
+
+    def __init__(self, url: str = "", encoding: Optional[str] = None):
+        self.parser = MetadataParser(url)
+        self._decoder = _incremental_decoder(encoding) if encoding else None
+        self._pending = b""
+
+    @property
+    def done(self) -> bool:
+        return self.parser.done
+
+    def feed(self, chunk: bytes):
+        if self._decoder is None:
+            chunk = self._pending + chunk if self._pending else chunk
+            match = _META_CHARSET.search(chunk, 0, _CHARSET_PRESCAN_BYTES)
+            if match is None and len(chunk) < _CHARSET_PRESCAN_BYTES and not _HEAD_END.search(chunk):
+                self._pending = chunk
+                return
+            self._pending = b""
+            self._start_decoding(chunk, match)
+        self.parser.feed(self._decoder.decode(chunk))
+
+    def _start_decoding(self, start: bytes, match: Optional[re.Match]):
+        if start.startswith(codecs.BOM_UTF8):
+            encoding = "utf-8-sig"
+        elif start.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            encoding = "utf-16"
+        elif match is not None:
+            label = match.group(1).decode("ascii").lower()
+            encoding = _CHARSET_OVERRIDES.get(label, label)
+        else:
+            encoding = "utf-8"
+        self._decoder = _incremental_decoder(encoding)
+
+    def close(self) -> PageMetadata:
+        if not self.parser.done:
+            if self._decoder is None:
+                self._start_decoding(self._pending, _META_CHARSET.search(self._pending))
+                self.parser.feed(self._decoder.decode(self._pending))
+            self.parser.feed(self._decoder.decode(b"", final=True))
+            self.parser.close()
+        return self.parser.result()
+
+
+def _incremental_decoder(encoding: str) -> codecs.IncrementalDecoder:
+    try:
+        return codecs.getincrementaldecoder(encoding)(errors="replace")
+    except LookupError:
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+
+def extract_metadata_from_html(html_content: str | bytes, url: str = "") -> PageMetadata:
+    """
+    Extracts link-preview metadata from a complete HTML document.
+
+    Parameters:
+        html_content (str | bytes): The raw HTML document.
+        url (str): The page URL, used to resolve relative links.
+
+    Returns:
+        PageMetadata: The metadata found in the document's head.
+    """
+    extractor = StreamingMetadataExtractor(url)
+    if isinstance(html_content, str):
+        extractor.parser.feed(html_content)
+    else:
+        extractor.feed(html_content)
+    return extractor.close()
@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import signal
+from typing import Optional
+
+import discord
+
+from bot.config import SHUTDOWN_DRAIN_TIMEOUT
+from services.publisher import Publisher, publisher
+
+logger = logging.getLogger(__name__)
+
+SHUTDOWN_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+
+class GracefulShutdown:
+    """
+    Stops the bot cleanly when the process is asked to exit.
+
+    On SIGTERM, which systemd sends when a deploy restarts the service, or
+    SIGINT, new commands are refused and the publisher stops taking snips.
+    Snips already queued are published for up to `drain_timeout` seconds
+    before the bot is closed, after which `run` saves the caches to disk.
+
+    Parameters:
+        queue (Publisher): The publish queue to drain.
+        drain_timeout (float): The longest to wait for queued snips.
+    """
+
+    def __init__(self, queue: Publisher = None, drain_timeout: float = SHUTDOWN_DRAIN_TIMEOUT):
+        self.queue = queue if queue is not None else publisher
+        self.drain_timeout = drain_timeout
+        self.requested = False
+        self._task: Optional[asyncio.Task] = None
+
+    def install(self, bot: discord.Bot):
+        """
+        Handle the shutdown signals. Must be called from inside the running loop.
+        """
+        loop = asyncio.get_running_loop()
+        for sig in SHUTDOWN_SIGNALS:
+            try:
+                loop.add_signal_handler(sig, self.request, bot, sig.name)
+            except (NotImplementedError, RuntimeError):
+                # Not supported on Windows; the default handlers stay in place.
+                pass
+
+    def request(self, bot: discord.Bot, reason: str = "shutdown requested"):
+        """
+        Start shutting down, unless already shutting down.
+        """
+        if self.requested:
+            return
+        self.requested = True
+        logger.info("Shutting down (%s)...", reason)
+        self._task = asyncio.create_task(self.shutdown(bot), name="shutdown")
+
+    async def shutdown(self, bot: discord.Bot):
+        self.requested = True
+        self.queue.close()
+        if len(self.queue):
+            logger.info("Publishing %s queued snips before shutting down...", len(self.queue))
+        try:
+            await asyncio.wait_for(self.queue.drain(), timeout=self.drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Shutting down with %s snips still queued.", len(self.queue))
+        await bot.close()
+
+
+graceful_shutdown = GracefulShutdown()
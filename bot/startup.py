@@ -0,0 +1,113 @@
+import asyncio
+import importlib
+import pkgutil
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+
+COGS_PACKAGE = "bot.cogs"
+
+
+def discover_cogs(package: str = COGS_PACKAGE) -> List[str]:
+    """
+    Find the cog modules in a package.
+
+    Modules are found through the package's import path rather than the
+    working directory, so the bot can be started from anywhere.
+
+    Parameters:
+        package (str): The package holding the cogs.
+
+    Returns:
+        List[str]: The cogs' module names, sorted so they always load in the same order.
+    """
+    module = importlib.import_module(package)
+    return sorted(
+        info.name for info in pkgutil.iter_modules(module.__path__, prefix=f"{package}.")
+        if not info.ispkg and not info.name.rsplit(".", 1)[-1].startswith("_")
+    )
+
+
+def preload_cogs(names: List[str]):
+    """
+    Import cog modules, and so everything they depend on, ahead of loading them.
+
+    `load_extension` executes each cog module itself, but the services, UI and
+    parsers it imports are then already loaded. Cogs that fail to import are
+    left for `load_extension` to report.
+    """
+    for name in names:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+
+
+class StartupTimer:
+    """
+    Times the steps of starting the bot for a startup report.
+
+    Parameters:
+        clock (Callable[[], float]): The clock steps are timed with.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self._clock = clock
+        self.started_at = clock()
+        self.reported = False
+        # Name, start and duration of each step, in the order they finished.
+        self.steps: List[Tuple[str, float, float]] = []
+        # Name and time since the start of each milestone.
+        self.marks: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def step(self, name: str):
+        start = self._clock()
+        try:
+            yield
+        finally:
+            self.steps.append((name, start, self._clock() - start))
+
+    def mark(self, name: str):
+        """
+        Record a milestone, such as the bot becoming ready, at the time since the timer was created.
+        """
+        self.marks.append((name, self._clock() - self.started_at))
+
+    async def gather(self, name: str, steps: Dict[str, Callable[[], object]]):
+        """
+        Run independent blocking steps concurrently in worker threads.
+
+        Each step is timed on its own and `name` times the whole group, so the
+        report shows what running them together saved.
+
+        Raises:
+            Exception: The first step that failed, once every step has finished.
+        """
+        async def _run(step_name: str, function: Callable[[], object]):
+            with self.step(step_name):
+                await asyncio.to_thread(function)
+
+        with self.step(name):
+            results = await asyncio.gather(*(_run(*step) for step in steps.items()), return_exceptions=True)
+        failure = next((result for result in results if isinstance(result, BaseException)), None)
+        if failure is not None:
+            raise failure
+
+    def report(self) -> str:
+        """
+        Returns:
+            str: Every step's duration in the order they started, followed by the milestones.
+        """
+        total = self._clock() - self.started_at
+        width = max((len(name) for name in [step[0] for step in self.steps] + [mark[0] for mark in self.marks]),
+                    default=0)
+        lines = [f"Startup took {total:.2f}s:"]
+        for name, start, duration in sorted(self.steps, key=lambda step: step[1]):
+            lines.append(f"  {name:<{width}}  {duration * 1000:8.1f}ms  (at {(start - self.started_at) * 1000:.0f}ms)")
+        for name, elapsed in self.marks:
+            lines.append(f"  {name:<{width}}  {'':>10}  (at {elapsed * 1000:.0f}ms)")
+        return "\n".join(lines)
+
+
+startup_timer = StartupTimer()
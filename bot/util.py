@@ -1,16 +1,42 @@
+import functools
 import os
 import re
 from urllib.parse import urlparse, urlencode, parse_qs
 import aiohttp
 import discord
 from bot.config import DEV_GUILD_IDS
-from typing import List, Optional, Callable
+from typing import List, Optional, Callable, Tuple
 import asyncio
-import requests
-from bs4 import BeautifulSoup
+import logging
+import time
+from bot.metadata import PageMetadata, StreamingMetadataExtractor, extract_metadata_from_html
+from services.http import get_session
+from services.origin_limiter import origin_limiter
+from services.page_bodies import page_bodies
 from services.youtube import YouTubeService
 
-youtube_service = YouTubeService(os.getenv("YOUTUBE_API_KEY"))
+logger = logging.getLogger(__name__)
+
+_youtube_service: Optional[YouTubeService] = None
+
+# Content types whose metadata can be read.
+HTML_CONTENT_TYPES = frozenset(("text/html", "application/xhtml+xml"))
+
+
+def get_youtube_service() -> YouTubeService:
+    """
+    Return the YouTube API client, creating it on first use.
+    """
+    global _youtube_service
+    if _youtube_service is None:
+        _youtube_service = YouTubeService(os.getenv("YOUTUBE_API_KEY"))
+    return _youtube_service
+
+# Maps a registered domain to the name of an async title extractor in this module.
+DOMAIN_EXTRACTORS: dict[str, str] = {}
+
+# Status codes that mean the site is refusing our IP rather than the page being missing.
+BLOCKED_STATUS_CODES = {403, 429, 503}
 
 def validate_and_normalize_url(url: str) -> str | None:
     """
@@ -106,30 +132,30 @@ def remove_website_title(title: str, url: str) -> str:
         str: The title with the website name removed.
     """
     try:
-        parsed_url = urlparse(url)
-        domain_parts = parsed_url.netloc.lower().split('.')
-        
-        # Filter out common prefixes and get domain parts
-        filtered_parts = [part for part in domain_parts if part not in ['www']]
-        patterns = []
-        
-        # Add all possible domain combinations to patterns
-        for i in range(len(filtered_parts)):
-            pattern = '.'.join(filtered_parts[i:])
-            patterns.append(re.escape(pattern))
-        
-        # Create pattern for common separators
-        separators = '[-|:_]'
-        pattern = f"\\s*{separators}\\s*(?:{'|'.join(patterns)})\\s*$"
-        
-        # Remove domain and separators
-        clean_title = re.sub(pattern, '', title, flags=re.IGNORECASE)
+        clean_title = _website_title_pattern(urlparse(url).netloc.lower()).sub('', title)
         return clean_title.strip()
     except Exception as e:
-        print(f"Error cleaning title: {e}")
+        logger.warning("Error cleaning title: %s", e)
         return title
 
 
+@functools.lru_cache(maxsize=1024)
+def _website_title_pattern(netloc: str) -> re.Pattern:
+    """
+    Compiles the pattern matching a separator followed by the domain, or any of
+    its parent domains, at the end of a title. Cached per host.
+    """
+    # Filter out common prefixes and get domain parts
+    filtered_parts = [part for part in netloc.split('.') if part not in ['www']]
+
+    # Add all possible domain combinations to patterns
+    patterns = ['.'.join(filtered_parts[i:]) for i in range(len(filtered_parts))]
+
+    # Create pattern for common separators
+    separators = '[-|:_]'
+    return re.compile(f"\\s*{separators}\\s*(?:{'|'.join(map(re.escape, patterns))})\\s*$", re.IGNORECASE)
+
+
 def get_guild_ids_for_environment():
     """
     Retrieves a list of guild IDs for the current environment.
@@ -145,11 +171,14 @@ def get_guild_ids_for_environment():
     return None
 
 
-async def fetch_proxies() -> List[str]:
+async def fetch_proxies(session: Optional[aiohttp.ClientSession] = None) -> List[str]:
     """
     Fetch a list of proxies from the ProxyScrape API.
     The URL is built dynamically with parameters for flexibility.
 
+    Parameters:
+        session (Optional[aiohttp.ClientSession]): Session to reuse. Defaults to the shared session.
+
     Returns:
         List[str]: List of proxies fetched from the API.
     """
@@ -172,16 +201,16 @@ async def fetch_proxies() -> List[str]:
         query_string = urlencode(params, doseq=True)
         url = f"{base_url}?{query_string}"
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=10) as response:
-                if response.status == 200:
-                    proxy_list = await response.text()
-                    return proxy_list.strip().split("\n")
-                else:
-                    print(f"Failed to fetch proxies. HTTP Status Code: {response.status}")
-                    return []
+        session = session or get_session()
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+            if response.status == 200:
+                proxy_list = await response.text()
+                return proxy_list.strip().split("\n")
+            else:
+                logger.warning("Failed to fetch proxies. HTTP Status Code: %s", response.status)
+                return []
     except Exception as e:
-        print(f"Error fetching proxies: {e}")
+        logger.warning("Error fetching proxies: %s", e)
         return []
 
 
@@ -199,73 +228,224 @@ async def fetch_youtube_video_title(url: str) -> Optional[str]:
     video_id = extract_youtube_video_id(url)
 
     try:
-        title = youtube_service.get_video_title(video_id)
+        # YouTubeService uses a blocking client, so keep it off the event loop.
+        title = await asyncio.to_thread(get_youtube_service().get_video_title, video_id)
         return title if "No video found" not in title and "An error occurred" not in title else None
     except Exception as e:
-        print(f"Error fetching YouTube video title from service: {e}")
+        logger.warning("Error fetching YouTube video title from service: %s", e, extra={"url": url})
         return None
 
 
-async def fetch_webpage_title(url: str, retries: int = 1) -> Optional[str]:
+def extract_title_from_html(html_content: str | bytes) -> Optional[str]:
     """
-    Fetches the webpage title from the given URL.
+    Extracts the best title candidate from an HTML document.
+
+    Looks at the `<title>` tag as well as the `og:title` and `twitter:title`
+    meta tags and returns the longest of them.
+
+    Parameters:
+        html_content (str | bytes): The raw HTML document.
+
+    Returns:
+        Optional[str]: The longest title found, or None if the page has none.
+    """
+    return extract_metadata_from_html(html_content).title
+
+
+async def _get_page_metadata(url: str, proxy: Optional[str] = None,
+                             headers: Optional[dict] = None) -> Tuple[int, Optional[PageMetadata]]:
+    """
+    GET a page and extract its metadata; see `_read_page_metadata`.
+
+    Direct requests go through the origin's limiter, which paces them and
+    raises `CircuitOpenError` while the origin keeps failing. Proxied requests
+    are paced by the proxy pool instead.
+
+    Returns:
+        Tuple[int, Optional[PageMetadata]]: The response status, and the page
+        metadata when the status is 200.
+    """
+    if proxy is not None:
+        return await _read_page_metadata(url, proxy, headers)
+
+    async with origin_limiter.request(url) as request:
+        status, metadata = await _read_page_metadata(url, None, headers)
+        request.record_status(status)
+        return status, metadata
+
+
+async def _read_page_metadata(url: str, proxy: Optional[str],
+                              headers: Optional[dict]) -> Tuple[int, Optional[PageMetadata]]:
+    """
+    GET a page through the shared HTTP session, optionally via a proxy, and
+    extract its metadata while the body streams in. Reading stops as soon as
+    the `<head>` has been parsed, so large pages are never downloaded in full,
+    unless snapshots are being archived, in which case the rest of the body is
+    handed to `page_bodies` to finish reading in the background.
+
+    The response's `ETag` and `Last-Modified` headers are kept on the metadata
+    so it can be revalidated later.
+
+    Returns:
+        Tuple[int, Optional[PageMetadata]]: The response status, and the page
+        metadata when the status is 200.
+    """
+    response = await get_session().get(url, proxy=proxy, headers=headers)
+    try:
+        if response.status != 200:
+            return response.status, None
+        # PDFs, images and downloads have no head to read; without this they'd stream until the timeout.
+        if "Content-Type" in response.headers and response.content_type not in HTML_CONTENT_TYPES:
+            return 200, None
+
+        received = bytearray() if page_bodies.enabled else None
+        extractor = StreamingMetadataExtractor(str(response.url), encoding=response.charset)
+        async for chunk in response.content.iter_chunked(16 * 1024):
+            extractor.feed(chunk)
+            # Bodies past the archive limit aren't kept; non-HTML bodies never finish the head.
+            if received is not None and len(received) < page_bodies.max_bytes:
+                received += chunk[:page_bodies.max_bytes - len(received)]
+            if extractor.done:
+                break
+        metadata = extractor.close()
+        metadata.etag = response.headers.get("ETag")
+        metadata.last_modified = response.headers.get("Last-Modified")
+
+        if received is not None:
+            page_bodies.capture((url, str(response.url)), response, bytes(received))
+            response = None
+        return 200, metadata
+    finally:
+        if response is not None:
+            response.release()
+
+
+async def revalidate_page_metadata(url: str, cached: PageMetadata) -> Tuple[bool, Optional[PageMetadata]]:
+    """
+    Conditionally re-fetch a page using the validators stored on its cached metadata.
+
+    Parameters:
+        url (str): The page URL.
+        cached (PageMetadata): The previously fetched metadata, with `etag` and/or `last_modified` set.
+
+    Returns:
+        Tuple[bool, Optional[PageMetadata]]: Whether the page is unchanged (304),
+        and the fresh metadata when it did change.
+    """
+    headers = {}
+    if cached.etag:
+        headers["If-None-Match"] = cached.etag
+    if cached.last_modified:
+        headers["If-Modified-Since"] = cached.last_modified
+
+    status, metadata = await _get_page_metadata(url, headers=headers)
+    return status == 304, metadata
+
+
+async def fetch_metadata_via_proxy(url: str, domain: str, proxy_pool, attempts: int = 2) -> Optional[PageMetadata]:
+    """
+    Fetch a page's metadata through the proxy pool, reporting each proxy's outcome back to the pool.
+    """
+    tried = ()
+    for _ in range(attempts):
+        proxy = proxy_pool.choose(domain, exclude=tried)
+        if not proxy:
+            return None
+        tried += (proxy.split("://", 1)[-1],)
+
+        started = time.monotonic()
+        try:
+            status, metadata = await _get_page_metadata(url, proxy=proxy)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            proxy_pool.record(proxy, domain, success=False, latency=time.monotonic() - started)
+            logger.info("Proxied request for %s failed: %s", domain, e, extra={"url": url})
+            continue
+
+        success = status == 200
+        proxy_pool.record(proxy, domain, success=success, latency=time.monotonic() - started)
+        if success:
+            return metadata
+        logger.info("Proxied request for %s failed: Status Code %s", domain, status, extra={"url": url})
+    return None
 
-    This function attempts to retrieve the webpage's title by first determining
+
+async def fetch_webpage_metadata(url: str, retries: int = 1, proxy_pool=None) -> Optional[PageMetadata]:
+    """
+    Fetches link-preview metadata for the given URL.
+
+    This function attempts to retrieve the webpage's metadata by first determining
     if the URL requires a specific domain handler. If a custom domain handler
     is found, it is used to process the URL. If not, the function sends an HTTP
-    GET request to the URL and parses the HTML content to extract the title.
+    GET request to the URL and extracts the title, description, site name,
+    canonical URL, image, published time and favicon from the page's head in a
+    single pass.
 
-    It searches for titles defined in the `<title>` tag, as well as meta tags
-    `og:title` and `twitter:title`. The longest title among these is selected.
+    If the site blocks the direct request (403, 429 or 503) and a proxy pool is
+    given, the page is fetched through a proxy instead. Domains that blocked us
+    recently skip the direct attempt altogether.
 
     If a failure occurs (e.g., non-200 status code, network issues), the function
     retries up to the specified number of attempts, pausing briefly between retries.
 
     Parameters:
-        url (str): The webpage URL to fetch the title from.
-        retries (int): The number of attempts to fetch the title. Default is 3.
+        url (str): The webpage URL to fetch metadata from.
+        retries (int): The number of attempts to fetch the page. Default is 1.
+        proxy_pool (Optional[ProxyPool]): Pool to fall back to when the site blocks us.
 
     Returns:
-        Optional[str]: The extracted longest title if found; otherwise, None.
+        Optional[PageMetadata]: The page metadata if a title was found; otherwise, None.
     """
+    domain = get_domain_from_url(url)
+
     for attempt in range(retries):
         try:
             domain_handler = get_domain_handler(url)
             if domain_handler:
-                return await domain_handler(url)
-
-            response = requests.get(url)
-            if response.status_code != 200:
-                print(f"Attempt {attempt + 1}/{retries} failed: Status Code {response.status_code}")
-                continue
-
-            html_content = response.content
-            soup = BeautifulSoup(html_content, "html.parser")
-
-            titles = []
+                title = await domain_handler(url)
+                return PageMetadata(title=title) if title else None
+
+            metadata = None
+            if proxy_pool and proxy_pool.is_blocked(domain):
+                metadata = await fetch_metadata_via_proxy(url, domain, proxy_pool)
+
+            if metadata is None:
+                status, metadata = await _get_page_metadata(url)
+                if status in BLOCKED_STATUS_CODES and proxy_pool:
+                    logger.info("Direct request to %s was blocked (Status Code %s); retrying via proxy", domain, status,
+                                extra={"url": url})
+                    proxy_pool.mark_blocked(domain)
+                    metadata = await fetch_metadata_via_proxy(url, domain, proxy_pool)
+                    if metadata is None:
+                        continue
+                elif status != 200:
+                    logger.info("Attempt %s/%s failed: Status Code %s", attempt + 1, retries, status, extra={"url": url})
+                    continue
+
+            if metadata and metadata.title:
+                logger.debug("Longest title found: %s", metadata.title, extra={"url": url})
+                return metadata
 
-            if soup.title and soup.title.string:
-                titles.append(soup.title.string.strip())
+        except Exception as e:
+            logger.info("Attempt %s/%s failed due to error: %s", attempt + 1, retries, e, extra={"url": url})
+            if attempt + 1 < retries:
+                await asyncio.sleep(1)
 
-            og_title = soup.find("meta", property="og:title")
-            if og_title and og_title.get("content"):
-                titles.append(og_title["content"].strip())
+    logger.info("Failed to fetch a valid title after retries.", extra={"url": url})
+    return None
 
-            twitter_title = soup.find("meta", property="twitter:title")
-            if twitter_title and twitter_title.get("content"):
-                titles.append(twitter_title["content"].strip())
 
-            longest_title = max(titles, key=len, default=None)
-            if longest_title:
-                print(f"Longest title found: {longest_title}")
-                return longest_title
+async def fetch_webpage_title(url: str, retries: int = 1, proxy_pool=None) -> Optional[str]:
+    """
+    Fetches the webpage title from the given URL.
 
-        except Exception as e:
-            print(f"Attempt {attempt + 1}/{retries} failed due to error: {e}")
-            await asyncio.sleep(1)
+    See `fetch_webpage_metadata`; the title is the longest of the `<title>` tag
+    and the `og:title` and `twitter:title` meta tags.
 
-    print("Failed to fetch a valid title after retries.")
-    return None
+    Returns:
+        Optional[str]: The extracted longest title if found; otherwise, None.
+    """
+    metadata = await fetch_webpage_metadata(url, retries=retries, proxy_pool=proxy_pool)
+    return metadata.title if metadata else None
 
 
 def get_domain_from_url(url: str) -> Optional[str]:
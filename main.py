@@ -1,15 +1,21 @@
 import asyncio
-from bot import bot
+import logging
+from bot.startup import startup_timer
+from bot.log import setup_logging, stop_logging
 import sentry_sdk
 from sentry_sdk.integrations.asyncio import AsyncioIntegration
 
 import os
 
+logger = logging.getLogger("main")
+
 
 def main():
     """
     Entry point for starting the bot.
     """
+    setup_logging()
+
     try:
         sentry_sdk.init(
             dsn=os.getenv("SENTRY_DSN"),
@@ -18,9 +24,9 @@ def main():
             traces_sample_rate=1.0,
             integrations=[AsyncioIntegration()]
         )
-        print("Sentry initialized successfully")
+        logger.info("Sentry initialized successfully")
     except Exception as sentry_error:
-        print(f"Sentry initialization failed: {sentry_error}")
+        logger.error("Sentry initialization failed: %s", sentry_error)
 
     # This is to healthcheck Sentry reporting
     # on initialization. There have been some
@@ -37,10 +43,17 @@ def main():
     except ValueError as e:
         sentry_sdk.capture_exception(e)
 
+    # The bot and its dependencies are imported after Sentry is initialized,
+    # so errors while importing them are reported too.
+    with startup_timer.step("imports"):
+        from bot import bot
+
     try:
         asyncio.run(bot.run())
     except Exception as e:
-        print(f"Error starting the bot: {e}")
+        logger.exception("Error starting the bot: %s", e)
+    finally:
+        stop_logging()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,270 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import zlib
+from collections import OrderedDict
+from typing import Optional
+
+import discord
+
+from bot.config import ARCHIVE_MAX_BYTES, ARCHIVE_SNAPSHOTS, DATA_DIR
+from services.http import get_session
+from services.page_bodies import PageBodies, page_bodies
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:  # Optional: snapshots fall back to zlib without it.
+    zstandard = None
+
+ARCHIVE_BUTTON_PREFIX = "snip-archive:"
+
+# Elements that are never part of an article's text.
+_BOILERPLATE_TAGS = ("script", "style", "noscript", "template", "svg", "nav", "header", "footer", "aside", "form",
+                     "iframe", "button")
+_TEXT_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6", "p", "li", "blockquote", "pre")
+_MIN_PARAGRAPH_LENGTH = 25
+
+
+def extract_readable_text(body: bytes, encoding: Optional[str] = None) -> str:
+    """
+    Pull an article's readable text out of a page, roughly the way Readability does.
+
+    Boilerplate elements are dropped and every paragraph scores its parent by
+    its length, and its grandparent by half that. The best scoring element, or
+    the page's `<article>`/`<main>` if it has one, is taken as the article and
+    its headings, paragraphs, list items and quotes are kept.
+
+    Returns:
+        str: The article's text with one blank line between blocks, or an empty string.
+    """
+    # BeautifulSoup is slow to import and only needed once a snip is archived.
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(body, "html.parser", from_encoding=encoding)
+    for element in soup(_BOILERPLATE_TAGS):
+        element.decompose()
+
+    root = soup.find("article") or soup.find("main")
+    if root is None:
+        scores = {}
+        for paragraph in soup.find_all("p"):
+            length = len(paragraph.get_text(" ", strip=True))
+            if length < _MIN_PARAGRAPH_LENGTH or paragraph.parent is None:
+                continue
+            scores[paragraph.parent] = scores.get(paragraph.parent, 0) + length
+            if paragraph.parent.parent is not None:
+                scores[paragraph.parent.parent] = scores.get(paragraph.parent.parent, 0) + length / 2
+        root = max(scores, key=scores.get) if scores else soup.body or soup
+
+    blocks = []
+    for element in root.find_all(_TEXT_TAGS):
+        # Nested blocks, such as a paragraph inside a quote, are kept with their outermost block.
+        if element.find_parent(_TEXT_TAGS) is not None:
+            continue
+        text = " ".join(element.get_text(" ", strip=True).split())
+        if text:
+            blocks.append(text)
+    return "\n\n".join(blocks)
+
+
+class SnapshotStore:
+    """
+    Content-addressed store of compressed page snapshots.
+
+    Each snapshot is saved under the SHA-256 of its text, so a page snipped
+    several times is stored once, even under different titles or URLs. The
+    title and URL it was first snipped with are kept in a small JSON sidecar.
+    Snapshots are compressed with zstd when the `zstandard` package is
+    installed and with zlib otherwise; both kinds are read back.
+
+    Parameters:
+        directory (str): Where snapshots are kept.
+        cache_size (int): Recently read snapshots kept decompressed in memory.
+    """
+
+    def __init__(self, directory: str = None, cache_size: int = 32):
+        self.directory = directory or os.path.join(DATA_DIR, "archive")
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+
+    def _path(self, digest: str, suffix: str) -> str:
+        return os.path.join(self.directory, digest[:2], f"{digest}{suffix}")
+
+    def put(self, text: str, title: str = None, url: str = None) -> str:
+        """
+        Save a snapshot unless an identical one is already stored.
+
+        Parameters:
+            text (str): The page's readable text, which alone decides the digest.
+            title (str): The snip's title, kept in the sidecar.
+            url (str): The snipped URL, kept in the sidecar.
+
+        Returns:
+            str: The snapshot's digest.
+        """
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        if not self.exists(digest):
+            if zstandard is not None:
+                path, compressed = self._path(digest, ".zst"), zstandard.ZstdCompressor(level=10).compress(data)
+            else:
+                path, compressed = self._path(digest, ".zz"), zlib.compress(data, 9)
+            self._write(path, compressed)
+
+        info_path = self._path(digest, ".json")
+        if not os.path.exists(info_path):
+            self._write(info_path, json.dumps({"title": title, "url": url}).encode("utf-8"))
+        return digest
+
+    def _write(self, path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(data)
+        os.replace(temp_path, path)
+
+    def info(self, digest: str) -> Optional[dict]:
+        """
+        Return the title and URL a snapshot was saved with, or None if it has no sidecar.
+        """
+        try:
+            with open(self._path(digest, ".json"), "r", encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Failed to read snapshot info for %s: %s", digest, e)
+            return None
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self._path(digest, ".zst")) or os.path.exists(self._path(digest, ".zz"))
+
+    def get(self, digest: str) -> Optional[str]:
+        """
+        Return a stored snapshot's text, or None if there is no such snapshot.
+        """
+        if digest in self._cache:
+            self._cache.move_to_end(digest)
+            return self._cache[digest]
+
+        try:
+            with open(self._path(digest, ".zst"), "rb") as file:
+                if zstandard is None:
+                    return None
+                text = zstandard.ZstdDecompressor().decompress(file.read()).decode("utf-8")
+        except FileNotFoundError:
+            try:
+                with open(self._path(digest, ".zz"), "rb") as file:
+                    text = zlib.decompress(file.read()).decode("utf-8")
+            except FileNotFoundError:
+                return None
+
+        self._cache[digest] = text
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return text
+
+
+class ArchivedCopyView(discord.ui.View):
+    """
+    The "View archived copy" button added to a snip's first message.
+
+    The button's custom ID carries the snapshot's digest, so it keeps working
+    after restarts without the view being registered again.
+    """
+
+    def __init__(self, digest: str):
+        super().__init__(timeout=None)
+        self.add_item(discord.ui.Button(
+            label="View archived copy",
+            style=discord.ButtonStyle.secondary,
+            custom_id=f"{ARCHIVE_BUTTON_PREFIX}{digest}",
+        ))
+
+
+class SnapshotArchiver:
+    """
+    Archives a readable text snapshot of each snipped page.
+
+    Snapshots are taken in the background after the thread is created, from
+    the body downloaded while the title was resolved when there is one, and
+    the page is only fetched again when there isn't. Extraction and compression
+    run in a worker thread.
+
+    Parameters:
+        store (SnapshotStore): Where snapshots are saved.
+        bodies (PageBodies): Bodies captured during title resolution.
+        enabled (bool): Whether snips are archived.
+        max_bytes (int): The most of a page read when it has to be fetched again.
+    """
+
+    def __init__(self, store: SnapshotStore = None, bodies: PageBodies = None, enabled: bool = ARCHIVE_SNAPSHOTS,
+                 max_bytes: int = ARCHIVE_MAX_BYTES):
+        self.store = store or snapshot_store
+        self.bodies = bodies or page_bodies
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self._pending: set = set()
+
+    async def _fetch(self, url: str):
+        async with get_session().get(url) as response:
+            if response.status != 200:
+                return None
+            body = bytearray()
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                body += chunk
+                if len(body) >= self.max_bytes:
+                    break
+            return bytes(body[:self.max_bytes]), response.charset
+
+    async def snapshot(self, url: str, title: str, source_url: str = None) -> Optional[str]:
+        """
+        Archive a page's readable text.
+
+        Parameters:
+            url (str): The snipped URL, saved with the snapshot.
+            title (str): The snip's title, saved with the snapshot.
+            source_url (str): The URL the page was fetched from, if different.
+
+        Returns:
+            Optional[str]: The snapshot's digest, or None if the page had no readable text.
+        """
+        page = await self.bodies.take(source_url or url)
+        if page is None and source_url and source_url != url:
+            page = await self.bodies.take(url)
+        if page is None:
+            page = await self._fetch(source_url or url)
+        if page is None:
+            return None
+
+        text = await asyncio.to_thread(extract_readable_text, *page)
+        if not text:
+            return None
+        return await asyncio.to_thread(self.store.put, text, title, url)
+
+    def archive_later(self, thread: discord.Thread, url: str, title: str, source_url: str = None):
+        """
+        Archive a snip's page in the background and add the archived copy button to its thread.
+        """
+        if not self.enabled:
+            return
+
+        async def _archive():
+            try:
+                digest = await self.snapshot(url, title, source_url)
+                if digest:
+                    await thread.get_partial_message(thread.id).edit(view=ArchivedCopyView(digest))
+            except Exception as e:
+                logger.warning("Failed to archive %s: %s", url, e, extra={"url": url})
+
+        task = asyncio.create_task(_archive(), name=f"archive-{thread.id}")
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+
+snapshot_store = SnapshotStore()
+snapshot_archiver = SnapshotArchiver()
@@ -0,0 +1,271 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import List, Optional
+from urllib.parse import parse_qsl, unquote_plus, urlencode, urljoin, urlparse, urlsplit, urlunparse, urlunsplit
+
+import aiohttp
+
+from bot.config import DATA_DIR
+from services.http import get_session
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that only track where a click came from and never change the page.
+TRACKING_PARAMS = frozenset((
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "twclid", "ttclid", "li_fat_id",
+    "igshid", "mc_cid", "mc_eid", "_hsenc", "_hsmi", "mkt_tok", "vero_id", "oly_anon_id", "oly_enc_id",
+    "ref_src", "ref_url", "spm", "si", "share_id", "cmpid",
+))
+TRACKING_PREFIXES = ("utm_", "pk_", "hsa_")
+
+# Domains that only redirect to the real link.
+SHORTENER_DOMAINS = frozenset((
+    "t.co", "bit.ly", "lnkd.in", "tinyurl.com", "ow.ly", "buff.ly", "dlvr.it", "trib.al", "goo.gl",
+    "is.gd", "rebrand.ly", "shorturl.at", "cutt.ly", "tiny.cc", "bitly.com", "amzn.to", "fb.me", "wp.me",
+))
+
+REDIRECT_STATUS_CODES = {301, 302, 303, 307, 308}
+
+# Shortener links never change target, so their chains can be kept for a long time.
+DEFAULT_REDIRECT_TTL = 30 * 24 * 60 * 60
+
+
+def strip_tracking_params(url: str) -> str:
+    """
+    Normalizes a URL into a stable form.
+
+    Tracking parameters and the fragment are removed, the scheme and host are
+    lowercased and default ports are dropped. The remaining query parameters
+    keep their order.
+
+    Parameters:
+        url (str): An absolute URL.
+
+    Returns:
+        str: The normalized URL.
+    """
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+    netloc = parsed.netloc.lower()
+    if (scheme, parsed.port) in (("http", 80), ("https", 443)):
+        netloc = netloc.rsplit(":", 1)[0]
+
+    query = [
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True) if not _is_tracking(key)
+    ]
+    return urlunparse((scheme, netloc, parsed.path or "/", parsed.params, urlencode(query, doseq=True), ""))
+
+
+def remove_tracking_params(url: str) -> str:
+    """
+    Removes tracking parameters from a URL and leaves the rest exactly as written.
+
+    Unlike `strip_tracking_params`, this is meant for the link that gets posted:
+    the fragment, the host's case and the query's own encoding are kept, and a
+    bare `?flag` stays bare.
+
+    Parameters:
+        url (str): An absolute URL.
+
+    Returns:
+        str: The URL without tracking parameters.
+    """
+    parsed = urlsplit(url)
+    if not parsed.query:
+        return url
+
+    query = "&".join(part for part in parsed.query.split("&") if not _is_tracking(unquote_plus(part.split("=", 1)[0])))
+    return urlunsplit(parsed._replace(query=query))
+
+
+def _is_tracking(key: str) -> bool:
+    key = key.lower()
+    return key in TRACKING_PARAMS or key.startswith(TRACKING_PREFIXES)
+
+
+def is_shortener(url: str) -> bool:
+    host = (urlparse(url).hostname or "").lower()
+    return host.removeprefix("www.") in SHORTENER_DOMAINS
+
+
+def choose_canonical(url: str, declared: Optional[str]) -> str:
+    """
+    Picks the page's declared `<link rel=canonical>` over the fetched URL when it is trustworthy.
+
+    A declared canonical is only used when it points at the same site and, for
+    anything other than a homepage, not at the homepage, since misconfigured
+    sites often declare their front page as canonical for every article.
+
+    Parameters:
+        url (str): The canonicalized URL that was fetched.
+        declared (Optional[str]): The absolute canonical URL found in the page head.
+
+    Returns:
+        str: The URL to use as the stable key.
+    """
+    if not declared or not declared.startswith(("http://", "https://")):
+        return url
+
+    declared = strip_tracking_params(declared)
+    fetched_host = (urlparse(url).hostname or "").removeprefix("www.")
+    declared_parsed = urlparse(declared)
+    declared_host = (declared_parsed.hostname or "").removeprefix("www.")
+
+    same_site = (
+        declared_host == fetched_host
+        or declared_host.endswith(f".{fetched_host}")
+        or fetched_host.endswith(f".{declared_host}")
+    )
+    if not same_site:
+        return url
+    if declared_parsed.path in ("", "/") and urlparse(url).path not in ("", "/"):
+        return url
+    return declared
+
+
+class Canonicalizer:
+    """
+    Turns any link to a page into one stable URL for caches, indexes and duplicate checks.
+
+    Tracking parameters are stripped, and shortener links are expanded by
+    following their redirects by hand. The resulting redirect chain is cached
+    under the short link, so the same short link is only ever followed once
+    per `redirect_ttl`, and the cache is persisted to `DATA_DIR`.
+
+    Parameters:
+        cache_path (str): Where redirect chains are persisted.
+        max_redirects (int): Hops followed before giving up on a chain.
+        timeout (float): Seconds allowed for expanding a short link.
+        redirect_ttl (float): Seconds a redirect chain is trusted.
+        max_entries (int): Chains kept before the least recently used are dropped.
+    """
+
+    def __init__(self, cache_path: str = None, max_redirects: int = 10, timeout: float = 0.5,
+                 redirect_ttl: float = DEFAULT_REDIRECT_TTL, max_entries: int = 10000):
+        self.cache_path = cache_path or os.path.join(DATA_DIR, "redirects.json")
+        self.max_redirects = max_redirects
+        self.timeout = timeout
+        self.redirect_ttl = redirect_ttl
+        self.max_entries = max_entries
+
+        # short link -> (redirect chain ending at the final URL, expiry as wall-clock time)
+        self._chains: OrderedDict = OrderedDict()
+        self._pending: dict = {}
+        self._dirty = False
+
+    def chain_for(self, url: str) -> Optional[List[str]]:
+        """
+        Return the cached redirect chain for a short link, or None if unknown or expired.
+        """
+        entry = self._chains.get(url)
+        if entry is None:
+            return None
+
+        chain, expires_at = entry
+        if expires_at < time.time():
+            del self._chains[url]
+            return None
+
+        self._chains.move_to_end(url)
+        return chain
+
+    async def canonicalize(self, url: str) -> str:
+        """
+        Produce the stable form of a validated URL.
+
+        Parameters:
+            url (str): A validated, absolute URL.
+
+        Returns:
+            str: The URL with tracking removed and shorteners expanded. If a short
+            link can't be expanded in time, its stripped form is returned.
+        """
+        url = strip_tracking_params(url)
+        if not is_shortener(url):
+            return url
+
+        chain = self.chain_for(url)
+        if chain is None:
+            # Concurrent snips of the same short link share one expansion.
+            task = self._pending.get(url)
+            if task is None:
+                task = asyncio.create_task(self._follow(url), name="canonical-redirects")
+                self._pending[url] = task
+                task.add_done_callback(lambda done: self._finish_pending(url, done))
+            try:
+                chain = await asyncio.wait_for(asyncio.shield(task), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                logger.info("Timed out expanding short link %s", url, extra={"url": url})
+                return url
+            except (aiohttp.ClientError, ValueError) as e:
+                logger.info("Failed to expand short link %s: %s", url, e, extra={"url": url})
+                return url
+
+        return strip_tracking_params(chain[-1])
+
+    def _finish_pending(self, url: str, task: asyncio.Task):
+        self._pending.pop(url, None)
+        # Retrieve the exception so a failure after the caller timed out isn't reported as unhandled.
+        if not task.cancelled():
+            task.exception()
+
+    async def _follow(self, url: str) -> List[str]:
+        chain = [url]
+        current = url
+        for _ in range(self.max_redirects):
+            # Some shorteners answer HEAD with 405, so GET is used without reading the body.
+            async with get_session().get(current, allow_redirects=False) as response:
+                location = response.headers.get("Location")
+                if response.status not in REDIRECT_STATUS_CODES or not location:
+                    break
+            current = urljoin(current, location)
+            chain.append(current)
+            if not is_shortener(current):
+                break
+
+        self._chains[url] = (chain, time.time() + self.redirect_ttl)
+        self._chains.move_to_end(url)
+        while len(self._chains) > self.max_entries:
+            self._chains.popitem(last=False)
+        self._dirty = True
+        return chain
+
+    def load(self):
+        """
+        Load persisted redirect chains, if any.
+        """
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("Failed to load redirect cache: %s", e)
+            return
+
+        now = time.time()
+        self._chains = OrderedDict(
+            (url, (entry["chain"], entry["expires_at"])) for url, entry in data.items() if entry["expires_at"] > now
+        )
+
+    def save(self):
+        """
+        Persist redirect chains atomically, if any changed since the last save.
+        """
+        if not self._dirty:
+            return
+
+        data = {url: {"chain": chain, "expires_at": expires_at} for url, (chain, expires_at) in self._chains.items()}
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        temp_path = f"{self.cache_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        os.replace(temp_path, self.cache_path)
+        self._dirty = False
+
+
+canonicalizer = Canonicalizer()
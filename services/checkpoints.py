@@ -0,0 +1,61 @@
+import json
+import logging
+import os
+from typing import Optional
+
+from bot.config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointStore:
+    """
+    Small JSON documents recording how far a long-running job has got, so it
+    can resume where it stopped after a crash or restart.
+
+    Parameters:
+        directory (str): Where checkpoint files are kept.
+    """
+
+    def __init__(self, directory: str = None):
+        self.directory = directory or os.path.join(DATA_DIR, "checkpoints")
+
+    def path_for(self, key: str) -> str:
+        safe_key = "".join(char if char.isalnum() or char in "-_." else "_" for char in key)
+        return os.path.join(self.directory, f"{safe_key}.json")
+
+    def load(self, key: str) -> Optional[dict]:
+        """
+        Return the saved state for a job, or None if it has no checkpoint.
+        """
+        try:
+            with open(self.path_for(key), "r", encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Failed to load checkpoint '%s': %s", key, e)
+            return None
+
+    def save(self, key: str, state: dict):
+        """
+        Atomically replace a job's checkpoint.
+        """
+        path = self.path_for(key)
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(state, file)
+        os.replace(temp_path, path)
+
+    def clear(self, key: str):
+        """
+        Remove a finished job's checkpoint.
+        """
+        try:
+            os.remove(self.path_for(key))
+        except FileNotFoundError:
+            pass
+
+
+checkpoints = CheckpointStore()
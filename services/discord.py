@@ -1,46 +1,55 @@
+import asyncio
 import discord
-from typing import List
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
 
-from bot.util import build_mentioned_users_string
-from constants.messages import EMPTY_LINE_SYMBOL
+from bot.metadata import PageMetadata
+from bot.util import build_mentioned_users_string, get_domain_from_url, truncate_string
+from services.guild_config import guild_config
+from services.search_index import snip_index
+from services.snip_records import (
+    AUTHOR_PREFIX, MENTIONS_FIELD, SITE_NAME_SEPARATOR, SNIPPED_LINK_FIELD, USER_PROFILE_URL, SnipRecord,
+)
+from services.thread_templates import ThreadTemplates
+from services.title_normalizer import MAX_TITLE_LENGTH, truncate_title
+
+logger = logging.getLogger(__name__)
+
+# Discord's limits on tags per forum and per thread.
+MAX_FORUM_TAGS = 20
+MAX_THREAD_TAGS = 5
+
+# Shared by every snip that mentions nobody; AllowedMentions objects aren't modified when sent.
+NO_MENTIONS = discord.AllowedMentions.none()
+
+# Tag edits replace a forum's whole tag list, so edits to the same forum are serialized.
+_forum_tag_locks: Dict[int, asyncio.Lock] = {}
 
 
 async def create_forum_thread(
         channel: discord.ForumChannel = None,
         title: str = None,
         url: str = None,
+        metadata: PageMetadata = None,
         mention: discord.User = None,
         author: discord.User = None,
         additional_mentions: List[discord.User] = None,
         message: str = "",
         applied_tags: List[discord.ForumTag] = None,
+        templates: ThreadTemplates = None,
+        canonical_url: str = None,
 ) -> discord.Thread:
-    try:
-        embed = discord.Embed(
-            title=title,
-            url=url,
-            color=discord.Color.green(),
-        )
-        embed.set_author(name=f"Snipped by {author.display_name}", icon_url=author.avatar.url if author.avatar else None)
-        embed.add_field(name="Snipped Link", value=url, inline=True)
-        embed.set_footer(text=f"Snipped by {author.display_name}")
-
-        if mention:
-            mentions = build_mentioned_users_string(mention, additional_mentions)
-            embed.add_field(name="Mentions", value=mentions, inline=False)
-
-        def _construct_message():
-            parts = [
-                EMPTY_LINE_SYMBOL,
-                f"**{title.capitalize()}**",
-                f"{message}" if message else "",
-                f"Snipped URL:\n{url}",
-                f"Snipped by:\n{author.mention}",
-            ]
-
-            return "\n\n".join(filter(bool, parts))
+    """
+    Post a snip as a new forum thread, laid out by the guild's thread templates.
 
-        content_message = _construct_message()
+    Parameters:
+        canonical_url (str): The stable form of `url` the snip is indexed under; defaults to `url`.
+        templates (ThreadTemplates): Templates to use instead of the guild's.
+    """
+    try:
+        if templates is None:
+            templates = guild_config.templates(channel.guild.id)
 
         # Combine all mentioned users for notifications
         all_mentioned_users = []
@@ -48,18 +57,38 @@ async def create_forum_thread(
             all_mentioned_users.append(mention)
         if additional_mentions:
             all_mentioned_users.extend(additional_mentions)
+        allowed_mentions = discord.AllowedMentions(users=all_mentioned_users) if all_mentioned_users else NO_MENTIONS
+
+        fields = _template_fields(title, url, metadata, message, author, mention, additional_mentions)
+        name = truncate_title(_upper_first(templates.name.render(fields)) or fields["title"], MAX_TITLE_LENGTH)
+
+        embed = discord.Embed(
+            title=templates.embed_title.render(fields) or None,
+            url=url,
+            color=discord.Color.green(),
+        )
+        embed.set_author(name=f"{AUTHOR_PREFIX}{author.display_name}", url=USER_PROFILE_URL.format(author.id),
+                         icon_url=author.avatar.url if author.avatar else None)
+        embed.add_field(name=SNIPPED_LINK_FIELD, value=url, inline=True)
+        footer = templates.embed_footer.render(fields)
+        embed.set_footer(text=footer)
+        if metadata:
+            _apply_link_preview(embed, metadata, footer)
+
+        if fields["mentions"]:
+            embed.add_field(name=MENTIONS_FIELD, value=fields["mentions"], inline=False)
 
         thread = await channel.create_thread(
-            content=content_message,
-            name=title.capitalize(),
-            allowed_mentions=discord.AllowedMentions(users=all_mentioned_users) if all_mentioned_users else discord.AllowedMentions.none(),
+            content=templates.body.render(fields),
+            name=name,
+            allowed_mentions=allowed_mentions,
             applied_tags=applied_tags if applied_tags else None
         )
 
         if thread:
             await thread.send(
                 embed=embed,
-                allowed_mentions=discord.AllowedMentions(users=all_mentioned_users) if all_mentioned_users else discord.AllowedMentions.none()
+                allowed_mentions=allowed_mentions
             )
 
         """
@@ -72,6 +101,163 @@ async def create_forum_thread(
             temp_message = await thread.send(content=mention_message)
             await temp_message.delete()
 
+        if snip_index.is_open:
+            # The thread is already posted, so a broken index must not fail the snip.
+            try:
+                snip_index.add(SnipRecord(
+                    thread_id=thread.id,
+                    guild_id=channel.guild.id,
+                    channel_id=channel.id,
+                    title=title,
+                    url=canonical_url or url,
+                    author_id=author.id,
+                    author_name=author.display_name,
+                    message=message or None,
+                    mentions=[user.id for user in all_mentioned_users if hasattr(user, "id")],
+                    tags=[tag.name for tag in applied_tags or []],
+                    created_at=datetime.now(timezone.utc).isoformat(),
+                    description=metadata.description if metadata else None,
+                    site_name=metadata.site_name if metadata else None,
+                    image=metadata.image if metadata else None,
+                    jump_url=thread.jump_url,
+                ))
+            except Exception as e:
+                logger.warning("Failed to index snip thread %s: %s", thread.id, e, extra={"url": url})
+
         return thread
     except discord.HTTPException as e:
         raise Exception(f"Error creating thread: {str(e)}")
+
+
+def _upper_first(text: str) -> str:
+    """
+    Uppercase the first letter only; `str.capitalize` would lowercase the rest, turning "GitHub" into "Github".
+    """
+    return text[:1].upper() + text[1:]
+
+
+def _template_fields(title: str, url: str, metadata: Optional[PageMetadata], message: str, author: discord.User,
+                     mention: Optional[discord.User], additional_mentions: Optional[List[discord.User]]) -> dict:
+    """
+    The values a snip's templates are rendered with; missing values are empty strings.
+    """
+    return {
+        "title": _upper_first(title),
+        "url": url,
+        "domain": get_domain_from_url(url) or "",
+        "message": message or "",
+        "author": author.mention,
+        "author_name": author.display_name,
+        "mentions": build_mentioned_users_string(mention, additional_mentions) if mention else "",
+        "site_name": (metadata.site_name if metadata else None) or "",
+        "description": (metadata.description if metadata else None) or "",
+    }
+
+
+def _apply_link_preview(embed: discord.Embed, metadata: PageMetadata, footer: str):
+    """
+    Adds the page's description, image, site name and publish date to a snip embed.
+    """
+    if metadata.description:
+        embed.description = truncate_string(metadata.description, 350)
+    if metadata.image:
+        embed.set_image(url=metadata.image)
+    if metadata.site_name:
+        embed.set_footer(text=f"{metadata.site_name}{SITE_NAME_SEPARATOR}{footer}" if footer else metadata.site_name,
+                         icon_url=metadata.favicon)
+    if metadata.published_time:
+        try:
+            embed.timestamp = datetime.fromisoformat(metadata.published_time.replace("Z", "+00:00"))
+        except ValueError:
+            pass
+
+
+def visible_forum_ids(guild: discord.Guild, member: discord.Member) -> Set[int]:
+    """
+    The IDs of a guild's forum channels a member can view; snips in other forums must not be shown to them.
+    """
+    return {channel.id for channel in guild.forum_channels if channel.permissions_for(member).view_channel}
+
+
+def forum_tag_lock(channel: discord.ForumChannel) -> asyncio.Lock:
+    """
+    Return the lock that serializes edits to a forum's tag list.
+    """
+    return _forum_tag_locks.setdefault(channel.id, asyncio.Lock())
+
+
+async def fetch_forum_tags(channel: discord.ForumChannel) -> List[discord.ForumTag]:
+    """
+    Fetch a forum's current tags from Discord.
+
+    The cached channel only catches up with a tag edit once the gateway
+    reports it, so an edit made straight after another one has to start from
+    the fetched list or it would undo the first.
+    """
+    fresh = await channel.guild.fetch_channel(channel.id)
+    return list(fresh.available_tags)
+
+
+async def ensure_forum_tag(channel: discord.ForumChannel, name: str, emoji: str = "",
+                           moderated: bool = False) -> discord.ForumTag:
+    """
+    Return the forum's tag with the given name, creating it if it doesn't exist yet.
+
+    Discord only accepts a forum's full tag list, so the new tag is appended to
+    the existing ones and the channel is edited with the combined list.
+
+    Parameters:
+        channel (discord.ForumChannel): The forum.
+        name (str): The tag name, matched case-insensitively.
+        emoji (str): Emoji for a newly created tag.
+        moderated (bool): Whether a newly created tag requires moderation.
+
+    Returns:
+        discord.ForumTag: The existing or newly created tag.
+
+    Raises:
+        ValueError: If the forum already has the maximum number of tags.
+    """
+    existing = next((tag for tag in channel.available_tags if tag.name.lower() == name.lower()), None)
+    if existing:
+        return existing
+
+    async with forum_tag_lock(channel):
+        tags = await fetch_forum_tags(channel)
+        existing = next((tag for tag in tags if tag.name.lower() == name.lower()), None)
+        if existing:
+            return existing
+
+        if len(tags) >= MAX_FORUM_TAGS:
+            raise ValueError(f"Forum channel {channel.mention} has reached the maximum of {MAX_FORUM_TAGS} tags.")
+
+        # emoji is required but uses empty string for tags without emojis
+        new_tag = discord.ForumTag(name=name, emoji=emoji or "", moderated=moderated)
+        updated = await channel.edit(available_tags=tags + [new_tag])
+        tags = updated.available_tags if updated else tags
+        return next((tag for tag in tags if tag.name.lower() == name.lower()), new_tag)
+
+
+async def set_thread_tag(thread: discord.Thread, tag: discord.ForumTag, present: bool = True) -> bool:
+    """
+    Add a tag to, or remove it from, a forum thread.
+
+    Archived threads can't be edited, so they are unarchived for the edit and
+    archived again afterwards.
+
+    Returns:
+        bool: Whether the thread's tags changed. A thread that already has the
+        maximum number of tags is left unchanged.
+    """
+    tags = list(thread.applied_tags)
+    has_tag = any(applied.id == tag.id for applied in tags)
+    if present == has_tag or (present and len(tags) >= MAX_THREAD_TAGS):
+        return False
+
+    tags = tags + [tag] if present else [applied for applied in tags if applied.id != tag.id]
+    if thread.archived:
+        await thread.edit(archived=False, applied_tags=tags)
+        await thread.edit(archived=True)
+    else:
+        await thread.edit(applied_tags=tags)
+    return True
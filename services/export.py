@@ -0,0 +1,165 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+from datetime import datetime
+from typing import Awaitable, Callable, List, NamedTuple, Optional
+
+import discord
+
+from bot.config import DATA_DIR
+from services.checkpoints import CheckpointStore, checkpoints
+from services.snip_records import SnipRecord, read_snip_record
+
+EXPORT_FORMATS = ("jsonl", "csv")
+
+
+class ExportResult(NamedTuple):
+    path: str
+    records: int
+    threads: int
+
+
+class ForumExporter:
+    """
+    Streams every snip in a forum into a gzip-compressed JSONL or CSV file.
+
+    Threads are read one page at a time, active threads first and then archived
+    threads from newest to oldest, so memory stays flat however large the forum
+    is. Each page is appended to the file as its own gzip member and a
+    checkpoint records the file size and the archive cursor afterwards. A
+    restarted export truncates the file back to the last checkpoint and carries
+    on from the cursor, without duplicating or losing records.
+
+    Parameters:
+        store (CheckpointStore): Where export progress is recorded.
+        directory (str): Where export files are written.
+        batch_size (int): Threads written per gzip member and checkpoint.
+        concurrency (int): Threads whose messages are fetched at once.
+    """
+
+    def __init__(self, store: CheckpointStore = None, directory: str = None,
+                 batch_size: int = 100, concurrency: int = 4):
+        self.store = store or checkpoints
+        self.directory = directory or os.path.join(DATA_DIR, "exports")
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self._running: set = set()
+
+    @staticmethod
+    def key_for(channel: discord.ForumChannel, fmt: str) -> str:
+        return f"export-{channel.guild.id}-{channel.id}-{fmt}"
+
+    def is_running(self, channel: discord.ForumChannel, fmt: str) -> bool:
+        return self.key_for(channel, fmt) in self._running
+
+    async def export(self, channel: discord.ForumChannel, fmt: str = "jsonl", restart: bool = False,
+                     progress: Optional[Callable[[dict], Awaitable[None]]] = None) -> ExportResult:
+        """
+        Export a forum's snips, resuming a previous unfinished export unless told to restart.
+
+        Parameters:
+            channel (discord.ForumChannel): The forum to export.
+            fmt (str): One of `EXPORT_FORMATS`.
+            restart (bool): Discard any saved progress and start over.
+            progress (Optional[Callable]): Awaited with the export state after every page.
+
+        Returns:
+            ExportResult: The finished file and how many records and threads it covers.
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+
+        key = self.key_for(channel, fmt)
+        if key in self._running:
+            raise RuntimeError("An export of this forum is already running.")
+        self._running.add(key)
+
+        try:
+            path = os.path.join(self.directory, f"{key}.{fmt}.gz")
+            state = None if restart else self.store.load(key)
+            if state is None:
+                state = {"phase": "active", "before": None, "records": 0, "threads": 0, "offset": 0}
+            await asyncio.to_thread(self._truncate, path, state["offset"])
+
+            if state["phase"] == "active":
+                # Active threads come from the cache, so this phase is just redone if interrupted.
+                active = list(channel.threads)
+                for start in range(0, len(active), self.batch_size):
+                    await self._write_batch(path, fmt, active[start:start + self.batch_size], state)
+                    if progress:
+                        await progress(state)
+                state["phase"] = "archived"
+                self.store.save(key, state)
+
+            before = datetime.fromisoformat(state["before"]) if state["before"] else None
+            batch = []
+            async for thread in channel.archived_threads(limit=None, before=before):
+                batch.append(thread)
+                if len(batch) >= self.batch_size:
+                    await self._checkpointed_batch(key, path, fmt, batch, state, progress)
+                    batch = []
+            if batch:
+                await self._checkpointed_batch(key, path, fmt, batch, state, progress)
+
+            self.store.clear(key)
+            return ExportResult(path, state["records"], state["threads"])
+        finally:
+            self._running.discard(key)
+
+    async def _checkpointed_batch(self, key: str, path: str, fmt: str, threads: List[discord.Thread],
+                                  state: dict, progress):
+        await self._write_batch(path, fmt, threads, state)
+        archived_at = threads[-1].archive_timestamp
+        state["before"] = archived_at.isoformat() if archived_at else state["before"]
+        self.store.save(key, state)
+        if progress:
+            await progress(state)
+
+    async def _write_batch(self, path: str, fmt: str, threads: List[discord.Thread], state: dict):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _record(thread: discord.Thread) -> Optional[SnipRecord]:
+            async with semaphore:
+                return await read_snip_record(thread)
+
+        records = [record for record in await asyncio.gather(*map(_record, threads)) if record]
+        data = _serialize(records, fmt, header=state["offset"] == 0)
+        state["offset"] = await asyncio.to_thread(_append_member, path, data)
+        state["records"] += len(records)
+        state["threads"] += len(threads)
+
+    @staticmethod
+    def _truncate(path: str, offset: int):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "ab") as file:
+            file.truncate(offset)
+
+
+def _serialize(records: List[SnipRecord], fmt: str, header: bool) -> bytes:
+    if fmt == "jsonl":
+        return "".join(json.dumps(record.to_dict(), ensure_ascii=False) + "\n" for record in records).encode("utf-8")
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=SnipRecord.FIELDS)
+    if header:
+        writer.writeheader()
+    writer.writerows(record.to_row() for record in records)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _append_member(path: str, data: bytes) -> int:
+    """
+    Append `data` as a new gzip member; concatenated members decompress as one stream.
+
+    Returns:
+        int: The file's size afterwards.
+    """
+    with open(path, "ab") as file:
+        file.write(gzip.compress(data))
+        return file.tell()
+
+
+forum_exporter = ForumExporter()
@@ -0,0 +1,129 @@
+import html
+import re
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import List, NamedTuple, Optional
+from xml.etree.ElementTree import Element, XMLPullParser
+
+_ENTRY_TAGS = ("item", "entry")
+_SUMMARY_TAGS = ("summary", "description", "content")
+_DATE_TAGS = ("published", "pubDate", "updated", "date")
+_MARKUP = re.compile(r"<[^>]+>")
+
+
+class FeedEntry(NamedTuple):
+    entry_id: str
+    title: Optional[str]
+    url: Optional[str]
+    published: Optional[float]
+    summary: Optional[str]
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _clean_text(text: Optional[str]) -> Optional[str]:
+    if not text:
+        return None
+    text = " ".join(html.unescape(_MARKUP.sub(" ", text)).split())
+    return text or None
+
+
+def parse_feed_date(text: Optional[str]) -> Optional[float]:
+    """
+    Parse an RSS (RFC 822) or Atom (ISO 8601) date into a Unix timestamp.
+    """
+    if not text:
+        return None
+    text = text.strip()
+    try:
+        parsed = parsedate_to_datetime(text)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _entry_from_element(element: Element) -> Optional[FeedEntry]:
+    title = url = entry_id = summary = None
+    published = None
+    for child in element:
+        name = _local_name(child.tag)
+        if name == "title":
+            title = _clean_text(child.text)
+        elif name == "link":
+            # RSS puts the URL in the text, Atom in the href of the alternate link.
+            href = child.get("href")
+            if href and child.get("rel", "alternate") == "alternate":
+                url = url or href.strip()
+            elif child.text and child.text.strip():
+                url = url or child.text.strip()
+        elif name in ("guid", "id"):
+            entry_id = (child.text or "").strip() or None
+        elif name in _SUMMARY_TAGS and summary is None:
+            summary = _clean_text(child.text)
+        elif name in _DATE_TAGS and published is None:
+            published = parse_feed_date(child.text)
+
+    entry_id = entry_id or url or title
+    if not entry_id:
+        return None
+    return FeedEntry(entry_id, title, url, published, summary)
+
+
+class FeedParser:
+    """
+    Incremental RSS and Atom parser.
+
+    The response body is fed in as it arrives and each entry is returned as
+    soon as its closing tag has been read, after which its element is cleared,
+    so memory stays flat and a caller can stop reading once it has enough.
+    YouTube channel and playlist feeds are plain Atom.
+    """
+
+    def __init__(self):
+        self._parser = XMLPullParser(events=("start", "end"))
+        self._entry_depth = 0
+        self.title: Optional[str] = None
+
+    def feed(self, data: bytes) -> List[FeedEntry]:
+        """
+        Parse the next chunk of the document.
+
+        Returns:
+            List[FeedEntry]: Entries completed within this chunk.
+
+        Raises:
+            xml.etree.ElementTree.ParseError: If the document isn't well-formed XML.
+        """
+        self._parser.feed(data)
+        return self._read_events()
+
+    def close(self) -> List[FeedEntry]:
+        self._parser.close()
+        return self._read_events()
+
+    def _read_events(self) -> List[FeedEntry]:
+        entries = []
+        for event, element in self._parser.read_events():
+            name = _local_name(element.tag)
+            if event == "start":
+                if name in _ENTRY_TAGS:
+                    self._entry_depth += 1
+                continue
+
+            if name in _ENTRY_TAGS:
+                self._entry_depth -= 1
+                entry = _entry_from_element(element)
+                if entry:
+                    entries.append(entry)
+                element.clear()
+            elif name == "title" and not self._entry_depth and self.title is None:
+                self.title = _clean_text(element.text)
+        return entries
+
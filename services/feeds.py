@@ -0,0 +1,473 @@
+import asyncio
+import logging
+import os
+import random
+import re
+import sqlite3
+import statistics
+import time
+from typing import Iterable, List, NamedTuple, Optional
+from urllib.parse import parse_qs, urlparse
+from xml.etree.ElementTree import ParseError
+
+import aiohttp
+import discord
+
+from bot.config import DATA_DIR, FEED_MAX_INTERVAL, FEED_MIN_INTERVAL
+from bot.metadata import PageMetadata
+from bot.util import truncate_string
+from services.canonical import canonicalizer, remove_tracking_params
+from services.feed_parser import FeedEntry, FeedParser
+from services.http import USER_AGENT
+from services.publisher import Publisher, PublisherClosed, publisher
+from services.title_cache import TitleCache, title_cache
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS feeds (
+    id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT,
+    tags TEXT,
+    created_by INTEGER,
+    etag TEXT,
+    last_modified TEXT,
+    interval REAL NOT NULL,
+    next_poll REAL NOT NULL,
+    last_polled REAL,
+    failures INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (channel_id, url)
+);
+CREATE INDEX IF NOT EXISTS feeds_next_poll ON feeds (next_poll);
+
+CREATE TABLE IF NOT EXISTS feed_entries (
+    feed_id INTEGER NOT NULL,
+    entry_id TEXT NOT NULL,
+    seen_at REAL NOT NULL,
+    PRIMARY KEY (feed_id, entry_id)
+) WITHOUT ROWID;
+"""
+
+_FEED_COLUMNS = ("id", "guild_id", "channel_id", "url", "title", "tags", "created_by", "etag", "last_modified",
+                 "interval", "next_poll", "last_polled", "failures")
+
+_YOUTUBE_CHANNEL = re.compile(r"^/channel/(UC[\w-]+)")
+_YOUTUBE_FEED = "https://www.youtube.com/feeds/videos.xml"
+
+
+class Feed(NamedTuple):
+    id: int
+    guild_id: int
+    channel_id: int
+    url: str
+    title: Optional[str]
+    tags: List[str]
+    created_by: Optional[int]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    interval: float
+    next_poll: float
+    last_polled: Optional[float]
+    failures: int
+
+
+class PollResult(NamedTuple):
+    entries: int
+    new: int
+    published: int
+    not_modified: bool
+
+
+def normalize_feed_url(url: str) -> str:
+    """
+    Turn a YouTube channel or playlist URL into its Atom feed; other URLs are returned unchanged.
+    """
+    parsed = urlparse(url)
+    if parsed.netloc.lower().removeprefix("www.").removeprefix("m.") != "youtube.com":
+        return url
+
+    channel = _YOUTUBE_CHANNEL.match(parsed.path)
+    if channel:
+        return f"{_YOUTUBE_FEED}?channel_id={channel.group(1)}"
+    playlist = parse_qs(parsed.query).get("list")
+    if parsed.path == "/playlist" and playlist:
+        return f"{_YOUTUBE_FEED}?playlist_id={playlist[0]}"
+    return url
+
+
+def next_interval(current: float, entries: List[FeedEntry], found_new: bool,
+                  minimum: float = FEED_MIN_INTERVAL, maximum: float = FEED_MAX_INTERVAL) -> float:
+    """
+    Work out how long to wait before polling a feed again.
+
+    The typical gap between the feed's most recent entries is its observed
+    update rate. A poll that found something new comes back after half that
+    gap; one that found nothing backs off by half again, up to the gap. Feeds
+    without dates halve or grow their interval instead.
+    """
+    published = sorted((entry.published for entry in entries if entry.published), reverse=True)[:10]
+    gaps = [newer - older for newer, older in zip(published, published[1:]) if newer > older]
+    typical_gap = statistics.median(gaps) if gaps else None
+
+    if found_new:
+        interval = typical_gap / 2 if typical_gap else current / 2
+    else:
+        interval = current * 1.5
+        if typical_gap:
+            interval = min(interval, max(typical_gap, current))
+    return min(max(interval, minimum), maximum)
+
+
+class FeedStore:
+    """
+    Feed subscriptions and the entries already seen from each, backed by SQLite.
+
+    Parameters:
+        path (str): The SQLite database file.
+        keep_entries (int): Seen entry IDs remembered per feed.
+    """
+
+    def __init__(self, path: str = None, keep_entries: int = 500):
+        self.path = path or os.path.join(DATA_DIR, "feeds.db")
+        self.keep_entries = keep_entries
+        self._connection: Optional[sqlite3.Connection] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._connection is not None
+
+    def open(self):
+        if self._connection is not None:
+            return
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _feeds(self, where: str, parameters: tuple) -> List[Feed]:
+        rows = self._connection.execute(f"SELECT {', '.join(_FEED_COLUMNS)} FROM feeds WHERE {where}", parameters)
+        return [Feed(*row[:5], row[5].split("|") if row[5] else [], *row[6:]) for row in rows]
+
+    def subscribe(self, guild_id: int, channel_id: int, url: str, tags: List[str] = None,
+                  created_by: int = None) -> Optional[Feed]:
+        """
+        Subscribe a forum to a feed, due for its first poll straight away.
+
+        Returns:
+            Optional[Feed]: The new subscription, or None if the forum already follows the feed.
+        """
+        with self._connection:
+            cursor = self._connection.execute(
+                "INSERT OR IGNORE INTO feeds (guild_id, channel_id, url, tags, created_by, interval, next_poll) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (guild_id, channel_id, url, "|".join(tags or []), created_by, FEED_MIN_INTERVAL, time.time()),
+            )
+        if not cursor.rowcount:
+            return None
+        return self._feeds("id = ?", (cursor.lastrowid,))[0]
+
+    def unsubscribe(self, channel_id: int, url: str) -> bool:
+        with self._connection:
+            row = self._connection.execute(
+                "SELECT id FROM feeds WHERE channel_id = ? AND url = ?", (channel_id, url)
+            ).fetchone()
+            if not row:
+                return False
+            self._connection.execute("DELETE FROM feed_entries WHERE feed_id = ?", row)
+            self._connection.execute("DELETE FROM feeds WHERE id = ?", row)
+        return True
+
+    def list(self, guild_id: int, channel_id: int = None) -> List[Feed]:
+        if channel_id is None:
+            return self._feeds("guild_id = ? ORDER BY channel_id, url", (guild_id,))
+        return self._feeds("guild_id = ? AND channel_id = ? ORDER BY url", (guild_id, channel_id))
+
+    def due(self, now: float, limit: int) -> List[Feed]:
+        """
+        Return the feeds whose next poll is due, most overdue first.
+        """
+        return self._feeds("next_poll <= ? ORDER BY next_poll LIMIT ?", (now, limit))
+
+    def next_due(self) -> Optional[float]:
+        return self._connection.execute("SELECT MIN(next_poll) FROM feeds").fetchone()[0]
+
+    def unseen(self, feed_id: int, entry_ids: Iterable[str]) -> set:
+        entry_ids = list(entry_ids)
+        seen = set()
+        # Stay under SQLite's limit on bound parameters.
+        for start in range(0, len(entry_ids), 500):
+            chunk = entry_ids[start:start + 500]
+            seen.update(row[0] for row in self._connection.execute(
+                f"SELECT entry_id FROM feed_entries WHERE feed_id = ? AND entry_id IN ({', '.join('?' for _ in chunk)})",
+                [feed_id, *chunk],
+            ))
+        return set(entry_ids) - seen
+
+    def mark_seen(self, feed_id: int, entry_ids: Iterable[str], now: float):
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO feed_entries (feed_id, entry_id, seen_at) VALUES (?, ?, ?)",
+                [(feed_id, entry_id, now) for entry_id in entry_ids],
+            )
+            self._connection.execute(
+                "DELETE FROM feed_entries WHERE feed_id = ? AND entry_id NOT IN "
+                "(SELECT entry_id FROM feed_entries WHERE feed_id = ? ORDER BY seen_at DESC LIMIT ?)",
+                (feed_id, feed_id, self.keep_entries),
+            )
+
+    def forget(self, feed_id: int, entry_ids: Iterable[str]):
+        """
+        Mark entries unseen again, so the next poll treats them as new.
+        """
+        with self._connection:
+            self._connection.executemany(
+                "DELETE FROM feed_entries WHERE feed_id = ? AND entry_id = ?",
+                [(feed_id, entry_id) for entry_id in entry_ids],
+            )
+
+    def record_poll(self, feed_id: int, interval: float, next_poll: float, failures: int, polled_at: float = None,
+                    etag: str = None, last_modified: str = None, title: str = None):
+        """
+        Save the outcome of a poll. Validators and title are only replaced when given.
+        """
+        with self._connection:
+            self._connection.execute(
+                "UPDATE feeds SET interval = ?, next_poll = ?, failures = ?, "
+                "last_polled = COALESCE(?, last_polled), etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified), title = COALESCE(?, title) WHERE id = ?",
+                (interval, next_poll, failures, polled_at, etag, last_modified, title, feed_id),
+            )
+
+
+class FeedWatcher:
+    """
+    Polls subscribed feeds and snips their new entries into the subscribed forums.
+
+    Polls are conditional GETs on the feed's ETag and Last-Modified, and each
+    feed's interval adapts to how often it has been publishing (see
+    `next_interval`), so hundreds of quiet feeds cost little more than a
+    handful of 304s an hour. Responses are parsed as they stream in and
+    reading stops once `max_entries` entries have been seen.
+
+    Entries are published through the paced publisher with their titles taken
+    from the feed, so no page is fetched. The first poll of a new subscription
+    only records what is already in the feed. Each entry is marked seen just
+    before it is published, so a crash can drop an entry but never post it
+    twice, while entries left over when the bot shuts down stay new.
+
+    Parameters:
+        store (FeedStore): Subscriptions and seen entries.
+        queue (Publisher): Paces thread creation.
+        cache (TitleCache): Seeded with each entry's title.
+        concurrency (int): Feeds polled at once.
+        max_entries (int): Entries read from a single response.
+        max_new (int): Entries published from a single poll.
+        max_bytes (int): Bytes read from a single response.
+    """
+
+    def __init__(self, store: FeedStore = None, queue: Publisher = None, cache: TitleCache = None,
+                 concurrency: int = 10, max_entries: int = 50, max_new: int = 10, max_bytes: int = 5 * 1024 * 1024):
+        self.store = store or feed_store
+        self.queue = queue if queue is not None else publisher
+        self.cache = cache or title_cache
+        self.concurrency = concurrency
+        self.max_entries = max_entries
+        self.max_new = max_new
+        self.max_bytes = max_bytes
+
+        self._bot: Optional[discord.Bot] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, bot: discord.Bot):
+        """
+        Start polling feeds in the background. Must be called from inside the running loop.
+        """
+        self._bot = bot
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run_loop(), name="feed-watcher")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Separate from the shared session so a burst of polls never holds up /snip.
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=2),
+                timeout=aiohttp.ClientTimeout(total=20, sock_connect=5),
+                headers={"User-Agent": USER_AGENT},
+                trust_env=True,
+            )
+        return self._session
+
+    async def _run_loop(self):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _poll(feed: Feed):
+            async with semaphore:
+                try:
+                    await self.poll(feed)
+                except PublisherClosed:
+                    raise
+                except Exception as e:
+                    logger.warning("Failed to poll feed %s: %s", feed.url, e, extra={"url": feed.url})
+
+        while True:
+            if not self.store.is_open:
+                await asyncio.sleep(60)
+                continue
+
+            due = self.store.due(time.time(), limit=self.concurrency * 5)
+            if due:
+                try:
+                    await asyncio.gather(*map(_poll, due))
+                except PublisherClosed:
+                    logger.info("Stopped polling feeds: the bot is shutting down.")
+                    return
+                continue
+
+            next_due = self.store.next_due()
+            await asyncio.sleep(min(max(next_due - time.time(), 1), 60) if next_due else 60)
+
+    async def poll(self, feed: Feed) -> PollResult:
+        """
+        Fetch a feed and publish its new entries.
+
+        A failed fetch backs the feed off before the error is raised.
+
+        Returns:
+            PollResult: How many entries were read, new and published.
+        """
+        now = time.time()
+        try:
+            response_etag, response_modified, title, entries = await self._fetch(feed)
+        except Exception:
+            interval = min(feed.interval * 2, FEED_MAX_INTERVAL)
+            self.store.record_poll(feed.id, interval, now + _jittered(interval), feed.failures + 1)
+            raise
+
+        if entries is None:
+            interval = next_interval(feed.interval, [], False)
+            self.store.record_poll(feed.id, interval, now + _jittered(interval), 0, polled_at=now)
+            return PollResult(0, 0, 0, True)
+
+        new_ids = self.store.unseen(feed.id, (entry.entry_id for entry in entries))
+        new_entries = [entry for entry in entries if entry.entry_id in new_ids]
+        to_publish = new_entries[:self.max_new] if feed.last_polled is not None else []
+        self.store.mark_seen(feed.id, new_ids.difference(entry.entry_id for entry in to_publish), now)
+
+        published = await self._publish(feed, title or feed.title, to_publish, now) if to_publish else 0
+
+        interval = next_interval(feed.interval, entries, bool(new_entries))
+        self.store.record_poll(feed.id, interval, now + _jittered(interval), 0, polled_at=now,
+                               etag=response_etag, last_modified=response_modified, title=title)
+        return PollResult(len(entries), len(new_entries), published, False)
+
+    async def _fetch(self, feed: Feed):
+        headers = {}
+        if feed.etag:
+            headers["If-None-Match"] = feed.etag
+        if feed.last_modified:
+            headers["If-Modified-Since"] = feed.last_modified
+
+        async with self._get_session().get(feed.url, headers=headers) as response:
+            if response.status == 304:
+                return None, None, None, None
+            response.raise_for_status()
+
+            parser = FeedParser()
+            entries: List[FeedEntry] = []
+            size = 0
+            truncated = False
+            async for chunk in response.content.iter_chunked(16 * 1024):
+                entries.extend(parser.feed(chunk))
+                size += len(chunk)
+                if len(entries) >= self.max_entries or size >= self.max_bytes:
+                    truncated = True
+                    break
+            if not truncated:
+                try:
+                    entries.extend(parser.close())
+                except ParseError:
+                    if not entries:
+                        raise
+            return response.headers.get("ETag"), response.headers.get("Last-Modified"), parser.title, \
+                entries[:self.max_entries]
+
+    async def _publish(self, feed: Feed, feed_title: Optional[str], entries: List[FeedEntry], now: float) -> int:
+        """
+        Publish new entries, marking each seen just before it is published.
+
+        Raises:
+            PublisherClosed: If the bot started shutting down; the entries not
+                yet published stay unseen for the next poll.
+        """
+        channel = self._bot.get_channel(feed.channel_id) if self._bot else None
+        if channel is None:
+            logger.warning("Feed %s is subscribed to a channel that no longer exists: %s", feed.url, feed.channel_id,
+                           extra={"url": feed.url})
+            self.store.mark_seen(feed.id, (entry.entry_id for entry in entries), now)
+            return 0
+
+        applied_tags = [tag for tag in channel.available_tags if tag.name in feed.tags]
+        published = 0
+        # Feeds list their newest entries first; publish in the order they were posted.
+        for entry in sorted(reversed(entries), key=lambda entry: entry.published or 0):
+            self.store.mark_seen(feed.id, [entry.entry_id], now)
+            if not entry.url:
+                continue
+            # Keyed like a /snip of the same link, which usually arrives without the feed's utm_* parameters.
+            canonical_url = await canonicalizer.canonicalize(entry.url)
+            metadata = PageMetadata(
+                title=truncate_string(entry.title or entry.url),
+                description=entry.summary,
+                site_name=feed_title,
+                canonical_url=canonical_url,
+            )
+            self.cache.set(canonical_url, metadata)
+            try:
+                await self.queue.publish(
+                    channel=channel,
+                    title=metadata.title,
+                    url=remove_tracking_params(entry.url),
+                    canonical_url=canonical_url,
+                    metadata=metadata,
+                    author=self._bot.user,
+                    applied_tags=applied_tags or None,
+                )
+                published += 1
+            except PublisherClosed:
+                self.store.forget(feed.id, [entry.entry_id])
+                raise
+            except Exception as e:
+                logger.warning("Failed to publish feed entry %s: %s", entry.url, e, extra={"url": entry.url})
+        return published
+
+
+def _jittered(interval: float) -> float:
+    # Spread polls out so feeds subscribed together don't stay in lockstep.
+    return interval * random.uniform(0.9, 1.1)
+
+
+feed_store = FeedStore()
+feed_watcher = FeedWatcher()
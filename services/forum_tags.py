@@ -0,0 +1,174 @@
+import json
+import re
+from typing import List, NamedTuple, Optional, Tuple
+
+import discord
+
+from services.discord import MAX_FORUM_TAGS, fetch_forum_tags, forum_tag_lock
+
+MAX_TAG_NAME_LENGTH = 20
+
+_LEADING_EMOJI = re.compile(r"^(<a?:\w+:\d+>|[^\w\s<]+)\s+(.+)$")
+_MODERATED = re.compile(r"\s*\((moderated|unmoderated)\)\s*$", re.IGNORECASE)
+
+
+class TagSpec(NamedTuple):
+    name: str
+    emoji: Optional[str] = None
+    moderated: Optional[bool] = None
+    rename_from: Optional[str] = None
+
+
+class TagDiff(NamedTuple):
+    added: List[str]
+    renamed: List[Tuple[str, str]]
+    updated: List[str]
+    removed: List[str]
+    tags: List[discord.ForumTag]
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.renamed or self.updated or self.removed)
+
+    def summary(self) -> str:
+        lines = [f"- Added `{name}`" for name in self.added]
+        lines += [f"- Renamed `{old}` to `{new}`" for old, new in self.renamed]
+        lines += [f"- Updated `{name}`" for name in self.updated]
+        lines += [f"- Removed `{name}`" for name in self.removed]
+        return "\n".join(lines) or "No changes."
+
+
+def _parse_item(item: str) -> TagSpec:
+    moderated = None
+    flag = _MODERATED.search(item)
+    if flag:
+        moderated = flag.group(1).lower() == "moderated"
+        item = item[:flag.start()]
+
+    rename_from = None
+    if "->" in item:
+        rename_from, item = (part.strip() for part in item.split("->", 1))
+
+    emoji = None
+    match = _LEADING_EMOJI.match(item.strip())
+    if match:
+        emoji, item = match.groups()
+    return TagSpec(item.strip(), emoji, moderated, rename_from or None)
+
+
+def parse_tag_spec(text: str) -> List[TagSpec]:
+    """
+    Parse a list of tags.
+
+    The list is either JSON, an array of tag names or of objects with `name`
+    and optionally `emoji`, `moderated` and `rename_from`, or plain text with
+    one tag per line (or per comma, on a single line) written as
+    `[emoji] Name [(moderated)]`, with `Old name -> [emoji] New name` for a rename.
+
+    Raises:
+        ValueError: If a tag is invalid or listed twice.
+    """
+    if text.lstrip().startswith("["):
+        try:
+            items = json.loads(text)
+        except ValueError as e:
+            raise ValueError(f"The tag list is not valid JSON: {e}")
+        specs = [_parse_json_item(item) for item in items]
+    else:
+        lines = text.splitlines() if "\n" in text.strip() else text.split(",")
+        specs = [_parse_item(line) for line in (line.strip() for line in lines) if line and not line.startswith("#")]
+
+    seen = set()
+    for spec in specs:
+        if not spec.name or len(spec.name) > MAX_TAG_NAME_LENGTH:
+            raise ValueError(f"Tag names must be 1 to {MAX_TAG_NAME_LENGTH} characters: `{spec.name}`")
+        if spec.name.lower() in seen:
+            raise ValueError(f"`{spec.name}` is listed more than once.")
+        seen.add(spec.name.lower())
+    return specs
+
+
+def _parse_json_item(item) -> TagSpec:
+    if isinstance(item, str):
+        return TagSpec(item)
+    if isinstance(item, dict):
+        return TagSpec(str(item.get("name", "")), item.get("emoji"), item.get("moderated"), item.get("rename_from"))
+    raise ValueError(f"Tags must be names or objects with a `name`, not `{json.dumps(item)}`.")
+
+
+def _same_emoji(wanted: Optional[str], current: Optional[discord.PartialEmoji]) -> bool:
+    if not wanted:
+        return current is None
+    if current is None:
+        return False
+    wanted = discord.PartialEmoji.from_str(wanted)
+    # Custom emojis on fetched tags carry an ID but no name.
+    return wanted.id == current.id if wanted.id else wanted.name == current.name
+
+
+def diff_tags(existing: List[discord.ForumTag], specs: List[TagSpec], remove_missing: bool = False) -> TagDiff:
+    """
+    Work out the tag list that applies `specs` to a forum's existing tags.
+
+    Existing tags keep their IDs, and so stay applied to their threads, when
+    they are renamed or their emoji or moderation changes. Tags the specs don't
+    mention are kept unless `remove_missing` is set.
+
+    Raises:
+        ValueError: If the result would have more tags than a forum allows, or two with the same name.
+    """
+    by_name = {tag.name.lower(): tag for tag in existing}
+    added, renamed, updated = [], [], []
+    replacements = {}
+    new_tags = []
+
+    for spec in specs:
+        current = by_name.get((spec.rename_from or spec.name).lower())
+        if current is None and spec.rename_from:
+            # Already renamed by an earlier run of the same spec.
+            current = by_name.get(spec.name.lower())
+        if current is None or current.id in replacements:
+            new_tags.append(discord.ForumTag(name=spec.name, emoji=spec.emoji or "", moderated=bool(spec.moderated)))
+            added.append(spec.name)
+            continue
+
+        emoji = current.emoji if spec.emoji is None else spec.emoji or None
+        moderated = current.moderated if spec.moderated is None else spec.moderated
+        tag = discord.ForumTag(name=spec.name, emoji=emoji, moderated=moderated)
+        tag.id = current.id
+        replacements[current.id] = tag
+
+        if current.name != spec.name:
+            renamed.append((current.name, spec.name))
+        elif moderated != current.moderated or (spec.emoji is not None and not _same_emoji(spec.emoji, current.emoji)):
+            updated.append(spec.name)
+
+    removed = [tag.name for tag in existing if remove_missing and tag.id not in replacements]
+    tags = [replacements.get(tag.id, tag) for tag in existing if not remove_missing or tag.id in replacements]
+    tags += new_tags
+
+    names = [tag.name.lower() for tag in tags]
+    duplicate = next((tag.name for tag in tags if names.count(tag.name.lower()) > 1), None)
+    if duplicate:
+        raise ValueError(f"That would leave two tags named `{duplicate}`.")
+    if len(tags) > MAX_FORUM_TAGS:
+        raise ValueError(f"That would leave {len(tags)} tags; a forum can have at most {MAX_FORUM_TAGS}.")
+    return TagDiff(added, renamed, updated, removed, tags)
+
+
+async def apply_tag_spec(channel: discord.ForumChannel, specs: List[TagSpec], remove_missing: bool = False,
+                         dry_run: bool = False) -> TagDiff:
+    """
+    Apply a tag list to a forum in a single channel edit.
+
+    The forum's tag lock is held from reading its current tags until the edit
+    is done, so concurrent edits can't overwrite each other.
+
+    Returns:
+        TagDiff: The changes, which are only previewed when `dry_run` is set.
+    """
+    async with forum_tag_lock(channel):
+        diff = diff_tags(await fetch_forum_tags(channel), specs, remove_missing)
+        if diff.has_changes and not dry_run:
+            await channel.edit(available_tags=diff.tags)
+        return diff
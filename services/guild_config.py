@@ -0,0 +1,168 @@
+import json
+import logging
+import os
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional
+
+from bot.config import DATA_DIR
+from services.thread_templates import DEFAULT_THREAD_TEMPLATES, ThreadTemplates, compile_templates
+
+logger = logging.getLogger(__name__)
+
+# Bounds for a guild's title-fetch budget; /snip has to answer within Discord's 3 second deadline.
+MIN_TITLE_BUDGET = 0.5
+MAX_TITLE_BUDGET = 2.5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS guild_config (
+    guild_id INTEGER PRIMARY KEY,
+    default_channel_id INTEGER,
+    default_tags TEXT NOT NULL DEFAULT '[]',
+    title_budget REAL,
+    auto_snip TEXT NOT NULL DEFAULT '{}',
+    templates TEXT NOT NULL DEFAULT '{}',
+    updated_at TEXT
+);
+"""
+
+# Columns added since the table was first created, for databases created before them.
+_ADDED_COLUMNS = {
+    "templates": "TEXT NOT NULL DEFAULT '{}'",
+}
+
+
+class GuildConfig(NamedTuple):
+    default_channel_id: Optional[int] = None
+    default_tags: List[str] = []
+    title_budget: Optional[float] = None
+    # Text channel ID -> forum ID: links posted in the text channel are snipped into the forum.
+    auto_snip: Dict[int, int] = {}
+    # Template key -> template, for the thread templates the guild has customized.
+    templates: Dict[str, str] = {}
+
+
+DEFAULT_GUILD_CONFIG = GuildConfig()
+
+
+def _validate(config: GuildConfig) -> GuildConfig:
+    if config.title_budget is not None and not MIN_TITLE_BUDGET <= config.title_budget <= MAX_TITLE_BUDGET:
+        raise ValueError(f"The title budget must be between {MIN_TITLE_BUDGET} and {MAX_TITLE_BUDGET} seconds.")
+    tags = [tag.strip() for tag in config.default_tags if tag.strip()]
+    if len(tags) > 5:
+        raise ValueError("A snip can have at most 5 tags.")
+    templates = {key: template for key, template in config.templates.items() if template}
+    return config._replace(default_tags=tags, templates=templates)
+
+
+class GuildConfigStore:
+    """
+    Per-guild settings, persisted in SQLite and served from memory.
+
+    Every guild's settings are loaded when the store is opened and changes are
+    written through to the database as they are made, so reads, including
+    the ones on `/snip`'s hot path, never touch the disk. Guilds without
+    settings get `DEFAULT_GUILD_CONFIG`.
+
+    Thread templates are compiled when they are loaded or changed, so
+    `templates` hands out ready-to-render templates.
+
+    Parameters:
+        path (str): The SQLite database file.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(DATA_DIR, "guilds.db")
+        self._connection: Optional[sqlite3.Connection] = None
+        self._configs: Dict[int, GuildConfig] = {}
+        self._templates: Dict[int, ThreadTemplates] = {}
+
+    @property
+    def is_open(self) -> bool:
+        return self._connection is not None
+
+    def open(self):
+        if self._connection is not None:
+            return
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.executescript(_SCHEMA)
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(guild_config)")}
+        with self._connection:
+            for column, definition in _ADDED_COLUMNS.items():
+                if column not in columns:
+                    self._connection.execute(f"ALTER TABLE guild_config ADD COLUMN {column} {definition}")
+        rows = self._connection.execute(
+            "SELECT guild_id, default_channel_id, default_tags, title_budget, auto_snip, templates FROM guild_config"
+        )
+        self._configs = {
+            guild_id: GuildConfig(
+                default_channel_id=channel_id,
+                default_tags=json.loads(tags),
+                title_budget=budget,
+                auto_snip={int(source): forum for source, forum in json.loads(auto_snip).items()},
+                templates=json.loads(templates),
+            )
+            for guild_id, channel_id, tags, budget, auto_snip, templates in rows
+        }
+        self._templates = {}
+        for guild_id, config in self._configs.items():
+            if config.templates:
+                try:
+                    self._templates[guild_id] = compile_templates(config.templates)
+                except ValueError as e:
+                    logger.warning("Ignoring invalid thread templates for guild %s: %s", guild_id, e)
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def get(self, guild_id: Optional[int]) -> GuildConfig:
+        return self._configs.get(guild_id, DEFAULT_GUILD_CONFIG)
+
+    def templates(self, guild_id: Optional[int]) -> ThreadTemplates:
+        return self._templates.get(guild_id, DEFAULT_THREAD_TEMPLATES)
+
+    def update(self, guild_id: int, **changes) -> GuildConfig:
+        """
+        Change some of a guild's settings.
+
+        Parameters:
+            guild_id (int): The guild.
+            **changes: New values for `GuildConfig` fields.
+
+        Returns:
+            GuildConfig: The guild's settings after the change.
+
+        Raises:
+            ValueError: If a field is unknown or a value is out of range.
+        """
+        unknown = set(changes) - set(GuildConfig._fields)
+        if unknown:
+            raise ValueError(f"Unknown settings: {', '.join(sorted(unknown))}")
+
+        config = _validate(self.get(guild_id)._replace(**changes))
+        templates = compile_templates(config.templates) if config.templates else None
+        if self._connection is not None:
+            with self._connection:
+                self._connection.execute(
+                    "INSERT INTO guild_config (guild_id, default_channel_id, default_tags, title_budget, auto_snip, "
+                    "templates, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (guild_id) DO UPDATE SET "
+                    "default_channel_id = excluded.default_channel_id, default_tags = excluded.default_tags, "
+                    "title_budget = excluded.title_budget, auto_snip = excluded.auto_snip, "
+                    "templates = excluded.templates, updated_at = excluded.updated_at",
+                    (guild_id, config.default_channel_id, json.dumps(config.default_tags), config.title_budget,
+                     json.dumps({str(source): forum for source, forum in config.auto_snip.items()}),
+                     json.dumps(config.templates), datetime.now(timezone.utc).isoformat()),
+                )
+        self._configs[guild_id] = config
+        if templates is None:
+            self._templates.pop(guild_id, None)
+        else:
+            self._templates[guild_id] = templates
+        return config
+
+
+guild_config = GuildConfigStore()
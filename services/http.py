@@ -0,0 +1,35 @@
+import aiohttp
+
+USER_AGENT = "Mozilla/5.0 (compatible; SnipDis/1.0; +https://github.com/CodeSpent/SnipDis)"
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=10, sock_connect=5)
+
+_session: aiohttp.ClientSession | None = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """
+    Return the process-wide HTTP session, creating it on first use.
+
+    Sharing one session keeps connections pooled across requests instead of
+    paying a new TCP/TLS handshake for every fetch. Must be called from inside
+    the running event loop.
+    """
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            timeout=DEFAULT_TIMEOUT,
+            headers={"User-Agent": USER_AGENT},
+            # Honor HTTP(S)_PROXY so deployments and the load test can route egress.
+            trust_env=True,
+        )
+    return _session
+
+
+async def close_session():
+    """
+    Close the shared HTTP session if it was opened.
+    """
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
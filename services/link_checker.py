@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import random
+from datetime import datetime, timezone
+from typing import List, NamedTuple, Optional, Tuple
+
+import aiohttp
+import discord
+
+from bot.config import LINK_CHECK_BATCH, LINK_CHECK_INTERVAL
+from services.checkpoints import CheckpointStore, checkpoints
+from services.discord import ensure_forum_tag, set_thread_tag
+from services.http import USER_AGENT
+from services.search_index import SnipIndex, snip_index
+from services.title_cache import TitleCache, title_cache
+
+logger = logging.getLogger(__name__)
+
+DEAD_LINK_TAG = "Dead link"
+
+ALIVE = "alive"
+DEAD = "dead"
+INCONCLUSIVE = "inconclusive"
+
+# Statuses that mean the page is gone. Anything else that isn't a success
+# (rate limits, bot walls, server errors) says nothing about the link itself.
+_DEAD_STATUSES = (404, 410)
+
+# Some servers reject HEAD outright; those links get a GET whose body is never read.
+_HEAD_REJECTED = (403, 405, 501)
+
+_CHECKPOINT_KEY = "link-check"
+
+
+class LinkCheckReport(NamedTuple):
+    checked: int
+    alive: int
+    inconclusive: int
+    dead: List[int]
+    newly_dead: List[int]
+    revived: List[int]
+    finished_at: str
+
+    def summary(self) -> str:
+        return (
+            f"checked {self.checked} snips: {self.alive} alive, {len(self.dead)} dead "
+            f"({len(self.newly_dead)} newly), {len(self.revived)} revived, {self.inconclusive} inconclusive"
+        )
+
+
+def classify_status(status: int) -> str:
+    if status < 400:
+        return ALIVE
+    if status in _DEAD_STATUSES:
+        return DEAD
+    return INCONCLUSIVE
+
+
+class LinkChecker:
+    """
+    Periodically probes snipped links and tags the threads whose links have died.
+
+    Each run takes the next `batch_size` snips from the search index, carrying
+    on from a checkpointed cursor and wrapping around at the end, so the whole
+    index is walked a batch at a time. Probes are HEAD requests, conditional on
+    the validators in the title cache where there are any, made through a
+    session of the checker's own so they never wait on connections that `/snip`
+    needs. Its connector caps probes overall and per host, and every probe
+    starts after a random delay so one site's snips don't arrive as a burst.
+
+    A link is only marked dead after `dead_after` runs in a row find it gone,
+    and it is unmarked as soon as a probe finds it again.
+
+    Parameters:
+        index (SnipIndex): The snips to check, and where results are recorded.
+        store (CheckpointStore): Where the cursor is kept between runs.
+        cache (TitleCache): Supplies ETag/Last-Modified validators for probes.
+        interval (float): Seconds between runs.
+        batch_size (int): Snips probed per run.
+        concurrency (int): Probes in flight at once.
+        per_host (int): Probes in flight at once to a single host.
+        jitter (float): Upper bound in seconds of the random delay before each probe.
+        dead_after (int): Failed runs in a row before a link is marked dead.
+        timeout (float): Seconds before a probe is given up as inconclusive.
+    """
+
+    def __init__(self, index: SnipIndex = None, store: CheckpointStore = None, cache: TitleCache = None,
+                 interval: float = LINK_CHECK_INTERVAL, batch_size: int = LINK_CHECK_BATCH, concurrency: int = 8,
+                 per_host: int = 2, jitter: float = 2.0, dead_after: int = 2, timeout: float = 10):
+        self.index = index or snip_index
+        self.store = store or checkpoints
+        self.cache = cache or title_cache
+        self.interval = interval
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.jitter = jitter
+        self.dead_after = dead_after
+        self.timeout = timeout
+
+        self.last_report: Optional[LinkCheckReport] = None
+        self._bot: Optional[discord.Bot] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, bot: discord.Bot):
+        """
+        Start checking links in the background. Must be called from inside the running loop.
+        """
+        self._bot = bot
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run_loop(), name="link-checker")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.exception("Dead-link check failed: %s", e)
+
+    def _next_batch(self) -> List[Tuple[int, int, int, str]]:
+        cursor = (self.store.load(_CHECKPOINT_KEY) or {}).get("thread_id", 0)
+        rows = self.index.snips_after(cursor, self.batch_size)
+        if not rows and cursor:
+            rows = self.index.snips_after(0, self.batch_size)
+        return rows
+
+    def _session(self) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host),
+            timeout=aiohttp.ClientTimeout(total=self.timeout, sock_connect=5),
+            headers={"User-Agent": USER_AGENT},
+            trust_env=True,
+        )
+
+    async def run_once(self) -> Optional[LinkCheckReport]:
+        """
+        Probe the next batch of snips and update their tags.
+
+        Returns:
+            Optional[LinkCheckReport]: What the run found, or None if there was nothing to check.
+        """
+        rows = self._next_batch()
+        if not rows:
+            return None
+
+        async with self._session() as session:
+            results = await asyncio.gather(*(self._probe_later(session, url) for _, _, _, url in rows))
+
+        if all(status is None for _, status in results):
+            # Nothing answered at all; more likely our own network is down than every link at once.
+            logger.warning("Dead-link check skipped: none of %s links could be reached.", len(rows))
+            return None
+
+        checked_at = datetime.now(timezone.utc).isoformat()
+        alive = inconclusive = 0
+        dead, newly_dead, revived = [], [], []
+        for (thread_id, _, _, _), (outcome, status) in zip(rows, results):
+            failures, was_dead = self.index.link_check(thread_id)
+            if outcome == ALIVE:
+                alive += 1
+                failures, is_dead = 0, False
+            elif outcome == DEAD:
+                failures += 1
+                is_dead = was_dead or failures >= self.dead_after
+            else:
+                inconclusive += 1
+                is_dead = was_dead
+
+            if is_dead:
+                dead.append(thread_id)
+            if is_dead != was_dead and await self._mark(thread_id, is_dead):
+                (newly_dead if is_dead else revived).append(thread_id)
+            elif is_dead != was_dead:
+                # The tag couldn't be changed; try again next time round.
+                is_dead = was_dead
+            self.index.record_link_check(thread_id, status, failures, is_dead, checked_at)
+
+        self.store.save(_CHECKPOINT_KEY, {"thread_id": rows[-1][0]})
+        self.last_report = LinkCheckReport(len(rows), alive, inconclusive, dead, newly_dead, revived, checked_at)
+        logger.info("Dead-link check %s.", self.last_report.summary())
+        return self.last_report
+
+    async def _probe_later(self, session: aiohttp.ClientSession, url: str) -> Tuple[str, Optional[int]]:
+        await asyncio.sleep(random.uniform(0, self.jitter))
+        return await self.probe(session, url)
+
+    async def probe(self, session: aiohttp.ClientSession, url: str) -> Tuple[str, Optional[int]]:
+        """
+        Check whether a link still resolves.
+
+        Returns:
+            Tuple[str, Optional[int]]: `ALIVE`, `DEAD` or `INCONCLUSIVE`, and the
+            HTTP status, or None if no response was received.
+        """
+        headers = {}
+        cached, _ = self.cache.lookup(url)
+        if cached and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+        try:
+            async with session.head(url, headers=headers, allow_redirects=True) as response:
+                status = response.status
+            if status in _HEAD_REJECTED:
+                async with session.get(url, headers=headers, allow_redirects=True) as response:
+                    status = response.status
+        except aiohttp.ClientConnectorDNSError:
+            # The name no longer resolves: the site itself is gone.
+            return DEAD, None
+        except aiohttp.ClientConnectorError as e:
+            # A refused connection means nothing serves the site any more, while TLS
+            # and proxy errors say more about the connection than about the link.
+            if (isinstance(e.os_error, ConnectionRefusedError)
+                    and not isinstance(e, (aiohttp.ClientSSLError, aiohttp.ClientProxyConnectionError))):
+                return DEAD, None
+            return INCONCLUSIVE, None
+        except (asyncio.TimeoutError, aiohttp.ClientError):
+            return INCONCLUSIVE, None
+        return classify_status(status), status
+
+    async def _mark(self, thread_id: int, dead: bool) -> bool:
+        """
+        Add or remove the dead-link tag on a snip's thread.
+
+        Returns:
+            bool: False if the thread couldn't be updated, including when it
+            already has the maximum number of tags.
+        """
+        if self._bot is None:
+            return False
+        try:
+            thread = self._bot.get_channel(thread_id) or await self._bot.fetch_channel(thread_id)
+            tag = await ensure_forum_tag(thread.parent, DEAD_LINK_TAG)
+            if await set_thread_tag(thread, tag, present=dead):
+                return True
+            # Left unchanged: either the tag was already right, or there was no room for it.
+            return any(applied.id == tag.id for applied in thread.applied_tags) == dead
+        except (discord.HTTPException, ValueError, AttributeError) as e:
+            logger.warning("Failed to update dead-link tag on thread %s: %s", thread_id, e)
+            return False
+
+
+link_checker = LinkChecker()
@@ -0,0 +1,287 @@
+import asyncio
+import csv
+import hashlib
+import html
+import logging
+import os
+import re
+import tempfile
+from typing import Awaitable, Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import discord
+
+from bot.config import DATA_DIR
+from bot.util import truncate_string, validate_and_normalize_url
+from services.canonical import canonicalizer, remove_tracking_params
+from services.checkpoints import CheckpointStore, checkpoints
+from services.http import get_session
+from services.publisher import Publisher, PublisherClosed, publisher
+from services.snip_records import iter_forum_threads, read_snip_record
+from services.title_resolver import BACKGROUND_BUDGET, TitleResolver, title_resolver
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ("text", "csv", "netscape")
+
+_NETSCAPE_LINK = re.compile(r"<A\s[^>]*HREF=\"([^\"]+)\"[^>]*>(.*?)</A>", re.IGNORECASE)
+_URL_COLUMNS = ("url", "link", "href", "address")
+_TITLE_COLUMNS = ("title", "name", "description")
+
+
+class ImportResult(NamedTuple):
+    published: int
+    duplicates: int
+    invalid: int
+    failed: int
+
+
+def detect_format(filename: str, first_line: str) -> str:
+    """
+    Guess an import file's format from its name and first line.
+    """
+    if first_line.lstrip().upper().startswith("<!DOCTYPE NETSCAPE-BOOKMARK-FILE") or filename.lower().endswith((".html", ".htm")):
+        return "netscape"
+    if filename.lower().endswith(".csv"):
+        return "csv"
+    return "text"
+
+
+def parse_links(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, str, Optional[str]]]:
+    """
+    Lazily pull links out of an import file.
+
+    Parameters:
+        lines (Iterable[str]): The file's lines.
+        fmt (str): One of `IMPORT_FORMATS`.
+
+    Returns:
+        Iterator[Tuple[int, str, Optional[str]]]: The 1-based line each link ends
+        on, the link, and the title the file gives it, if any.
+    """
+    if fmt == "netscape":
+        for line_number, line in enumerate(lines, start=1):
+            for href, title in _NETSCAPE_LINK.findall(line):
+                yield line_number, html.unescape(href), html.unescape(re.sub(r"<[^>]+>", "", title)).strip() or None
+        return
+
+    if fmt == "csv":
+        reader = csv.reader(lines)
+        url_column, title_column = None, None
+        for row in reader:
+            cells = [cell.strip() for cell in row]
+            if not cells or not any(cells):
+                continue
+            if reader.line_num == 1 and url_column is None:
+                lowered = [cell.lower() for cell in cells]
+                header = next((lowered.index(name) for name in _URL_COLUMNS if name in lowered), None)
+                if header is not None:
+                    url_column = header
+                    title_column = next((lowered.index(name) for name in _TITLE_COLUMNS if name in lowered), None)
+                    continue
+
+            if url_column is not None:
+                url = cells[url_column] if url_column < len(cells) else ""
+                title = cells[title_column] if title_column is not None and title_column < len(cells) else None
+            else:
+                url = next((cell for cell in cells if "." in cell and " " not in cell), "")
+                title = None
+            if url:
+                yield reader.line_num, url, title or None
+        return
+
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        url, _, title = line.partition(" ")
+        yield line_number, url, title.strip() or None
+
+
+class LinkImporter:
+    """
+    Imports a list of links into a forum as snips.
+
+    The uploaded file is saved to `DATA_DIR` and read line by line. Links are
+    validated, canonicalized and deduplicated against both the forum's existing
+    snips and earlier lines, their titles are resolved concurrently where the
+    file doesn't give one, and the snips are published in file order through
+    the paced publisher. Progress is checkpointed after every batch under a key
+    derived from the file's contents, so importing the same file into the same
+    forum again resumes where the last run stopped.
+
+    Parameters:
+        store (CheckpointStore): Where import progress is recorded.
+        directory (str): Where uploaded files are kept until their import finishes.
+        resolver (TitleResolver): Resolves titles for links without one.
+        queue (Publisher): Paces thread creation.
+        batch_size (int): Links processed between checkpoints.
+        concurrency (int): Titles resolved, or existing threads read, at once.
+    """
+
+    def __init__(self, store: CheckpointStore = None, directory: str = None, resolver: TitleResolver = None,
+                 queue: Publisher = None, batch_size: int = 20, concurrency: int = 8):
+        self.store = store or checkpoints
+        self.directory = directory or os.path.join(DATA_DIR, "imports")
+        self.resolver = resolver or title_resolver
+        self.queue = queue if queue is not None else publisher
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self._running: set = set()
+
+    async def download(self, url: str) -> Tuple[str, str]:
+        """
+        Stream an uploaded file to disk.
+
+        Returns:
+            Tuple[str, str]: The saved file's path and the SHA-256 of its contents.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        digest = hashlib.sha256()
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        async with get_session().get(url) as response:
+            response.raise_for_status()
+            with os.fdopen(handle, "wb") as file:
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    digest.update(chunk)
+                    file.write(chunk)
+
+        path = os.path.join(self.directory, f"{digest.hexdigest()}.src")
+        os.replace(temp_path, path)
+        return path, digest.hexdigest()
+
+    @staticmethod
+    def key_for(channel: discord.ForumChannel, digest: str) -> str:
+        return f"import-{channel.guild.id}-{channel.id}-{digest[:16]}"
+
+    def is_running(self, channel: discord.ForumChannel, digest: str) -> bool:
+        return self.key_for(channel, digest) in self._running
+
+    async def existing_urls(self, channel: discord.ForumChannel) -> set:
+        """
+        Canonical URLs of every snip already in the forum.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        urls = set()
+
+        async def _read(thread: discord.Thread):
+            async with semaphore:
+                record = await read_snip_record(thread)
+                if record:
+                    # Keyed the same way as incoming links, so a thread posted from a short link still matches.
+                    urls.add(await canonicalizer.canonicalize(record.url))
+
+        pending = []
+        async for thread in iter_forum_threads(channel):
+            pending.append(_read(thread))
+            if len(pending) >= 100:
+                await asyncio.gather(*pending)
+                pending = []
+        await asyncio.gather(*pending)
+        return urls
+
+    async def run(self, channel: discord.ForumChannel, path: str, digest: str, fmt: str, author: discord.User,
+                  applied_tags: List[discord.ForumTag] = None,
+                  progress: Optional[Callable[[dict], Awaitable[None]]] = None) -> ImportResult:
+        """
+        Import a saved file into a forum, resuming from its checkpoint if there is one.
+
+        Parameters:
+            channel (discord.ForumChannel): The forum to publish to.
+            path (str): The file returned by `download`.
+            digest (str): The file's SHA-256.
+            fmt (str): One of `IMPORT_FORMATS`.
+            author (discord.User): Who the snips are attributed to.
+            applied_tags (List[discord.ForumTag]): Tags applied to every imported snip.
+            progress (Optional[Callable]): Awaited with the import state after every batch.
+
+        Returns:
+            ImportResult: How many links were published, skipped or failed.
+        """
+        if fmt not in IMPORT_FORMATS:
+            raise ValueError(f"Unsupported import format: {fmt}")
+
+        key = self.key_for(channel, digest)
+        if key in self._running:
+            raise RuntimeError("This file is already being imported into this forum.")
+        self._running.add(key)
+
+        try:
+            state = self.store.load(key) or {"line": 0, "published": 0, "duplicates": 0, "invalid": 0, "failed": 0}
+            seen = await self.existing_urls(channel)
+
+            with open(path, "r", encoding="utf-8-sig", errors="replace", newline="") as file:
+                batch = []
+                for entry in parse_links(file, fmt):
+                    if entry[0] <= state["line"]:
+                        continue
+                    batch.append(entry)
+                    if len(batch) >= self.batch_size:
+                        await self._import_batch(channel, batch, seen, state, author, applied_tags)
+                        self.store.save(key, state)
+                        if progress:
+                            await progress(state)
+                        batch = []
+                if batch:
+                    await self._import_batch(channel, batch, seen, state, author, applied_tags)
+
+            self.store.clear(key)
+            os.remove(path)
+            return ImportResult(state["published"], state["duplicates"], state["invalid"], state["failed"])
+        finally:
+            self._running.discard(key)
+
+    async def _import_batch(self, channel: discord.ForumChannel, batch: List[Tuple[int, str, Optional[str]]],
+                            seen: set, state: dict, author: discord.User, applied_tags: List[discord.ForumTag]):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _canonical(url: str) -> Optional[Tuple[str, str]]:
+            url = validate_and_normalize_url(url)
+            if not url:
+                return None
+            async with semaphore:
+                return remove_tracking_params(url), await canonicalizer.canonicalize(url)
+
+        canonical_urls = await asyncio.gather(*(_canonical(url) for _, url, _ in batch))
+
+        pending = []
+        for (_, _, title), urls in zip(batch, canonical_urls):
+            if urls is None:
+                state["invalid"] += 1
+            elif urls[1] in seen:
+                state["duplicates"] += 1
+            else:
+                seen.add(urls[1])
+                pending.append((*urls, title))
+
+        async def _resolve(canonical_url: str, title: Optional[str]):
+            if title:
+                return None
+            async with semaphore:
+                return await self.resolver.resolve(canonical_url, budget=BACKGROUND_BUDGET)
+
+        resolved = await asyncio.gather(*(_resolve(canonical_url, title) for _, canonical_url, title in pending))
+
+        for (url, canonical_url, title), metadata in zip(pending, resolved):
+            title = title or (metadata.title if metadata else None) or url
+            try:
+                await self.queue.publish(
+                    channel=channel,
+                    title=truncate_string(title),
+                    url=url,
+                    canonical_url=canonical_url,
+                    metadata=metadata,
+                    author=author,
+                    applied_tags=applied_tags or None,
+                )
+                state["published"] += 1
+            except PublisherClosed:
+                # Shutting down: the batch is left unfinished so a resumed import starts over from it.
+                raise
+            except Exception as e:
+                logger.warning("Failed to import %s: %s", url, e, extra={"url": url})
+                state["failed"] += 1
+
+        state["line"] = batch[-1][0]
+
+
+link_importer = LinkImporter()
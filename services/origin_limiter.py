@@ -0,0 +1,352 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Deque, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Second-level labels under which country-code domains are registered, as in example.co.uk.
+_SECOND_LEVEL_LABELS = frozenset(("co", "com", "net", "org", "ac", "gov", "edu", "ne", "or", "go", "gv", "nic"))
+
+# Statuses that mean the origin is overloaded or throttling us; they slow us down without tripping the breaker.
+OVERLOAD_STATUS_CODES = frozenset((429, 503))
+# Statuses that mean the origin itself is failing.
+FAILURE_STATUS_CODES = frozenset((500, 502, 504, 520, 521, 522, 523, 524))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of fetching from an origin whose circuit breaker is open.
+    """
+
+
+def registrable_domain(url: str) -> str:
+    """
+    The domain a URL's host is registered under, such as `example.com` for
+    `https://news.example.com/a` and `example.co.uk` for `www.example.co.uk`.
+
+    Returns:
+        str: The registrable domain, or the lowercased host if it has no dots.
+    """
+    host = (urlparse(url).hostname if "//" in url else url.split("/", 1)[0].split(":", 1)[0]) or ""
+    labels = host.lower().rstrip(".").split(".")
+    if len(labels) <= 2:
+        return ".".join(labels)
+    # Country-code domains such as example.co.uk keep one more label.
+    if len(labels[-1]) == 2 and labels[-2] in _SECOND_LEVEL_LABELS:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+class TokenBucket:
+    """
+    Limits the rate of requests to `rate` per second with bursts of up to `burst`.
+
+    Tokens can be reserved ahead, so callers queue up in the order they asked.
+    """
+    __slots__ = ("rate", "burst", "tokens", "updated_at")
+
+    def __init__(self, rate: float, burst: float, now: float = None):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic() if now is None else now
+
+    def reserve(self, now: float = None) -> float:
+        """
+        Take a token.
+
+        Returns:
+            float: Seconds to wait before the token may be used.
+        """
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` failures in a row and stops requests for
+    `reset_timeout` seconds. After that a single probe is let through; if it
+    fails, the breaker opens again for twice as long, up to `max_reset_timeout`.
+    """
+    __slots__ = ("failure_threshold", "reset_timeout", "max_reset_timeout", "failures", "opened_at", "retry_at",
+                 "open_for", "probing")
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30, max_reset_timeout: float = 600):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.retry_at = 0.0
+        self.open_for = reset_timeout
+        self.probing = False
+
+    def state(self, now: float = None) -> str:
+        if self.opened_at is None:
+            return CLOSED
+        now = time.monotonic() if now is None else now
+        return HALF_OPEN if now >= self.retry_at and not self.probing else OPEN
+
+    def allow(self, now: float = None) -> bool:
+        """
+        Whether a request may go ahead; in the half-open state this claims the probe.
+        """
+        state = self.state(now)
+        if state == HALF_OPEN:
+            self.probing = True
+        return state != OPEN
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.open_for = self.reset_timeout
+        self.probing = False
+
+    def record_failure(self, now: float = None) -> bool:
+        """
+        Returns:
+            bool: True if this failure opened the breaker.
+        """
+        now = time.monotonic() if now is None else now
+        self.failures += 1
+        if self.probing:
+            self.probing = False
+            self.open_for = min(self.open_for * 2, self.max_reset_timeout)
+        elif self.opened_at is not None or self.failures < self.failure_threshold:
+            return False
+        self.opened_at = now
+        self.retry_at = now + self.open_for
+        return True
+
+    def release_probe(self):
+        """
+        Let another request probe, when the probe ended without telling whether the origin recovered.
+        """
+        self.probing = False
+
+
+class DomainController:
+    """
+    Fetch controls for one registrable domain: an AIMD concurrency limit, a
+    token bucket and a circuit breaker.
+
+    The concurrency limit grows by one for every `limit` successes and halves
+    when the origin fails or throttles us, at most once per `decrease_interval`,
+    so a burst of failures from requests sent together only counts once.
+    """
+
+    def __init__(self, initial_limit: float = 4, min_limit: float = 1, max_limit: float = 16,
+                 rate: float = 5, burst: float = 10, decrease_interval: float = 1.0,
+                 failure_threshold: int = 5, reset_timeout: float = 30):
+        self.limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_interval = decrease_interval
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = float("-inf")
+
+    @property
+    def idle(self) -> bool:
+        return not self.in_flight and not self._waiters and self.breaker.state() == CLOSED
+
+    async def acquire(self):
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Pass a wake-up this waiter received on to the next one.
+                if waiter.done() and not waiter.cancelled():
+                    self._wake()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        free = int(self.limit) - self.in_flight
+        for waiter in list(self._waiters):
+            if free <= 0:
+                break
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def increase(self):
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake()
+
+    def decrease(self, now: float = None):
+        now = time.monotonic() if now is None else now
+        if now - self._last_decrease >= self.decrease_interval:
+            self.limit = max(self.min_limit, self.limit / 2)
+            self._last_decrease = now
+
+
+class FetchBudget:
+    """
+    Shared by the requests made within one caller's time budget.
+
+    `expired` is set by whoever runs them when the budget runs out, telling a
+    request cancelled for being too slow apart from one cancelled because it
+    was no longer needed, such as the loser of a hedged race.
+    """
+    __slots__ = ("expired",)
+
+    def __init__(self):
+        self.expired = False
+
+
+# The budget requests made in the current context belong to, if any.
+fetch_budget: ContextVar[Optional[FetchBudget]] = ContextVar("fetch_budget", default=None)
+
+
+class OriginRequest:
+    """
+    One request to an origin, holding its controller's concurrency slot and recording the outcome on exit.
+    """
+    __slots__ = ("limiter", "domain", "controller", "started_at", "status", "budget")
+
+    def __init__(self, limiter: "OriginLimiter", domain: str, controller: DomainController):
+        self.limiter = limiter
+        self.domain = domain
+        self.controller = controller
+        self.started_at = 0.0
+        self.status: Optional[int] = None
+        self.budget = fetch_budget.get()
+
+    def record_status(self, status: int):
+        self.status = status
+
+    async def __aenter__(self) -> "OriginRequest":
+        breaker = self.controller.breaker
+        if not breaker.allow():
+            raise CircuitOpenError(f"{self.domain} is failing; requests to it are paused.")
+        try:
+            await self.controller.acquire()
+            try:
+                delay = self.controller.bucket.reserve()
+                if delay:
+                    await asyncio.sleep(delay)
+            except BaseException:
+                self.controller.release()
+                raise
+        except BaseException:
+            breaker.release_probe()
+            raise
+        self.started_at = time.monotonic()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.controller.release()
+        elapsed = time.monotonic() - self.started_at
+
+        if exc_type is None:
+            if self.status in FAILURE_STATUS_CODES:
+                self.limiter._failure(self.domain, self.controller, f"status {self.status}")
+            elif self.status in OVERLOAD_STATUS_CODES:
+                self.controller.decrease()
+                self.controller.breaker.release_probe()
+            else:
+                self.controller.breaker.record_success()
+                self.controller.increase()
+        elif issubclass(exc_type, (asyncio.TimeoutError, aiohttp.ClientConnectionError)):
+            self.limiter._failure(self.domain, self.controller, type(exc).__name__)
+        elif (issubclass(exc_type, asyncio.CancelledError) and elapsed >= self.limiter.slow_after
+              and self.budget is not None and self.budget.expired):
+            # Callers give up on slow origins long before the session times out, so a request
+            # still running this long when its caller's budget ran out is counted as a timeout.
+            self.limiter._failure(self.domain, self.controller, f"no response in {elapsed:.1f}s")
+        else:
+            self.controller.breaker.release_probe()
+        return False
+
+
+class OriginLimiter:
+    """
+    Per-origin fetch controls, keyed by registrable domain.
+
+    Every direct page fetch goes through `request`, which waits for a
+    concurrency slot under the domain's AIMD limit and for a token from its
+    rate limiter. Consecutive failures and timeouts open the domain's circuit
+    breaker, and while it is open `request` raises `CircuitOpenError` and
+    `is_open` lets callers skip the fetch and fall back to a cached title or
+    the manual-title modal.
+
+    Parameters:
+        slow_after (float): Seconds after which a request cancelled by its `FetchBudget` running out counts as a timeout.
+        max_domains (int): Idle domains are forgotten beyond this many, oldest first.
+        **controller_options: Options for each domain's `DomainController`.
+    """
+
+    def __init__(self, slow_after: float = 2.0, max_domains: int = 2048, **controller_options):
+        self.slow_after = slow_after
+        self.max_domains = max_domains
+        self.controller_options = controller_options
+        self._controllers: "OrderedDict[str, DomainController]" = OrderedDict()
+
+    def controller(self, domain: str) -> DomainController:
+        controller = self._controllers.get(domain)
+        if controller is None:
+            controller = self._controllers[domain] = DomainController(**self.controller_options)
+            self._evict()
+        self._controllers.move_to_end(domain)
+        return controller
+
+    def _evict(self):
+        excess = len(self._controllers) - self.max_domains
+        for domain in list(self._controllers):
+            if excess <= 0:
+                break
+            if self._controllers[domain].idle:
+                del self._controllers[domain]
+                excess -= 1
+
+    def request(self, url: str) -> OriginRequest:
+        """
+        Use as `async with limiter.request(url) as request:` around a fetch, calling
+        `request.record_status(status)` once the response arrives.
+
+        Raises:
+            CircuitOpenError: On entry, if the domain's breaker is open.
+        """
+        domain = registrable_domain(url)
+        return OriginRequest(self, domain, self.controller(domain))
+
+    def is_open(self, url: str) -> bool:
+        """
+        Whether requests to the URL's domain are paused by its breaker.
+        """
+        controller = self._controllers.get(registrable_domain(url))
+        return controller is not None and controller.breaker.state() == OPEN
+
+    def _failure(self, domain: str, controller: DomainController, reason: str):
+        controller.decrease()
+        if controller.breaker.record_failure():
+            logger.warning("Pausing requests to %s for %.0fs after %s failures (%s)", domain,
+                           controller.breaker.open_for, controller.breaker.failures, reason)
+
+
+origin_limiter = OriginLimiter()
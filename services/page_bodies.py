@@ -0,0 +1,91 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+import aiohttp
+
+from bot.config import ARCHIVE_MAX_BYTES, ARCHIVE_SNAPSHOTS
+
+PageBody = Tuple[bytes, Optional[str]]
+
+
+class PageBodies:
+    """
+    Briefly keeps the full bodies of pages fetched for their metadata, so the
+    snapshot archive can reuse the download instead of fetching the page again.
+
+    Metadata extraction stops reading once the `<head>` is parsed. When
+    capturing is enabled the rest of the response is read by a background task
+    instead of being discarded, so the title is never held up by the body.
+
+    Parameters:
+        enabled (bool): Whether bodies are captured at all.
+        max_bytes (int): The most of a page that is kept.
+        max_entries (int): Pages kept at once; the oldest are dropped first.
+        ttl (float): Seconds a page is kept if nothing takes it.
+    """
+
+    def __init__(self, enabled: bool = ARCHIVE_SNAPSHOTS, max_bytes: int = ARCHIVE_MAX_BYTES,
+                 max_entries: int = 16, ttl: float = 120):
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._pages: "OrderedDict[str, Tuple[asyncio.Task, float]]" = OrderedDict()
+
+    def capture(self, urls: Iterable[str], response: aiohttp.ClientResponse, received: bytes):
+        """
+        Take over a response whose head has been read and finish reading it in the background.
+
+        Parameters:
+            urls (Iterable[str]): URLs the page can be taken under, such as the requested and final URL.
+            response (aiohttp.ClientResponse): The open response; it is released once read.
+            received (bytes): The part of the body already read.
+        """
+        task = asyncio.create_task(self._read_rest(response, received))
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        expires_at = time.monotonic() + self.ttl
+        for url in set(urls):
+            self._pages[url] = (task, expires_at)
+            self._pages.move_to_end(url)
+
+        while len(self._pages) > self.max_entries:
+            _, (evicted, _) = self._pages.popitem(last=False)
+            if all(other is not evicted for other, _ in self._pages.values()):
+                evicted.cancel()
+
+    async def _read_rest(self, response: aiohttp.ClientResponse, received: bytes) -> PageBody:
+        body = bytearray(received)
+        try:
+            if len(body) < self.max_bytes:
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    body += chunk
+                    if len(body) >= self.max_bytes:
+                        break
+        finally:
+            response.release()
+        return bytes(body[:self.max_bytes]), response.charset
+
+    async def take(self, url: str, timeout: float = 10) -> Optional[PageBody]:
+        """
+        Return a captured page's body and charset, waiting for it to finish downloading.
+
+        Returns:
+            Optional[PageBody]: None if the page wasn't captured, has expired or couldn't be read.
+        """
+        entry = self._pages.pop(url, None)
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        task = entry[0]
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        except (asyncio.TimeoutError, aiohttp.ClientError):
+            return None
+        except asyncio.CancelledError:
+            if task.cancelled():
+                return None
+            raise
+
+
+page_bodies = PageBodies()
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict
+
+from services.canonical import canonicalizer
+from services.title_resolver import title_resolver
+
+logger = logging.getLogger(__name__)
+
+# Nobody is waiting on a prefetch yet, so it can take longer than an interaction would allow.
+PREFETCH_BUDGET = 10.0
+
+
+class TitlePrefetcher:
+    """
+    Speculatively resolves titles for URLs while users are still filling in `/snip`.
+
+    Autocomplete fires on every keystroke, so each prefetch waits a short
+    `delay` before touching the network, and a user only has `per_user`
+    prefetches in flight: starting another cancels their oldest one, which is
+    usually a half-typed URL. Results land in the resolver's cache, and a
+    submitted snip joins a prefetch that is still running instead of starting
+    over.
+
+    Parameters:
+        resolver (TitleResolver): Resolver whose cache the prefetch warms.
+        per_user (int): Prefetches a single user may have in flight.
+        max_in_flight (int): Prefetches allowed in flight across all users.
+        delay (float): Seconds to wait before fetching, so fast typing cancels cheaply.
+        budget (float): Time budget for each prefetch.
+    """
+
+    def __init__(self, resolver=None, per_user: int = 2, max_in_flight: int = 50,
+                 delay: float = 0.3, budget: float = PREFETCH_BUDGET):
+        self.resolver = resolver or title_resolver
+        self.per_user = per_user
+        self.max_in_flight = max_in_flight
+        self.delay = delay
+        self.budget = budget
+
+        self._by_user: Dict[int, OrderedDict] = {}
+
+    def __len__(self) -> int:
+        return sum(len(tasks) for tasks in self._by_user.values())
+
+    def prefetch(self, user_id: int, url: str) -> bool:
+        """
+        Start resolving a validated URL's title in the background.
+
+        Parameters:
+            user_id (int): The user typing the URL.
+            url (str): A validated, normalized URL.
+
+        Returns:
+            bool: False if the title is already cached, already being prefetched
+            for this user, or the global cap has been reached.
+        """
+        tasks = self._by_user.setdefault(user_id, OrderedDict())
+        if url in tasks or self.resolver.cache.get(url) is not None:
+            return False
+
+        while len(tasks) >= self.per_user:
+            _, oldest = tasks.popitem(last=False)
+            oldest.cancel()
+
+        if len(self) >= self.max_in_flight:
+            return False
+
+        task = asyncio.create_task(self._prefetch(url), name="title-prefetch")
+        tasks[url] = task
+        task.add_done_callback(lambda _: self._forget(user_id, url, task))
+        return True
+
+    def cancel_user(self, user_id: int):
+        """
+        Cancel every prefetch in flight for a user.
+        """
+        for task in self._by_user.pop(user_id, {}).values():
+            task.cancel()
+
+    async def stop(self):
+        tasks = [task for user_tasks in self._by_user.values() for task in user_tasks.values()]
+        self._by_user.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _prefetch(self, url: str):
+        await asyncio.sleep(self.delay)
+        try:
+            url = await canonicalizer.canonicalize(url)
+            await self.resolver.resolve(url, budget=self.budget)
+        except Exception as e:
+            logger.info("Title prefetch failed for %s: %s", url, e, extra={"url": url})
+
+    def _forget(self, user_id: int, url: str, task: asyncio.Task):
+        tasks = self._by_user.get(user_id)
+        if tasks is None or tasks.get(url) is not task:
+            return
+        del tasks[url]
+        if not tasks:
+            del self._by_user[user_id]
+
+
+title_prefetcher = TitlePrefetcher()
@@ -0,0 +1,294 @@
+import asyncio
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import discord
+from discord.enums import SortOrder
+
+from services.forum_tags import TagSpec, diff_tags, parse_tag_spec
+
+MAX_CHANNEL_NAME_LENGTH = 100
+MAX_TOPIC_LENGTH = 1024
+MAX_GUILD_CHANNELS = 500
+MAX_CATEGORY_CHANNELS = 50
+SORT_ORDERS = {"latest_activity": SortOrder.latest_activity, "creation_date": SortOrder.creation_date}
+AUTO_ARCHIVE_DURATIONS = (60, 1440, 4320, 10080)
+
+
+class ProvisioningError(Exception):
+    """
+    A spec that can't be provisioned, or a provisioning run that failed and was rolled back.
+    """
+
+
+class ForumSpec(NamedTuple):
+    name: str
+    topic: str = ""
+    tags: List[TagSpec] = []
+    roles: Optional[List[str]] = None
+    nsfw: bool = False
+    sort: Optional[str] = None
+    auto_archive: Optional[int] = None
+    slowmode: int = 0
+
+
+class ProvisioningSpec(NamedTuple):
+    forums: List[ForumSpec]
+    category_name: Optional[str] = None
+    category: Optional[discord.CategoryChannel] = None
+    position: Optional[int] = None
+    roles: List[str] = []
+
+
+class ProvisioningResult(NamedTuple):
+    category: Optional[discord.CategoryChannel]
+    forums: List[discord.ForumChannel]
+    warnings: List[str]
+
+
+def parse_provisioning_spec(data: dict) -> ProvisioningSpec:
+    """
+    Build a spec from its JSON form::
+
+        {
+          "category": {"name": "Reading", "position": 2},
+          "roles": ["Members"],
+          "forums": [
+            {"name": "articles", "topic": "...", "tags": ["🐛 Bug", "Docs"], "roles": ["Staff"],
+             "nsfw": false, "sort": "creation_date", "auto_archive": 10080, "slowmode": 0}
+          ]
+        }
+
+    Raises:
+        ProvisioningError: If the document doesn't have that shape.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("forums"), list):
+        raise ProvisioningError("The spec must be a JSON object with a `forums` list.")
+
+    category = data.get("category") or {}
+    if isinstance(category, str):
+        category = {"name": category}
+
+    forums = []
+    for forum in data["forums"]:
+        if isinstance(forum, str):
+            forum = {"name": forum}
+        try:
+            tags = parse_tag_spec("\n".join(forum.get("tags") or [])) if forum.get("tags") else []
+            forums.append(ForumSpec(
+                name=str(forum.get("name") or ""),
+                topic=str(forum.get("topic") or ""),
+                tags=tags,
+                roles=forum.get("roles"),
+                nsfw=bool(forum.get("nsfw", False)),
+                sort=forum.get("sort"),
+                auto_archive=forum.get("auto_archive"),
+                slowmode=int(forum.get("slowmode") or 0),
+            ))
+        except (AttributeError, TypeError, ValueError) as e:
+            raise ProvisioningError(f"Invalid forum in spec: {e}")
+
+    return ProvisioningSpec(
+        forums=forums,
+        category_name=category.get("name"),
+        position=category.get("position"),
+        roles=list(data.get("roles") or []),
+    )
+
+
+class RoleIndex:
+    """
+    Looks up a guild's roles by name, exactly or else case-insensitively, without scanning the role list per name.
+    """
+
+    def __init__(self, roles: Iterable[discord.Role]):
+        self._exact: Dict[str, discord.Role] = {}
+        self._folded: Dict[str, discord.Role] = {}
+        for role in roles:
+            self._exact.setdefault(role.name, role)
+            self._folded.setdefault(role.name.casefold(), role)
+
+    def resolve(self, names: Iterable[str]) -> Tuple[List[discord.Role], List[str]]:
+        """
+        Returns:
+            Tuple[List[discord.Role], List[str]]: The roles found, and the names that matched no role.
+        """
+        roles, missing = [], []
+        for name in names:
+            name = name.strip()
+            if not name:
+                continue
+            role = self._exact.get(name) or self._folded.get(name.casefold())
+            if role is None:
+                missing.append(name)
+            elif role not in roles:
+                roles.append(role)
+        return roles, missing
+
+
+class _Plan(NamedTuple):
+    category_overwrites: dict
+    forums: List[Tuple[ForumSpec, Optional[dict], List[discord.ForumTag]]]
+    warnings: List[str]
+
+
+class ForumProvisioner:
+    """
+    Creates a category and its forums from a declarative spec.
+
+    The whole spec is validated, and every role resolved, before the first
+    API call. The category is created first, since the forums go in it, and
+    then the forums are created concurrently, at most `concurrency` at a time,
+    which stays well within Discord's channel creation limits. If anything
+    fails, every channel created by the run is deleted again.
+
+    Parameters:
+        concurrency (int): Forums created at once.
+    """
+
+    def __init__(self, concurrency: int = 3):
+        self.concurrency = concurrency
+
+    @staticmethod
+    def _overwrites(guild: discord.Guild, roles: List[discord.Role]) -> dict:
+        overwrites = {guild.default_role: discord.PermissionOverwrite(view_channel=False)}
+        for role in roles:
+            overwrites[role] = discord.PermissionOverwrite(view_channel=True)
+        return overwrites
+
+    def plan(self, guild: discord.Guild, spec: ProvisioningSpec) -> _Plan:
+        """
+        Validate a spec against a guild and work out what to create.
+
+        Raises:
+            ProvisioningError: Listing every problem with the spec.
+        """
+        errors, warnings = [], []
+        roles = RoleIndex(guild.roles)
+
+        if spec.category is None and not spec.category_name:
+            errors.append("A category name or an existing category is required.")
+        if spec.category_name and len(spec.category_name) > MAX_CHANNEL_NAME_LENGTH:
+            errors.append(f"The category name is longer than {MAX_CHANNEL_NAME_LENGTH} characters.")
+        if spec.category is not None and spec.position is not None:
+            errors.append("You cannot modify the position of an existing category.")
+        if not spec.forums:
+            errors.append("The spec has no forums.")
+
+        category_roles, missing = roles.resolve(spec.roles)
+        missing_roles = list(missing)
+
+        names = [forum.name.lower() for forum in spec.forums]
+        forums = []
+        for forum in spec.forums:
+            label = f"Forum `{forum.name or '(unnamed)'}`"
+            if not forum.name or len(forum.name) > MAX_CHANNEL_NAME_LENGTH:
+                errors.append(f"{label}: names must be 1 to {MAX_CHANNEL_NAME_LENGTH} characters.")
+            if names.count(forum.name.lower()) > 1:
+                errors.append(f"{label} is listed more than once.")
+            if len(forum.topic) > MAX_TOPIC_LENGTH:
+                errors.append(f"{label}: the description is longer than {MAX_TOPIC_LENGTH} characters.")
+            if forum.sort is not None and forum.sort not in SORT_ORDERS:
+                errors.append(f"{label}: sort must be one of {', '.join(SORT_ORDERS)}.")
+            if forum.auto_archive is not None and forum.auto_archive not in AUTO_ARCHIVE_DURATIONS:
+                errors.append(f"{label}: auto_archive must be one of {', '.join(map(str, AUTO_ARCHIVE_DURATIONS))}.")
+            if not 0 <= forum.slowmode <= 21600:
+                errors.append(f"{label}: slowmode must be between 0 and 21600 seconds.")
+            try:
+                tags = diff_tags([], forum.tags).tags
+            except ValueError as e:
+                errors.append(f"{label}: {e}")
+                tags = []
+
+            # Forums without roles of their own get the category's permissions.
+            overwrites = None
+            if forum.roles is not None:
+                forum_roles, missing = roles.resolve(forum.roles)
+                missing_roles += [name for name in missing if name not in missing_roles]
+                overwrites = self._overwrites(guild, forum_roles)
+            elif spec.category is None or spec.roles:
+                overwrites = self._overwrites(guild, category_roles)
+            forums.append((forum, overwrites, tags))
+
+        new_channels = len(spec.forums) + (spec.category is None)
+        if len(guild.channels) + new_channels > MAX_GUILD_CHANNELS:
+            errors.append(f"This server can't have more than {MAX_GUILD_CHANNELS} channels.")
+        existing_children = len(spec.category.channels) if spec.category is not None else 0
+        if existing_children + len(spec.forums) > MAX_CATEGORY_CHANNELS:
+            errors.append(f"A category can't have more than {MAX_CATEGORY_CHANNELS} channels.")
+
+        if errors:
+            raise ProvisioningError("\n".join(f"- {error}" for error in errors))
+        if missing_roles:
+            warnings.append(f"Roles not found and ignored: {', '.join(f'`{name}`' for name in missing_roles)}")
+        return _Plan(self._overwrites(guild, category_roles), forums, warnings)
+
+    async def provision(self, guild: discord.Guild, spec: ProvisioningSpec, reason: str = None) -> ProvisioningResult:
+        """
+        Create everything in a spec, or nothing.
+
+        Raises:
+            ProvisioningError: If the spec is invalid, or creation failed and was rolled back.
+        """
+        plan = self.plan(guild, spec)
+        created: List[discord.abc.GuildChannel] = []
+
+        try:
+            category = spec.category
+            if category is None:
+                options = {"overwrites": plan.category_overwrites, "reason": reason}
+                if spec.position is not None:
+                    options["position"] = spec.position
+                category = await guild.create_category_channel(spec.category_name, **options)
+                created.append(category)
+
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def _create_forum(forum: ForumSpec, overwrites: Optional[dict], tags: List[discord.ForumTag]):
+                options = {
+                    "category": category,
+                    "overwrites": overwrites if overwrites is not None else category.overwrites,
+                    "topic": forum.topic,
+                    "nsfw": forum.nsfw,
+                    "slowmode_delay": forum.slowmode,
+                    "available_tags": tags,
+                    "reason": reason,
+                }
+                if forum.sort is not None:
+                    options["default_sort_order"] = SORT_ORDERS[forum.sort]
+                if forum.auto_archive is not None:
+                    options["default_auto_archive_duration"] = forum.auto_archive
+                async with semaphore:
+                    channel = await guild.create_forum_channel(forum.name, **options)
+                created.append(channel)
+                return channel
+
+            results = await asyncio.gather(*(_create_forum(*forum) for forum in plan.forums), return_exceptions=True)
+            failure = next((result for result in results if isinstance(result, BaseException)), None)
+            if failure is not None:
+                raise failure
+        except Exception as e:
+            rollback_failures = await self._rollback(created, reason)
+            message = f"Provisioning failed and was rolled back: {e}"
+            if rollback_failures:
+                message += f"\nThese channels could not be removed: {', '.join(rollback_failures)}"
+            raise ProvisioningError(message) from e
+
+        return ProvisioningResult(category, list(results), plan.warnings)
+
+    @staticmethod
+    async def _rollback(created: List[discord.abc.GuildChannel], reason: str = None) -> List[str]:
+        # Forums first, then the category they were created in.
+        forums = [channel for channel in created if not isinstance(channel, discord.CategoryChannel)]
+        categories = [channel for channel in created if isinstance(channel, discord.CategoryChannel)]
+        failures = []
+        for group in (forums, categories):
+            results = await asyncio.gather(
+                *(channel.delete(reason=f"Rolling back: {reason}" if reason else "Rolling back provisioning")
+                  for channel in group),
+                return_exceptions=True,
+            )
+            failures += [channel.name for channel, result in zip(group, results) if isinstance(result, Exception)]
+        return failures
+
+
+forum_provisioner = ForumProvisioner()
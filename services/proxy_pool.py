@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+from bot.config import PROXY_REFRESH_INTERVAL
+from bot.util import fetch_proxies
+from services.http import get_session
+
+logger = logging.getLogger(__name__)
+
+
+class ProxyStats:
+    """
+    Health record for a single proxy, scored by EWMA latency and success rate.
+    """
+    __slots__ = ("address", "latency", "success_rate", "consecutive_failures", "uses")
+
+    def __init__(self, address: str, latency: float = 1.0, success_rate: float = 0.5):
+        self.address = address
+        self.latency = latency
+        self.success_rate = success_rate
+        self.consecutive_failures = 0
+        self.uses = 0
+
+    @property
+    def score(self) -> float:
+        # Favor proxies that succeed; among those, favor the fast ones.
+        return self.success_rate / max(self.latency, 0.05)
+
+
+class ProxyPool:
+    """
+    In-memory pool of proxies refreshed from ProxyScrape in the background.
+
+    Proxies are only meant as a fallback for domains that block direct requests.
+    Once a domain has blocked us it is remembered for `blocked_ttl` seconds, so
+    the next fetch goes straight to a proxy, and the proxy that last worked for
+    a domain is reused while it stays healthy.
+
+    Parameters:
+        refresh_interval (float): Seconds between proxy list refreshes.
+        alpha (float): EWMA smoothing factor for latency and success rate.
+        max_consecutive_failures (int): Failures in a row before a proxy is evicted.
+        blocked_ttl (float): Seconds a domain is remembered as blocking direct requests.
+    """
+
+    def __init__(self, refresh_interval: float = PROXY_REFRESH_INTERVAL, alpha: float = 0.3,
+                 max_consecutive_failures: int = 3, blocked_ttl: float = 1800):
+        self.refresh_interval = refresh_interval
+        self.alpha = alpha
+        self.max_consecutive_failures = max_consecutive_failures
+        self.blocked_ttl = blocked_ttl
+
+        self._proxies: Dict[str, ProxyStats] = {}
+        self._sticky: Dict[str, str] = {}
+        self._blocked_until: Dict[str, float] = {}
+        self._evicted: set = set()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._proxies)
+
+    def start(self) -> bool:
+        """
+        Start refreshing the pool in the background. Must be called from inside the running loop.
+
+        Returns:
+            bool: False if no ProxyScrape API key is configured and the pool stays empty.
+        """
+        if not os.getenv("PROXYSCRAPE_API_KEY"):
+            logger.info("PROXYSCRAPE_API_KEY is not set; proxy fallback is disabled.")
+            return False
+
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop(), name="proxy-pool-refresh")
+        return True
+
+    async def stop(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def _refresh_loop(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.refresh_interval)
+
+    async def refresh(self):
+        """
+        Merge the latest proxy list into the pool, keeping stats for proxies we already know.
+        """
+        addresses = [address.strip() for address in await fetch_proxies(get_session()) if address.strip()]
+        if not addresses:
+            return
+
+        # A new list gives previously evicted proxies another chance.
+        self._evicted.clear()
+        listed = set(addresses)
+        self._proxies = {
+            address: self._proxies.get(address) or ProxyStats(address)
+            for address in listed
+        }
+        self._sticky = {domain: proxy for domain, proxy in self._sticky.items() if proxy in listed}
+        logger.info("Proxy pool refreshed: %s proxies available.", len(self._proxies))
+
+    def add(self, addresses: List[str]):
+        """
+        Add proxies to the pool directly, without a refresh.
+        """
+        for address in addresses:
+            if address not in self._proxies and address not in self._evicted:
+                self._proxies[address] = ProxyStats(address)
+
+    def mark_blocked(self, domain: str):
+        """
+        Remember that `domain` blocked a direct request.
+        """
+        self._blocked_until[domain] = time.monotonic() + self.blocked_ttl
+
+    def is_blocked(self, domain: str) -> bool:
+        """
+        Whether `domain` recently blocked direct requests and should go through a proxy first.
+        """
+        until = self._blocked_until.get(domain)
+        if until is None:
+            return False
+        if until < time.monotonic():
+            del self._blocked_until[domain]
+            return False
+        return bool(self._proxies)
+
+    def choose(self, domain: str, exclude: Tuple[str, ...] = ()) -> Optional[str]:
+        """
+        Pick a proxy for `domain`, preferring the one that last worked for it.
+
+        Otherwise two random proxies are compared and the better scored one wins,
+        which spreads load without always hammering the single best proxy.
+
+        Returns:
+            Optional[str]: A proxy URL such as ``http://1.2.3.4:8080``, or None if the pool is empty.
+        """
+        sticky = self._sticky.get(domain)
+        if sticky in self._proxies and sticky not in exclude:
+            return _as_url(sticky)
+
+        candidates = [stats for address, stats in self._proxies.items() if address not in exclude]
+        if not candidates:
+            return None
+
+        if len(candidates) == 1:
+            best = candidates[0]
+        else:
+            first, second = random.sample(candidates, 2)
+            best = first if first.score >= second.score else second
+
+        best.uses += 1
+        return _as_url(best.address)
+
+    def record(self, proxy: str, domain: str, success: bool, latency: float):
+        """
+        Update a proxy's health after a request and evict it once it is dead.
+
+        Parameters:
+            proxy (str): The proxy URL returned by `choose`.
+            domain (str): The domain that was requested through the proxy.
+            success (bool): Whether the request returned a usable response.
+            latency (float): Request duration in seconds.
+        """
+        address = _as_address(proxy)
+        stats = self._proxies.get(address)
+        if stats is None:
+            return
+
+        stats.latency += self.alpha * (latency - stats.latency)
+        stats.success_rate += self.alpha * ((1.0 if success else 0.0) - stats.success_rate)
+
+        if success:
+            stats.consecutive_failures = 0
+            self._sticky[domain] = address
+            return
+
+        stats.consecutive_failures += 1
+        if self._sticky.get(domain) == address:
+            del self._sticky[domain]
+        if stats.consecutive_failures >= self.max_consecutive_failures:
+            self._evict(address)
+
+    def _evict(self, address: str):
+        self._proxies.pop(address, None)
+        self._evicted.add(address)
+        self._sticky = {domain: proxy for domain, proxy in self._sticky.items() if proxy != address}
+
+    def stats(self, address: str) -> Optional[ProxyStats]:
+        return self._proxies.get(_as_address(address))
+
+
+def _as_url(address: str) -> str:
+    return address if "://" in address else f"http://{address}"
+
+
+def _as_address(proxy: str) -> str:
+    return proxy.split("://", 1)[-1]
+
+
+proxy_pool = ProxyPool()
@@ -0,0 +1,99 @@
+import asyncio
+import time
+from typing import Optional
+
+import discord
+
+from bot.config import PUBLISH_INTERVAL
+from services.discord import create_forum_thread
+
+
+class PublisherClosed(RuntimeError):
+    """
+    Raised instead of queuing a snip once the publisher has been closed for shutdown.
+    """
+
+
+class Publisher:
+    """
+    Paced queue in front of `create_forum_thread` for bulk jobs.
+
+    Discord rate limits thread creation per channel and flags bursts of new
+    threads as spam, so queued snips are published one at a time with at least
+    `interval` seconds between them. Interactive `/snip` commands don't go
+    through the queue. Once closed for shutdown, new snips are refused while
+    the ones already queued can still be drained.
+
+    Parameters:
+        interval (float): Minimum seconds between two published threads.
+    """
+
+    def __init__(self, interval: float = PUBLISH_INTERVAL):
+        self.interval = interval
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+        self._last_published = 0.0
+        self.closed = False
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    async def publish(self, **thread_kwargs) -> discord.Thread:
+        """
+        Queue a snip and wait until it has been published.
+
+        Parameters:
+            **thread_kwargs: Arguments for `create_forum_thread`.
+
+        Returns:
+            discord.Thread: The created thread.
+
+        Raises:
+            PublisherClosed: If the publisher has been closed.
+        """
+        if self.closed:
+            raise PublisherClosed("The bot is shutting down; the snip was not queued.")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((thread_kwargs, future))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run(), name="publisher")
+        return await future
+
+    async def _run(self):
+        while not self._queue.empty():
+            thread_kwargs, future = await self._queue.get()
+            try:
+                if future.cancelled():
+                    continue
+
+                wait = self._last_published + self.interval - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+                try:
+                    thread = await create_forum_thread(**thread_kwargs)
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    if not future.done():
+                        future.set_result(thread)
+                finally:
+                    self._last_published = time.monotonic()
+            finally:
+                self._queue.task_done()
+
+    def close(self):
+        """
+        Stop accepting snips; those already queued are still published.
+        """
+        self.closed = True
+
+    async def drain(self):
+        """
+        Wait until every queued snip has been published.
+        """
+        await self._queue.join()
+
+
+publisher = Publisher()
@@ -0,0 +1,315 @@
+import asyncio
+import os
+import re
+import sqlite3
+from typing import Collection, Iterable, List, NamedTuple, Optional, Tuple
+
+import discord
+
+from bot.config import DATA_DIR
+from bot.util import get_domain_from_url
+from services.snip_records import SnipRecord, iter_forum_threads, read_snip_record
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snips (
+    thread_id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    channel_id INTEGER,
+    title TEXT NOT NULL,
+    url TEXT NOT NULL,
+    domain TEXT,
+    message TEXT,
+    tags TEXT,
+    author_id INTEGER,
+    author_name TEXT,
+    created_at TEXT,
+    jump_url TEXT
+);
+CREATE INDEX IF NOT EXISTS snips_guild_channel ON snips (guild_id, channel_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS snips_fts USING fts5(
+    title, message, domain, tags, author_name,
+    content='snips', content_rowid='thread_id', tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS snips_ai AFTER INSERT ON snips BEGIN
+    INSERT INTO snips_fts (rowid, title, message, domain, tags, author_name)
+    VALUES (new.thread_id, new.title, new.message, new.domain, new.tags, new.author_name);
+END;
+CREATE TRIGGER IF NOT EXISTS snips_ad AFTER DELETE ON snips BEGIN
+    INSERT INTO snips_fts (snips_fts, rowid, title, message, domain, tags, author_name)
+    VALUES ('delete', old.thread_id, old.title, old.message, old.domain, old.tags, old.author_name);
+END;
+CREATE TRIGGER IF NOT EXISTS snips_au AFTER UPDATE ON snips BEGIN
+    INSERT INTO snips_fts (snips_fts, rowid, title, message, domain, tags, author_name)
+    VALUES ('delete', old.thread_id, old.title, old.message, old.domain, old.tags, old.author_name);
+    INSERT INTO snips_fts (rowid, title, message, domain, tags, author_name)
+    VALUES (new.thread_id, new.title, new.message, new.domain, new.tags, new.author_name);
+END;
+
+CREATE TABLE IF NOT EXISTS link_checks (
+    thread_id INTEGER PRIMARY KEY,
+    status INTEGER,
+    failures INTEGER NOT NULL DEFAULT 0,
+    dead INTEGER NOT NULL DEFAULT 0,
+    checked_at TEXT
+);
+"""
+
+_COLUMNS = ("thread_id", "guild_id", "channel_id", "title", "url", "domain", "message", "tags", "author_id",
+            "author_name", "created_at", "jump_url")
+
+# An upsert rather than INSERT OR REPLACE, whose implicit delete wouldn't fire the FTS delete trigger.
+_UPSERT = (
+    f"INSERT INTO snips ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' for _ in _COLUMNS)}) "
+    f"ON CONFLICT (thread_id) DO UPDATE SET {', '.join(f'{column} = excluded.{column}' for column in _COLUMNS[1:])}"
+)
+
+# bm25 column weights for title, message, domain, tags and author: a title match ranks highest.
+_RANK = "bm25(snips_fts, 10.0, 2.0, 4.0, 4.0, 1.0)"
+
+_QUERY_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+class SearchHit(NamedTuple):
+    thread_id: int
+    channel_id: int
+    title: str
+    url: str
+    domain: Optional[str]
+    tags: List[str]
+    author_name: Optional[str]
+    jump_url: Optional[str]
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query that matches every word as a prefix.
+
+    Quoting each token keeps user input from being read as FTS5 syntax.
+    """
+    tokens = _QUERY_TOKEN.findall(query)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+class SnipIndex:
+    """
+    Local full-text index of snips, backed by SQLite FTS5.
+
+    Every thread created by `create_forum_thread` is added as it is published,
+    and older threads are added with `backfill`. Until `open` is called, adding
+    and removing snips does nothing, so tests and tools that don't run the bot
+    never touch the database.
+
+    Parameters:
+        path (str): The SQLite database file.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(DATA_DIR, "snips.db")
+        self._connection: Optional[sqlite3.Connection] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._connection is not None
+
+    def open(self):
+        if self._connection is not None:
+            return
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def add(self, record: SnipRecord):
+        """
+        Index a snip, replacing any earlier entry for the same thread.
+        """
+        self.add_many([record])
+
+    def add_many(self, records: Iterable[SnipRecord]):
+        if self._connection is None:
+            return
+        rows = [
+            (record.thread_id, record.guild_id, record.channel_id, record.title, record.url,
+             get_domain_from_url(record.url), record.message, "|".join(record.tags), record.author_id,
+             record.author_name, record.created_at, record.jump_url)
+            for record in records
+        ]
+        with self._connection:
+            self._connection.executemany(_UPSERT, rows)
+
+    def remove(self, thread_id: int):
+        if self._connection is None:
+            return
+        with self._connection:
+            self._connection.execute("DELETE FROM snips WHERE thread_id = ?", (thread_id,))
+            self._connection.execute("DELETE FROM link_checks WHERE thread_id = ?", (thread_id,))
+
+    def snips_after(self, thread_id: int, limit: int) -> List[Tuple[int, int, int, str]]:
+        """
+        Page through every indexed snip in thread order, for background jobs.
+
+        Returns:
+            List[Tuple[int, int, int, str]]: `(thread_id, guild_id, channel_id, url)` for up to
+            `limit` snips with a thread ID above `thread_id`.
+        """
+        if self._connection is None:
+            return []
+        return self._connection.execute(
+            "SELECT thread_id, guild_id, channel_id, url FROM snips WHERE thread_id > ? ORDER BY thread_id LIMIT ?",
+            (thread_id, limit),
+        ).fetchall()
+
+    def link_check(self, thread_id: int) -> Tuple[int, bool]:
+        """
+        Return how many probes in a row have found a snip's link dead, and whether it is marked dead.
+        """
+        if self._connection is None:
+            return 0, False
+        row = self._connection.execute(
+            "SELECT failures, dead FROM link_checks WHERE thread_id = ?", (thread_id,)
+        ).fetchone()
+        return (row[0], bool(row[1])) if row else (0, False)
+
+    def record_link_check(self, thread_id: int, status: Optional[int], failures: int, dead: bool, checked_at: str):
+        if self._connection is None:
+            return
+        with self._connection:
+            self._connection.execute(
+                "INSERT INTO link_checks (thread_id, status, failures, dead, checked_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (thread_id) DO UPDATE SET status = excluded.status, failures = excluded.failures, "
+                "dead = excluded.dead, checked_at = excluded.checked_at",
+                (thread_id, status, failures, int(dead), checked_at),
+            )
+
+    def dead_links(self, guild_id: int, limit: int = 25,
+                   channel_ids: Collection[int] = None) -> List[Tuple[str, str, Optional[str], Optional[int]]]:
+        """
+        Return a guild's snips whose links are marked dead, most recently checked first.
+
+        Parameters:
+            channel_ids (Collection[int]): Only return snips from these forums.
+
+        Returns:
+            List[Tuple[str, str, Optional[str], Optional[int]]]: `(title, url, jump_url, status)` rows.
+        """
+        if self._connection is None or (channel_ids is not None and not channel_ids):
+            return []
+        conditions = ["snips.guild_id = ?", "link_checks.dead = 1"]
+        parameters: list = [guild_id]
+        if channel_ids is not None:
+            conditions.append(_in_channels(channel_ids))
+            parameters.extend(channel_ids)
+        return self._connection.execute(
+            "SELECT snips.title, snips.url, snips.jump_url, link_checks.status FROM link_checks "
+            f"JOIN snips ON snips.thread_id = link_checks.thread_id WHERE {' AND '.join(conditions)} "
+            "ORDER BY link_checks.checked_at DESC LIMIT ?",
+            parameters + [limit],
+        ).fetchall()
+
+    def count(self, guild_id: int) -> int:
+        if self._connection is None:
+            return 0
+        return self._connection.execute("SELECT COUNT(*) FROM snips WHERE guild_id = ?", (guild_id,)).fetchone()[0]
+
+    def search(self, guild_id: int, query: str, channel_id: int = None, tag: str = None, author_id: int = None,
+               limit: int = 10, offset: int = 0, channel_ids: Collection[int] = None) -> Tuple[List[SearchHit], int]:
+        """
+        Find a guild's snips matching a query, best matches first.
+
+        Parameters:
+            guild_id (int): The guild to search.
+            query (str): Free text matched against title, message, domain, tags and author.
+            channel_id (int): Only return snips from this forum.
+            tag (str): Only return snips with this tag.
+            author_id (int): Only return snips by this user.
+            limit (int): Page size.
+            offset (int): Results to skip.
+            channel_ids (Collection[int]): Only return snips from these forums, such as those the searcher can view.
+
+        Returns:
+            Tuple[List[SearchHit], int]: One page of results and the total number of matches.
+        """
+        match = build_match_query(query)
+        if self._connection is None or match is None or (channel_ids is not None and not channel_ids):
+            return [], 0
+
+        if tag:
+            # Tags are indexed as one `|`-separated column, so a tag is matched as a phrase within it.
+            match = f'({match}) AND tags : "{tag.replace(chr(34), chr(34) * 2)}"'
+
+        conditions = ["snips_fts MATCH ?", "snips.guild_id = ?"]
+        parameters: list = [match, guild_id]
+        if channel_id is not None:
+            conditions.append("snips.channel_id = ?")
+            parameters.append(channel_id)
+        if author_id is not None:
+            conditions.append("snips.author_id = ?")
+            parameters.append(author_id)
+        if channel_ids is not None:
+            conditions.append(_in_channels(channel_ids))
+            parameters.extend(channel_ids)
+
+        where = " AND ".join(conditions)
+        # CROSS JOIN keeps the full-text match as the outer loop; otherwise SQLite may scan
+        # the guild's snips and re-run the match for each one.
+        from_clause = "FROM snips_fts CROSS JOIN snips ON snips.thread_id = snips_fts.rowid"
+
+        total = self._connection.execute(f"SELECT COUNT(*) {from_clause} WHERE {where}", parameters).fetchone()[0]
+        rows = self._connection.execute(
+            f"SELECT snips.thread_id, snips.channel_id, snips.title, snips.url, snips.domain, snips.tags, "
+            f"snips.author_name, snips.jump_url {from_clause} WHERE {where} ORDER BY {_RANK} LIMIT ? OFFSET ?",
+            parameters + [limit, offset],
+        ).fetchall()
+
+        hits = [
+            SearchHit(thread_id, channel_id, title, url, domain, tags.split("|") if tags else [], author_name, jump_url)
+            for thread_id, channel_id, title, url, domain, tags, author_name, jump_url in rows
+        ]
+        return hits, total
+
+    async def backfill(self, channel: discord.ForumChannel, concurrency: int = 4, batch_size: int = 100) -> int:
+        """
+        Index every existing snip in a forum. Safe to rerun; threads are re-indexed in place.
+
+        Returns:
+            int: How many snips were indexed.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _read(thread: discord.Thread) -> Optional[SnipRecord]:
+            async with semaphore:
+                return await read_snip_record(thread)
+
+        indexed = 0
+        batch = []
+        async for thread in iter_forum_threads(channel):
+            batch.append(thread)
+            if len(batch) >= batch_size:
+                indexed += self._add_batch(await asyncio.gather(*map(_read, batch)))
+                batch = []
+        if batch:
+            indexed += self._add_batch(await asyncio.gather(*map(_read, batch)))
+        return indexed
+
+    def _add_batch(self, records: List[Optional[SnipRecord]]) -> int:
+        records = [record for record in records if record]
+        self.add_many(records)
+        return len(records)
+
+
+def _in_channels(channel_ids: Collection[int]) -> str:
+    return f"snips.channel_id IN ({', '.join('?' for _ in channel_ids)})"
+
+
+snip_index = SnipIndex()
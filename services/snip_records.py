@@ -0,0 +1,226 @@
+import logging
+import re
+from typing import AsyncIterator, List, Optional
+
+import discord
+
+from constants.messages import EMPTY_LINE_SYMBOL
+from services.guild_config import guild_config
+from services.thread_templates import DEFAULT_THREAD_TEMPLATES, CompiledTemplate, ThreadTemplates
+
+logger = logging.getLogger(__name__)
+
+_BOLD_TITLE = re.compile(r"\*\*(.+?)\*\*", re.DOTALL)
+_SNIPPED_URL = re.compile(r"Snipped URL:\s*(\S+)")
+_SNIPPED_BY = re.compile(r"Snipped by:\s*<@!?(\d+)>")
+_USER_MENTION = re.compile(r"<@!?(\d+)>")
+_USER_PROFILE_ID = re.compile(r"/users/(\d+)$")
+
+SNIPPED_LINK_FIELD = "Snipped Link"
+MENTIONS_FIELD = "Mentions"
+# The embed's author line, linked to the author's profile so the author can be read back whatever the templates say.
+AUTHOR_PREFIX = "Snipped by "
+USER_PROFILE_URL = "https://discord.com/users/{}"
+# Between the site name and the rendered footer template in the embed footer.
+SITE_NAME_SEPARATOR = " • "
+
+
+class SnipRecord:
+    """
+    One snip as written to a forum by `create_forum_thread`, flattened for export and indexing.
+    """
+    __slots__ = ("thread_id", "guild_id", "channel_id", "title", "url", "author_id", "author_name", "message",
+                 "mentions", "tags", "created_at", "archived", "description", "site_name", "image", "jump_url")
+
+    # Column order for CSV exports.
+    FIELDS = __slots__
+
+    def __init__(self, thread_id: int, guild_id: int, channel_id: int, title: str, url: str,
+                 author_id: Optional[int] = None, author_name: Optional[str] = None, message: Optional[str] = None,
+                 mentions: List[int] = (), tags: List[str] = (), created_at: Optional[str] = None,
+                 archived: bool = False, description: Optional[str] = None, site_name: Optional[str] = None,
+                 image: Optional[str] = None, jump_url: Optional[str] = None):
+        self.thread_id = thread_id
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.title = title
+        self.url = url
+        self.author_id = author_id
+        self.author_name = author_name
+        self.message = message
+        self.mentions = list(mentions)
+        self.tags = list(tags)
+        self.created_at = created_at
+        self.archived = archived
+        self.description = description
+        self.site_name = site_name
+        self.image = image
+        self.jump_url = jump_url
+
+    def __repr__(self) -> str:
+        return f"SnipRecord(thread_id={self.thread_id}, url={self.url!r})"
+
+    def to_dict(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def to_row(self) -> dict:
+        """
+        Flatten the record for CSV, joining list fields with `;`.
+        """
+        row = self.to_dict()
+        row["mentions"] = ";".join(str(user_id) for user_id in self.mentions)
+        row["tags"] = ";".join(self.tags)
+        return row
+
+
+def _snip_embed(messages: List[discord.Message]) -> Optional[discord.Embed]:
+    for message in messages:
+        for embed in message.embeds:
+            if any(field.name == SNIPPED_LINK_FIELD for field in embed.fields):
+                return embed
+    return None
+
+
+def _field(embed: Optional[discord.Embed], name: str) -> Optional[str]:
+    if embed is None:
+        return None
+    return next((field.value for field in embed.fields if field.name == name), None)
+
+
+def _starter_message_body(content: str, title: Optional[str]) -> Optional[str]:
+    """
+    Pull the user's message out of the starter post, which is the part that is
+    not the title, the snipped URL or the author.
+    """
+    for part in content.split("\n\n"):
+        part = part.strip()
+        if not part or part == EMPTY_LINE_SYMBOL.strip() or part.startswith(("**", "Snipped URL:", "Snipped by:")):
+            continue
+        if title and part.lower() == title.lower():
+            continue
+        return part
+    return None
+
+
+def _match_body(content: str, templates: List[ThreadTemplates]) -> Optional[dict]:
+    return next((fields for fields in (t.body.match(content) for t in templates) if fields is not None), None)
+
+
+def _site_name(footer: Optional[str], templates: List[ThreadTemplates]) -> Optional[str]:
+    """
+    Split the site name off an embed footer, which is the rendered footer template
+    with the site name and `SITE_NAME_SEPARATOR` in front of it when the page had one.
+    """
+    if not footer:
+        return None
+    footer_templates: List[CompiledTemplate] = [t.embed_footer for t in templates]
+    if any(template.match(footer) is not None for template in footer_templates):
+        return None
+    start = footer.find(SITE_NAME_SEPARATOR)
+    while start != -1:
+        rest = footer[start + len(SITE_NAME_SEPARATOR):]
+        if any(template.match(rest) is not None for template in footer_templates):
+            return footer[:start]
+        start = footer.find(SITE_NAME_SEPARATOR, start + 1)
+    # Only the site name, as the footer template rendered empty.
+    return footer if any(template.match("") is not None for template in footer_templates) else None
+
+
+def _author_id(embed: Optional[discord.Embed], body: Optional[dict], content: str) -> Optional[int]:
+    match = _USER_PROFILE_ID.search(embed.author.url or "") if embed and embed.author else None
+    if not match and body:
+        match = _USER_MENTION.fullmatch(body["author"])
+    if not match:
+        # Threads posted before the embed author was linked, with the default body.
+        match = _SNIPPED_BY.search(content)
+    return int(match.group(1)) if match else None
+
+
+def parse_snip_thread(thread: discord.Thread, messages: List[discord.Message],
+                      templates: ThreadTemplates = None) -> Optional[SnipRecord]:
+    """
+    Rebuild a snip from a forum thread and its first messages.
+
+    The embed posted in the thread is preferred, and the starter post's content
+    fills in anything the embed lacks. The post and footer are read with the
+    guild's templates, falling back to the defaults for threads posted before
+    the guild changed them.
+
+    Parameters:
+        thread (discord.Thread): The forum thread.
+        messages (List[discord.Message]): The thread's first messages, oldest first.
+        templates (ThreadTemplates): The guild's templates; defaults to `DEFAULT_THREAD_TEMPLATES`.
+
+    Returns:
+        Optional[SnipRecord]: The snip, or None if the thread wasn't created by `/snip`.
+    """
+    starter = next((message for message in messages if message.id == thread.id), messages[0] if messages else None)
+    content = starter.content if starter else ""
+    embed = _snip_embed(messages)
+    candidates = [templates] if templates is not None and templates is not DEFAULT_THREAD_TEMPLATES else []
+    candidates.append(DEFAULT_THREAD_TEMPLATES)
+    body = _match_body(content, candidates)
+
+    url = _field(embed, SNIPPED_LINK_FIELD) or (embed.url if embed else None) or (body or {}).get("url")
+    if not url:
+        match = _SNIPPED_URL.search(content)
+        url = match.group(1) if match else None
+    if not url:
+        return None
+
+    title_match = _BOLD_TITLE.search(content)
+    title = ((body or {}).get("title") or (embed.title if embed else None)
+             or (title_match.group(1) if title_match else None) or thread.name)
+
+    author_name = None
+    site_name = None
+    if embed is not None:
+        if embed.author and embed.author.name:
+            author_name = embed.author.name.removeprefix(AUTHOR_PREFIX)
+        site_name = _site_name(embed.footer.text if embed.footer else None, candidates)
+
+    mentions = _field(embed, MENTIONS_FIELD) or ""
+
+    return SnipRecord(
+        thread_id=thread.id,
+        guild_id=thread.guild.id if thread.guild else None,
+        channel_id=thread.parent_id,
+        title=title,
+        url=url,
+        author_id=_author_id(embed, body, content),
+        author_name=author_name,
+        message=(body["message"] or None) if body else _starter_message_body(content, title),
+        mentions=[int(user_id) for user_id in _USER_MENTION.findall(mentions)],
+        tags=[tag.name for tag in thread.applied_tags],
+        created_at=thread.created_at.isoformat() if thread.created_at else None,
+        archived=bool(thread.archived),
+        description=embed.description if embed else None,
+        site_name=site_name,
+        image=embed.image.url if embed and embed.image else None,
+        jump_url=thread.jump_url,
+    )
+
+
+async def read_snip_record(thread: discord.Thread) -> Optional[SnipRecord]:
+    """
+    Fetch a thread's first messages and rebuild its snip.
+
+    Returns:
+        Optional[SnipRecord]: The snip, or None if the thread isn't one or couldn't be read.
+    """
+    try:
+        messages = [message async for message in thread.history(limit=2, oldest_first=True)]
+    except discord.HTTPException as e:
+        logger.warning("Failed to read thread %s: %s", thread.id, e)
+        messages = []
+    return parse_snip_thread(thread, messages, guild_config.templates(thread.guild.id if thread.guild else None))
+
+
+async def iter_forum_threads(channel: discord.ForumChannel) -> AsyncIterator[discord.Thread]:
+    """
+    Yield every thread in a forum: active threads first, then archived threads from newest to oldest.
+    """
+    for thread in list(channel.threads):
+        yield thread
+    async for thread in channel.archived_threads(limit=None):
+        yield thread
@@ -0,0 +1,163 @@
+import re
+from itertools import product
+from string import Formatter
+from typing import Dict, List, Mapping, NamedTuple, Optional, Pattern, Tuple
+
+from constants.messages import EMPTY_LINE_SYMBOL
+
+# Fields a template can use, and what they hold.
+TEMPLATE_FIELDS = {
+    "title": "the snip's title",
+    "url": "the snipped link",
+    "domain": "the link's domain",
+    "message": "the snipper's message",
+    "author": "a mention of the snipper",
+    "author_name": "the snipper's display name",
+    "mentions": "the mentioned users",
+    "site_name": "the page's site name",
+    "description": "the page's description",
+}
+
+# The parts of a snip a guild can template.
+TEMPLATE_KEYS = ("name", "body", "embed_title", "embed_footer")
+
+DEFAULT_TEMPLATES = {
+    "name": "{title}",
+    "body": EMPTY_LINE_SYMBOL + "\n\n**{title}**\n\n{message}\n\nSnipped URL:\n{url}\n\nSnipped by:\n{author}",
+    "embed_title": "{title}",
+    "embed_footer": "Snipped by {author_name}",
+}
+
+# Blocks of a template are separated by a blank line.
+_BLOCK_SEPARATOR = "\n\n"
+
+
+class CompiledTemplate:
+    """
+    A template parsed into blocks once, so rendering is a `format_map` per block.
+
+    Templates use `{field}` placeholders from `TEMPLATE_FIELDS`, with `{{` and
+    `}}` for literal braces. A template is split into blocks at blank lines, and
+    a block whose fields are all empty is left out, so a snip without a message
+    doesn't get an empty paragraph. `match` reads the fields back out of a
+    rendering.
+
+    Parameters:
+        source (str): The template.
+
+    Raises:
+        ValueError: If the template is malformed or uses an unknown field.
+    """
+    __slots__ = ("source", "_blocks", "_patterns")
+
+    def __init__(self, source: str):
+        self.source = source
+        self._blocks: List[Tuple[str, Tuple[str, ...]]] = [
+            (block, _fields_of(block)) for block in source.split(_BLOCK_SEPARATOR)
+        ]
+        self._patterns: Optional[List[Pattern]] = None
+
+    def render(self, fields: Mapping[str, str]) -> str:
+        return _BLOCK_SEPARATOR.join(
+            block.format_map(fields) for block, names in self._blocks
+            if not names or any(fields[name] for name in names)
+        )
+
+    def match(self, text: str) -> Optional[Dict[str, str]]:
+        """
+        Read the field values back out of a rendering of this template.
+
+        A rendering can leave out any block with fields, so every choice of
+        blocks is tried, the ones that account for the most template text first.
+        That keeps a message from swallowing the `Snipped URL:` block after it.
+
+        Parameters:
+            text (str): The rendered text.
+
+        Returns:
+            Optional[Dict[str, str]]: The fields, empty for those in left out blocks,
+            or None if `text` isn't a rendering of this template.
+        """
+        if self._patterns is None:
+            self._patterns = self._compile_patterns()
+        # Every block is matched with the separator in front of it, so left out blocks take theirs with them.
+        text = _BLOCK_SEPARATOR + text
+        for pattern in self._patterns:
+            match = pattern.fullmatch(text)
+            if match:
+                fields = dict.fromkeys((name for _, names in self._blocks for name in names), "")
+                fields.update(match.groupdict())
+                return fields
+        return None
+
+    def _compile_patterns(self) -> List[Pattern]:
+        optional = [index for index, (_, names) in enumerate(self._blocks) if names]
+        choices = []
+        for included in product((True, False), repeat=len(optional)):
+            kept = {index for index, keep in zip(optional, included) if keep}
+            blocks = [block for index, (block, names) in enumerate(self._blocks) if not names or index in kept]
+            literal_length = sum(len(literal) for block in blocks for literal, *_ in Formatter().parse(block))
+            choices.append((-literal_length, -len(blocks), blocks))
+        choices.sort(key=lambda choice: choice[:2])
+        return [re.compile(_block_pattern(blocks), re.DOTALL) for *_, blocks in choices]
+
+
+def _block_pattern(blocks: List[str]) -> str:
+    if not blocks:
+        # An empty rendering, which `match` sees as a lone separator.
+        return re.escape(_BLOCK_SEPARATOR)
+    seen = set()
+    pattern = ""
+    for block in blocks:
+        pattern += re.escape(_BLOCK_SEPARATOR)
+        for literal, name, _, _ in Formatter().parse(block):
+            pattern += re.escape(literal)
+            if name is not None:
+                pattern += f"(?P={name})" if name in seen else f"(?P<{name}>.+?)"
+                seen.add(name)
+    return pattern
+
+
+def _fields_of(block: str) -> Tuple[str, ...]:
+    try:
+        parsed = list(Formatter().parse(block))
+    except ValueError as e:
+        raise ValueError(f"Invalid template: {e}. Use {{{{ and }}}} for literal braces.") from None
+
+    names = []
+    for _, name, spec, conversion in parsed:
+        if name is None:
+            continue
+        if name not in TEMPLATE_FIELDS or spec or conversion:
+            raise ValueError(f"Unknown template field `{{{name}}}`. "
+                             f"Available fields: {', '.join(f'{{{field}}}' for field in TEMPLATE_FIELDS)}")
+        names.append(name)
+    return tuple(names)
+
+
+class ThreadTemplates(NamedTuple):
+    """
+    A guild's compiled templates for the thread name, the opening post and the embed.
+    """
+    name: CompiledTemplate
+    body: CompiledTemplate
+    embed_title: CompiledTemplate
+    embed_footer: CompiledTemplate
+
+
+def compile_templates(templates: Dict[str, str]) -> ThreadTemplates:
+    """
+    Compile a guild's templates, using the defaults for any it doesn't set.
+
+    Raises:
+        ValueError: If a key isn't in `TEMPLATE_KEYS` or a template is invalid.
+    """
+    unknown = set(templates) - set(TEMPLATE_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown templates: {', '.join(sorted(unknown))}")
+    return ThreadTemplates(**{
+        key: CompiledTemplate(templates.get(key) or DEFAULT_TEMPLATES[key]) for key in TEMPLATE_KEYS
+    })
+
+
+DEFAULT_THREAD_TEMPLATES = compile_templates({})
@@ -0,0 +1,129 @@
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from bot.config import DATA_DIR
+from bot.metadata import PageMetadata
+
+logger = logging.getLogger(__name__)
+
+
+class TitleCache:
+    """
+    In-memory LRU cache of resolved page metadata, keyed by canonical URL.
+
+    Entries are fresh for `ttl` seconds. After that they are stale but kept for
+    another `stale_ttl` seconds, so they can still be served while they are
+    revalidated in the background. The cache is saved on shutdown and loaded on
+    boot, so a restart doesn't start cold.
+
+    Parameters:
+        ttl (float): Seconds an entry stays fresh.
+        stale_ttl (float): Seconds an expired entry may still be served stale.
+        max_entries (int): Entries kept before the least recently used are dropped.
+        cache_path (str): Where the cache is saved.
+    """
+
+    def __init__(self, ttl: float = 24 * 60 * 60, stale_ttl: float = 7 * 24 * 60 * 60, max_entries: int = 5000,
+                 cache_path: str = None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.cache_path = cache_path or os.path.join(DATA_DIR, "title_cache.json")
+        self._entries: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, url: str) -> Tuple[Optional[PageMetadata], bool]:
+        """
+        Return the cached metadata for a URL and whether it is stale.
+
+        Returns:
+            Tuple[Optional[PageMetadata], bool]: The metadata, or None if missing or
+            past its stale window, and True when the entry needs revalidating.
+        """
+        entry = self._entries.get(url)
+        if entry is None:
+            return None, False
+
+        metadata, expires_at = entry
+        now = time.monotonic()
+        if expires_at + self.stale_ttl < now:
+            del self._entries[url]
+            return None, False
+
+        self._entries.move_to_end(url)
+        return metadata, expires_at < now
+
+    def get(self, url: str) -> Optional[PageMetadata]:
+        """
+        Return the cached metadata for a URL, or None if missing or expired.
+        """
+        metadata, stale = self.lookup(url)
+        return None if stale else metadata
+
+    def set(self, url: str, metadata: PageMetadata):
+        """
+        Cache metadata for a URL, evicting the least recently used entry when full.
+        """
+        self._entries[url] = (metadata, time.monotonic() + self.ttl)
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def touch(self, url: str) -> bool:
+        """
+        Extend an entry's freshness after the origin confirmed it is unchanged.
+
+        Returns:
+            bool: False if the URL is no longer cached.
+        """
+        entry = self._entries.get(url)
+        if entry is None:
+            return False
+        self._entries[url] = (entry[0], time.monotonic() + self.ttl)
+        return True
+
+    def load(self):
+        """
+        Load a saved cache, if any, dropping entries that expired while the bot was down.
+        """
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("Failed to load title cache: %s", e)
+            return
+
+        # Expiry times are saved as wall clock times, since the monotonic clock restarts with the process.
+        offset = time.monotonic() - time.time()
+        entries = [
+            (entry["url"], (PageMetadata.from_dict(entry["metadata"]), entry["expires_at"] + offset))
+            for entry in data
+            if entry["expires_at"] + offset + self.stale_ttl >= time.monotonic()
+        ]
+        self._entries = OrderedDict(entries[-self.max_entries:])
+
+    def save(self):
+        """
+        Save the cache atomically, least recently used entries first.
+        """
+        offset = time.time() - time.monotonic()
+        data = [
+            {"url": url, "metadata": metadata.to_dict(), "expires_at": expires_at + offset}
+            for url, (metadata, expires_at) in self._entries.items()
+        ]
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        temp_path = f"{self.cache_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        os.replace(temp_path, self.cache_path)
+
+
+title_cache = TitleCache()
@@ -0,0 +1,96 @@
+import re
+from typing import List, NamedTuple, Optional
+from urllib.parse import unquote, urlparse
+
+from bot.metadata import PageMetadata
+from services.origin_limiter import registrable_domain
+from services.title_normalizer import truncate_title
+
+# Candidates at least this confident are used without asking the user.
+CONFIDENT_TITLE = 0.6
+
+# Titles that name a kind of page rather than the page, compared casefolded.
+GENERIC_TITLES = frozenset((
+    "home", "homepage", "home page", "index", "main page", "welcome", "untitled", "untitled document",
+    "loading", "loading...", "just a moment...", "please wait", "access denied", "forbidden",
+    "403 forbidden", "404 not found", "not found", "page not found", "error", "sign in", "log in", "login",
+))
+
+# Path segments that carry no title: numeric and hex IDs, and index pages.
+_ID_SEGMENT = re.compile(r"^(?:\d+|[0-9a-f]{8,}|[0-9a-z]{1,3}|index|default)$", re.IGNORECASE)
+_PAGE_EXTENSION = re.compile(r"\.(?:html?|php|aspx?|jsp)$", re.IGNORECASE)
+_WORD_SEPARATORS = re.compile(r"[-_+\s]+")
+
+
+class TitleCandidate(NamedTuple):
+    """
+    A possible title for a page and how likely it is to be the right one.
+
+    Parameters:
+        title (str): The title.
+        confidence (float): From 0 to 1; at least `CONFIDENT_TITLE` is used without asking.
+        source (str): Where it came from: `page` for the resolved metadata, `url` for the URL's path.
+        metadata (Optional[PageMetadata]): The resolved metadata, for `page` candidates.
+    """
+    title: str
+    confidence: float
+    source: str
+    metadata: Optional[PageMetadata] = None
+
+
+def score_title(title: str, url: str, site_name: Optional[str] = None) -> float:
+    """
+    How likely a resolved title is to describe the page rather than its site.
+
+    Generic titles such as "Home" or a bot-check interstitial score lowest,
+    followed by the site's own name. Any other title is trusted, though a
+    single short word ranks a little below a longer one.
+    """
+    key = title.casefold().strip()
+    if not key:
+        return 0.0
+    if key in GENERIC_TITLES:
+        return 0.1
+    domain = registrable_domain(url)
+    if key in (domain, domain.split(".", 1)[0]) or (site_name and key == site_name.casefold().strip()):
+        return 0.2
+    if " " not in key and len(key) < 12:
+        return 0.7
+    return 0.9
+
+
+def title_from_url(url: str) -> Optional[str]:
+    """
+    Guess a title from the last descriptive segment of a URL's path, as in
+    `/blog/2024/03/my-great-post.html` becoming "My great post".
+    """
+    for segment in reversed(urlparse(url).path.split("/")):
+        segment = _PAGE_EXTENSION.sub("", unquote(segment))
+        if not segment or _ID_SEGMENT.match(segment):
+            continue
+        words = _WORD_SEPARATORS.sub(" ", segment).strip()
+        if sum(character.isalpha() for character in words) < 3:
+            continue
+        return truncate_title(words[0].upper() + words[1:])
+    return None
+
+
+def rank_candidates(url: str, metadata: Optional[PageMetadata]) -> List[TitleCandidate]:
+    """
+    List the possible titles for a page, most confident first.
+
+    Parameters:
+        url (str): The page's URL.
+        metadata (Optional[PageMetadata]): Its resolved metadata, if any was found in time.
+
+    Returns:
+        List[TitleCandidate]: The candidates, without duplicates; empty when there are none.
+    """
+    candidates = []
+    if metadata and metadata.title:
+        candidates.append(TitleCandidate(metadata.title, score_title(metadata.title, url, metadata.site_name),
+                                         "page", metadata))
+    guess = title_from_url(url)
+    if guess and all(guess.casefold() != candidate.title.casefold() for candidate in candidates):
+        candidates.append(TitleCandidate(guess, 0.4 if " " in guess else 0.3, "url"))
+    return sorted(candidates, key=lambda candidate: -candidate.confidence)
@@ -0,0 +1,192 @@
+import html
+import json
+import logging
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from bot.config import DATA_DIR
+from services.origin_limiter import registrable_domain
+
+logger = logging.getLogger(__name__)
+
+# Discord's limit on thread names.
+MAX_TITLE_LENGTH = 100
+
+# Runs of whitespace, including the zero-width and non-breaking spaces pages pad titles with.
+_WHITESPACE = re.compile(r"[\s​‌‍⁠﻿]+")
+# A title split at its last spaced separator, as in "Article | Site" or "Article - Site".
+_LAST_SEGMENT = re.compile(r"^(.*\S)\s+[|\-–—·•»:~]\s+(\S.*)$")
+# Trailing separators and punctuation left over after truncating at a word boundary.
+_TRAILING_SEPARATORS = re.compile(r"[\s|\-–—·•»:~,;]+$")
+
+# A truncated title is cut at a word boundary unless that would lose more than this share of it.
+_MIN_WORD_CUT = 0.6
+
+
+def _segment_key(segment: str) -> str:
+    return segment.casefold().strip()
+
+
+def split_suffix(title: str) -> Tuple[str, Optional[str]]:
+    """
+    Split a title at its last spaced separator.
+
+    Returns:
+        Tuple[str, Optional[str]]: The title before the separator and the segment
+        after it, or the whole title and None when it has no separator.
+    """
+    match = _LAST_SEGMENT.match(title)
+    if match is None:
+        return title, None
+    return match.group(1), match.group(2)
+
+
+def truncate_title(title: str, max_length: int = MAX_TITLE_LENGTH) -> str:
+    """
+    Shorten a title to `max_length` characters, cutting at a word boundary and ending with an ellipsis.
+    """
+    if len(title) <= max_length:
+        return title
+    cut = title[:max_length - 1]
+    boundary = cut.rfind(" ")
+    if boundary >= max_length * _MIN_WORD_CUT:
+        cut = cut[:boundary]
+    return _TRAILING_SEPARATORS.sub("", cut) + "…"
+
+
+class TitleNormalizer:
+    """
+    Cleans up page titles before they become thread names.
+
+    Titles are HTML-unescaped, have their whitespace collapsed, lose their site's
+    brand suffix ("Foo - Stack Overflow" becomes "Foo") or domain ("Foo | jvns.ca")
+    and are truncated at a word boundary to fit Discord's thread-name limit.
+
+    The suffix for each registrable domain is learned from the titles passing
+    through `learn`: a trailing segment that matches the page's `site_name`
+    metadata is taken straight away, and any other trailing segment once it has
+    ended `min_samples` different titles from the domain. Learned suffixes are
+    kept in a dict keyed by domain, so applying them is a lookup and one
+    precompiled match per title, and are saved to `DATA_DIR` so they survive
+    restarts.
+
+    Parameters:
+        min_samples (int): Titles a trailing segment must end before it is taken as the domain's suffix.
+        max_candidates (int): Trailing segments tracked per domain; the rarest are forgotten beyond this.
+        max_length (int): The longest a normalized title may be.
+        rules_path (str): Where learned suffixes are saved.
+    """
+
+    def __init__(self, min_samples: int = 3, max_candidates: int = 20, max_length: int = MAX_TITLE_LENGTH,
+                 rules_path: str = None):
+        self.min_samples = min_samples
+        self.max_candidates = max_candidates
+        self.max_length = max_length
+        self.rules_path = rules_path or os.path.join(DATA_DIR, "title_suffixes.json")
+        # Registrable domain -> casefolded brand suffix.
+        self._suffixes: Dict[str, str] = {}
+        # Registrable domain -> casefolded trailing segment -> the different titles it has ended.
+        self._candidates: Dict[str, Dict[str, List[str]]] = {}
+
+    def suffix_for(self, url: str) -> Optional[str]:
+        return self._suffixes.get(registrable_domain(url))
+
+    @staticmethod
+    def clean(title: str) -> str:
+        """
+        Decode HTML entities and collapse whitespace.
+        """
+        return _WHITESPACE.sub(" ", html.unescape(title)).strip()
+
+    def learn(self, url: str, title: str, site_name: Optional[str] = None):
+        """
+        Count a resolved title's trailing segment towards its domain's suffix.
+
+        Parameters:
+            url (str): The page's URL.
+            title (str): The title as the page sent it.
+            site_name (Optional[str]): The page's `og:site_name` or oEmbed provider name.
+        """
+        head, segment = split_suffix(self.clean(title))
+        if segment is None:
+            return
+        domain = registrable_domain(url)
+        key = _segment_key(segment)
+        if self._suffixes.get(domain) == key:
+            return
+
+        if site_name and key == _segment_key(self.clean(site_name)):
+            self._set_suffix(domain, key)
+            return
+
+        # Revalidating a page sees its title again, so only different titles count.
+        candidates = self._candidates.setdefault(domain, {})
+        heads = candidates.setdefault(key, [])
+        head = _segment_key(head)
+        if head in heads:
+            return
+        heads.append(head)
+        if len(heads) >= self.min_samples:
+            self._set_suffix(domain, key)
+        elif len(candidates) > self.max_candidates:
+            del candidates[min(candidates, key=lambda segment: len(candidates[segment]))]
+
+    def _set_suffix(self, domain: str, suffix: str):
+        self._suffixes[domain] = suffix
+        self._candidates.pop(domain, None)
+
+    def normalize(self, title: str, url: str = None, site_name: Optional[str] = None) -> str:
+        """
+        Run a title through the whole pipeline.
+
+        Parameters:
+            title (str): The raw title.
+            url (str): The page's URL. Its domain and learned suffix are stripped.
+            site_name (Optional[str]): The page's site name, stripped as a suffix as well.
+
+        Returns:
+            str: The normalized title.
+        """
+        title = self.clean(title)
+        head, segment = split_suffix(title)
+        if segment is not None:
+            key = _segment_key(segment)
+            domain = registrable_domain(url) if url else None
+            if (domain and key in (domain, self._suffixes.get(domain))) or \
+                    (site_name and key == _segment_key(self.clean(site_name))):
+                title = head
+        return truncate_title(title, self.max_length)
+
+    def load(self):
+        """
+        Load learned suffixes, if any.
+        """
+        try:
+            with open(self.rules_path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("Failed to load title suffixes: %s", e)
+            return
+
+        self._suffixes = dict(data.get("suffixes", {}))
+        self._candidates = data.get("candidates", {})
+
+    def save(self):
+        """
+        Save learned suffixes and the candidates for new ones atomically.
+        """
+        data = {
+            "suffixes": self._suffixes,
+            "candidates": self._candidates,
+        }
+        os.makedirs(os.path.dirname(self.rules_path) or ".", exist_ok=True)
+        temp_path = f"{self.rules_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        os.replace(temp_path, self.rules_path)
+
+
+title_normalizer = TitleNormalizer()
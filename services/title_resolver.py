@@ -0,0 +1,513 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+from urllib.parse import quote, urlparse, parse_qs
+
+from bot.config import DATA_DIR
+from bot.metadata import PageMetadata
+from bot.util import (
+    fetch_metadata_via_proxy,
+    fetch_webpage_metadata,
+    fetch_youtube_video_title,
+    get_domain_from_url,
+    revalidate_page_metadata,
+    get_youtube_service,
+)
+from services.canonical import choose_canonical
+from services.http import get_session
+from services.origin_limiter import FetchBudget, OriginLimiter, fetch_budget, origin_limiter
+from services.proxy_pool import proxy_pool
+from services.title_candidates import TitleCandidate, rank_candidates
+from services.title_cache import TitleCache, title_cache
+from services.title_normalizer import TitleNormalizer, title_normalizer
+
+logger = logging.getLogger(__name__)
+
+# oEmbed endpoints keyed by the domain they serve. `{url}` is replaced with the quoted page URL.
+OEMBED_PROVIDERS = {
+    "youtube.com": "https://www.youtube.com/oembed?format=json&url={url}",
+    "youtu.be": "https://www.youtube.com/oembed?format=json&url={url}",
+    "vimeo.com": "https://vimeo.com/api/oembed.json?url={url}",
+    "soundcloud.com": "https://soundcloud.com/oembed?format=json&url={url}",
+    "open.spotify.com": "https://open.spotify.com/oembed?url={url}",
+    "reddit.com": "https://www.reddit.com/oembed?url={url}",
+    "tiktok.com": "https://www.tiktok.com/oembed?url={url}",
+}
+
+# Seconds to wait for the primary strategy before hedging when a domain has no history yet.
+DEFAULT_HEDGE_DELAY = 1.0
+
+# Overall time budget for resolving a title across all strategies. Discord expects an
+# interaction response within 3 seconds, and the manual-title modal can't be deferred.
+DEFAULT_BUDGET = 2.5
+
+# Upper bound for a race. Races are cancelled once nobody waits on them, so this only
+# applies to background refreshes of stale cache entries, where nobody is waiting.
+BACKGROUND_BUDGET = 15.0
+
+
+def _provider_for(domain: str, providers: dict) -> Optional[str]:
+    for registered_domain, value in providers.items():
+        if domain == registered_domain or domain.endswith(f".{registered_domain}"):
+            return value
+    return None
+
+
+async def _get_json(url: str) -> Optional[dict]:
+    async with get_session().get(url, headers={"Accept": "application/json"}) as response:
+        if response.status != 200:
+            return None
+        return await response.json(content_type=None)
+
+
+async def fetch_oembed_metadata(url: str) -> Optional[PageMetadata]:
+    """
+    Fetches a title, provider name and thumbnail from the domain's oEmbed endpoint.
+    """
+    endpoint = _provider_for(get_domain_from_url(url) or "", OEMBED_PROVIDERS)
+    if not endpoint:
+        return None
+    data = await _get_json(endpoint.format(url=quote(url, safe="")))
+    if not data or not data.get("title"):
+        return None
+    return PageMetadata(title=data["title"], site_name=data.get("provider_name"), image=data.get("thumbnail_url"))
+
+
+async def _fetch_api_title(url: str) -> Optional[str]:
+    domain = get_domain_from_url(url) or ""
+    parsed = urlparse(url)
+
+    if domain.endswith("youtube.com") or domain == "youtu.be":
+        return await fetch_youtube_video_title(url)
+
+    if domain.endswith("reddit.com") and "/comments/" in parsed.path:
+        data = await _get_json(f"https://www.reddit.com{parsed.path.rstrip('/')}.json?limit=1")
+        try:
+            return data[0]["data"]["children"][0]["data"]["title"]
+        except (KeyError, IndexError, TypeError):
+            return None
+
+    if domain == "news.ycombinator.com":
+        item_id = parse_qs(parsed.query).get("id", [None])[0]
+        if item_id and item_id.isdigit():
+            data = await _get_json(f"https://hacker-news.firebaseio.com/v0/item/{item_id}.json")
+            return (data or {}).get("title") or None
+
+    return None
+
+
+async def fetch_api_metadata(url: str) -> Optional[PageMetadata]:
+    """
+    Fetches a title from a site's JSON API, for the sites that expose one.
+    """
+    title = await _fetch_api_title(url)
+    return PageMetadata(title=title) if title else None
+
+
+def _has_api(domain: str, url: str) -> bool:
+    if domain.endswith("youtube.com") or domain == "youtu.be":
+        return bool(get_youtube_service().api_key)
+    if domain.endswith("reddit.com"):
+        return "/comments/" in url
+    return domain == "news.ycombinator.com"
+
+
+async def fetch_proxied_metadata(url: str) -> Optional[PageMetadata]:
+    """
+    Fetches the page's metadata through the proxy pool.
+    """
+    return await fetch_metadata_via_proxy(url, get_domain_from_url(url), proxy_pool, attempts=1)
+
+
+class Strategy(NamedTuple):
+    name: str
+    fetch: Callable[[str], Awaitable[Optional[PageMetadata]]]
+    applies: Callable[[str, str], bool]
+
+
+STRATEGIES: List[Strategy] = [
+    Strategy("api", fetch_api_metadata, _has_api),
+    Strategy("oembed", fetch_oembed_metadata, lambda domain, url: bool(_provider_for(domain, OEMBED_PROVIDERS))),
+    # Proxies are only raced for domains that have already blocked a direct request.
+    Strategy("html", lambda url: fetch_webpage_metadata(url, proxy_pool=proxy_pool),
+             lambda domain, url: not proxy_pool.is_blocked(domain)),
+    Strategy("proxy", fetch_proxied_metadata, lambda domain, url: proxy_pool.is_blocked(domain)),
+]
+
+
+class LatencyStats:
+    """
+    Rolling latency samples and success counts for one (domain, strategy) pair.
+    """
+    __slots__ = ("samples", "successes", "failures")
+
+    def __init__(self, samples: List[float] = (), successes: int = 0, failures: int = 0, window: int = 50):
+        self.samples = deque(samples, maxlen=window)
+        self.successes = successes
+        self.failures = failures
+
+    def record(self, latency: float, success: bool):
+        if success:
+            self.samples.append(latency)
+            self.successes += 1
+        else:
+            self.failures += 1
+
+    def percentile(self, point: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(point / 100 * len(ordered)))]
+
+    @property
+    def success_rate(self) -> float:
+        total = self.successes + self.failures
+        return self.successes / total if total else 1.0
+
+    def to_dict(self) -> dict:
+        return {"samples": [round(s, 4) for s in self.samples], "successes": self.successes, "failures": self.failures}
+
+
+class _InFlight:
+    """
+    A resolution in progress, how many callers are waiting on it, and whether
+    it should finish even once nobody waits.
+    """
+    __slots__ = ("task", "waiters", "detached", "budget")
+
+    def __init__(self, task: asyncio.Task, budget: FetchBudget):
+        self.task = task
+        self.waiters = 0
+        self.detached = False
+        self.budget = budget
+
+
+class TitleResolver:
+    """
+    Resolves a page title by racing the strategies that apply to its domain.
+
+    The strategy that has historically been fastest and most reliable for the
+    domain goes first. If it hasn't answered within that strategy's observed p90
+    for the domain, the next strategy is started alongside it, and so on. The
+    first valid title wins and every other in-flight strategy is cancelled. A
+    strategy that fails outright starts the next one immediately.
+
+    Fetched titles are normalized by `normalizer` (entities decoded, the site's
+    brand suffix stripped, truncated to fit a thread name) before anything sees
+    them, and teach it the suffixes of their sites.
+
+    Resolved metadata is cached under both the requested URL and the page's
+    canonical URL, which is recorded in `canonical_url`. Stale cache entries are
+    served immediately while they are revalidated in the background, using a
+    conditional request when the page sent an `ETag` or `Last-Modified`.
+    Concurrent resolutions of the same URL share one race, which is cancelled
+    once every caller waiting on it has given up. Learned latency stats are
+    persisted to `DATA_DIR` so they survive restarts.
+
+    URLs whose origin has its circuit breaker open aren't fetched at all:
+    callers get the cached title if there is one and None otherwise, so
+    `/snip` goes straight to the manual-title modal.
+    """
+
+    def __init__(self, strategies: List[Strategy] = None, stats_path: str = None,
+                 default_hedge_delay: float = DEFAULT_HEDGE_DELAY, save_interval: float = 60,
+                 cache: TitleCache = None, limiter: OriginLimiter = None, normalizer: TitleNormalizer = None):
+        self.strategies = strategies if strategies is not None else STRATEGIES
+        self.cache = cache if cache is not None else title_cache
+        self.limiter = limiter if limiter is not None else origin_limiter
+        self.normalizer = normalizer if normalizer is not None else title_normalizer
+        self.stats_path = stats_path or os.path.join(DATA_DIR, "domain_latency.json")
+        self.default_hedge_delay = default_hedge_delay
+        self.save_interval = save_interval
+
+        self._stats: Dict[str, Dict[str, LatencyStats]] = {}
+        self._dirty = False
+        self._save_task: Optional[asyncio.Task] = None
+        self._revalidating: Dict[str, asyncio.Task] = {}
+        self._in_flight: Dict[str, _InFlight] = {}
+
+    def stats_for(self, domain: str, strategy: str) -> LatencyStats:
+        return self._stats.setdefault(domain, {}).setdefault(strategy, LatencyStats())
+
+    def hedge_delay(self, domain: str, strategy: str) -> float:
+        """
+        How long to give `strategy` before hedging: its observed p90 for the domain.
+        """
+        p90 = self.stats_for(domain, strategy).percentile(90)
+        return p90 if p90 is not None else self.default_hedge_delay
+
+    def rank(self, domain: str, url: str) -> List[Strategy]:
+        """
+        Order the applicable strategies for a domain, best first.
+
+        Strategies are ranked by median latency, penalized by their failure rate.
+        A strategy without history is assumed to take the default hedge delay, and
+        ties keep the declared order.
+        """
+        applicable = [strategy for strategy in self.strategies if strategy.applies(domain, url)]
+
+        def _cost(indexed):
+            index, strategy = indexed
+            stats = self.stats_for(domain, strategy.name)
+            median = stats.percentile(50)
+            if median is None:
+                median = self.default_hedge_delay
+            return (median / max(stats.success_rate, 0.05), index)
+
+        return [strategy for _, strategy in sorted(enumerate(applicable), key=_cost)]
+
+    async def resolve(self, url: str, budget: float = DEFAULT_BUDGET, detach: bool = False) -> Optional[PageMetadata]:
+        """
+        Resolve the metadata for a URL, hedging across strategies.
+
+        Parameters:
+            url (str): The normalized URL to resolve.
+            budget (float): Overall time limit in seconds.
+            detach (bool): Keep resolving in the background after the budget runs
+                out, so the title is cached for the next request.
+
+        Returns:
+            Optional[PageMetadata]: The first metadata found with a valid title, or None.
+        """
+        cached, stale = self.cache.lookup(url)
+        if cached is not None:
+            if stale and url not in self._revalidating and not self.limiter.is_open(url):
+                task = asyncio.create_task(self._revalidate(url, cached), name="title-revalidate")
+                self._revalidating[url] = task
+                task.add_done_callback(lambda _: self._revalidating.pop(url, None))
+            return cached
+
+        if self.limiter.is_open(url):
+            logger.info("Skipping title lookup for %s: its site is failing", url, extra={"url": url})
+            return None
+
+        flight = self._in_flight.get(url)
+        if flight is None:
+            # The race runs for as long as any caller still waits on it, each within its own budget.
+            budget_state = FetchBudget()
+            flight = _InFlight(
+                asyncio.create_task(self._race(url, BACKGROUND_BUDGET, budget_state), name="title-resolve"), budget_state
+            )
+            self._in_flight[url] = flight
+            flight.task.add_done_callback(lambda _: self._forget_flight(url, flight))
+
+        flight.waiters += 1
+        flight.detached = flight.detached or detach
+        timed_out = False
+        try:
+            return await asyncio.wait_for(asyncio.shield(flight.task), timeout=max(budget, 0))
+        except asyncio.TimeoutError:
+            timed_out = True
+            return None
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.detached and not flight.task.done():
+                self._forget_flight(url, flight)
+                flight.budget.expired = timed_out
+                flight.task.cancel()
+
+    async def resolve_candidates(self, url: str, budget: float = DEFAULT_BUDGET) -> List[TitleCandidate]:
+        """
+        Resolve a URL's possible titles, most confident first.
+
+        When nothing confident is found in time, the caller can ask the user
+        with the best candidate prefilled. The resolution carries on in the
+        background meanwhile, so a retry or the next snip of the URL finds the
+        full title in the cache.
+
+        Parameters:
+            url (str): The normalized URL to resolve.
+            budget (float): Overall time limit in seconds.
+
+        Returns:
+            List[TitleCandidate]: The candidates, possibly none.
+        """
+        metadata = await self.resolve(url, budget=budget, detach=True)
+        return rank_candidates(url, metadata)
+
+    def _forget_flight(self, url: str, flight: _InFlight):
+        if self._in_flight.get(url) is flight:
+            del self._in_flight[url]
+
+    async def _revalidate(self, url: str, cached: PageMetadata):
+        """
+        Refresh a stale cache entry, extending it when the origin reports it unchanged.
+        """
+        try:
+            if cached.etag or cached.last_modified:
+                not_modified, metadata = await revalidate_page_metadata(url, cached)
+                if not_modified:
+                    self.cache.touch(url)
+                    return
+                if metadata and metadata.title and self._normalize(url, metadata):
+                    self._store(url, metadata)
+                    return
+
+            await self._race(url, BACKGROUND_BUDGET)
+        except Exception as e:
+            logger.warning("Failed to revalidate title for %s: %s", url, e, extra={"url": url})
+
+    async def _race(self, url: str, budget: float, budget_state: FetchBudget = None) -> Optional[PageMetadata]:
+        domain = get_domain_from_url(url) or ""
+        queue = self.rank(domain, url)
+        running: Dict[asyncio.Task, tuple] = {}
+        deadline = time.monotonic() + budget
+        # Strategy tasks copy this context, so their requests learn whether they were cut off by the deadline.
+        budget_state = budget_state or FetchBudget()
+        fetch_budget.set(budget_state)
+
+        def _launch():
+            strategy = queue.pop(0)
+            task = asyncio.create_task(strategy.fetch(url), name=f"title-{strategy.name}")
+            running[task] = (strategy, time.monotonic())
+
+        try:
+            if queue:
+                _launch()
+
+            while running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    budget_state.expired = True
+                    break
+
+                timeout = remaining
+                if queue:
+                    newest_strategy, newest_started = max(running.values(), key=lambda item: item[1])
+                    hedge_at = newest_started + self.hedge_delay(domain, newest_strategy.name)
+                    timeout = min(remaining, max(0.0, hedge_at - time.monotonic()))
+
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    strategy, started = running.pop(task)
+                    try:
+                        metadata = task.result()
+                    except Exception as e:
+                        logger.info("Title strategy '%s' failed for %s: %s", strategy.name, domain, e,
+                                    extra={"url": url, "strategy": strategy.name})
+                        metadata = None
+
+                    valid = bool(metadata and metadata.title) and self._normalize(url, metadata)
+                    self._record(domain, strategy.name, time.monotonic() - started, valid)
+                    if valid:
+                        logger.info("Title for %s resolved via '%s'", domain, strategy.name,
+                                    extra={"url": url, "strategy": strategy.name})
+                        self._store(url, metadata)
+                        return metadata
+
+                # Hedge when the primary is slow, or move on when everything running has failed.
+                if queue and (not done or not running):
+                    _launch()
+
+            return None
+        finally:
+            for task in running:
+                task.cancel()
+
+    def _normalize(self, url: str, metadata: PageMetadata) -> bool:
+        """
+        Learn from a freshly fetched title, then replace it with its normalized form.
+
+        Returns:
+            bool: Whether a title is left once normalized.
+        """
+        self.normalizer.learn(url, metadata.title, metadata.site_name)
+        metadata.title = self.normalizer.normalize(metadata.title, url, metadata.site_name)
+        return bool(metadata.title)
+
+    def _store(self, url: str, metadata: PageMetadata):
+        """
+        Cache freshly fetched metadata under the URL and, when it differs, the page's canonical URL.
+        """
+        metadata.canonical_url = choose_canonical(url, metadata.canonical_url)
+        self.cache.set(url, metadata)
+        if metadata.canonical_url != url:
+            self.cache.set(metadata.canonical_url, metadata)
+
+    def _record(self, domain: str, strategy: str, latency: float, success: bool):
+        self.stats_for(domain, strategy).record(latency, success)
+        self._dirty = True
+
+    def load(self):
+        """
+        Load persisted latency stats, if any.
+        """
+        try:
+            with open(self.stats_path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("Failed to load domain latency stats: %s", e)
+            return
+
+        self._stats = {
+            domain: {name: LatencyStats(**values) for name, values in strategies.items()}
+            for domain, strategies in data.items()
+        }
+
+    def save(self):
+        """
+        Persist latency stats atomically.
+        """
+        self._write(self._snapshot())
+
+    def _snapshot(self) -> dict:
+        """
+        Copy the stats into plain data. Must run on the event loop, which is what changes them.
+        """
+        self._dirty = False
+        return {
+            domain: {name: stats.to_dict() for name, stats in strategies.items()}
+            for domain, strategies in self._stats.items()
+        }
+
+    def _write(self, data: dict):
+        os.makedirs(os.path.dirname(self.stats_path) or ".", exist_ok=True)
+        temp_path = f"{self.stats_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        os.replace(temp_path, self.stats_path)
+
+    def start(self):
+        """
+        Load persisted stats and periodically save them. Must be called from inside the running loop.
+        """
+        self.load()
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self._save_loop(), name="title-resolver-save")
+
+    async def stop(self):
+        for task in list(self._revalidating.values()):
+            task.cancel()
+        for flight in list(self._in_flight.values()):
+            flight.task.cancel()
+        if self._save_task:
+            self._save_task.cancel()
+            try:
+                await self._save_task
+            except asyncio.CancelledError:
+                pass
+            self._save_task = None
+        if self._dirty:
+            self.save()
+
+    async def _save_loop(self):
+        while True:
+            await asyncio.sleep(self.save_interval)
+            if self._dirty:
+                # Only the file is written in a thread; the stats keep changing on the loop meanwhile.
+                data = self._snapshot()
+                try:
+                    await asyncio.to_thread(self._write, data)
+                except Exception as e:
+                    self._dirty = True
+                    logger.warning("Failed to save domain latency stats: %s", e)
+
+
+title_resolver = TitleResolver()
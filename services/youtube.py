@@ -1,6 +1,3 @@
-import requests
-
-
 class YouTubeService:
     def __init__(self, api_key):
 
@@ -8,6 +5,8 @@ class YouTubeService:
         self.base_url = 'https://www.googleapis.com/youtube/v3'
 
     def get_video_title(self, video_id):
+        # Only needed for YouTube links, so imported on first use rather than at startup.
+        import requests
 
         url = f"{self.base_url}/videos"
         params = {
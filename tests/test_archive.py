@@ -0,0 +1,122 @@
+"""
+Tests for page snapshots and the content-addressed snapshot store.
+"""
+import os
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from bot.util import _read_page_metadata
+from services.archive import SnapshotArchiver, SnapshotStore, extract_readable_text
+from services.page_bodies import PageBodies
+
+PAGE = b"""<html><head><title>Example</title><script>var tracking = 1;</script></head><body>
+<nav><p>Home About Contact and a long list of navigation links here</p></nav>
+<div class="sidebar"><p>Short aside.</p></div>
+<div class="content">
+<h1>The headline</h1>
+<p>The first paragraph of the article is long enough to count as real text.</p>
+<p>The second paragraph keeps going with <a href="/x">a link</a> in the middle of it.</p>
+<blockquote><p>A quoted passage that should only appear once in the snapshot.</p></blockquote>
+</div>
+<footer><p>Copyright and a long footer paragraph nobody wants to keep around.</p></footer>
+</body></html>"""
+
+
+class _Content:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def iter_chunked(self, size):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def test_extract_readable_text_keeps_the_article():
+    text = extract_readable_text(PAGE)
+
+    assert text.split("\n\n") == [
+        "The headline",
+        "The first paragraph of the article is long enough to count as real text.",
+        "The second paragraph keeps going with a link in the middle of it.",
+        "A quoted passage that should only appear once in the snapshot.",
+    ]
+
+
+def test_extract_readable_text_prefers_article_element():
+    text = extract_readable_text(b"<div><p>Outside the article, but long enough to be scored.</p></div>"
+                                 b"<article><p>Inside</p></article>")
+
+    assert text == "Inside"
+
+
+class TestSnapshotStore:
+    """Tests for storing and reading snapshots."""
+
+    def test_identical_snapshots_are_stored_once(self, tmp_path):
+        store = SnapshotStore(str(tmp_path))
+
+        first = store.put("Body", "Title", "https://example.com")
+        second = store.put("Body", "Other title", "https://example.com/?ref=2")
+
+        assert first == second
+        assert sum(len(files) for _, _, files in os.walk(tmp_path)) == 2
+        assert SnapshotStore(str(tmp_path)).get(first) == "Body"
+        assert store.info(first) == {"title": "Title", "url": "https://example.com"}
+
+    def test_missing_snapshot(self, tmp_path):
+        assert SnapshotStore(str(tmp_path)).get("0" * 64) is None
+
+
+class TestSnapshotArchiver:
+    """Tests for reusing captured page bodies."""
+
+    @pytest.mark.asyncio
+    async def test_reuses_the_body_captured_during_title_resolution(self, tmp_path):
+        bodies = PageBodies(enabled=True)
+        response = Mock()
+        response.content = _Content([PAGE[200:]])
+        response.charset = "utf-8"
+        bodies.capture(["https://example.com/a"], response, PAGE[:200])
+        archiver = SnapshotArchiver(store=SnapshotStore(str(tmp_path)), bodies=bodies, enabled=True)
+
+        with patch.object(archiver, "_fetch", AsyncMock()) as fetch:
+            digest = await archiver.snapshot("https://example.com/a", "Example")
+
+        fetch.assert_not_awaited()
+        response.release.assert_called_once()
+        assert archiver.store.get(digest).startswith("The headline")
+        assert archiver.store.info(digest) == {"title": "Example", "url": "https://example.com/a"}
+
+    @pytest.mark.asyncio
+    async def test_fetches_the_page_when_nothing_was_captured(self, tmp_path):
+        archiver = SnapshotArchiver(store=SnapshotStore(str(tmp_path)), bodies=PageBodies(), enabled=True)
+
+        with patch.object(archiver, "_fetch", AsyncMock(return_value=(PAGE, None))) as fetch:
+            assert await archiver.snapshot("https://example.com/a", "Example")
+
+        fetch.assert_awaited_once_with("https://example.com/a")
+
+    def test_disabled_archiver_does_nothing(self):
+        archiver = SnapshotArchiver(enabled=False)
+
+        archiver.archive_later(Mock(), "https://example.com/a", "Example")
+
+        assert not archiver._pending
+
+
+class TestPageBodies:
+    """Tests for capturing page bodies while metadata is read."""
+
+    @pytest.mark.asyncio
+    async def test_buffering_stops_at_the_size_limit(self):
+        """Test that a body whose head never ends is only buffered up to `max_bytes`."""
+        bodies = PageBodies(enabled=True, max_bytes=100)
+        response = Mock(status=200, url="https://example.com/file", charset=None, headers={})
+        response.content = _Content([b"%PDF-1.7 " + b"x" * 55] * 10)
+        session = Mock()
+        session.get = AsyncMock(return_value=response)
+
+        with patch("bot.util.get_session", return_value=session), patch("bot.util.page_bodies", bodies), \
+                patch.object(bodies, "capture") as capture:
+            await _read_page_metadata("https://example.com/file", None, None)
+
+        assert len(capture.call_args.args[2]) == 100
@@ -0,0 +1,116 @@
+"""
+Tests for URL canonicalization and the redirect-chain cache.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+from bot.cogs.snip_cog import SnipCog
+from services.canonical import Canonicalizer, choose_canonical, remove_tracking_params, strip_tracking_params
+
+
+def _redirect_session(hops):
+    """Build a fake session whose GET answers each URL in `hops` with a redirect to its value."""
+    def _get(url, allow_redirects=True):
+        response = MagicMock()
+        response.status = 301 if url in hops else 200
+        response.headers = {"Location": hops[url]} if url in hops else {}
+        context = MagicMock()
+        context.__aenter__ = AsyncMock(return_value=response)
+        context.__aexit__ = AsyncMock(return_value=False)
+        return context
+
+    session = MagicMock()
+    session.get = MagicMock(side_effect=_get)
+    return session
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://Example.com/a?utm_source=x&id=3&fbclid=abc#section", "https://example.com/a?id=3"),
+    ("https://example.com:443/a?b=2&a=1", "https://example.com/a?b=2&a=1"),
+    ("http://example.com", "http://example.com/"),
+    ("https://example.com/a?UTM_Medium=email&gclid=1", "https://example.com/a"),
+])
+def test_strip_tracking_params(url, expected):
+    assert strip_tracking_params(url) == expected
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://Example.com/a?q=a%20b&utm_source=x&path=a/b#section", "https://Example.com/a?q=a%20b&path=a/b#section"),
+    ("https://example.com/a?flag&fbclid=1", "https://example.com/a?flag"),
+    ("https://example.com/a?q=a+b", "https://example.com/a?q=a+b"),
+    ("https://example.com/a?utm_medium=email#top", "https://example.com/a#top"),
+])
+def test_remove_tracking_params(url, expected):
+    assert remove_tracking_params(url) == expected
+
+
+@pytest.mark.parametrize("url, declared, expected", [
+    ("https://example.com/story?id=3", "https://www.example.com/story", "https://www.example.com/story"),
+    ("https://example.com/story", "https://other.com/story", "https://example.com/story"),
+    ("https://example.com/story", "https://example.com/", "https://example.com/story"),
+    ("https://example.com/story", "/story", "https://example.com/story"),
+    ("https://example.com/story", None, "https://example.com/story"),
+])
+def test_choose_canonical(url, declared, expected):
+    assert choose_canonical(url, declared) == expected
+
+
+class TestCanonicalizer:
+    """Tests for shortener expansion and the redirect-chain cache."""
+
+    @pytest.mark.asyncio
+    async def test_shortener_is_expanded_once_and_cached(self, tmp_path):
+        """Test that a short link's chain is followed once and reused afterwards."""
+        session = _redirect_session({
+            "https://t.co/abc": "https://bit.ly/xyz",
+            "https://bit.ly/xyz": "https://example.com/story?utm_campaign=launch",
+        })
+        canonicalizer = Canonicalizer(cache_path=str(tmp_path / "redirects.json"))
+
+        with patch("services.canonical.get_session", return_value=session):
+            first = await canonicalizer.canonicalize("https://t.co/abc")
+            second = await canonicalizer.canonicalize("https://t.co/abc")
+
+        assert first == second == "https://example.com/story"
+        assert session.get.call_count == 2
+        assert canonicalizer.chain_for("https://t.co/abc")[-1] == "https://example.com/story?utm_campaign=launch"
+
+    @pytest.mark.asyncio
+    async def test_regular_url_is_not_fetched(self):
+        """Test that only shortener domains trigger network requests."""
+        canonicalizer = Canonicalizer()
+
+        with patch("services.canonical.get_session") as get_session:
+            assert await canonicalizer.canonicalize("https://example.com/a?fbclid=1") == "https://example.com/a"
+
+        get_session.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_chains_persist_across_instances(self, tmp_path):
+        """Test that saved redirect chains are loaded by a fresh canonicalizer."""
+        path = str(tmp_path / "redirects.json")
+        canonicalizer = Canonicalizer(cache_path=path)
+        with patch("services.canonical.get_session", return_value=_redirect_session({"https://bit.ly/a": "https://example.com/a"})):
+            await canonicalizer.canonicalize("https://bit.ly/a")
+        canonicalizer.save()
+
+        restored = Canonicalizer(cache_path=path)
+        restored.load()
+
+        with patch("services.canonical.get_session") as get_session:
+            assert await restored.canonicalize("https://bit.ly/a") == "https://example.com/a"
+        get_session.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_snip_posts_the_users_link_and_indexes_the_canonical_one(self, mock_application_context,
+                                                                            mock_forum_channel):
+        """Test that /snip keys the snip by its canonical URL but posts the link as the user wrote it."""
+        with patch("bot.cogs.snip_cog.create_forum_thread", AsyncMock()) as create, \
+                patch("bot.cogs.snip_cog.snapshot_archiver"):
+            await SnipCog.snip.callback(SnipCog(Mock()), mock_application_context,
+                                        url="https://Example.com/a?q=a%20b&flag&utm_source=x#part",
+                                        channel=mock_forum_channel, title="Title", message=None, mention=None,
+                                        additional_mentions="", tags=None)
+
+        kwargs = create.await_args.kwargs
+        assert kwargs["url"] == "https://Example.com/a?q=a%20b&flag#part"
+        assert kwargs["canonical_url"] == "https://example.com/a?q=a+b&flag="
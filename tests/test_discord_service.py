@@ -3,9 +3,11 @@ Tests for Discord service layer functions.
 Tests the create_forum_thread function with tag support.
 """
 import pytest
-from unittest.mock import Mock, AsyncMock
+from unittest.mock import Mock, AsyncMock, patch
 import discord
+from bot.metadata import PageMetadata
 from services.discord import create_forum_thread
+from services.thread_templates import compile_templates
 
 
 class TestCreateForumThread:
@@ -45,7 +47,7 @@ class TestCreateForumThread:
         call_kwargs = mock_forum_channel.create_thread.call_args.kwargs
         assert "applied_tags" in call_kwargs
         assert call_kwargs["applied_tags"] == selected_tags
-        assert call_kwargs["name"] == "Test thread title"  # Capitalized
+        assert call_kwargs["name"] == "Test Thread Title"  # Casing kept
 
     @pytest.mark.asyncio
     async def test_create_thread_with_none_tags(self, mock_forum_channel, mock_thread):
@@ -200,6 +202,41 @@ class TestCreateForumThread:
         send_kwargs = mock_thread.send.call_args.kwargs
         assert "embed" in send_kwargs
 
+    @pytest.mark.asyncio
+    async def test_create_thread_embed_includes_link_preview(self, mock_forum_channel, mock_thread):
+        """Test that page metadata fills in the embed's description, image, footer and timestamp."""
+        mock_forum_channel.create_thread.return_value = mock_thread
+        mock_thread.send = AsyncMock()
+
+        author = Mock(spec=discord.User)
+        author.display_name = "Test Author"
+        author.mention = "<@111222333>"
+        author.avatar = None
+
+        metadata = PageMetadata(
+            title="Test Article",
+            description="A" * 500,
+            site_name="Example News",
+            image="https://example.com/cover.png",
+            published_time="2024-05-01T12:00:00Z",
+            favicon="https://example.com/favicon.ico",
+        )
+
+        await create_forum_thread(
+            channel=mock_forum_channel,
+            title="Test Article",
+            url="https://example.com/article",
+            metadata=metadata,
+            author=author,
+        )
+
+        embed = mock_thread.send.call_args.kwargs["embed"]
+        assert len(embed.description) == 350
+        assert embed.image.url == "https://example.com/cover.png"
+        assert embed.footer.text == "Example News • Snipped by Test Author"
+        assert embed.footer.icon_url == "https://example.com/favicon.ico"
+        assert embed.timestamp.year == 2024
+
     @pytest.mark.asyncio
     async def test_create_thread_raises_exception_on_error(self, mock_forum_channel):
         """Test that exceptions from Discord API are properly raised."""
@@ -256,8 +293,62 @@ class TestCreateForumThread:
         call_kwargs = mock_forum_channel.create_thread.call_args.kwargs
         content = call_kwargs["content"]
 
-        # Verify content contains expected elements (note: title gets capitalized)
-        assert "**Test title**" in content
+        # Verify content contains expected elements
+        assert "**Test Title**" in content
         assert "Test message body" in content
         assert "https://example.com/test" in content
         assert author.mention in content
+
+    @pytest.mark.asyncio
+    async def test_create_thread_uses_templates_and_keeps_casing(self, mock_forum_channel, mock_thread):
+        """Test that custom templates lay out the thread and only the title's first letter is raised."""
+        mock_forum_channel.create_thread.return_value = mock_thread
+        mock_thread.send = AsyncMock()
+
+        author = Mock(spec=discord.User)
+        author.display_name = "Test Author"
+        author.mention = "<@111222333>"
+        author.avatar = None
+
+        await create_forum_thread(
+            channel=mock_forum_channel,
+            title="gitHub Actions for Rust",
+            url="https://github.com/features/actions",
+            metadata=PageMetadata(title="GitHub Actions", site_name="GitHub"),
+            author=author,
+            templates=compile_templates({
+                "name": "[{site_name}] {title}",
+                "body": "{title} ({domain})\n\n{message}\n\nvia {author_name}",
+                "embed_footer": "Shared by {author_name}",
+            }),
+        )
+
+        call_kwargs = mock_forum_channel.create_thread.call_args.kwargs
+        assert call_kwargs["name"] == "[GitHub] GitHub Actions for Rust"
+        assert call_kwargs["content"] == "GitHub Actions for Rust (github.com)\n\nvia Test Author"
+        assert call_kwargs["allowed_mentions"] is mock_thread.send.call_args.kwargs["allowed_mentions"]
+        embed = mock_thread.send.call_args.kwargs["embed"]
+        assert embed.title == "GitHub Actions for Rust"
+        assert embed.footer.text == "GitHub • Shared by Test Author"
+
+    @pytest.mark.asyncio
+    async def test_index_failure_does_not_fail_the_posted_thread(self, mock_forum_channel, mock_thread):
+        """Test that the thread is still returned when adding it to the search index fails."""
+        mock_forum_channel.create_thread.return_value = mock_thread
+        mock_thread.send = AsyncMock()
+        author = Mock(spec=discord.User)
+        author.display_name = "Test Author"
+        author.avatar = None
+
+        with patch("services.discord.snip_index") as index:
+            index.is_open = True
+            index.add.side_effect = RuntimeError("database is locked")
+            thread = await create_forum_thread(
+                channel=mock_forum_channel,
+                title="Test Thread",
+                url="https://example.com",
+                author=author,
+            )
+
+        assert thread is mock_thread
+        index.add.assert_called_once()
@@ -0,0 +1,178 @@
+"""
+Tests for parsing snip threads and the resumable forum export.
+"""
+import gzip
+import json
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, Mock
+import discord
+from bot.metadata import PageMetadata
+from services.checkpoints import CheckpointStore
+from services.discord import create_forum_thread
+from services.export import ForumExporter
+from services.snip_records import parse_snip_thread
+from services.thread_templates import compile_templates
+
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+async def _snip_thread(thread_id, title, url, archived_at=None, templates=None, metadata=None):
+    """Create a snip with create_forum_thread and return a thread replaying what it posted."""
+    posted = Mock(spec=discord.Thread)
+    posted.send = AsyncMock()
+    channel = Mock(spec=discord.ForumChannel)
+    channel.create_thread = AsyncMock(return_value=posted)
+
+    author = Mock(spec=discord.User)
+    author.id = 111222333
+    author.display_name = "Test Author"
+    author.mention = "<@111222333>"
+    author.avatar = None
+    mention = Mock(spec=discord.User)
+    mention.id = 444555666
+    mention.mention = "<@444555666>"
+
+    await create_forum_thread(channel=channel, title=title, url=url, message="Worth a read",
+                              author=author, mention=mention, additional_mentions=[], templates=templates,
+                              metadata=metadata)
+
+    starter = Mock(spec=discord.Message)
+    starter.id = thread_id
+    starter.content = channel.create_thread.call_args.kwargs["content"]
+    starter.embeds = []
+    embed_message = Mock(spec=discord.Message)
+    embed_message.id = thread_id + 1
+    embed_message.content = ""
+    embed_message.embeds = [posted.send.call_args_list[0].kwargs["embed"]]
+
+    async def history(limit=None, oldest_first=None):
+        for message in [starter, embed_message][:limit]:
+            yield message
+
+    thread = Mock(spec=discord.Thread)
+    thread.id = thread_id
+    thread.name = title
+    thread.guild = Mock(id=1)
+    thread.parent_id = 2
+    thread.applied_tags = [Mock(spec=discord.ForumTag)]
+    thread.applied_tags[0].name = "Reading"
+    thread.created_at = EPOCH
+    thread.archived = archived_at is not None
+    thread.archive_timestamp = archived_at
+    thread.jump_url = f"https://discord.com/channels/1/{thread_id}"
+    thread.history = history
+    return thread
+
+
+def _forum(active, archived):
+    channel = Mock(spec=discord.ForumChannel)
+    channel.id = 2
+    channel.guild = Mock(id=1)
+    channel.threads = active
+
+    async def archived_threads(limit=None, before=None):
+        for thread in sorted(archived, key=lambda t: t.archive_timestamp, reverse=True):
+            if before is None or thread.archive_timestamp < before:
+                yield thread
+
+    channel.archived_threads = archived_threads
+    return channel
+
+
+def _read_jsonl(path):
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        return [json.loads(line) for line in file]
+
+
+class TestParseSnipThread:
+    """Tests for rebuilding snips from what create_forum_thread posts."""
+
+    @pytest.mark.asyncio
+    async def test_round_trips_create_forum_thread(self):
+        """Test that every field written by create_forum_thread is read back."""
+        thread = await _snip_thread(10, "Test article", "https://example.com/a")
+        messages = [message async for message in thread.history(limit=2, oldest_first=True)]
+
+        record = parse_snip_thread(thread, messages)
+
+        assert record.title == "Test article"
+        assert record.url == "https://example.com/a"
+        assert record.author_id == 111222333
+        assert record.author_name == "Test Author"
+        assert record.message == "Worth a read"
+        assert record.mentions == [444555666]
+        assert record.tags == ["Reading"]
+
+    @pytest.mark.asyncio
+    async def test_reads_threads_posted_with_custom_templates(self):
+        """Test that the author and site name are read from a thread laid out by a guild's own templates."""
+        templates = compile_templates({"body": "{title}\n\n{message}\n\nvia {url}",
+                                       "embed_footer": "Shared by {author_name} • {domain}"})
+        metadata = PageMetadata(title="Test article", site_name="Example • Docs")
+        thread = await _snip_thread(10, "Test article", "https://example.com/a", templates=templates,
+                                    metadata=metadata)
+        messages = [message async for message in thread.history(limit=2, oldest_first=True)]
+
+        record = parse_snip_thread(thread, messages, templates)
+
+        assert record.author_id == 111222333
+        assert record.author_name == "Test Author"
+        assert record.site_name == "Example • Docs"
+        assert record.message == "Worth a read"
+
+    def test_non_snip_thread_is_skipped(self):
+        """Test that a thread without a snipped URL isn't treated as a snip."""
+        thread = Mock(spec=discord.Thread)
+        thread.id = 1
+        message = Mock(spec=discord.Message)
+        message.id = 1
+        message.content = "Just a discussion"
+        message.embeds = []
+
+        assert parse_snip_thread(thread, [message]) is None
+
+
+class TestForumExporter:
+    """Tests for streaming, compressed and resumable exports."""
+
+    @pytest.mark.asyncio
+    async def test_exports_active_and_archived_threads(self, tmp_path):
+        """Test that every snip in the forum ends up in the file once."""
+        active = [await _snip_thread(1, "Active", "https://example.com/active")]
+        archived = [await _snip_thread(100 + i, f"Old {i}", f"https://example.com/{i}", EPOCH + timedelta(days=i))
+                    for i in range(5)]
+        exporter = ForumExporter(CheckpointStore(str(tmp_path / "checkpoints")), str(tmp_path), batch_size=2)
+
+        result = await exporter.export(_forum(active, archived), "jsonl")
+
+        urls = [row["url"] for row in _read_jsonl(result.path)]
+        assert urls == ["https://example.com/active"] + [f"https://example.com/{i}" for i in reversed(range(5))]
+        assert result.records == result.threads == 6
+
+    @pytest.mark.asyncio
+    async def test_interrupted_export_resumes_without_duplicates(self, tmp_path):
+        """Test that a restarted export continues from its last checkpoint."""
+        archived = [await _snip_thread(100 + i, f"Old {i}", f"https://example.com/{i}", EPOCH + timedelta(days=i))
+                    for i in range(7)]
+        forum = _forum([], archived)
+        store = CheckpointStore(str(tmp_path / "checkpoints"))
+
+        calls = []
+
+        async def crash_after_second_batch(state):
+            calls.append(state["threads"])
+            if len(calls) == 2:
+                raise discord.HTTPException(Mock(status=500), "boom")
+
+        with pytest.raises(discord.HTTPException):
+            await ForumExporter(store, str(tmp_path), batch_size=2).export(forum, "csv", progress=crash_after_second_batch)
+
+        result = await ForumExporter(store, str(tmp_path), batch_size=2).export(forum, "csv")
+
+        with gzip.open(result.path, "rt", encoding="utf-8") as file:
+            lines = file.read().splitlines()
+        assert lines[0].startswith("thread_id,")
+        assert len(lines) == 8
+        assert len(set(lines)) == 8
+        assert store.load(ForumExporter.key_for(forum, "csv")) is None
@@ -0,0 +1,228 @@
+"""
+Tests for feed parsing, subscriptions and the feed watcher.
+"""
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from bot.cogs.snip_cog import SnipCog
+from bot.config import FEED_MIN_INTERVAL
+from services.feed_parser import FeedEntry, FeedParser, parse_feed_date
+from services.feeds import FeedStore, FeedWatcher, next_interval, normalize_feed_url
+from services.publisher import PublisherClosed
+from services.title_cache import TitleCache
+from services.title_resolver import TitleResolver
+
+RSS = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Example &amp; Co</title>
+<item><title>Second post</title><link>https://example.com/2</link><guid>post-2</guid>
+<pubDate>Tue, 02 Jan 2024 00:00:00 GMT</pubDate><description>&lt;p&gt;Hello &lt;b&gt;world&lt;/b&gt;&lt;/p&gt;</description></item>
+<item><title>First post</title><link>https://example.com/1</link><guid>post-1</guid>
+<pubDate>Mon, 01 Jan 2024 00:00:00 GMT</pubDate></item>
+</channel></rss>"""
+
+YOUTUBE = b"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns="http://www.w3.org/2005/Atom">
+<link rel="self" href="https://www.youtube.com/feeds/videos.xml?channel_id=UC123"/>
+<title>A Channel</title>
+<entry><id>yt:video:abc</id><yt:videoId>abc</yt:videoId><title>New video</title>
+<link rel="alternate" href="https://www.youtube.com/watch?v=abc"/><published>2024-01-02T10:00:00+00:00</published></entry>
+</feed>"""
+
+
+def _entries(document: bytes, chunk_size: int):
+    parser = FeedParser()
+    entries = []
+    for start in range(0, len(document), chunk_size):
+        entries.extend(parser.feed(document[start:start + chunk_size]))
+    entries.extend(parser.close())
+    return parser, entries
+
+
+class TestFeedParser:
+    """Tests for incremental RSS and Atom parsing."""
+
+    def test_parses_rss_in_small_chunks(self):
+        parser, entries = _entries(RSS, 7)
+
+        assert parser.title == "Example & Co"
+        assert [entry.entry_id for entry in entries] == ["post-2", "post-1"]
+        assert entries[0].url == "https://example.com/2"
+        assert entries[0].summary == "Hello world"
+        assert entries[0].published == parse_feed_date("2024-01-02T00:00:00Z")
+
+    def test_parses_youtube_atom(self):
+        parser, entries = _entries(YOUTUBE, 64)
+
+        assert parser.title == "A Channel"
+        assert entries == [FeedEntry("yt:video:abc", "New video", "https://www.youtube.com/watch?v=abc",
+                                     parse_feed_date("2024-01-02T10:00:00Z"), None)]
+
+    def test_entries_are_returned_as_soon_as_they_close(self):
+        parser = FeedParser()
+        cut = RSS.index(b"</item>") + len(b"</item>")
+
+        assert [entry.entry_id for entry in parser.feed(RSS[:cut])] == ["post-2"]
+
+
+def test_normalize_feed_url():
+    assert normalize_feed_url("https://www.youtube.com/channel/UC123abc") == \
+        "https://www.youtube.com/feeds/videos.xml?channel_id=UC123abc"
+    assert normalize_feed_url("https://youtube.com/playlist?list=PL9") == \
+        "https://www.youtube.com/feeds/videos.xml?playlist_id=PL9"
+    assert normalize_feed_url("https://example.com/feed.xml") == "https://example.com/feed.xml"
+
+
+class TestNextInterval:
+    """Tests for adaptive poll intervals."""
+
+    def _entries(self, gap):
+        return [FeedEntry(str(i), None, None, 1_000_000 - i * gap, None) for i in range(5)]
+
+    def test_new_entries_poll_at_half_the_update_rate(self):
+        assert next_interval(3600, self._entries(7200), True, minimum=60, maximum=86400) == 3600
+
+    def test_quiet_feeds_back_off_up_to_the_update_rate(self):
+        assert next_interval(3600, self._entries(86400), False, minimum=60, maximum=86400) == 5400
+        assert next_interval(3600, self._entries(4000), False, minimum=60, maximum=86400) == 4000
+
+    def test_interval_stays_within_bounds(self):
+        assert next_interval(100, [], True, minimum=60, maximum=600) == 60
+        assert next_interval(500, [], False, minimum=60, maximum=600) == 600
+
+
+@pytest.fixture
+def store():
+    store = FeedStore(":memory:", keep_entries=3)
+    store.open()
+    yield store
+    store.close()
+
+
+class TestFeedStore:
+    """Tests for subscriptions and seen entries."""
+
+    def test_subscribe_once_per_forum(self, store):
+        assert store.subscribe(1, 10, "https://example.com/feed", ["News"]).tags == ["News"]
+        assert store.subscribe(1, 10, "https://example.com/feed") is None
+        assert store.subscribe(1, 11, "https://example.com/feed") is not None
+        assert len(store.list(1)) == 2
+        assert store.unsubscribe(10, "https://example.com/feed")
+        assert [feed.channel_id for feed in store.list(1)] == [11]
+
+    def test_unseen_and_pruning(self, store):
+        feed = store.subscribe(1, 10, "https://example.com/feed")
+        store.mark_seen(feed.id, ["a"], 1.0)
+        store.mark_seen(feed.id, ["b"], 2.0)
+        store.mark_seen(feed.id, ["c", "d"], 3.0)
+
+        assert store.unseen(feed.id, ["a", "c", "e"]) == {"a", "e"}
+
+
+class TestFeedWatcher:
+    """Tests for polling and publishing."""
+
+    @pytest.fixture
+    def watcher(self, store):
+        queue = Mock()
+        queue.publish = AsyncMock()
+        watcher = FeedWatcher(store=store, queue=queue, cache=TitleCache())
+        channel = Mock()
+        channel.available_tags = []
+        watcher._bot = Mock()
+        watcher._bot.get_channel = Mock(return_value=channel)
+        return watcher
+
+    @pytest.mark.asyncio
+    async def test_first_poll_only_records_existing_entries(self, watcher, store):
+        feed = store.subscribe(1, 10, "https://example.com/feed")
+        _, entries = _entries(RSS, 1024)
+
+        with patch.object(watcher, "_fetch", AsyncMock(return_value=('"v1"', None, "Example", entries))):
+            result = await watcher.poll(feed)
+
+        assert result.new == 2 and result.published == 0
+        watcher.queue.publish.assert_not_awaited()
+        feed = store.list(1)[0]
+        assert feed.etag == '"v1"' and feed.title == "Example" and feed.last_polled is not None
+
+    @pytest.mark.asyncio
+    async def test_later_polls_publish_new_entries_with_feed_titles(self, watcher, store):
+        feed = store.subscribe(1, 10, "https://example.com/feed")
+        _, entries = _entries(RSS, 1024)
+        with patch.object(watcher, "_fetch", AsyncMock(return_value=(None, None, "Example", entries[1:]))):
+            await watcher.poll(feed)
+
+        with patch.object(watcher, "_fetch", AsyncMock(return_value=(None, None, "Example", entries))):
+            result = await watcher.poll(store.list(1)[0])
+
+        assert result.new == 1 and result.published == 1
+        kwargs = watcher.queue.publish.await_args.kwargs
+        assert kwargs["title"] == "Second post"
+        assert kwargs["url"] == "https://example.com/2"
+        assert kwargs["metadata"].site_name == "Example"
+        assert watcher.cache.get("https://example.com/2").title == "Second post"
+
+    @pytest.mark.asyncio
+    async def test_snipping_a_published_entry_keeps_its_url(self, watcher, store, tmp_path,
+                                                             mock_application_context, mock_forum_channel):
+        """Test that /snip of a URL the feed cached posts that URL, not the metadata's missing canonical URL."""
+        feed = store.subscribe(1, 10, "https://example.com/feed")
+        _, entries = _entries(RSS, 1024)
+        with patch.object(watcher, "_fetch", AsyncMock(return_value=(None, None, "Example", entries[1:]))):
+            await watcher.poll(feed)
+        with patch.object(watcher, "_fetch", AsyncMock(return_value=(None, None, "Example", entries))):
+            await watcher.poll(store.list(1)[0])
+
+        resolver = TitleResolver(strategies=[], stats_path=str(tmp_path / "stats.json"), cache=watcher.cache)
+        with patch("bot.cogs.snip_cog.title_resolver", resolver), \
+                patch("bot.cogs.snip_cog.create_forum_thread", AsyncMock()) as create, \
+                patch("bot.cogs.snip_cog.snapshot_archiver"):
+            await SnipCog.snip.callback(SnipCog(Mock()), mock_application_context, url="https://example.com/2",
+                                        channel=mock_forum_channel, title=None, message=None, mention=None,
+                                        additional_mentions="", tags=None)
+
+        kwargs = create.await_args.kwargs
+        assert kwargs["url"] == "https://example.com/2"
+        assert kwargs["title"] == "Second post"
+
+    @pytest.mark.asyncio
+    async def test_entry_links_are_keyed_by_their_canonical_url(self, watcher, store):
+        """Test that an entry's tracking parameters are dropped before it is cached and posted."""
+        feed = store.subscribe(1, 10, "https://example.com/feed")
+        with patch.object(watcher, "_fetch", AsyncMock(return_value=(None, None, "Example", []))):
+            await watcher.poll(feed)
+
+        entry = FeedEntry("post-3", "Third post", "https://example.com/3?utm_source=rss&id=3#comments", None, None)
+        with patch.object(watcher, "_fetch", AsyncMock(return_value=(None, None, "Example", [entry]))):
+            await watcher.poll(store.list(1)[0])
+
+        kwargs = watcher.queue.publish.await_args.kwargs
+        assert kwargs["url"] == "https://example.com/3?id=3#comments"
+        assert kwargs["canonical_url"] == "https://example.com/3?id=3"
+        assert watcher.cache.get("https://example.com/3?id=3").title == "Third post"
+
+    @pytest.mark.asyncio
+    async def test_entries_refused_at_shutdown_stay_unseen(self, watcher, store):
+        """Test that entries the closed publisher refused are published by the next poll."""
+        feed = store.subscribe(1, 10, "https://example.com/feed")
+        _, entries = _entries(RSS, 1024)
+        with patch.object(watcher, "_fetch", AsyncMock(return_value=(None, None, "Example", []))):
+            await watcher.poll(feed)
+
+        watcher.queue.publish = AsyncMock(side_effect=PublisherClosed("shutting down"))
+        with patch.object(watcher, "_fetch", AsyncMock(return_value=(None, None, "Example", entries))):
+            with pytest.raises(PublisherClosed):
+                await watcher.poll(store.list(1)[0])
+
+        assert store.unseen(feed.id, [entry.entry_id for entry in entries]) == {entry.entry_id for entry in entries}
+
+    @pytest.mark.asyncio
+    async def test_failed_poll_backs_off(self, watcher, store):
+        feed = store.subscribe(1, 10, "https://example.com/feed")
+
+        with patch.object(watcher, "_fetch", AsyncMock(side_effect=RuntimeError("boom"))):
+            with pytest.raises(RuntimeError):
+                await watcher.poll(feed)
+
+        feed = store.list(1)[0]
+        assert feed.failures == 1
+        assert feed.interval == 2 * FEED_MIN_INTERVAL
@@ -0,0 +1,100 @@
+"""
+Tests for bulk forum tag management.
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+import discord
+from services.forum_tags import TagSpec, apply_tag_spec, diff_tags, parse_tag_spec
+
+
+def _tag(tag_id, name, emoji=None, moderated=False):
+    tag = discord.ForumTag(name=name, emoji=emoji, moderated=moderated)
+    tag.id = tag_id
+    return tag
+
+
+class TestParseTagSpec:
+    """Tests for reading tag lists."""
+
+    def test_parses_comma_separated_list(self):
+        assert parse_tag_spec("🐛 Bug, Docs (moderated), Old -> ✨ New") == [
+            TagSpec("Bug", "🐛"),
+            TagSpec("Docs", None, True),
+            TagSpec("New", "✨", None, "Old"),
+        ]
+
+    def test_parses_lines_and_json(self):
+        assert parse_tag_spec("# taxonomy\nBug\nFeature, request\n") == [TagSpec("Bug"), TagSpec("Feature, request")]
+        assert parse_tag_spec('["Bug", {"name": "Docs", "moderated": false}]') == [
+            TagSpec("Bug"), TagSpec("Docs", None, False)
+        ]
+
+    def test_rejects_duplicates_and_long_names(self):
+        with pytest.raises(ValueError):
+            parse_tag_spec("Bug, bug")
+        with pytest.raises(ValueError):
+            parse_tag_spec("A tag name that is far too long")
+
+    @pytest.mark.parametrize("text", ['["Bug", 1]', '[null]', '[["Bug"]]'])
+    def test_rejects_json_items_that_are_not_tags(self, text):
+        with pytest.raises(ValueError):
+            parse_tag_spec(text)
+
+
+class TestDiffTags:
+    """Tests for diffing a spec against a forum's tags."""
+
+    def test_adds_renames_updates_and_keeps_ids(self):
+        existing = [_tag(1, "Bug"), _tag(2, "Question"), _tag(3, "Docs", emoji="📄")]
+
+        diff = diff_tags(existing, [TagSpec("Help", rename_from="Question"), TagSpec("Docs", "📚"), TagSpec("Idea")])
+
+        assert diff.added == ["Idea"]
+        assert diff.renamed == [("Question", "Help")]
+        assert diff.updated == ["Docs"]
+        assert diff.removed == []
+        assert [(tag.id, tag.name) for tag in diff.tags] == [(1, "Bug"), (2, "Help"), (3, "Docs"), (0, "Idea")]
+
+    def test_unchanged_spec_has_no_changes(self):
+        existing = [_tag(1, "Bug", emoji="🐛")]
+
+        assert not diff_tags(existing, [TagSpec("Bug", "🐛")]).has_changes
+        assert not diff_tags(existing, [TagSpec("Bug", rename_from="Old")]).has_changes
+
+    def test_remove_missing(self):
+        diff = diff_tags([_tag(1, "Bug"), _tag(2, "Stale")], [TagSpec("Bug")], remove_missing=True)
+
+        assert diff.removed == ["Stale"]
+        assert [tag.name for tag in diff.tags] == ["Bug"]
+
+    def test_rejects_too_many_tags_and_name_clashes(self):
+        existing = [_tag(index + 1, f"Tag {index}") for index in range(19)]
+        with pytest.raises(ValueError):
+            diff_tags(existing, [TagSpec("One"), TagSpec("Two")])
+        with pytest.raises(ValueError):
+            diff_tags([_tag(1, "Bug"), _tag(2, "Defect")], [TagSpec("Defect", rename_from="Bug")])
+
+
+@pytest.mark.asyncio
+async def test_concurrent_edits_to_one_forum_are_serialized():
+    """Test that two bulk edits at once both end up in the forum's tags."""
+    state = {"tags": [_tag(1, "Bug")]}
+    channel = Mock(spec=discord.ForumChannel)
+    channel.id = 42
+
+    async def _fetch_channel(channel_id):
+        await asyncio.sleep(0)
+        return Mock(available_tags=list(state["tags"]))
+
+    async def _edit(available_tags):
+        await asyncio.sleep(0.01)
+        state["tags"] = [tag if tag.id else _tag(len(state["tags"]) + 10, tag.name) for tag in available_tags]
+
+    channel.guild = Mock()
+    channel.guild.fetch_channel = AsyncMock(side_effect=_fetch_channel)
+    channel.edit = AsyncMock(side_effect=_edit)
+
+    await asyncio.gather(apply_tag_spec(channel, [TagSpec("Idea")]), apply_tag_spec(channel, [TagSpec("Docs")]))
+
+    assert sorted(tag.name for tag in state["tags"]) == ["Bug", "Docs", "Idea"]
@@ -0,0 +1,95 @@
+"""
+Tests for the per-guild configuration store.
+"""
+import sqlite3
+import pytest
+from services.guild_config import DEFAULT_GUILD_CONFIG, GuildConfigStore
+from services.thread_templates import DEFAULT_THREAD_TEMPLATES
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = GuildConfigStore(str(tmp_path / "guilds.db"))
+    store.open()
+    yield store
+    store.close()
+
+
+class TestGuildConfigStore:
+    """Tests for reads, write-through and validation."""
+
+    def test_unconfigured_guilds_get_defaults(self, store):
+        assert store.get(1) == DEFAULT_GUILD_CONFIG
+        assert store.get(None) == DEFAULT_GUILD_CONFIG
+
+    def test_changes_are_written_through_and_reloaded(self, store, tmp_path):
+        store.update(1, default_channel_id=10, default_tags=[" News ", "", "Docs"], title_budget=1.5)
+        store.update(1, auto_snip={20: 10})
+        store.close()
+
+        reopened = GuildConfigStore(str(tmp_path / "guilds.db"))
+        reopened.open()
+        config = reopened.get(1)
+        reopened.close()
+
+        assert config.default_channel_id == 10
+        assert config.default_tags == ["News", "Docs"]
+        assert config.title_budget == 1.5
+        assert config.auto_snip == {20: 10}
+
+    def test_rejects_invalid_settings(self, store):
+        with pytest.raises(ValueError):
+            store.update(1, title_budget=5)
+        with pytest.raises(ValueError):
+            store.update(1, colour="blue")
+        with pytest.raises(ValueError):
+            store.update(1, default_tags=["a", "b", "c", "d", "e", "f"])
+
+        assert store.get(1) == DEFAULT_GUILD_CONFIG
+
+    def test_reads_never_touch_the_database(self, store):
+        store.update(1, default_channel_id=10)
+        store._connection.close()
+
+        assert store.get(1).default_channel_id == 10
+
+    def test_templates_are_compiled_on_change_and_reload(self, store, tmp_path):
+        """Test that custom templates are compiled when set and again when the store is reopened."""
+        store.update(1, templates={"name": "[{site_name}] {title}", "body": ""})
+        assert store.get(1).templates == {"name": "[{site_name}] {title}"}
+        assert store.templates(1).name.source == "[{site_name}] {title}"
+        assert store.templates(2) is DEFAULT_THREAD_TEMPLATES
+
+        with pytest.raises(ValueError):
+            store.update(1, templates={"name": "{colour}"})
+        store.close()
+
+        reopened = GuildConfigStore(str(tmp_path / "guilds.db"))
+        reopened.open()
+        templates = reopened.templates(1)
+        reopened.update(1, templates={})
+        reopened.close()
+
+        assert templates.name.source == "[{site_name}] {title}"
+        assert reopened.templates(1) is DEFAULT_THREAD_TEMPLATES
+
+    def test_adds_columns_to_older_databases(self, tmp_path):
+        """Test that a database created before templates existed gains the column."""
+        path = str(tmp_path / "old.db")
+        connection = sqlite3.connect(path)
+        connection.execute(
+            "CREATE TABLE guild_config (guild_id INTEGER PRIMARY KEY, default_channel_id INTEGER, "
+            "default_tags TEXT NOT NULL DEFAULT '[]', title_budget REAL, auto_snip TEXT NOT NULL DEFAULT '{}', "
+            "updated_at TEXT)"
+        )
+        connection.execute("INSERT INTO guild_config (guild_id, default_channel_id) VALUES (1, 10)")
+        connection.commit()
+        connection.close()
+
+        store = GuildConfigStore(path)
+        store.open()
+        store.update(1, templates={"name": "{title}!"})
+        store.close()
+
+        assert store.get(1).default_channel_id == 10
+        assert store.templates(1).name.source == "{title}!"
@@ -0,0 +1,213 @@
+"""
+Tests for the background dead-link checker.
+"""
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+import aiohttp
+import discord
+from services.checkpoints import CheckpointStore
+from services.discord import set_thread_tag
+from services.link_checker import ALIVE, DEAD, DEAD_LINK_TAG, INCONCLUSIVE, LinkChecker, classify_status
+from services.search_index import SnipIndex
+from services.snip_records import SnipRecord
+from services.title_cache import TitleCache
+from bot.metadata import PageMetadata
+
+
+@pytest.fixture
+def index():
+    index = SnipIndex(":memory:")
+    index.open()
+    for thread_id in (1, 2, 3):
+        index.add(SnipRecord(thread_id=thread_id, guild_id=100, channel_id=10, title=f"Snip {thread_id}",
+                             url=f"https://example.com/{thread_id}"))
+    yield index
+    index.close()
+
+
+@pytest.fixture
+def checker(index, tmp_path):
+    return LinkChecker(index=index, store=CheckpointStore(str(tmp_path)), cache=TitleCache(), batch_size=2,
+                       jitter=0)
+
+
+def _response(status):
+    response = Mock()
+    response.status = status
+    context = AsyncMock()
+    context.__aenter__.return_value = response
+    return context
+
+
+def test_classify_status():
+    assert classify_status(200) == ALIVE
+    assert classify_status(304) == ALIVE
+    assert classify_status(404) == DEAD
+    assert classify_status(410) == DEAD
+    assert classify_status(429) == INCONCLUSIVE
+    assert classify_status(503) == INCONCLUSIVE
+
+
+class TestProbe:
+    """Tests for single link probes."""
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_get_when_head_is_rejected(self, checker):
+        session = Mock()
+        session.head = Mock(return_value=_response(405))
+        session.get = Mock(return_value=_response(200))
+
+        assert await checker.probe(session, "https://example.com/1") == (ALIVE, 200)
+
+    @pytest.mark.asyncio
+    async def test_sends_cached_validators(self, checker):
+        metadata = PageMetadata(title="Snip")
+        metadata.etag = '"abc"'
+        checker.cache.set("https://example.com/1", metadata)
+        session = Mock()
+        session.head = Mock(return_value=_response(304))
+
+        assert await checker.probe(session, "https://example.com/1") == (ALIVE, 304)
+        assert session.head.call_args.kwargs["headers"] == {"If-None-Match": '"abc"'}
+
+    @pytest.mark.asyncio
+    async def test_timeouts_are_inconclusive(self, checker):
+        session = Mock()
+        session.head = Mock(side_effect=aiohttp.ServerTimeoutError())
+
+        assert await checker.probe(session, "https://example.com/1") == (INCONCLUSIVE, None)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("error, outcome", [
+        (aiohttp.ClientConnectorDNSError(Mock(), OSError("Name or service not known")), DEAD),
+        (aiohttp.ClientConnectorError(Mock(), ConnectionRefusedError()), DEAD),
+        (aiohttp.ClientConnectorCertificateError(Mock(), ValueError("certificate has expired")), INCONCLUSIVE),
+        (aiohttp.ClientConnectorSSLError(Mock(), OSError("handshake failed")), INCONCLUSIVE),
+        (aiohttp.ClientProxyConnectionError(Mock(), ConnectionRefusedError()), INCONCLUSIVE),
+    ])
+    async def test_only_dns_failures_and_refused_connections_are_dead(self, checker, error, outcome):
+        session = Mock()
+        session.head = Mock(side_effect=error)
+
+        assert await checker.probe(session, "https://example.com/1") == (outcome, None)
+
+
+class TestRunOnce:
+    """Tests for batches, strikes and tagging."""
+
+    @pytest.mark.asyncio
+    async def test_walks_index_in_batches_and_wraps_around(self, checker):
+        seen = []
+
+        async def _probe(session, url):
+            seen.append(url)
+            return ALIVE, 200
+
+        with patch.object(checker, "probe", side_effect=_probe):
+            await checker.run_once()
+            await checker.run_once()
+            await checker.run_once()
+
+        assert [url[-1] for url in seen] == ["1", "2", "3", "1", "2"]
+
+    @pytest.mark.asyncio
+    async def test_marks_dead_after_consecutive_failures_and_revives(self, checker, index):
+        checker.batch_size = 3
+        checker._mark = AsyncMock(return_value=True)
+        outcomes = {"https://example.com/1": (DEAD, 404), "https://example.com/2": (ALIVE, 200),
+                    "https://example.com/3": (INCONCLUSIVE, 503)}
+
+        async def _probe(session, url):
+            return outcomes[url]
+
+        with patch.object(checker, "probe", side_effect=_probe):
+            first = await checker.run_once()
+            second = await checker.run_once()
+            outcomes["https://example.com/1"] = (ALIVE, 200)
+            third = await checker.run_once()
+
+        assert first.newly_dead == [] and first.dead == []
+        assert second.newly_dead == [1]
+        assert third.revived == [1]
+        assert index.link_check(1) == (0, False)
+        assert checker._mark.await_args_list[0].args == (1, True)
+        assert second.inconclusive == 1
+
+    @pytest.mark.asyncio
+    async def test_skips_recording_when_nothing_is_reachable(self, checker, index):
+        with patch.object(checker, "probe", AsyncMock(return_value=(DEAD, None))):
+            assert await checker.run_once() is None
+
+        assert index.link_check(1) == (0, False)
+
+    @pytest.mark.asyncio
+    async def test_records_answers_when_only_some_links_are_unreachable(self, checker, index):
+        """Test that one unreachable host doesn't hold back a batch of definite 404s."""
+        checker._mark = AsyncMock(return_value=True)
+        outcomes = {"https://example.com/1": (DEAD, 404), "https://example.com/2": (INCONCLUSIVE, None)}
+
+        async def _probe(session, url):
+            return outcomes[url]
+
+        with patch.object(checker, "probe", side_effect=_probe):
+            report = await checker.run_once()
+
+        assert report.checked == 2 and report.inconclusive == 1
+        assert index.link_check(1) == (1, False)
+        assert checker._next_batch()[0][0] == 3
+
+    @pytest.mark.asyncio
+    async def test_mark_applies_dead_link_tag(self, checker):
+        tag = Mock(spec=discord.ForumTag)
+        tag.id = 9
+        tag.name = DEAD_LINK_TAG
+        thread = Mock(spec=discord.Thread)
+        thread.parent = Mock(spec=discord.ForumChannel)
+        thread.parent.id = 10
+        thread.parent.available_tags = [tag]
+        thread.applied_tags = []
+        thread.archived = False
+        thread.edit = AsyncMock()
+        checker._bot = Mock()
+        checker._bot.get_channel = Mock(return_value=thread)
+
+        assert await checker._mark(1, True)
+
+        thread.edit.assert_awaited_once_with(applied_tags=[tag])
+
+    @pytest.mark.asyncio
+    async def test_mark_fails_when_the_thread_has_no_room_for_the_tag(self, checker):
+        tag = Mock(spec=discord.ForumTag)
+        tag.id = 9
+        tag.name = DEAD_LINK_TAG
+        thread = Mock(spec=discord.Thread)
+        thread.parent = Mock(spec=discord.ForumChannel)
+        thread.parent.id = 10
+        thread.parent.available_tags = [tag]
+        thread.applied_tags = [Mock(id=i) for i in range(5)]
+        thread.edit = AsyncMock()
+        checker._bot = Mock()
+        checker._bot.get_channel = Mock(return_value=thread)
+
+        assert not await checker._mark(1, True)
+        assert await checker._mark(1, False)
+
+        thread.edit.assert_not_awaited()
+
+
+class TestSetThreadTag:
+    """Tests for tagging archived threads."""
+
+    @pytest.mark.asyncio
+    async def test_archived_thread_is_reopened_and_archived_again(self):
+        tag = Mock(spec=discord.ForumTag)
+        tag.id = 9
+        thread = Mock(spec=discord.Thread)
+        thread.applied_tags = [tag]
+        thread.archived = True
+        thread.edit = AsyncMock()
+
+        assert await set_thread_tag(thread, tag, present=False)
+
+        assert thread.edit.await_args_list[0].kwargs == {"archived": False, "applied_tags": []}
+        assert thread.edit.await_args_list[1].kwargs == {"archived": True}
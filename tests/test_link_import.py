@@ -0,0 +1,156 @@
+"""
+Tests for parsing link lists and the resumable bulk import.
+"""
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+import discord
+from bot.metadata import PageMetadata
+from services.checkpoints import CheckpointStore
+from services.link_import import LinkImporter, detect_format, parse_links
+from services.publisher import PublisherClosed
+
+NETSCAPE = """<!DOCTYPE NETSCAPE-Bookmark-file-1>
+<DL><p>
+    <DT><A HREF="https://example.com/a" ADD_DATE="1700000000">Article &amp; More</A>
+    <DT><A HREF="https://example.com/b">B</A>
+</DL><p>
+"""
+
+
+class FakeQueue:
+    """Publisher stand-in that records published snips and can fail on demand."""
+
+    def __init__(self, fail_on=None, close_on=None):
+        self.published = []
+        self.fail_on = fail_on
+        self.close_on = close_on
+
+    async def publish(self, **kwargs):
+        if kwargs["url"] == self.fail_on:
+            raise RuntimeError("stop")
+        if kwargs["url"] == self.close_on:
+            raise PublisherClosed("shutting down")
+        self.published.append((kwargs["url"], kwargs["title"]))
+        return Mock(spec=discord.Thread)
+
+
+def _importer(tmp_path, queue):
+    resolver = Mock()
+    resolver.resolve = AsyncMock(side_effect=lambda url, budget=None: PageMetadata(title=f"Resolved {url}"))
+    importer = LinkImporter(CheckpointStore(str(tmp_path / "checkpoints")), str(tmp_path), resolver, queue, batch_size=2)
+    importer.existing_urls = AsyncMock(return_value={"https://example.com/existing"})
+    return importer
+
+
+def _forum():
+    channel = Mock(spec=discord.ForumChannel)
+    channel.id = 2
+    channel.guild = Mock(id=1)
+    return channel
+
+
+def test_parse_netscape_bookmarks():
+    assert list(parse_links(NETSCAPE.splitlines(), "netscape")) == [
+        (3, "https://example.com/a", "Article & More"),
+        (4, "https://example.com/b", "B"),
+    ]
+
+
+def test_parse_csv_with_header():
+    lines = ["Title,URL", "First,https://example.com/1", "\"Second, quoted\",https://example.com/2"]
+    assert list(parse_links(lines, "csv")) == [
+        (2, "https://example.com/1", "First"),
+        (3, "https://example.com/2", "Second, quoted"),
+    ]
+
+
+def test_parse_text_skips_blanks_and_comments():
+    lines = ["# exported links", "", "https://example.com/1", "example.com/2 A title"]
+    assert list(parse_links(lines, "text")) == [(3, "https://example.com/1", None), (4, "example.com/2", "A title")]
+
+
+def test_detect_format():
+    assert detect_format("bookmarks.html", "") == "netscape"
+    assert detect_format("export", "<!DOCTYPE NETSCAPE-Bookmark-file-1>") == "netscape"
+    assert detect_format("links.csv", "url") == "csv"
+    assert detect_format("links.txt", "https://example.com") == "text"
+
+
+class TestLinkImporter:
+    """Tests for dedupe, title resolution and checkpointed resume."""
+
+    @pytest.mark.asyncio
+    async def test_import_dedupes_and_resolves_missing_titles(self, tmp_path):
+        """Test that duplicates and invalid links are skipped and only untitled links are resolved."""
+        source = tmp_path / "links.txt"
+        source.write_text(
+            "https://example.com/existing\n"
+            "https://example.com/new?utm_source=mail Given title\n"
+            "https://example.com/new\n"
+            "not a url\n"
+            "https://example.com/other\n"
+        )
+        queue = FakeQueue()
+        importer = _importer(tmp_path, queue)
+
+        result = await importer.run(_forum(), str(source), "abc", "text", Mock(spec=discord.User))
+
+        assert queue.published == [
+            ("https://example.com/new", "Given title"),
+            ("https://example.com/other", "Resolved https://example.com/other"),
+        ]
+        assert (result.published, result.duplicates, result.invalid, result.failed) == (2, 2, 1, 0)
+        assert not source.exists()
+
+    @pytest.mark.asyncio
+    async def test_existing_snips_are_keyed_like_incoming_links(self, tmp_path):
+        """Test that a thread posted from a short link is matched by the link it expands to."""
+        async def threads(channel):
+            yield Mock(spec=discord.Thread)
+
+        async def canonicalize(url):
+            return {"https://bit.ly/abc": "https://example.com/story"}.get(url, url)
+
+        importer = LinkImporter(CheckpointStore(str(tmp_path / "checkpoints")), str(tmp_path), Mock(), FakeQueue())
+        with patch("services.link_import.iter_forum_threads", threads), \
+                patch("services.link_import.read_snip_record", AsyncMock(return_value=Mock(url="https://bit.ly/abc"))), \
+                patch("services.link_import.canonicalizer.canonicalize", side_effect=canonicalize):
+            assert await importer.existing_urls(_forum()) == {"https://example.com/story"}
+
+    @pytest.mark.asyncio
+    async def test_restarted_import_resumes_from_checkpoint(self, tmp_path):
+        """Test that a crashed import picks up after the last checkpointed batch."""
+        source = tmp_path / "links.txt"
+        source.write_text("\n".join(f"https://example.com/{i}" for i in range(5)))
+        forum = _forum()
+
+        async def crash(state):
+            raise RuntimeError("restart")
+
+        first = FakeQueue()
+        with pytest.raises(RuntimeError):
+            await _importer(tmp_path, first).run(forum, str(source), "abc", "text", Mock(spec=discord.User), progress=crash)
+
+        second = FakeQueue()
+        await _importer(tmp_path, second).run(forum, str(source), "abc", "text", Mock(spec=discord.User))
+
+        assert [url for url, _ in first.published] == ["https://example.com/0", "https://example.com/1"]
+        assert [url for url, _ in second.published] == [f"https://example.com/{i}" for i in range(2, 5)]
+
+    @pytest.mark.asyncio
+    async def test_shutdown_stops_the_import_without_skipping_links(self, tmp_path):
+        """Test that links refused by a closed publisher are published when the import is resumed."""
+        source = tmp_path / "links.txt"
+        source.write_text("\n".join(f"https://example.com/{i}" for i in range(5)))
+        forum = _forum()
+
+        first = FakeQueue(close_on="https://example.com/3")
+        with pytest.raises(PublisherClosed):
+            await _importer(tmp_path, first).run(forum, str(source), "abc", "text", Mock(spec=discord.User))
+        assert source.exists()
+
+        second = FakeQueue()
+        await _importer(tmp_path, second).run(forum, str(source), "abc", "text", Mock(spec=discord.User))
+
+        assert [url for url, _ in first.published] == [f"https://example.com/{i}" for i in range(3)]
+        assert [url for url, _ in second.published] == [f"https://example.com/{i}" for i in range(2, 5)]
@@ -0,0 +1,148 @@
+"""
+Tests for structured, queued logging.
+"""
+import asyncio
+import io
+import json
+import logging
+import queue
+import sys
+import pytest
+from bot.log import (
+    ContextFilter, JsonFormatter, NonBlockingQueueHandler, RateLimitFilter, bind, log_context, setup_logging,
+    stop_logging,
+)
+
+
+def _record(name="services.test", message="hello", **fields):
+    record = logging.LogRecord(name, logging.INFO, __file__, 1, message, (), None)
+    for key, value in fields.items():
+        setattr(record, key, value)
+    return record
+
+
+class TestContext:
+    """Tests for context fields on records."""
+
+    def test_bound_fields_and_url_domain_are_added(self):
+        """Test that bound fields and the domain of a `url` field end up on the record."""
+        record = _record(url="https://news.example.com/a?b=1")
+
+        with log_context(guild=1, command="snip", trace_id="abc"):
+            ContextFilter().filter(record)
+
+        assert (record.guild, record.command, record.trace_id) == (1, "snip", "abc")
+        assert record.domain == "news.example.com"
+
+    @pytest.mark.asyncio
+    async def test_fields_follow_tasks_but_not_siblings(self):
+        """Test that a task's bound fields reach the tasks it starts, and no other task."""
+        seen = {}
+
+        async def _child(name):
+            record = _record()
+            ContextFilter().filter(record)
+            seen[name] = getattr(record, "trace_id", None)
+
+        async def _command():
+            bind(trace_id="one")
+            await asyncio.create_task(_child("child"))
+
+        await asyncio.create_task(_command())
+        await asyncio.create_task(_child("other"))
+
+        assert seen == {"child": "one", "other": None}
+
+
+class TestRateLimitFilter:
+    """Tests for per-logger rate limits."""
+
+    def test_limits_each_logger_and_reports_suppressed(self, monkeypatch):
+        """Test that a logger over its burst is dropped, without affecting other loggers."""
+        now = [0.0]
+        monkeypatch.setattr("bot.log.time.monotonic", lambda: now[0])
+        limiter = RateLimitFilter(rate=1, burst=2, rates={"services.feeds": 10})
+
+        noisy = [limiter.filter(_record("services.title_resolver")) for _ in range(5)]
+        assert noisy == [True, True, False, False, False]
+        assert limiter.filter(_record("services.canonical"))
+
+        now[0] = 1.0
+        record = _record("services.title_resolver")
+        assert limiter.filter(record)
+        assert record.suppressed == 3
+
+    def test_per_logger_rate_applies_to_children(self, monkeypatch):
+        """Test that a configured rate covers the logger's children."""
+        limiter = RateLimitFilter(rate=1, burst=1, rates={"services.feeds": 50})
+
+        assert limiter._rate_for("services.feeds.poller") == 50
+        assert limiter._rate_for("services.prefetch") == 1
+
+
+class TestQueueHandler:
+    """Tests for queueing records without blocking."""
+
+    def test_full_queue_drops_and_counts(self):
+        """Test that records beyond the queue's size are dropped and the next queued record says how many."""
+        record_queue = queue.Queue(maxsize=1)
+        handler = NonBlockingQueueHandler(record_queue)
+
+        handler.handle(_record(message="kept"))
+        handler.handle(_record(message="dropped"))
+        handler.handle(_record(message="dropped"))
+        record_queue.get_nowait()
+        handler.handle(_record(message="next"))
+
+        assert handler.dropped == 0
+        assert record_queue.get_nowait().dropped == 2
+
+    def test_message_and_traceback_are_rendered_before_queueing(self):
+        """Test that arguments and exceptions are rendered in the logging thread."""
+        handler = NonBlockingQueueHandler(queue.Queue())
+        try:
+            raise ValueError("bad")
+        except ValueError:
+            record = logging.LogRecord("x", logging.ERROR, __file__, 1, "failed %s", ("here",), True)
+            record.exc_info = sys.exc_info()
+
+        prepared = handler.prepare(record)
+
+        assert prepared.msg == "failed here"
+        assert prepared.exc_info is None
+        assert "ValueError: bad" in prepared.exc_text
+
+
+class TestJsonLogging:
+    """Tests for the JSON output end to end."""
+
+    def test_records_are_written_as_json_by_the_writer_thread(self):
+        """Test that a logged record comes out as one JSON line with its fields."""
+        stream = io.StringIO()
+        root = logging.getLogger()
+        level = root.level
+        setup_logging(level="INFO", levels="tests.quiet=ERROR", stream=stream)
+        try:
+            with log_context(guild=7, trace_id="t1"):
+                logging.getLogger("tests.loud").info("Resolved %s", "title", extra={"url": "https://example.com/a"})
+            logging.getLogger("tests.quiet").warning("not shown")
+        finally:
+            stop_logging()
+            for handler in [h for h in root.handlers if isinstance(h, NonBlockingQueueHandler)]:
+                root.removeHandler(handler)
+            root.setLevel(level)
+
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert len(lines) == 1
+        assert lines[0]["message"] == "Resolved title"
+        assert lines[0]["level"] == "INFO"
+        assert lines[0]["logger"] == "tests.loud"
+        assert (lines[0]["guild"], lines[0]["trace_id"], lines[0]["domain"]) == (7, "t1", "example.com")
+        assert "url" not in lines[0]
+
+    def test_formatter_includes_exception(self):
+        """Test that a record's traceback is included."""
+        record = _record(message="failed")
+        record.exc_text = "Traceback ..."
+
+        assert json.loads(JsonFormatter().format(record))["exception"] == "Traceback ..."
@@ -0,0 +1,50 @@
+"""
+Tests for the event loop lag monitor.
+"""
+import asyncio
+import time
+import pytest
+from unittest.mock import patch
+from bot.loop_monitor import LoopLagMonitor
+
+
+class TestLoopLagMonitor:
+    """Tests for LoopLagMonitor measurements and block detection."""
+
+    def test_percentiles_empty_window(self):
+        """Test that percentiles are zero before any samples are recorded."""
+        monitor = LoopLagMonitor()
+
+        assert monitor.percentiles() == {"p50": 0.0, "p90": 0.0, "p99": 0.0}
+
+    def test_percentiles_in_milliseconds(self):
+        """Test that percentiles are computed over the sample window in ms."""
+        monitor = LoopLagMonitor()
+        monitor._samples.extend([i / 1000 for i in range(1, 101)])
+
+        result = monitor.percentiles((50, 99))
+
+        assert result["p50"] == pytest.approx(51.0, abs=1)
+        assert result["p99"] == pytest.approx(99.0, abs=1)
+
+    @pytest.mark.asyncio
+    async def test_detects_blocking_call_with_context(self, caplog):
+        """Test that a blocking call is reported with its stack and tagged command context."""
+        monitor = LoopLagMonitor(interval=0.01, block_threshold=0.05)
+
+        with patch("bot.loop_monitor.sentry_sdk.capture_message") as capture, \
+                caplog.at_level("WARNING", logger="bot.loop_monitor"):
+            monitor.start()
+            await asyncio.sleep(0.02)
+            monitor.tag_current_task(guild=1, command="snip")
+            time.sleep(0.3)
+            await asyncio.sleep(0.05)
+            await monitor.stop()
+
+        assert monitor.blocked_count == 1
+        assert monitor.max_block >= 0.25
+        capture.assert_called_once()
+        record = caplog.records[-1]
+        assert "test_detects_blocking_call_with_context" in record.getMessage()
+        assert record.command == "snip"
+        assert record.guild == 1
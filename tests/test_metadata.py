@@ -0,0 +1,107 @@
+"""
+Tests for single-pass link-preview metadata extraction.
+"""
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from bot.metadata import PageMetadata, StreamingMetadataExtractor, extract_metadata_from_html
+from bot.util import _read_page_metadata
+
+PAGE = b"""<!DOCTYPE html>
+<html>
+<head>
+  <title>Short</title>
+  <meta property="og:title" content="A Much Longer Open Graph Title">
+  <meta name="description" content="Plain description">
+  <meta property="og:description" content="Open Graph description">
+  <meta property="og:site_name" content="Example News">
+  <meta property="og:image" content="/images/cover.png">
+  <meta property="article:published_time" content="2024-05-01T12:00:00Z">
+  <link rel="canonical" href="https://example.com/story">
+  <link rel="apple-touch-icon" href="/touch.png">
+  <link rel="icon" href="/favicon.ico">
+</head>
+<body><meta property="og:image" content="/late.png"></body>
+</html>"""
+
+
+class TestMetadataExtraction:
+    """Tests for extract_metadata_from_html and the streaming extractor."""
+
+    def test_extracts_all_fields(self):
+        """Test that every preview field is read from the head."""
+        metadata = extract_metadata_from_html(PAGE, url="https://example.com/story?ref=1")
+
+        assert metadata == PageMetadata(
+            title="A Much Longer Open Graph Title",
+            description="Open Graph description",
+            site_name="Example News",
+            canonical_url="https://example.com/story",
+            image="https://example.com/images/cover.png",
+            published_time="2024-05-01T12:00:00Z",
+            favicon="https://example.com/favicon.ico",
+        )
+
+    def test_streaming_stops_at_end_of_head(self):
+        """Test that the extractor reports done once the head closes, ignoring the body."""
+        extractor = StreamingMetadataExtractor("https://example.com")
+        for start in range(0, len(PAGE), 7):
+            extractor.feed(PAGE[start:start + 7])
+            if extractor.done:
+                break
+
+        assert extractor.done
+        assert extractor.close().image == "https://example.com/images/cover.png"
+
+    def test_multibyte_characters_split_across_chunks(self):
+        """Test that a UTF-8 character split between chunks decodes intact."""
+        data = "<head><title>Café — Menü</title></head>".encode("utf-8")
+        extractor = StreamingMetadataExtractor()
+        for byte in data:
+            extractor.feed(bytes([byte]))
+
+        assert extractor.close().title == "Café — Menü"
+
+    def test_charset_from_meta_tags(self):
+        """Test that pages declaring their encoding only in a meta tag are decoded with it."""
+        charset = '<meta charset="windows-1251"><title>Привет</title>'.encode("cp1251")
+        http_equiv = ('<meta http-equiv="Content-Type" content="text/html; charset=Shift_JIS">'
+                      '<title>こんにちは</title>').encode("shift_jis")
+        latin = '<meta charset="iso-8859-1"><title>Caf\xe9 \u2014 menu</title>'.encode("cp1252")
+
+        assert extract_metadata_from_html(charset).title == "Привет"
+        assert extract_metadata_from_html(http_equiv).title == "こんにちは"
+        assert extract_metadata_from_html(latin).title == "Café — menu"
+
+    def test_charset_found_across_small_chunks(self):
+        """Test that the meta charset is still found when the page arrives a byte at a time."""
+        data = '<head><meta charset="koi8-r"><title>Пример</title></head>'.encode("koi8_r")
+        extractor = StreamingMetadataExtractor()
+        for byte in data:
+            extractor.feed(bytes([byte]))
+
+        assert extractor.close().title == "Пример"
+
+    def test_header_charset_wins_over_meta(self):
+        data = '<meta charset="cp1251"><title>Café</title>'.encode("utf-8")
+        extractor = StreamingMetadataExtractor(encoding="utf-8")
+        extractor.feed(data)
+
+        assert extractor.close().title == "Café"
+
+    @pytest.mark.asyncio
+    async def test_non_html_responses_are_not_read(self):
+        """Test that a PDF or other non-HTML response is given up on without reading its body."""
+        response = Mock(status=200, headers={"Content-Type": "application/pdf"}, content_type="application/pdf")
+        session = Mock()
+        session.get = AsyncMock(return_value=response)
+
+        with patch("bot.util.get_session", return_value=session):
+            assert await _read_page_metadata("https://example.com/paper.pdf", None, None) == (200, None)
+
+        response.content.iter_chunked.assert_not_called()
+        response.release.assert_called_once()
+
+    def test_round_trips_through_dict(self):
+        """Test that metadata survives serialization for caching."""
+        metadata = PageMetadata(title="Title", image="https://example.com/a.png")
+        assert PageMetadata.from_dict(metadata.to_dict()) == metadata
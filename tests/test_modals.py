@@ -89,6 +89,24 @@ class TestTitleInputModal:
         assert modal.title_input.label == "Post Title:"
         assert modal.title_input.max_length == 100
 
+    @pytest.mark.asyncio
+    async def test_modal_prefills_suggested_title(
+        self, mock_application_context, mock_bot, mock_forum_channel
+    ):
+        """Test that the title input starts with the suggested title, if any."""
+        modal = TitleInputModal(
+            ctx=mock_application_context,
+            bot=mock_bot,
+            channel=mock_forum_channel,
+            url="https://example.com",
+            message="",
+            mention=None,
+            additional_mentions=None,
+            suggested_title="My great post"
+        )
+
+        assert modal.title_input.value == "My great post"
+
     @pytest.mark.asyncio
     async def test_modal_callback_passes_tags_to_create_forum_thread(
         self, mock_application_context, mock_bot, mock_forum_channel, mock_forum_tags, mock_interaction
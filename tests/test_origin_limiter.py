@@ -0,0 +1,213 @@
+"""
+Tests for the per-origin concurrency limiter, rate limiter and circuit breaker.
+"""
+import asyncio
+import pytest
+from bot.metadata import PageMetadata
+from services.origin_limiter import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, DomainController, FetchBudget, OriginLimiter, TokenBucket,
+    fetch_budget, registrable_domain,
+)
+from services.title_cache import TitleCache
+from services.title_resolver import Strategy, TitleResolver
+
+
+@pytest.mark.parametrize("url,expected", [
+    ("https://news.example.com/a", "example.com"),
+    ("https://www.example.co.uk/page", "example.co.uk"),
+    ("http://Example.COM:8080/", "example.com"),
+    ("https://localhost/", "localhost"),
+    ("blog.example.org", "example.org"),
+])
+def test_registrable_domain(url, expected):
+    assert registrable_domain(url) == expected
+
+
+class TestTokenBucket:
+    """Tests for TokenBucket reservations."""
+
+    def test_burst_then_paced(self):
+        """Test that a burst is free and later tokens are spaced by the rate."""
+        bucket = TokenBucket(rate=2, burst=2, now=0)
+
+        assert [bucket.reserve(now=0) for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+        assert bucket.reserve(now=10) == 0.0
+
+
+class TestCircuitBreaker:
+    """Tests for CircuitBreaker state changes."""
+
+    def test_opens_after_consecutive_failures(self):
+        """Test that only an unbroken run of failures opens the breaker."""
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10)
+        breaker.record_failure(now=0)
+        breaker.record_failure(now=0)
+        breaker.record_success()
+        breaker.record_failure(now=0)
+        breaker.record_failure(now=0)
+
+        assert breaker.state(now=0) == CLOSED
+        assert breaker.record_failure(now=0)
+        assert breaker.state(now=5) == OPEN
+        assert not breaker.allow(now=5)
+
+    def test_single_probe_when_half_open(self):
+        """Test that one probe is let through after the timeout, and a failed probe doubles it."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        breaker.record_failure(now=0)
+
+        assert breaker.state(now=10) == HALF_OPEN
+        assert breaker.allow(now=10)
+        assert not breaker.allow(now=10)
+
+        assert breaker.record_failure(now=11)
+        assert breaker.state(now=25) == OPEN
+        assert breaker.state(now=31) == HALF_OPEN
+
+        assert breaker.allow(now=31)
+        breaker.record_success()
+        assert breaker.state(now=31) == CLOSED
+        assert breaker.open_for == 10
+
+
+class TestDomainController:
+    """Tests for the AIMD concurrency limit."""
+
+    def test_additive_increase_multiplicative_decrease(self):
+        """Test that successes grow the limit slowly and a failure halves it, once per interval."""
+        controller = DomainController(initial_limit=4, max_limit=16, decrease_interval=1.0)
+        for _ in range(4):
+            controller.increase()
+        assert controller.limit == pytest.approx(4.9, abs=0.1)
+
+        controller.decrease(now=100)
+        controller.decrease(now=100.5)
+        assert controller.limit == pytest.approx(2.45, abs=0.1)
+
+        for _ in range(5):
+            controller.decrease(now=200 + _ * 2)
+        assert controller.limit == 1
+
+    @pytest.mark.asyncio
+    async def test_waiters_get_freed_slots(self):
+        """Test that requests past the limit wait for a slot, and a cancelled waiter doesn't lose a wake-up."""
+        controller = DomainController(initial_limit=1)
+        await controller.acquire()
+        cancelled = asyncio.create_task(controller.acquire())
+        waiting = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+
+        controller.release()
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        await asyncio.wait_for(waiting, timeout=1)
+
+        assert controller.in_flight == 1
+
+
+class TestOriginLimiter:
+    """Tests for OriginLimiter request outcomes."""
+
+    @pytest.mark.asyncio
+    async def test_failures_open_breaker_for_whole_domain(self):
+        """Test that timeouts on one host pause requests to every host of the domain."""
+        limiter = OriginLimiter(failure_threshold=2)
+
+        for _ in range(2):
+            with pytest.raises(asyncio.TimeoutError):
+                async with limiter.request("https://a.example.com/"):
+                    raise asyncio.TimeoutError()
+
+        assert limiter.is_open("https://b.example.com/x")
+        assert not limiter.is_open("https://example.org/")
+        with pytest.raises(CircuitOpenError):
+            async with limiter.request("https://example.com/"):
+                pass
+
+    @pytest.mark.asyncio
+    async def test_statuses_are_classified(self):
+        """Test that 5xx responses count as failures, 429 only slows down and 404 is a success."""
+        limiter = OriginLimiter(failure_threshold=2)
+        controller = limiter.controller("example.com")
+
+        for status in (429, 429, 404):
+            async with limiter.request("https://example.com/") as request:
+                request.record_status(status)
+        assert controller.limit < 4
+        assert controller.breaker.failures == 0
+
+        for status in (502, 500):
+            async with limiter.request("https://example.com/") as request:
+                request.record_status(status)
+        assert limiter.is_open("https://example.com/")
+
+    @pytest.mark.asyncio
+    async def test_cancellation_counts_as_timeout_only_when_budget_ran_out(self):
+        """Test that only slow requests cut off by their caller's budget count, not hedge losers."""
+        limiter = OriginLimiter(slow_after=0.05, failure_threshold=1)
+
+        async def _cancel_after(wait, expired):
+            budget = FetchBudget()
+
+            async def _fetch():
+                fetch_budget.set(budget)
+                async with limiter.request("https://example.com/"):
+                    await asyncio.sleep(1)
+
+            task = asyncio.create_task(_fetch())
+            await asyncio.sleep(wait)
+            budget.expired = expired
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        await _cancel_after(0.01, expired=True)
+        assert not limiter.is_open("https://example.com/")
+        await _cancel_after(0.1, expired=False)
+        assert not limiter.is_open("https://example.com/")
+        await _cancel_after(0.1, expired=True)
+        assert limiter.is_open("https://example.com/")
+
+    @pytest.mark.asyncio
+    async def test_hedge_loser_is_not_counted_as_a_failure(self, tmp_path):
+        """Test that a slow strategy cancelled because another one won doesn't trip the breaker."""
+        limiter = OriginLimiter(slow_after=0.01, failure_threshold=1)
+
+        async def slow(url):
+            async with limiter.request(url):
+                await asyncio.sleep(1)
+
+        async def fast(url):
+            await asyncio.sleep(0.05)
+            return PageMetadata(title="Fast")
+
+        resolver = TitleResolver(
+            strategies=[Strategy("slow", slow, lambda domain, url: True), Strategy("fast", fast, lambda domain, url: True)],
+            stats_path=str(tmp_path / "stats.json"), cache=TitleCache(), limiter=limiter, default_hedge_delay=0.02,
+        )
+
+        assert (await resolver.resolve("https://example.com/a")).title == "Fast"
+        await asyncio.sleep(0)
+        assert not limiter.is_open("https://example.com/")
+
+    @pytest.mark.asyncio
+    async def test_resolver_skips_origin_while_breaker_is_open(self, tmp_path):
+        """Test that an open breaker serves the cached title or nothing, without fetching."""
+        limiter = OriginLimiter(failure_threshold=1)
+        limiter._failure("example.com", limiter.controller("example.com"), "test")
+
+        fetched = []
+
+        async def fetch(url):
+            fetched.append(url)
+            return PageMetadata(title="Fresh")
+
+        cache = TitleCache()
+        cache.set("https://example.com/cached", PageMetadata(title="Cached"))
+        resolver = TitleResolver(strategies=[Strategy("html", fetch, lambda domain, url: True)],
+                                 stats_path=str(tmp_path / "stats.json"), cache=cache, limiter=limiter)
+
+        assert (await resolver.resolve("https://example.com/cached")).title == "Cached"
+        assert await resolver.resolve("https://example.com/new") is None
+        assert (await resolver.resolve("https://example.org/new")).title == "Fresh"
+        assert fetched == ["https://example.org/new"]
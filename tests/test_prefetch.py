@@ -0,0 +1,79 @@
+"""
+Tests for speculative title prefetching from the /snip URL autocomplete.
+"""
+import asyncio
+import pytest
+from unittest.mock import Mock
+from bot.metadata import PageMetadata
+from services.prefetch import TitlePrefetcher
+from services.title_cache import TitleCache
+
+
+class FakeResolver:
+    """Resolver stand-in that records the URLs it is asked for."""
+
+    def __init__(self, delay=0.0):
+        self.cache = TitleCache()
+        self.delay = delay
+        self.started = []
+
+    async def resolve(self, url, budget=None):
+        self.started.append(url)
+        await asyncio.sleep(self.delay)
+        metadata = PageMetadata(title=f"Title of {url}")
+        self.cache.set(url, metadata)
+        return metadata
+
+
+class TestTitlePrefetcher:
+    """Tests for TitlePrefetcher caps, cancellation and cache warming."""
+
+    @pytest.mark.asyncio
+    async def test_prefetch_warms_cache_with_canonical_url(self):
+        """Test that a prefetch canonicalizes the URL and caches its title."""
+        resolver = FakeResolver()
+        prefetcher = TitlePrefetcher(resolver=resolver, delay=0)
+
+        assert prefetcher.prefetch(1, "https://example.com/a?utm_source=x")
+        await asyncio.sleep(0.01)
+
+        assert resolver.started == ["https://example.com/a"]
+        assert resolver.cache.get("https://example.com/a").title == "Title of https://example.com/a"
+        assert len(prefetcher) == 0
+
+    @pytest.mark.asyncio
+    async def test_per_user_cap_cancels_oldest(self):
+        """Test that a user typing a new URL cancels their oldest prefetch before it fetches."""
+        resolver = FakeResolver()
+        prefetcher = TitlePrefetcher(resolver=resolver, per_user=1, delay=0.05)
+
+        prefetcher.prefetch(1, "https://example.co")
+        prefetcher.prefetch(1, "https://example.com")
+        await asyncio.sleep(0.1)
+
+        assert resolver.started == ["https://example.com/"]
+
+    @pytest.mark.asyncio
+    async def test_cached_and_duplicate_urls_are_skipped(self):
+        """Test that nothing is started for a cached URL or one already in flight."""
+        resolver = FakeResolver(delay=0.05)
+        resolver.cache.set("https://cached.com/", PageMetadata(title="Cached"))
+        prefetcher = TitlePrefetcher(resolver=resolver, delay=0)
+
+        assert not prefetcher.prefetch(1, "https://cached.com/")
+        assert prefetcher.prefetch(1, "https://example.com/")
+        assert not prefetcher.prefetch(1, "https://example.com/")
+
+        await prefetcher.stop()
+        assert len(prefetcher) == 0
+
+    @pytest.mark.asyncio
+    async def test_global_cap(self):
+        """Test that prefetches stop once the global in-flight cap is reached."""
+        prefetcher = TitlePrefetcher(resolver=FakeResolver(delay=0.05), max_in_flight=2, delay=0)
+
+        assert prefetcher.prefetch(1, "https://a.com/")
+        assert prefetcher.prefetch(2, "https://b.com/")
+        assert not prefetcher.prefetch(3, "https://c.com/")
+
+        await prefetcher.stop()
@@ -0,0 +1,144 @@
+"""
+Tests for forum provisioning from a declarative spec.
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+import discord
+from services.forum_tags import TagSpec
+from services.provisioning import (
+    ForumProvisioner, ForumSpec, ProvisioningError, ProvisioningSpec, RoleIndex, parse_provisioning_spec
+)
+
+
+def _role(name):
+    role = Mock(spec=discord.Role)
+    role.name = name
+    return role
+
+
+@pytest.fixture
+def guild():
+    guild = Mock(spec=discord.Guild)
+    guild.default_role = _role("@everyone")
+    guild.roles = [guild.default_role, _role("Staff"), _role("Members")]
+    guild.channels = []
+
+    async def _create_category(name, **options):
+        category = Mock(spec=discord.CategoryChannel)
+        category.name = name
+        category.overwrites = options["overwrites"]
+        return category
+
+    async def _create_forum(name, **options):
+        await asyncio.sleep(0.01)
+        forum = Mock(spec=discord.ForumChannel)
+        forum.name = name
+        forum.options = options
+        return forum
+
+    guild.create_category_channel = AsyncMock(side_effect=_create_category)
+    guild.create_forum_channel = AsyncMock(side_effect=_create_forum)
+    return guild
+
+
+def test_role_index_resolves_exact_then_case_insensitive():
+    staff = _role("Staff")
+    index = RoleIndex([staff, _role("staff")])
+
+    assert index.resolve(["Staff", " STAFF ", "Nobody"]) == ([staff], ["Nobody"])
+
+
+def test_parse_provisioning_spec():
+    spec = parse_provisioning_spec({
+        "category": "Reading",
+        "roles": ["Members"],
+        "forums": ["links", {"name": "articles", "tags": ["🐛 Bug"], "sort": "creation_date"}],
+    })
+
+    assert spec.category_name == "Reading"
+    assert spec.forums[0] == ForumSpec("links")
+    assert spec.forums[1].tags == [TagSpec("Bug", "🐛")]
+    with pytest.raises(ProvisioningError):
+        parse_provisioning_spec({"forums": "links"})
+
+
+class TestForumProvisioner:
+    """Tests for validation, concurrent creation and rollback."""
+
+    @pytest.mark.asyncio
+    async def test_validates_everything_before_any_api_call(self, guild):
+        spec = ProvisioningSpec(
+            forums=[ForumSpec("links", sort="newest"), ForumSpec("links"), ForumSpec("x" * 101)],
+            category_name="Reading",
+        )
+
+        with pytest.raises(ProvisioningError) as error:
+            await ForumProvisioner().provision(guild, spec)
+
+        assert "sort must be one of" in str(error.value)
+        assert "listed more than once" in str(error.value)
+        assert "1 to 100 characters" in str(error.value)
+        guild.create_category_channel.assert_not_awaited()
+        guild.create_forum_channel.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_creates_category_then_forums_with_tags_and_roles(self, guild):
+        spec = ProvisioningSpec(
+            forums=[ForumSpec("links", tags=[TagSpec("Bug")]), ForumSpec("staff-only", roles=["Staff"])],
+            category_name="Reading",
+            roles=["Members", "Ghosts", "Phantoms"],
+        )
+
+        result = await ForumProvisioner().provision(guild, spec)
+
+        assert result.category.name == "Reading"
+        assert sorted(forum.name for forum in result.forums) == ["links", "staff-only"]
+        links = next(forum for forum in result.forums if forum.name == "links")
+        assert [tag.name for tag in links.options["available_tags"]] == ["Bug"]
+        assert links.options["category"] is result.category
+        staff_only = next(forum for forum in result.forums if forum.name == "staff-only")
+        assert [role.name for role in staff_only.options["overwrites"]] == ["@everyone", "Staff"]
+        assert result.warnings == ["Roles not found and ignored: `Ghosts`, `Phantoms`"]
+
+    @pytest.mark.asyncio
+    async def test_rolls_back_when_a_creation_fails(self, guild):
+        created = []
+
+        async def _create_forum(name, **options):
+            if name == "broken":
+                raise discord.HTTPException(Mock(status=400, reason="Bad Request"), "Invalid name")
+            forum = Mock(spec=discord.ForumChannel)
+            forum.name = name
+            forum.delete = AsyncMock()
+            created.append(forum)
+            return forum
+
+        guild.create_forum_channel = AsyncMock(side_effect=_create_forum)
+        category = Mock(spec=discord.CategoryChannel)
+        category.name = "Reading"
+        category.delete = AsyncMock()
+        guild.create_category_channel = AsyncMock(return_value=category)
+
+        with pytest.raises(ProvisioningError) as error:
+            await ForumProvisioner().provision(guild, ProvisioningSpec(
+                forums=[ForumSpec("links"), ForumSpec("broken")], category_name="Reading"
+            ))
+
+        assert "rolled back" in str(error.value)
+        created[0].delete.assert_awaited_once()
+        category.delete.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_existing_category_is_reused_and_never_deleted(self, guild):
+        category = Mock(spec=discord.CategoryChannel)
+        category.channels = []
+        category.overwrites = {}
+        category.delete = AsyncMock()
+        guild.create_forum_channel = AsyncMock(side_effect=RuntimeError("boom"))
+
+        with pytest.raises(ProvisioningError):
+            await ForumProvisioner().provision(guild, ProvisioningSpec(forums=[ForumSpec("links")], category=category))
+
+        guild.create_category_channel.assert_not_awaited()
+        category.delete.assert_not_awaited()
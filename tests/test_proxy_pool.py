@@ -0,0 +1,114 @@
+"""
+Tests for the proxy pool and the proxy fallback in fetch_webpage_title.
+"""
+import pytest
+from unittest.mock import AsyncMock, patch
+from bot.metadata import PageMetadata
+from bot.util import fetch_webpage_title
+from services.proxy_pool import ProxyPool
+
+PAGE = PageMetadata(title="Proxied Title")
+
+
+class TestProxyPool:
+    """Tests for ProxyPool scoring, stickiness and eviction."""
+
+    def test_choose_returns_none_when_empty(self):
+        """Test that an empty pool has nothing to offer."""
+        assert ProxyPool().choose("example.com") is None
+
+    def test_choose_prefers_better_scored_proxy(self):
+        """Test that the healthier of two proxies is chosen."""
+        pool = ProxyPool()
+        pool.add(["1.1.1.1:80", "2.2.2.2:80"])
+        pool.record("http://1.1.1.1:80", "other.com", success=False, latency=5.0)
+        pool.record("http://2.2.2.2:80", "other.com", success=True, latency=0.2)
+        pool._sticky.clear()
+
+        assert pool.choose("example.com") == "http://2.2.2.2:80"
+
+    def test_successful_proxy_becomes_sticky_for_domain(self):
+        """Test that the proxy that worked for a domain is reused for it."""
+        pool = ProxyPool()
+        pool.add(["1.1.1.1:80", "2.2.2.2:80", "3.3.3.3:80"])
+        pool.record("http://3.3.3.3:80", "example.com", success=True, latency=0.5)
+
+        assert all(pool.choose("example.com") == "http://3.3.3.3:80" for _ in range(10))
+
+    def test_ewma_updates_latency_and_success_rate(self):
+        """Test that stats move toward observed values by the smoothing factor."""
+        pool = ProxyPool(alpha=0.5)
+        pool.add(["1.1.1.1:80"])
+        stats = pool.stats("1.1.1.1:80")
+
+        pool.record("http://1.1.1.1:80", "example.com", success=True, latency=3.0)
+
+        assert stats.latency == pytest.approx(2.0)
+        assert stats.success_rate == pytest.approx(0.75)
+
+    def test_dead_proxy_is_evicted(self):
+        """Test that a proxy failing repeatedly is evicted and loses stickiness."""
+        pool = ProxyPool(max_consecutive_failures=2)
+        pool.add(["1.1.1.1:80"])
+        pool.record("http://1.1.1.1:80", "example.com", success=True, latency=0.5)
+
+        pool.record("http://1.1.1.1:80", "example.com", success=False, latency=0.5)
+        pool.record("http://1.1.1.1:80", "example.com", success=False, latency=0.5)
+
+        assert len(pool) == 0
+        assert pool.choose("example.com") is None
+
+        pool.add(["1.1.1.1:80"])
+        assert len(pool) == 0
+
+    def test_blocked_domain_requires_proxies(self):
+        """Test that a blocked domain only routes to proxies when the pool has some."""
+        pool = ProxyPool()
+        pool.mark_blocked("example.com")
+        assert pool.is_blocked("example.com") is False
+
+        pool.add(["1.1.1.1:80"])
+        assert pool.is_blocked("example.com") is True
+        assert pool.is_blocked("other.com") is False
+
+
+class TestFetchWebpageTitleProxyFallback:
+    """Tests for the direct-then-proxy fetch flow."""
+
+    @pytest.mark.asyncio
+    async def test_direct_success_does_not_use_proxy(self):
+        """Test that proxies are not used when the direct request works."""
+        pool = ProxyPool()
+        pool.add(["1.1.1.1:80"])
+
+        with patch("bot.util._get_page_metadata", new_callable=AsyncMock, return_value=(200, PAGE)) as get_html:
+            title = await fetch_webpage_title("https://example.com", proxy_pool=pool)
+
+        assert title == "Proxied Title"
+        get_html.assert_awaited_once_with("https://example.com")
+
+    @pytest.mark.asyncio
+    async def test_blocked_request_falls_back_to_proxy(self):
+        """Test that a 403 marks the domain blocked and retries through a proxy."""
+        pool = ProxyPool()
+        pool.add(["1.1.1.1:80"])
+
+        with patch("bot.util._get_page_metadata", new_callable=AsyncMock, side_effect=[(403, None), (200, PAGE)]) as get_html:
+            title = await fetch_webpage_title("https://example.com", proxy_pool=pool)
+
+        assert title == "Proxied Title"
+        assert get_html.await_args_list[1].kwargs == {"proxy": "http://1.1.1.1:80"}
+        assert pool.is_blocked("example.com")
+
+    @pytest.mark.asyncio
+    async def test_blocked_domain_goes_straight_to_proxy(self):
+        """Test that a domain known to block us skips the direct attempt."""
+        pool = ProxyPool()
+        pool.add(["1.1.1.1:80"])
+        pool.mark_blocked("example.com")
+
+        with patch("bot.util._get_page_metadata", new_callable=AsyncMock, return_value=(200, PAGE)) as get_html:
+            title = await fetch_webpage_title("https://example.com", proxy_pool=pool)
+
+        assert title == "Proxied Title"
+        get_html.assert_awaited_once_with("https://example.com", proxy="http://1.1.1.1:80")
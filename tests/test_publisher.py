@@ -0,0 +1,65 @@
+"""
+Tests for the paced publish queue used by bulk jobs.
+"""
+import asyncio
+import time
+import pytest
+from unittest.mock import patch
+from services.publisher import Publisher, PublisherClosed
+
+
+class TestPublisher:
+    """Tests for Publisher pacing, ordering and error propagation."""
+
+    @pytest.mark.asyncio
+    async def test_publishes_in_order_with_minimum_interval(self):
+        """Test that queued snips are created one at a time, spaced by the interval."""
+        created = []
+
+        async def fake_create(**kwargs):
+            created.append((kwargs["title"], time.monotonic()))
+            return kwargs["title"]
+
+        publisher = Publisher(interval=0.05)
+        with patch("services.publisher.create_forum_thread", side_effect=fake_create):
+            results = await asyncio.gather(*(publisher.publish(title=f"Snip {i}") for i in range(3)))
+
+        assert results == ["Snip 0", "Snip 1", "Snip 2"]
+        assert [title for title, _ in created] == results
+        gaps = [later - earlier for (_, earlier), (_, later) in zip(created, created[1:])]
+        assert all(gap >= 0.045 for gap in gaps)
+
+    @pytest.mark.asyncio
+    async def test_failure_is_raised_to_its_caller_only(self):
+        """Test that one failed publish doesn't stop the rest of the queue."""
+        async def fake_create(**kwargs):
+            if kwargs["title"] == "bad":
+                raise Exception("Error creating thread")
+            return kwargs["title"]
+
+        publisher = Publisher(interval=0)
+        with patch("services.publisher.create_forum_thread", side_effect=fake_create):
+            bad, good = await asyncio.gather(publisher.publish(title="bad"), publisher.publish(title="good"),
+                                             return_exceptions=True)
+            await publisher.drain()
+
+        assert isinstance(bad, Exception)
+        assert good == "good"
+
+    @pytest.mark.asyncio
+    async def test_closed_publisher_refuses_new_snips_but_drains_queued(self):
+        """Test that closing stops new snips while those already queued are still published."""
+        async def fake_create(**kwargs):
+            return kwargs["title"]
+
+        publisher = Publisher(interval=0)
+        with patch("services.publisher.create_forum_thread", side_effect=fake_create):
+            queued = asyncio.create_task(publisher.publish(title="queued"))
+            await asyncio.sleep(0)
+            publisher.close()
+
+            with pytest.raises(PublisherClosed):
+                await publisher.publish(title="late")
+            await publisher.drain()
+
+        assert await queued == "queued"
@@ -0,0 +1,134 @@
+"""
+Tests for the SQLite FTS5 snip index.
+"""
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+import discord
+from services.discord import create_forum_thread, visible_forum_ids
+from services.search_index import SnipIndex, build_match_query
+from services.snip_records import SnipRecord
+
+
+def _record(thread_id, title, url="https://example.com/a", message=None, tags=(), author_id=1, channel_id=10,
+            guild_id=100):
+    return SnipRecord(thread_id=thread_id, guild_id=guild_id, channel_id=channel_id, title=title, url=url,
+                      author_id=author_id, author_name=f"user{author_id}", message=message, tags=list(tags))
+
+
+@pytest.fixture
+def index():
+    index = SnipIndex(":memory:")
+    index.open()
+    yield index
+    index.close()
+
+
+def test_build_match_query_quotes_user_input():
+    assert build_match_query('rust OR "async') == '"rust"* "OR"* "async"*'
+    assert build_match_query("!!!") is None
+
+
+class TestSnipIndex:
+    """Tests for indexing, ranking, filters and pagination."""
+
+    def test_title_matches_rank_above_message_matches(self, index):
+        """Test that a query matching a title outranks one matching only the message."""
+        index.add_many([
+            _record(1, "Weekly links", message="A long read about python packaging"),
+            _record(2, "Python packaging in 2024"),
+        ])
+
+        hits, total = index.search(100, "python packaging")
+
+        assert total == 2
+        assert [hit.thread_id for hit in hits] == [2, 1]
+
+    def test_matches_prefixes_domain_and_author(self, index):
+        """Test that partial words, domains and snipper names are searchable."""
+        index.add(_record(1, "Release notes", url="https://www.github.com/org/repo", author_id=7))
+
+        assert index.search(100, "relea")[1] == 1
+        assert index.search(100, "github")[1] == 1
+        assert index.search(100, "user7")[1] == 1
+
+    def test_filters_by_channel_tag_author_and_guild(self, index):
+        """Test that every filter narrows the results."""
+        index.add_many([
+            _record(1, "Cooking tips", tags=["Feature Request", "Bug"], author_id=1, channel_id=10),
+            _record(2, "Cooking tools", tags=["Bug"], author_id=2, channel_id=11),
+            _record(3, "Cooking elsewhere", guild_id=200),
+        ])
+
+        assert index.search(100, "cooking")[1] == 2
+        assert [hit.thread_id for hit in index.search(100, "cooking", channel_id=11)[0]] == [2]
+        assert [hit.thread_id for hit in index.search(100, "cooking", tag="Feature Request")[0]] == [1]
+        assert [hit.thread_id for hit in index.search(100, "cooking", author_id=2)[0]] == [2]
+        assert index.search(100, "cooking", channel_ids={10}) == (index.search(100, "cooking", channel_id=10)[0], 1)
+        assert index.search(100, "cooking", channel_ids=set()) == ([], 0)
+        assert index.search(100, "cooking")[0][0].tags in (["Feature Request", "Bug"], ["Bug"])
+
+    def test_pagination_and_removal(self, index):
+        """Test that results page with a stable total and removed threads disappear."""
+        index.add_many([_record(i, f"Snip number {i}") for i in range(25)])
+
+        first, total = index.search(100, "snip", limit=10)
+        last, _ = index.search(100, "snip", limit=10, offset=20)
+        assert total == 25
+        assert len(first) == 10 and len(last) == 5
+
+        index.remove(0)
+        assert index.search(100, "snip")[1] == 24
+
+    def test_dead_links_only_from_given_forums(self, index):
+        """Test that dead links are listed only from the forums passed in."""
+        index.add_many([_record(1, "Gone", channel_id=10), _record(2, "Also gone", channel_id=11)])
+        for thread_id in (1, 2):
+            index.record_link_check(thread_id, 404, 3, True, "2024-01-01T00:00:00+00:00")
+
+        assert [row[0] for row in index.dead_links(100, channel_ids={11})] == ["Also gone"]
+        assert len(index.dead_links(100)) == 2
+
+    def test_closed_index_is_a_no_op(self):
+        """Test that an index that was never opened ignores writes and finds nothing."""
+        index = SnipIndex(":memory:")
+        index.add(_record(1, "Anything"))
+        assert index.search(100, "anything") == ([], 0)
+
+
+@pytest.mark.asyncio
+async def test_create_forum_thread_indexes_new_snips(index, mock_forum_channel, mock_thread):
+    """Test that publishing a snip adds it to an open index."""
+    mock_forum_channel.guild = Mock(id=100)
+    mock_forum_channel.create_thread.return_value = mock_thread
+    author = Mock(spec=discord.User)
+    author.id = 5
+    author.display_name = "Test Author"
+    author.mention = "<@5>"
+    author.avatar = None
+
+    with patch("services.discord.snip_index", index):
+        await create_forum_thread(channel=mock_forum_channel, title="Indexed article",
+                                  url="https://example.com/indexed", author=author, message="Great read")
+
+    hits, total = index.search(100, "great read")
+    assert total == 1
+    assert hits[0].thread_id == mock_thread.id
+    assert hits[0].author_name == "Test Author"
+
+
+def test_reindexing_a_thread_replaces_its_old_text(index):
+    """Test that re-adding a thread drops its old title from the full-text index."""
+    index.add(_record(1, "Original headline"))
+    index.add(_record(1, "Corrected headline"))
+
+    assert index.search(100, "original") == ([], 0)
+    assert index.search(100, "corrected")[1] == 1
+
+
+def test_visible_forum_ids_skips_forums_the_member_cannot_view():
+    public, private = Mock(id=10), Mock(id=11)
+    public.permissions_for.return_value = discord.Permissions(view_channel=True)
+    private.permissions_for.return_value = discord.Permissions(view_channel=False)
+    guild = Mock(forum_channels=[public, private])
+
+    assert visible_forum_ids(guild, Mock(spec=discord.Member)) == {10}
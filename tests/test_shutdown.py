@@ -0,0 +1,60 @@
+"""
+Tests for graceful shutdown.
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from bot.shutdown import GracefulShutdown
+from services.publisher import Publisher
+
+
+class TestGracefulShutdown:
+    """Tests for draining the publish queue before the bot closes."""
+
+    @pytest.mark.asyncio
+    async def test_drains_queue_before_closing_bot(self):
+        """Test that queued snips are published before the bot is closed."""
+        events = []
+
+        async def fake_create(**kwargs):
+            await asyncio.sleep(0.01)
+            events.append(kwargs["title"])
+
+        bot = Mock()
+        bot.close = AsyncMock(side_effect=lambda: events.append("closed"))
+        queue = Publisher(interval=0)
+        shutdown = GracefulShutdown(queue=queue, drain_timeout=5)
+
+        with patch("services.publisher.create_forum_thread", side_effect=fake_create):
+            tasks = [asyncio.create_task(queue.publish(title=f"Snip {i}")) for i in range(2)]
+            await asyncio.sleep(0)
+            shutdown.request(bot, "SIGTERM")
+            shutdown.request(bot, "SIGTERM")
+            await shutdown._task
+            await asyncio.gather(*tasks)
+
+        assert shutdown.requested
+        assert queue.closed
+        assert events == ["Snip 0", "Snip 1", "closed"]
+        bot.close.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_closes_bot_when_drain_times_out(self):
+        """Test that a stuck queue doesn't hold up shutdown past the drain timeout."""
+        release = asyncio.Event()
+
+        async def fake_create(**kwargs):
+            await release.wait()
+
+        bot = Mock()
+        bot.close = AsyncMock()
+        queue = Publisher(interval=0)
+        shutdown = GracefulShutdown(queue=queue, drain_timeout=0.05)
+
+        with patch("services.publisher.create_forum_thread", side_effect=fake_create):
+            task = asyncio.create_task(queue.publish(title="stuck"))
+            await asyncio.sleep(0)
+            await shutdown.shutdown(bot)
+            bot.close.assert_awaited_once()
+            release.set()
+            await task
@@ -104,6 +104,21 @@ class TestTagAutocomplete:
         assert "select a channel first" in choices[0].name.lower()
         assert choices[0].value == ""
 
+    @pytest.mark.asyncio
+    async def test_autocomplete_uses_the_servers_default_forum(
+        self, mock_bot, mock_autocomplete_context, mock_forum_tags
+    ):
+        """Test that the server's default forum is used when no channel is selected."""
+        cog = SnipCog(mock_bot)
+        mock_autocomplete_context.options["channel"] = None
+        mock_autocomplete_context.value = ""
+
+        with patch("bot.cogs.snip_cog.guild_config.get", return_value=Mock(default_channel_id=123456789)):
+            choices = await cog.tag_autocomplete(mock_autocomplete_context)
+
+        assert len(choices) == len(mock_forum_tags)
+        mock_bot.get_channel.assert_called_once_with(123456789)
+
     @pytest.mark.asyncio
     async def test_autocomplete_handles_channel_with_no_tags(
         self, mock_bot, mock_autocomplete_context, mock_forum_channel_no_tags
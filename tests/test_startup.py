@@ -0,0 +1,88 @@
+"""
+Tests for cog discovery and startup timing.
+"""
+import threading
+import pytest
+from bot.startup import StartupTimer, discover_cogs
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDiscoverCogs:
+    """Tests for finding cogs through the package rather than the working directory."""
+
+    def test_finds_cog_modules(self, monkeypatch, tmp_path):
+        """Test that every cog module is found regardless of the working directory."""
+        monkeypatch.chdir(tmp_path)
+
+        cogs = discover_cogs()
+
+        assert "bot.cogs.snip_cog" in cogs
+        assert "bot.cogs.setup_cog" in cogs
+        assert cogs == sorted(cogs)
+        assert not any(name.rsplit(".", 1)[-1].startswith("_") for name in cogs)
+
+
+class TestStartupTimer:
+    """Tests for StartupTimer steps and reports."""
+
+    def test_step_records_duration(self):
+        """Test that a step is recorded with its start and duration."""
+        clock = FakeClock()
+        timer = StartupTimer(clock=clock)
+        clock.now = 1.0
+
+        with timer.step("imports"):
+            clock.now = 1.5
+
+        assert timer.steps == [("imports", 1.0, 0.5)]
+
+    @pytest.mark.asyncio
+    async def test_gather_runs_steps_concurrently(self):
+        """Test that gathered steps overlap, so one can wait on another without deadlocking."""
+        timer = StartupTimer()
+        started = threading.Event()
+
+        def _first():
+            started.set()
+
+        def _second():
+            assert started.wait(timeout=5)
+
+        await timer.gather("initialization", {"second": _second, "first": _first})
+
+        assert {name for name, _, _ in timer.steps} == {"initialization", "first", "second"}
+
+    @pytest.mark.asyncio
+    async def test_gather_raises_after_every_step_finishes(self):
+        """Test that a failing step is raised once the other steps are done."""
+        timer = StartupTimer()
+        finished = []
+
+        def _fail():
+            raise RuntimeError("database is locked")
+
+        with pytest.raises(RuntimeError, match="database is locked"):
+            await timer.gather("initialization", {"fail": _fail, "ok": lambda: finished.append(True)})
+
+        assert finished == [True]
+
+    def test_report_lists_steps_in_start_order_then_marks(self):
+        """Test that the report orders steps by when they started and ends with milestones."""
+        clock = FakeClock()
+        timer = StartupTimer(clock=clock)
+        timer.steps = [("guild config", 0.2, 0.1), ("initialization", 0.1, 0.3), ("imports", 0.0, 0.1)]
+        clock.now = 2.0
+        timer.mark("ready")
+
+        lines = timer.report().splitlines()
+
+        assert lines[0] == "Startup took 2.00s:"
+        assert [line.split()[0] for line in lines[1:]] == ["imports", "initialization", "guild", "ready"]
+        assert "(at 2000ms)" in lines[-1]
@@ -0,0 +1,54 @@
+"""
+Tests for compiling and rendering snip thread templates.
+"""
+import pytest
+from services.thread_templates import DEFAULT_THREAD_TEMPLATES, CompiledTemplate, compile_templates
+
+FIELDS = {
+    "title": "GitHub Actions", "url": "https://github.com/a", "domain": "github.com", "message": "",
+    "author": "<@1>", "author_name": "Ada", "mentions": "", "site_name": "GitHub", "description": "",
+}
+
+
+class TestCompiledTemplate:
+    """Tests for CompiledTemplate rendering."""
+
+    def test_blocks_with_only_empty_fields_are_dropped(self):
+        """Test that a paragraph is left out when every field in it is empty, but literal paragraphs stay."""
+        template = CompiledTemplate("**{title}**\n\n{message}\n\nBy {author}\n\n---")
+
+        assert template.render(FIELDS) == "**GitHub Actions**\n\nBy <@1>\n\n---"
+        assert template.render({**FIELDS, "message": "Look"}) == "**GitHub Actions**\n\nLook\n\nBy <@1>\n\n---"
+
+    def test_literal_braces(self):
+        assert CompiledTemplate("{{{site_name}}} {title}").render(FIELDS) == "{GitHub} GitHub Actions"
+
+    def test_match_reads_back_rendered_fields(self):
+        """Test that fields come back out of a rendering, including from a message that precedes other blocks."""
+        body = DEFAULT_THREAD_TEMPLATES.body
+
+        assert body.match(body.render(FIELDS)) == {
+            "title": "GitHub Actions", "message": "", "url": "https://github.com/a", "author": "<@1>",
+        }
+        assert body.match(body.render({**FIELDS, "message": "Look\n\nhere"}))["message"] == "Look\n\nhere"
+        assert body.match("Just a discussion") is None
+
+    @pytest.mark.parametrize("source", ["{colour}", "{title.__class__}", "{title!r}", "{title:>5}", "{title"])
+    def test_rejects_unknown_fields_and_formatting(self, source):
+        with pytest.raises(ValueError):
+            CompiledTemplate(source)
+
+
+class TestCompileTemplates:
+    """Tests for compiling a guild's set of templates."""
+
+    def test_defaults_fill_in_unset_parts(self):
+        """Test that parts a guild doesn't customize use the default templates."""
+        templates = compile_templates({"name": "[{site_name}] {title}"})
+
+        assert templates.name.render(FIELDS) == "[GitHub] GitHub Actions"
+        assert templates.body.source == DEFAULT_THREAD_TEMPLATES.body.source
+
+    def test_rejects_unknown_parts(self):
+        with pytest.raises(ValueError):
+            compile_templates({"sidebar": "{title}"})
@@ -0,0 +1,74 @@
+"""
+Tests for scoring and ranking title candidates.
+"""
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from bot.cogs.snip_cog import SnipCog
+from bot.metadata import PageMetadata
+from services.title_candidates import CONFIDENT_TITLE, rank_candidates, score_title, title_from_url
+
+
+@pytest.mark.parametrize("title,site_name,confident", [
+    ("How to exit Vim", None, True),
+    ("Home", None, False),
+    ("Just a moment...", None, False),
+    ("Example", None, False),
+    ("The Verge", "The Verge", False),
+    ("Rust", None, True),
+    ("Changelog", None, True),
+    ("", None, False),
+])
+def test_score_title(title, site_name, confident):
+    assert (score_title(title, "https://www.example.com/a", site_name) >= CONFIDENT_TITLE) == confident
+
+
+@pytest.mark.parametrize("url,expected", [
+    ("https://example.com/blog/2024/03/my-great-post.html", "My great post"),
+    ("https://en.wikipedia.org/wiki/Python_(programming_language)", "Python (programming language)"),
+    ("https://example.com/questions/231767/what-is-yield/", "What is yield"),
+    ("https://example.com/p/5f3a9c2b7d1e", None),
+    ("https://example.com/", None),
+])
+def test_title_from_url(url, expected):
+    assert title_from_url(url) == expected
+
+
+class TestRankCandidates:
+    """Tests for ordering the candidates for a page."""
+
+    def test_generic_page_title_ranks_below_url_guess(self):
+        """Test that a bare "Home" title loses to a descriptive guess from the URL."""
+        metadata = PageMetadata(title="Home")
+
+        candidates = rank_candidates("https://example.com/posts/my-great-post", metadata)
+
+        assert [candidate.source for candidate in candidates] == ["url", "page"]
+        assert candidates[0].title == "My great post"
+        assert candidates[0].confidence < CONFIDENT_TITLE
+        assert candidates[1].metadata is metadata
+
+    def test_duplicate_guess_is_dropped(self):
+        """Test that a URL guess equal to the page title isn't listed twice."""
+        candidates = rank_candidates("https://example.com/my-great-post", PageMetadata(title="My Great Post"))
+
+        assert [candidate.source for candidate in candidates] == ["page"]
+
+    def test_nothing_to_offer(self):
+        assert rank_candidates("https://example.com/", None) == []
+
+    @pytest.mark.asyncio
+    async def test_one_word_title_is_posted_without_the_modal(self, mock_application_context, mock_forum_channel):
+        """Test that /snip posts a short real title such as "Kubernetes" straight away."""
+        metadata = PageMetadata(title="Kubernetes")
+        resolver = Mock()
+        resolver.resolve_candidates = AsyncMock(return_value=rank_candidates("https://example.com/docs/k8s", metadata))
+
+        with patch("bot.cogs.snip_cog.title_resolver", resolver), \
+                patch("bot.cogs.snip_cog.create_forum_thread", AsyncMock()) as create, \
+                patch("bot.cogs.snip_cog.snapshot_archiver"):
+            await SnipCog.snip.callback(SnipCog(Mock()), mock_application_context, url="https://example.com/docs/k8s",
+                                        channel=mock_forum_channel, title=None, message=None, mention=None,
+                                        additional_mentions="", tags=None)
+
+        mock_application_context.send_modal.assert_not_called()
+        assert create.await_args.kwargs["title"] == "Kubernetes"
@@ -0,0 +1,110 @@
+"""
+Tests for the title normalization pipeline and learned suffix stripping.
+"""
+import pytest
+from bot.metadata import PageMetadata
+from services.title_cache import TitleCache
+from services.title_normalizer import TitleNormalizer, split_suffix, truncate_title
+from services.title_resolver import Strategy, TitleResolver
+
+
+@pytest.mark.parametrize("title,expected", [
+    ("Article | The Verge", ("Article", "The Verge")),
+    ("Spider-Man: No Way Home - IMDb", ("Spider-Man: No Way Home", "IMDb")),
+    ("A - B - C", ("A - B", "C")),
+    ("Well-known title", ("Well-known title", None)),
+])
+def test_split_suffix(title, expected):
+    assert split_suffix(title) == expected
+
+
+class TestTruncateTitle:
+    """Tests for truncating titles to the thread-name limit."""
+
+    def test_cuts_at_word_boundary(self):
+        """Test that a long title is cut between words and ends with an ellipsis."""
+        title = "word " * 30
+
+        truncated = truncate_title(title.strip(), 23)
+
+        assert truncated == "word word word word…"
+
+    def test_cuts_long_words(self):
+        """Test that a title without a late enough word boundary is cut mid-word."""
+        assert truncate_title("a " + "x" * 50, 20) == "a " + "x" * 17 + "…"
+
+    def test_short_title_unchanged(self):
+        assert truncate_title("Short", 100) == "Short"
+
+
+class TestTitleNormalizer:
+    """Tests for TitleNormalizer cleaning, learning and persistence."""
+
+    def test_cleans_entities_and_whitespace(self):
+        """Test that entities are decoded and whitespace runs collapsed."""
+        normalizer = TitleNormalizer()
+
+        assert normalizer.normalize("  Tom &amp; Jerry\n\t&#8212;  a​retrospective ") == \
+            "Tom & Jerry — a retrospective"
+
+    def test_strips_domain_and_site_name(self):
+        """Test that the page's domain and site name are stripped without any learning."""
+        normalizer = TitleNormalizer()
+
+        assert normalizer.normalize("Popular git config options | jvns.ca", "https://jvns.ca/blog/") == \
+            "Popular git config options"
+        assert normalizer.normalize("Article | The Verge", "https://www.theverge.com/a", site_name="The Verge") == \
+            "Article"
+
+    def test_site_name_is_learned_immediately(self):
+        """Test that a suffix matching the site name is applied to later titles from the domain."""
+        normalizer = TitleNormalizer()
+        normalizer.learn("https://www.theverge.com/a", "First | The Verge", site_name="The Verge")
+
+        assert normalizer.normalize("Second | THE VERGE", "https://theverge.com/b") == "Second"
+        assert normalizer.normalize("Second | The Verge", "https://example.com/b") == "Second | The Verge"
+
+    def test_suffix_learned_from_different_titles(self):
+        """Test that a trailing segment becomes the suffix only after ending enough different titles."""
+        normalizer = TitleNormalizer(min_samples=3)
+        url = "https://stackoverflow.com/questions/1"
+
+        normalizer.learn(url, "How do I exit Vim? - Stack Overflow")
+        normalizer.learn(url, "How do I exit Vim? - Stack Overflow")
+        normalizer.learn(url, "Why is Python slow? - Stack Overflow")
+        assert normalizer.suffix_for(url) is None
+
+        normalizer.learn(url, "What is a monad? - Stack Overflow")
+        assert normalizer.suffix_for(url) == "stack overflow"
+        assert normalizer.normalize("Foo - Stack Overflow", url) == "Foo"
+
+    def test_rules_persist(self, tmp_path):
+        """Test that learned suffixes and candidates survive a restart."""
+        path = str(tmp_path / "suffixes.json")
+        normalizer = TitleNormalizer(min_samples=2, rules_path=path)
+        normalizer.learn("https://bbc.co.uk/news/1", "Chipmakers race - BBC News")
+        normalizer.learn("https://bbc.co.uk/news/2", "Rain expected - BBC News")
+        normalizer.learn("https://example.com/1", "One - Example Blog")
+        normalizer.save()
+
+        restored = TitleNormalizer(min_samples=2, rules_path=path)
+        restored.load()
+        restored.learn("https://example.com/2", "Two - Example Blog")
+
+        assert restored.normalize("Markets - BBC News", "https://www.bbc.co.uk/news/3") == "Markets"
+        assert restored.suffix_for("https://example.com/") == "example blog"
+
+    @pytest.mark.asyncio
+    async def test_resolver_normalizes_and_learns(self, tmp_path):
+        """Test that resolved titles are normalized before they are cached."""
+        async def fetch(url):
+            return PageMetadata(title="Article &amp; more | The Verge", site_name="The Verge")
+
+        normalizer = TitleNormalizer()
+        cache = TitleCache()
+        resolver = TitleResolver(strategies=[Strategy("html", fetch, lambda domain, url: True)],
+                                 stats_path=str(tmp_path / "stats.json"), cache=cache, normalizer=normalizer)
+
+        assert (await resolver.resolve("https://www.theverge.com/a")).title == "Article & more"
+        assert cache.get("https://www.theverge.com/a").title == "Article & more"
+        assert normalizer.suffix_for("https://www.theverge.com/") == "the verge"
@@ -0,0 +1,317 @@
+"""
+Tests for hedged title resolution across strategies.
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from bot.metadata import PageMetadata
+from services.title_cache import TitleCache
+from services.title_resolver import TitleResolver, Strategy
+
+
+def _strategy(name, delay, title, log):
+    async def fetch(url):
+        log.append(f"start:{name}")
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            log.append(f"cancelled:{name}")
+            raise
+        if isinstance(title, Exception):
+            raise title
+        return PageMetadata(title=title)
+
+    return Strategy(name, fetch, lambda domain, url: True)
+
+
+class TestTitleResolver:
+    """Tests for TitleResolver hedging, cancellation and stats."""
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_is_not_hedged(self, tmp_path):
+        """Test that no secondary starts when the primary answers in time."""
+        log = []
+        resolver = TitleResolver(
+            strategies=[_strategy("a", 0.01, "Title A", log), _strategy("b", 0.01, "Title B", log)],
+            stats_path=str(tmp_path / "stats.json"),
+            cache=TitleCache(),
+            default_hedge_delay=0.2,
+        )
+
+        assert (await resolver.resolve("https://example.com")).title == "Title A"
+        assert log == ["start:a"]
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged_and_loser_cancelled(self, tmp_path):
+        """Test that a slow primary triggers the secondary and the loser is cancelled."""
+        log = []
+        resolver = TitleResolver(
+            strategies=[_strategy("slow", 1.0, "Slow Title", log), _strategy("fast", 0.01, "Fast Title", log)],
+            stats_path=str(tmp_path / "stats.json"),
+            cache=TitleCache(),
+            default_hedge_delay=0.05,
+        )
+
+        assert (await resolver.resolve("https://example.com")).title == "Fast Title"
+        await asyncio.sleep(0)
+        assert log == ["start:slow", "start:fast", "cancelled:slow"]
+
+    @pytest.mark.asyncio
+    async def test_failed_primary_starts_next_immediately(self, tmp_path):
+        """Test that a failing strategy moves on without waiting for the hedge delay."""
+        log = []
+        resolver = TitleResolver(
+            strategies=[_strategy("broken", 0.0, RuntimeError("boom"), log), _strategy("ok", 0.0, "OK", log)],
+            stats_path=str(tmp_path / "stats.json"),
+            cache=TitleCache(),
+            default_hedge_delay=5.0,
+        )
+
+        assert (await asyncio.wait_for(resolver.resolve("https://example.com"), timeout=1)).title == "OK"
+
+    @pytest.mark.asyncio
+    async def test_budget_limits_resolution(self, tmp_path):
+        """Test that resolution gives up once the budget is spent."""
+        log = []
+        resolver = TitleResolver(
+            strategies=[_strategy("slow", 1.0, "Slow", log)],
+            stats_path=str(tmp_path / "stats.json"),
+            cache=TitleCache(),
+        )
+
+        assert await resolver.resolve("https://example.com", budget=0.05) is None
+        await asyncio.sleep(0.01)
+        assert "cancelled:slow" in log
+
+    @pytest.mark.asyncio
+    async def test_resolved_metadata_is_cached(self, tmp_path):
+        """Test that a second resolve for the same URL is served from the cache."""
+        log = []
+        resolver = TitleResolver(
+            strategies=[_strategy("a", 0.0, "Cached Title", log)],
+            stats_path=str(tmp_path / "stats.json"),
+            cache=TitleCache(),
+        )
+
+        first = await resolver.resolve("https://example.com")
+        second = await resolver.resolve("https://example.com")
+
+        assert first is second
+        assert log == ["start:a"]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_resolves_share_one_race(self, tmp_path):
+        """Test that a second caller joins the race already running for the URL."""
+        log = []
+        resolver = TitleResolver(
+            strategies=[_strategy("a", 0.05, "Shared", log)],
+            stats_path=str(tmp_path / "stats.json"),
+            cache=TitleCache(),
+        )
+
+        first, second = await asyncio.gather(
+            resolver.resolve("https://example.com", budget=5),
+            resolver.resolve("https://example.com", budget=1),
+        )
+
+        assert first.title == second.title == "Shared"
+        assert log == ["start:a"]
+
+    @pytest.mark.asyncio
+    async def test_race_survives_while_another_caller_waits(self, tmp_path):
+        """Test that a caller timing out doesn't cancel the race for a caller with a longer budget."""
+        log = []
+        resolver = TitleResolver(
+            strategies=[_strategy("a", 0.1, "Slow", log)],
+            stats_path=str(tmp_path / "stats.json"),
+            cache=TitleCache(),
+        )
+
+        short, long = await asyncio.gather(
+            resolver.resolve("https://example.com", budget=0.02),
+            resolver.resolve("https://example.com", budget=1),
+        )
+
+        assert short is None
+        assert long.title == "Slow"
+        assert "cancelled:a" not in log
+
+    @pytest.mark.asyncio
+    async def test_candidates_keep_resolving_after_budget(self, tmp_path):
+        """Test that a slow page yields a URL guess now and lands in the cache once it resolves."""
+        log = []
+        cache = TitleCache()
+        resolver = TitleResolver(
+            strategies=[_strategy("a", 0.1, "The Full Title Of The Post", log)],
+            stats_path=str(tmp_path / "stats.json"),
+            cache=cache,
+        )
+        url = "https://example.com/blog/my-great-post"
+
+        candidates = await resolver.resolve_candidates(url, budget=0.02)
+        assert [(candidate.title, candidate.source) for candidate in candidates] == [("My great post", "url")]
+
+        await asyncio.gather(*(flight.task for flight in resolver._in_flight.values()))
+        assert "cancelled:a" not in log
+        assert cache.get(url).title == "The Full Title Of The Post"
+
+        best = (await resolver.resolve_candidates(url, budget=0))[0]
+        assert (best.title, best.source) == ("The Full Title Of The Post", "page")
+
+    @pytest.mark.asyncio
+    async def test_stale_entry_is_served_and_extended_on_304(self, tmp_path):
+        """Test that a stale entry is returned at once and a 304 just extends it."""
+        log = []
+        cache = TitleCache(ttl=0)
+        cache.set("https://example.com", PageMetadata(title="Cached", etag='"v1"'))
+        resolver = TitleResolver(
+            strategies=[_strategy("a", 0.0, "Fresh", log)],
+            stats_path=str(tmp_path / "stats.json"),
+            cache=cache,
+        )
+
+        with patch("services.title_resolver.revalidate_page_metadata",
+                   new_callable=AsyncMock, return_value=(True, None)) as revalidate:
+            cache.ttl = 60
+            metadata = await resolver.resolve("https://example.com")
+            assert metadata.title == "Cached"
+            await asyncio.gather(*resolver._revalidating.values())
+
+        assert revalidate.await_args.args[1].etag == '"v1"'
+        assert cache.lookup("https://example.com") == (metadata, False)
+        assert log == []
+
+    @pytest.mark.asyncio
+    async def test_revalidated_page_is_cached_under_its_canonical_url(self, tmp_path):
+        """Test that a changed page found by revalidation is cached like a resolved one."""
+        cache = TitleCache(ttl=0)
+        cache.set("https://example.com/a?id=1", PageMetadata(title="Cached", etag='"v1"'))
+        resolver = TitleResolver(strategies=[], stats_path=str(tmp_path / "stats.json"), cache=cache)
+        changed = PageMetadata(title="Fresh", etag='"v2"', canonical_url="https://example.com/a")
+
+        with patch("services.title_resolver.revalidate_page_metadata",
+                   new_callable=AsyncMock, return_value=(False, changed)):
+            await resolver.resolve("https://example.com/a?id=1")
+            cache.ttl = 60
+            await asyncio.gather(*resolver._revalidating.values())
+
+        assert cache.get("https://example.com/a?id=1").title == "Fresh"
+        assert cache.get("https://example.com/a").title == "Fresh"
+
+    @pytest.mark.asyncio
+    async def test_stale_entry_without_validators_is_re_resolved(self, tmp_path):
+        """Test that a stale entry with no ETag or Last-Modified is refreshed through the strategies."""
+        log = []
+        cache = TitleCache(ttl=0)
+        cache.set("https://example.com", PageMetadata(title="Cached"))
+        resolver = TitleResolver(
+            strategies=[_strategy("a", 0.0, "Fresh", log)],
+            stats_path=str(tmp_path / "stats.json"),
+            cache=cache,
+        )
+
+        assert (await resolver.resolve("https://example.com")).title == "Cached"
+        cache.ttl = 60
+        await asyncio.gather(*resolver._revalidating.values())
+
+        assert cache.get("https://example.com").title == "Fresh"
+
+    def test_rank_prefers_fastest_learned_strategy(self, tmp_path):
+        """Test that learned latency reorders strategies for a domain."""
+        log = []
+        resolver = TitleResolver(
+            strategies=[_strategy("a", 0, "A", log), _strategy("b", 0, "B", log)],
+            stats_path=str(tmp_path / "stats.json"),
+        )
+        for _ in range(5):
+            resolver.stats_for("example.com", "a").record(2.0, True)
+            resolver.stats_for("example.com", "b").record(0.1, True)
+
+        assert [s.name for s in resolver.rank("example.com", "")] == ["b", "a"]
+        assert [s.name for s in resolver.rank("other.com", "")] == ["a", "b"]
+
+    def test_stats_persist_across_restarts(self, tmp_path):
+        """Test that latency stats survive a save/load round trip."""
+        path = str(tmp_path / "stats.json")
+        resolver = TitleResolver(strategies=[], stats_path=path)
+        resolver.stats_for("example.com", "html").record(0.5, True)
+        resolver.stats_for("example.com", "html").record(0.0, False)
+        resolver.save()
+
+        restored = TitleResolver(strategies=[], stats_path=path)
+        restored.load()
+        stats = restored.stats_for("example.com", "html")
+
+        assert list(stats.samples) == [0.5]
+        assert stats.successes == 1
+        assert stats.failures == 1
+        assert restored.hedge_delay("example.com", "html") == 0.5
+
+
+    @pytest.mark.asyncio
+    async def test_save_loop_survives_a_failed_write(self, tmp_path):
+        """Test that a failed stats write is retried on the next interval."""
+        resolver = TitleResolver(strategies=[], stats_path=str(tmp_path / "stats.json"))
+        resolver.save_interval = 0.001
+        resolver.stats_for("example.com", "html").record(0.5, True)
+        resolver._dirty = True
+        writes = []
+
+        def write(data):
+            writes.append(data)
+            if len(writes) == 1:
+                raise ValueError("disk went away")
+
+        with patch.object(resolver, "_write", side_effect=write):
+            task = asyncio.create_task(resolver._save_loop())
+            while len(writes) < 2:
+                await asyncio.sleep(0.001)
+            task.cancel()
+
+        assert writes[1] == {"example.com": {"html": resolver.stats_for("example.com", "html").to_dict()}}
+        assert not resolver._dirty
+
+class TestTitleCachePersistence:
+    """Tests for saving the title cache on shutdown and loading it on boot."""
+
+    def test_round_trip_keeps_order_and_freshness(self, tmp_path):
+        """Test that entries survive a save/load round trip in LRU order, fresh or stale as before."""
+        path = str(tmp_path / "titles.json")
+        cache = TitleCache(ttl=60, cache_path=path)
+        cache.set("https://example.com/a", PageMetadata(title="A", etag='"1"'))
+        cache.set("https://example.com/b", PageMetadata(title="B"))
+        cache._entries["https://example.com/b"] = (cache._entries["https://example.com/b"][0], 0.0)
+        cache.save()
+
+        restored = TitleCache(ttl=60, cache_path=path)
+        restored.load()
+
+        assert list(restored._entries) == ["https://example.com/a", "https://example.com/b"]
+        assert restored.lookup("https://example.com/a") == (PageMetadata(title="A", etag='"1"'), False)
+        metadata, stale = restored.lookup("https://example.com/b")
+        assert metadata.title == "B"
+        assert stale
+
+    def test_load_drops_entries_past_their_stale_window(self, tmp_path):
+        """Test that entries which expired for good while the bot was down aren't restored."""
+        path = str(tmp_path / "titles.json")
+        cache = TitleCache(ttl=60, stale_ttl=10, cache_path=path)
+        cache.set("https://example.com/old", PageMetadata(title="Old"))
+        cache._entries["https://example.com/old"] = (PageMetadata(title="Old"), -1000.0)
+        cache.set("https://example.com/new", PageMetadata(title="New"))
+        cache.save()
+
+        restored = TitleCache(stale_ttl=10, cache_path=path)
+        restored.load()
+
+        assert list(restored._entries) == ["https://example.com/new"]
+
+    def test_load_without_saved_cache(self, tmp_path):
+        """Test that a missing or corrupt file leaves the cache empty."""
+        path = tmp_path / "titles.json"
+        cache = TitleCache(cache_path=str(path))
+        cache.load()
+        path.write_text("{not json")
+        cache.load()
+
+        assert len(cache) == 0
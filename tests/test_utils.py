@@ -4,7 +4,8 @@ from bot.util import (
     validate_and_normalize_url,
     truncate_string,
     remove_website_title,
-    get_domain_from_url
+    get_domain_from_url,
+    extract_title_from_html
 )
 
 
@@ -78,4 +79,17 @@ def test_remove_website_title(title, url, expected):
     ("", None),
 ])
 def test_get_domain_from_url(url, expected):
-    assert get_domain_from_url(url) == expected
\ No newline at end of file
+    assert get_domain_from_url(url) == expected
+
+
+# Test title extraction from HTML
+@pytest.mark.parametrize("html,expected", [
+    ("<html><head><title>Plain Title</title></head></html>", "Plain Title"),
+    ('<head><title>Short</title><meta property="og:title" content="A Longer Open Graph Title"></head>',
+     "A Longer Open Graph Title"),
+    ('<head><meta property="twitter:title" content="  Twitter Title  "></head>', "Twitter Title"),
+    ("<html><body>No title here</body></html>", None),
+    ("", None),
+])
+def test_extract_title_from_html(html, expected):
+    assert extract_title_from_html(html) == expected
@@ -2,7 +2,9 @@ import discord
 from typing import List
 import sentry_sdk
 from bot.responder import Responder
+from services.archive import snapshot_archiver
 from services.discord import create_forum_thread
+from services.title_cache import title_cache
 
 
 class TitleInputModal(discord.ui.Modal):
@@ -15,7 +17,9 @@ class TitleInputModal(discord.ui.Modal):
             message: str,
             mention: discord.User,
             additional_mentions: List[discord.User],
-            applied_tags: List[discord.ForumTag] = None
+            applied_tags: List[discord.ForumTag] = None,
+            suggested_title: str = None,
+            canonical_url: str = None
     ):
         super().__init__(title="Provide a Title for the Post")
 
@@ -23,6 +27,7 @@ class TitleInputModal(discord.ui.Modal):
             label="Post Title:",
             style=discord.InputTextStyle.short,
             placeholder="Enter the title for your Forum post",
+            value=suggested_title[:100] if suggested_title else None,
             max_length=100
         )
 
@@ -32,6 +37,7 @@ class TitleInputModal(discord.ui.Modal):
         self.bot = bot
         self.channel = channel
         self.url = url
+        self.canonical_url = canonical_url or url
         self.mention = mention
         self.additional_mentions = additional_mentions
         self.message = message
@@ -49,11 +55,16 @@ class TitleInputModal(discord.ui.Modal):
             )
             return
 
+        # The page may have resolved in the background while the user typed.
+        metadata = title_cache.get(self.canonical_url)
+
         try:
             thread = await create_forum_thread(
                 channel=self.channel,
                 title=title,
                 url=self.url,
+                canonical_url=(metadata.canonical_url if metadata else None) or self.canonical_url,
+                metadata=metadata,
                 message=self.message,
                 author=self.ctx.author,
                 mention=self.mention,
@@ -67,6 +78,7 @@ class TitleInputModal(discord.ui.Modal):
             await self.responder.success(
                 f"Thread **'{title}'** created successfully in {self.channel.mention}! \n\nView it [here]({thread.jump_url})."
             )
+            snapshot_archiver.archive_later(thread, self.url, title, source_url=self.canonical_url)
         except discord.Forbidden as forbidden_error:
             sentry_sdk.capture_exception(forbidden_error)
             await self.responder.error(
@@ -0,0 +1,70 @@
+import discord
+from typing import Callable, List, Tuple
+
+from bot.util import truncate_string
+from services.search_index import SearchHit
+
+SEARCH_PAGE_SIZE = 10
+
+
+def build_search_embed(query: str, hits: List[SearchHit], total: int, page: int) -> discord.Embed:
+    """
+    Render one page of search results.
+    """
+    pages = max(1, -(-total // SEARCH_PAGE_SIZE))
+    embed = discord.Embed(title=f"Snips matching \"{truncate_string(query, 200)}\"", color=discord.Color.green())
+
+    if not hits:
+        embed.description = "No snips found."
+        return embed
+
+    lines = []
+    for rank, hit in enumerate(hits, start=page * SEARCH_PAGE_SIZE + 1):
+        details = " · ".join(filter(None, [hit.domain, ", ".join(hit.tags), f"by {hit.author_name}" if hit.author_name else None]))
+        lines.append(f"**{rank}.** [{truncate_string(hit.title, 100)}]({hit.jump_url or hit.url})\n{details}")
+    embed.description = "\n\n".join(lines)
+    embed.set_footer(text=f"Page {page + 1} of {pages} · {total} results")
+    return embed
+
+
+class SearchResultsView(discord.ui.View):
+    """
+    Previous/Next buttons for paging through `/snipsearch` results.
+
+    Parameters:
+        query (str): The search query, shown in the embed title.
+        fetch_page (Callable[[int], Tuple[List[SearchHit], int]]): Returns the hits and total for a page.
+        total (int): Total number of matches.
+        author_id (int): Only this user may page through the results.
+    """
+
+    def __init__(self, query: str, fetch_page: Callable[[int], Tuple[List[SearchHit], int]], total: int, author_id: int):
+        super().__init__(timeout=300)
+        self.query = query
+        self.fetch_page = fetch_page
+        self.total = total
+        self.author_id = author_id
+        self.page = 0
+        self._update_buttons()
+
+    def _update_buttons(self):
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = (self.page + 1) * SEARCH_PAGE_SIZE >= self.total
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.author_id
+
+    async def _show(self, interaction: discord.Interaction):
+        hits, self.total = self.fetch_page(self.page)
+        self._update_buttons()
+        await interaction.response.edit_message(embed=build_search_embed(self.query, hits, self.total, self.page), view=self)
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, button: discord.ui.Button, interaction: discord.Interaction):
+        self.page = max(0, self.page - 1)
+        await self._show(interaction)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary)
+    async def next_page(self, button: discord.ui.Button, interaction: discord.Interaction):
+        self.page += 1
+        await self._show(interaction)